@@ -1,6 +1,8 @@
 """Wrapper for the Madrid EMT (Empresa Municipal de Trasnportes) API."""
 
-from .main import EMTClient
+from importlib import import_module
+from typing import TYPE_CHECKING, Any
+
 from .domain.stop import Stop
 from .domain.line import Line
 from .domain.exceptions import (
@@ -9,11 +11,35 @@ from .domain.exceptions import (
     ArrivalsNotFoundError,
 )
 
+if TYPE_CHECKING:
+    from .main import EMTClient
+    from .sync_client import SyncEMTClient
+
+_LAZY_ATTRIBUTES = {
+    "EMTClient": ".main",
+    "SyncEMTClient": ".sync_client",
+}
+
 __all__ = [
     "EMTClient",
+    "SyncEMTClient",
     "Line",
     "Stop",
     "AuthenticationError",
     "StopNotFoundError",
     "ArrivalsNotFoundError",
 ]
+
+
+def __getattr__(name: str) -> Any:
+    """Import the clients, and aiohttp with them, on first access."""
+    module = _LAZY_ATTRIBUTES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,106 @@
+from datetime import datetime
+from typing import Callable, Optional
+
+from emt_madrid.domain.line import Line
+from emt_madrid.domain.service_calendar import ServiceCalendar
+from emt_madrid.domain.stop import Stop
+
+HeadwayProvider = Callable[[int, str, datetime], Optional[float]]
+
+
+class ArrivalEstimator:
+    """
+    Estimate arrivals from the timetable when live arrivals are unavailable.
+
+    Without live data the position of the buses is unknown, so a rider
+    reaching the stop at a random time waits half a headway on average, and
+    the following bus comes one headway later. The headway is taken from the
+    observed headways when a provider knows the line, or from the average of
+    the minimum and maximum frequencies of the timetable otherwise. When an
+    arrival provider knows the expected wait of a line, e.g. from the time
+    elapsed since the last bus passed, it replaces the half headway. Lines out
+    of service get no arrival.
+
+    Every line of the estimated stop is flagged with ``is_estimate`` so
+    estimates are never mistaken for live arrivals. No request is made.
+
+    Args:
+        calendar: Optional service calendar deciding which lines are running
+        headway_provider: Optional callable returning the observed headway, in
+            minutes, of a line at a stop and time, or None if unknown
+        arrival_provider: Optional callable returning the expected time, in
+            minutes, to the next bus of a line at a stop and time, or None if unknown
+
+    Methods:
+        headway: Get the expected headway of a line
+        estimate: Update a stop with estimated arrivals
+    """
+
+    def __init__(
+        self,
+        calendar: Optional[ServiceCalendar] = None,
+        headway_provider: Optional[HeadwayProvider] = None,
+        arrival_provider: Optional[HeadwayProvider] = None,
+    ) -> None:
+        """Initialize ArrivalEstimator object."""
+        self._calendar: ServiceCalendar = calendar or ServiceCalendar()
+        self._headway_provider: Optional[HeadwayProvider] = headway_provider
+        self._arrival_provider: Optional[HeadwayProvider] = arrival_provider
+
+    def headway(self, stop_id: int, line: Line, now: datetime) -> Optional[float]:
+        """
+        Get the expected headway of a line, in minutes.
+
+        Args:
+            stop_id: ID of the bus stop
+            line: The bus line
+            now: Naive local time
+
+        Returns:
+            The observed headway if known, the timetable headway otherwise, or
+            None if the line has no frequencies
+        """
+        if self._headway_provider is not None:
+            observed = self._headway_provider(stop_id, line.line_number, now)
+            if observed is not None:
+                return observed
+        frequencies = [
+            frequency
+            for frequency in (line.min_frequency, line.max_frequency)
+            if frequency
+        ]
+        if not frequencies:
+            return None
+        return sum(frequencies) / len(frequencies)
+
+    def estimate(self, stop: Stop, now: Optional[datetime] = None) -> Stop:
+        """
+        Update a stop with estimated arrivals.
+
+        Args:
+            stop: The bus stop to update
+            now: Optional naive local time, defaults to the current time
+
+        Returns:
+            The same Stop object with estimated arrivals flagged as estimates
+        """
+        now = now or self._calendar.now()
+        for line in stop.stop_lines:
+            line.is_estimate = True
+            headway = (
+                self.headway(stop.stop_id, line, now)
+                if self._calendar.is_line_active(line, now)
+                else None
+            )
+            if headway is None:
+                line.arrival = None
+                line.next_arrival = None
+            else:
+                wait = None
+                if self._arrival_provider is not None:
+                    wait = self._arrival_provider(stop.stop_id, line.line_number, now)
+                if wait is None:
+                    wait = headway / 2
+                line.arrival = round(wait)
+                line.next_arrival = round(wait + headway)
+        return stop
@@ -0,0 +1,106 @@
+import time
+from typing import Callable, Optional
+
+from emt_madrid.domain.stop import Stop
+
+
+class ArrivalExtrapolator:
+    """
+    Extrapolate arrival times locally from the last fetched snapshot.
+
+    Arrival times are countdowns, so between two API refreshes they can be
+    derived by subtracting the elapsed time from the last fetched values. A
+    refresh is only needed when the snapshot is older than the staleness bound
+    or when an extrapolated arrival or next arrival is at or below the refresh
+    threshold, since estimates for imminent buses change quickly. Until a whole
+    minute has elapsed the snapshot is returned as fetched, so an imminent bus
+    does not force a refresh on every call.
+
+    Args:
+        max_staleness: Maximum age of the fetched snapshot, in seconds
+        refresh_threshold: Arrival time, in minutes, that forces a refresh when crossed
+        clock: Monotonic clock returning seconds
+
+    Methods:
+        record: Store the arrivals of a freshly fetched stop
+        needs_refresh: Check whether the arrivals must be fetched again
+        extrapolate: Update the stop with the extrapolated arrivals
+    """
+
+    def __init__(
+        self,
+        max_staleness: float,
+        refresh_threshold: int = 1,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Initialize ArrivalExtrapolator object."""
+        self._max_staleness: float = max_staleness
+        self._refresh_threshold: int = refresh_threshold
+        self._clock: Callable[[], float] = clock
+        self._stop: Optional[Stop] = None
+        self._fetched_at: Optional[float] = None
+        self._snapshot: list[tuple[Optional[int], Optional[int]]] = []
+
+    def record(self, stop: Stop) -> None:
+        """Store the arrivals of a stop that has just been fetched from the API."""
+        self._stop = stop
+        self._fetched_at = self._clock()
+        self._snapshot = [(line.arrival, line.next_arrival) for line in stop.stop_lines]
+
+    def needs_refresh(self, stop: Stop) -> bool:
+        """
+        Check whether the arrivals of a stop must be fetched again.
+
+        Args:
+            stop: The bus stop about to be returned to the caller
+
+        Returns:
+            True if there is no usable snapshot for the stop, it is older than
+            the staleness bound, or a minute has elapsed and any extrapolated
+            arrival or next arrival is at or below the refresh threshold
+        """
+        if (
+            self._fetched_at is None
+            or stop is not self._stop
+            or len(stop.stop_lines) != len(self._snapshot)
+        ):
+            return True
+
+        if self._clock() - self._fetched_at > self._max_staleness:
+            return True
+
+        elapsed_minutes = self._elapsed_minutes()
+        if elapsed_minutes == 0:
+            return False
+        return any(
+            value is not None and value - elapsed_minutes <= self._refresh_threshold
+            for arrivals in self._snapshot
+            for value in arrivals
+        )
+
+    def extrapolate(self, stop: Stop) -> Stop:
+        """
+        Update a stop with the arrivals extrapolated from the last snapshot.
+
+        Args:
+            stop: The bus stop recorded in the last snapshot
+
+        Returns:
+            The same Stop object with the elapsed time subtracted from each arrival
+        """
+        elapsed_minutes = self._elapsed_minutes()
+        for line, (arrival, next_arrival) in zip(stop.stop_lines, self._snapshot):
+            arrivals = [
+                value - elapsed_minutes
+                for value in (arrival, next_arrival)
+                if value is not None and value - elapsed_minutes >= 0
+            ]
+            line.arrival = arrivals[0] if arrivals else None
+            line.next_arrival = arrivals[1] if len(arrivals) > 1 else None
+        return stop
+
+    def _elapsed_minutes(self) -> int:
+        """Return the whole minutes elapsed since the last snapshot."""
+        if self._fetched_at is None:
+            return 0
+        return int((self._clock() - self._fetched_at) // 60)
@@ -0,0 +1,41 @@
+from dataclasses import dataclass
+from typing import Iterable
+
+
+@dataclass(frozen=True)
+class ArrivalObservation:
+    """
+    Estimated arrival of a bus at a stop, as observed at a given time.
+
+    Args:
+        stop_id: ID of the bus stop
+        line_number: Number of the bus line
+        eta: Estimated time to arrival, in seconds
+        observed_at: Unix timestamp, in seconds, of the observation
+    """
+
+    stop_id: int
+    line_number: str
+    eta: int
+    observed_at: float
+
+
+def observations_from_estimates(
+    stop_id: int, estimates: Iterable[tuple[str, int]], observed_at: float
+) -> list[ArrivalObservation]:
+    """
+    Get one observation per bus reported by the arrivals endpoint.
+
+    Args:
+        stop_id: ID of the bus stop
+        estimates: Line number and estimated time to arrival, in seconds, of
+            every bus approaching the stop
+        observed_at: Unix timestamp, in seconds, of the arrivals
+
+    Returns:
+        The observations of every bus approaching the stop
+    """
+    return [
+        ArrivalObservation(stop_id, line_number, eta, observed_at)
+        for line_number, eta in estimates
+    ]
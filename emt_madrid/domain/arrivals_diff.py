@@ -0,0 +1,141 @@
+from dataclasses import dataclass
+from enum import Enum
+from typing import Optional
+
+from emt_madrid.domain.stop import Stop
+
+
+class ChangeType(Enum):
+    """Arrival change type enum."""
+
+    LINE_APPEARED = "Line appeared"
+    LINE_DISAPPEARED = "Line disappeared"
+    ARRIVAL_CHANGED = "Arrival changed"
+
+    def __str__(self) -> str:
+        return self.value
+
+
+@dataclass(frozen=True)
+class ArrivalChange:
+    """Change of the arrivals of a line at a stop between two snapshots."""
+
+    stop_id: int
+    line_number: str
+    change_type: ChangeType
+    previous_arrival: Optional[int] = None
+    previous_next_arrival: Optional[int] = None
+    arrival: Optional[int] = None
+    next_arrival: Optional[int] = None
+
+    def __str__(self) -> str:
+        """Return a string representation of the change."""
+        return f"Stop {self.stop_id} line {self.line_number}: {self.change_type} ({self.previous_arrival} → {self.arrival} min)"
+
+
+class ArrivalsDiffer:
+    """
+    Compare the arrivals of a stop with its previous snapshot.
+
+    A line appears when it gets an arrival and disappears when it loses it.
+    An arrival change is only reported when the arrival or the next arrival
+    moved by more than the threshold, so small fluctuations are not published.
+    Arrivals are whole minutes, so the threshold is in minutes too.
+
+    Args:
+        threshold: Minimum arrival change, in minutes, to report
+
+    Methods:
+        diff: Get the changes of a stop since its previous snapshot
+        forget: Discard the snapshot of a stop
+    """
+
+    def __init__(self, threshold: int = 0) -> None:
+        """Initialize ArrivalsDiffer object."""
+        self._threshold: int = threshold
+        self._snapshots: dict[int, dict[str, tuple[int, Optional[int]]]] = {}
+
+    def diff(self, stop: Stop) -> list[ArrivalChange]:
+        """
+        Get the changes of a stop since its previous snapshot.
+
+        The stop becomes the new snapshot, except for the arrivals that moved
+        less than the threshold, which keep their previous reference so slow
+        drifts are eventually reported.
+
+        Args:
+            stop: The bus stop with its latest arrival information
+
+        Returns:
+            The list of changes, empty if nothing relevant changed
+        """
+        previous = self._snapshots.get(stop.stop_id, {})
+        current: dict[str, tuple[int, Optional[int]]] = {}
+        changes: list[ArrivalChange] = []
+
+        for line in stop.stop_lines:
+            if line.arrival is None or line.line_number in current:
+                continue
+            arrivals = (line.arrival, line.next_arrival)
+            before = previous.get(line.line_number)
+            if before is None:
+                changes.append(
+                    ArrivalChange(
+                        stop_id=stop.stop_id,
+                        line_number=line.line_number,
+                        change_type=ChangeType.LINE_APPEARED,
+                        arrival=line.arrival,
+                        next_arrival=line.next_arrival,
+                    )
+                )
+            elif self._has_moved(before, arrivals):
+                changes.append(
+                    ArrivalChange(
+                        stop_id=stop.stop_id,
+                        line_number=line.line_number,
+                        change_type=ChangeType.ARRIVAL_CHANGED,
+                        previous_arrival=before[0],
+                        previous_next_arrival=before[1],
+                        arrival=line.arrival,
+                        next_arrival=line.next_arrival,
+                    )
+                )
+            else:
+                arrivals = before
+            current[line.line_number] = arrivals
+
+        for line_number, (arrival, next_arrival) in previous.items():
+            if line_number not in current:
+                changes.append(
+                    ArrivalChange(
+                        stop_id=stop.stop_id,
+                        line_number=line_number,
+                        change_type=ChangeType.LINE_DISAPPEARED,
+                        previous_arrival=arrival,
+                        previous_next_arrival=next_arrival,
+                    )
+                )
+
+        self._snapshots[stop.stop_id] = current
+        return changes
+
+    def forget(self, stop_id: int) -> None:
+        """Discard the snapshot of a stop."""
+        self._snapshots.pop(stop_id, None)
+
+    def _has_moved(
+        self,
+        before: tuple[int, Optional[int]],
+        after: tuple[int, Optional[int]],
+    ) -> bool:
+        """Check whether any arrival moved by more than the threshold."""
+        for previous, current in zip(before, after):
+            if (previous is None) != (current is None):
+                return True
+            if (
+                previous is not None
+                and current is not None
+                and abs(current - previous) > self._threshold
+            ):
+                return True
+        return False
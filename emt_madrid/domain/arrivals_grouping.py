@@ -0,0 +1,92 @@
+import weakref
+from bisect import insort
+from operator import attrgetter, is_
+from typing import Iterable, NamedTuple
+
+from emt_madrid.domain.line import Line
+from emt_madrid.domain.stop import Stop
+
+_line_number = attrgetter("line_number")
+
+
+class _LineIndex(NamedTuple):
+    """Lines of a stop by line number, with the lines it was built from."""
+
+    lines: tuple[Line, ...]
+    numbers: list[str]
+    index: dict[str, list[Line]]
+
+
+_INDEXES: dict[int, _LineIndex] = {}
+
+
+def lines_by_number(stop: Stop) -> dict[str, list[Line]]:
+    """
+    Get the lines of a stop by line number.
+
+    A line is listed once per day type, so a number can map to several
+    Line objects. The index is built once per Stop and kept outside of it, so
+    the dataclass holds no cached state. It is rebuilt when a line of the stop
+    is added, removed, replaced or renumbered, and dropped with the Stop, so
+    the id of a Stop always refers to the same one in the cache.
+    """
+    stop_lines = stop.stop_lines
+    numbers = list(map(_line_number, stop_lines))
+    cached = _INDEXES.get(id(stop))
+    if cached is not None:
+        if cached.numbers == numbers and all(map(is_, cached.lines, stop_lines)):
+            return cached.index
+    else:
+        weakref.finalize(stop, _INDEXES.pop, id(stop), None)
+
+    index: dict[str, list[Line]] = {}
+    for line in stop_lines:
+        index.setdefault(line.line_number, []).append(line)
+    _INDEXES[id(stop)] = _LineIndex(tuple(stop_lines), numbers, index)
+    return index
+
+
+def group_arrivals(
+    stop: Stop, arrivals: Iterable[tuple[str, int]], k: int = 2
+) -> dict[str, list[int]]:
+    """
+    Update the lines of a stop with their next arrivals, in a single pass.
+
+    Every line number of the stop gets a slot holding its ``k`` smallest
+    distinct arrivals, in minutes. Each arrival is dropped as soon as its line
+    is not at the stop, its time is already in the slot, or the slot is full
+    of earlier ones, so no intermediate list is built or sorted. The first two
+    arrivals of a slot become the ``arrival`` and ``next_arrival`` of every
+    Line of that number.
+
+    Args:
+        stop: The bus stop to update
+        arrivals: Line number and estimated time to arrival, in seconds, of
+            every reported bus
+        k: Number of arrivals kept per line, at least 2
+
+    Returns:
+        The kept arrivals of every line number of the stop, sorted
+    """
+    index = lines_by_number(stop)
+    slots: dict[str, list[int]] = {number: [] for number in index}
+    for line_number, eta in arrivals:
+        slot = slots.get(line_number)
+        if slot is None:
+            continue
+        minutes = eta // 60
+        if len(slot) < k:
+            if minutes not in slot:
+                insort(slot, minutes)
+        elif minutes < slot[-1] and minutes not in slot:
+            slot.pop()
+            insort(slot, minutes)
+
+    for number, lines in index.items():
+        slot = slots[number]
+        arrival = slot[0] if slot else None
+        next_arrival = slot[1] if len(slot) > 1 else None
+        for line in lines:
+            line.arrival = arrival
+            line.next_arrival = next_arrival
+    return slots
@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+from typing import Collection, Optional
 
 from emt_madrid.domain.stop import Stop
 
@@ -7,16 +8,28 @@ class EMTRepository(ABC):
     """EMT repository interface."""
 
     @abstractmethod
-    def get_stop_info(self, stop_id: int) -> Stop:
-        """Get information about a bus stop."""
+    async def get_stop_info(
+        self, stop_id: int, lines: Optional[Collection[str]] = None
+    ) -> Stop:
+        """Get information about a bus stop, optionally only some of its lines."""
         raise NotImplementedError
 
     @abstractmethod
-    def get_nearby_stops(self, stop_id: int) -> Stop:
+    async def get_nearby_stops(self, stop_id: int) -> Stop:
         """Get information about nearby stops."""
         raise NotImplementedError
 
     @abstractmethod
-    def get_arrivals(self, stop: Stop) -> Stop:
+    async def get_arrivals(self, stop: Stop) -> Stop:
         """Get information about arrivals at a specific stop."""
         raise NotImplementedError
+
+    @abstractmethod
+    async def get_line_stops(self, line_id: str, direction: int) -> list[Stop]:
+        """Get the ordered stops of a bus line in a direction."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_all_stops(self) -> list[Stop]:
+        """Get information about every stop of the network."""
+        raise NotImplementedError
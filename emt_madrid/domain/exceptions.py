@@ -41,6 +41,28 @@ class StopNotFoundError(APIResponseError):
         self.stop_id = stop_id
 
 
+class LineNotFoundError(APIResponseError):
+    """Raised when the specified bus line is not found."""
+
+    def __init__(
+        self, line_id: Optional[str] = None, message: Optional[str] = None
+    ) -> None:
+        default_message = (
+            f"Line {line_id} not found" if line_id is not None else "Line not found"
+        )
+        super().__init__(message or default_message)
+        self.line_id = line_id
+
+
+class PayloadDecodeError(APIResponseError):
+    """Raised when an API response does not match the schema of its endpoint."""
+
+    def __init__(self, path: str, reason: str) -> None:
+        super().__init__(f"Invalid payload at {path}: {reason}")
+        self.path = path
+        self.reason = reason
+
+
 class APILimitExceededError(APIResponseError):
     """Raised when the API limit is exceeded."""
 
@@ -48,6 +70,13 @@ class APILimitExceededError(APIResponseError):
         super().__init__(message or "API rate limit exceeded")
 
 
+class QuotaThrottledError(APILimitExceededError):
+    """Raised when low-priority work is held back to preserve the daily quota."""
+
+    def __init__(self, message: Optional[str] = None) -> None:
+        super().__init__(message or "Low-priority request throttled to preserve quota")
+
+
 class ArrivalsNotFoundError(APIResponseError):
     """Raised when the specified bus stop arrivals are not found."""
 
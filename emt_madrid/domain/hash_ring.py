@@ -0,0 +1,66 @@
+import hashlib
+from bisect import bisect, insort
+from typing import Iterable
+
+
+def _hash(key: str) -> int:
+    """Hash a key the same way in every process, unlike the builtin hash."""
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest())
+
+
+class HashRing:
+    """
+    Consistent hash ring assigning stops to shards.
+
+    Every shard owns ``replicas`` points on the ring and a stop belongs to
+    the shard of the first point after its hash. Adding or removing a shard
+    only moves the stops of the ring segments it gains or loses, about one
+    stop in the number of shards, and every process computes the same
+    assignment.
+
+    Args:
+        shards: IDs of the initial shards
+        replicas: Number of points of every shard, smoothing the distribution
+
+    Methods:
+        add: Add a shard
+        remove: Remove a shard
+        shard: Get the shard of a stop
+    """
+
+    def __init__(self, shards: Iterable[int] = (), replicas: int = 64) -> None:
+        """Initialize HashRing object."""
+        self._replicas: int = replicas
+        self._points: list[tuple[int, int]] = []
+        self._shards: set[int] = set()
+        for shard in shards:
+            self.add(shard)
+
+    def __len__(self) -> int:
+        """Return the number of shards."""
+        return len(self._shards)
+
+    def add(self, shard: int) -> None:
+        """Add a shard, taking over a share of the stops of the other shards."""
+        if shard in self._shards:
+            return
+        self._shards.add(shard)
+        for replica in range(self._replicas):
+            insort(self._points, (_hash(f"{shard}:{replica}"), shard))
+
+    def remove(self, shard: int) -> None:
+        """Remove a shard, handing its stops over to the other shards."""
+        self._shards.discard(shard)
+        self._points = [point for point in self._points if point[1] != shard]
+
+    def shard(self, stop_id: int) -> int:
+        """
+        Get the shard of a stop.
+
+        Raises:
+            LookupError: If the ring has no shard
+        """
+        if not self._points:
+            raise LookupError("The hash ring has no shard")
+        index = bisect(self._points, (_hash(str(stop_id)), -1))
+        return self._points[index % len(self._points)][1]
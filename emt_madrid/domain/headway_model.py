@@ -0,0 +1,276 @@
+from bisect import bisect_left
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+
+from emt_madrid.domain.day_type import DayType
+from emt_madrid.domain.service_calendar import ServiceCalendar
+from emt_madrid.domain.stop import Stop
+
+HEADWAY_BINS = (
+    1,
+    2,
+    3,
+    4,
+    5,
+    6,
+    7,
+    8,
+    9,
+    10,
+    12,
+    14,
+    16,
+    18,
+    20,
+    25,
+    30,
+    40,
+    50,
+    60,
+    90,
+    120,
+)
+
+SeriesKey = tuple[int, str, DayType, int]
+
+
+class HeadwayHistogram:
+    """
+    Decaying histogram of headways, in minutes, with a fixed number of bins.
+
+    Older samples fade by ``decay`` every time a new one is added, so the
+    statistics follow timetable and traffic changes with constant memory.
+    """
+
+    __slots__ = ("counts", "weight")
+
+    def __init__(self) -> None:
+        """Initialize HeadwayHistogram object."""
+        self.counts: list[float] = [0.0] * len(HEADWAY_BINS)
+        self.weight: float = 0.0
+
+    def add(self, headway: float, decay: float = 1.0) -> None:
+        """Add a headway sample, fading the previous ones."""
+        if decay < 1.0:
+            self.counts = [count * decay for count in self.counts]
+            self.weight *= decay
+        index = min(bisect_left(HEADWAY_BINS, headway), len(HEADWAY_BINS) - 1)
+        self.counts[index] += 1
+        self.weight += 1
+
+    def _bins(self) -> list[tuple[float, float, float]]:
+        """Get the lower bound, upper bound and weight of every bin."""
+        return [
+            (HEADWAY_BINS[index - 1] if index else 0.0, upper, count)
+            for index, (upper, count) in enumerate(zip(HEADWAY_BINS, self.counts))
+        ]
+
+    def mean(self) -> Optional[float]:
+        """Get the mean headway."""
+        if not self.weight:
+            return None
+        return (
+            sum((lower + upper) / 2 * count for lower, upper, count in self._bins())
+            / self.weight
+        )
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Get a headway quantile, interpolated within its bin."""
+        if not self.weight:
+            return None
+        target = q * self.weight
+        cumulative = 0.0
+        for lower, upper, count in self._bins():
+            if count and cumulative + count >= target:
+                return lower + (upper - lower) * (target - cumulative) / count
+            cumulative += count
+        return float(HEADWAY_BINS[-1])
+
+    def expected_wait(self, elapsed: Optional[float] = None) -> Optional[float]:
+        """
+        Get the expected wait for the next bus.
+
+        Args:
+            elapsed: Optional minutes since the last bus passed. Without it, the
+                wait of a rider reaching the stop at a random time is returned
+
+        Returns:
+            The expected wait in minutes, or None without samples
+        """
+        bins = [((lower + upper) / 2, count) for lower, upper, count in self._bins()]
+        if elapsed is None:
+            total = sum(middle * count for middle, count in bins)
+            if not total:
+                return None
+            return sum(middle * middle * count for middle, count in bins) / (2 * total)
+        remaining = [
+            (middle - elapsed, count) for middle, count in bins if middle > elapsed
+        ]
+        weight = sum(count for _, count in remaining)
+        if not weight:
+            return None
+        return sum(wait * count for wait, count in remaining) / weight
+
+
+@dataclass
+class _LineState:
+    observed_at: datetime
+    arrival: Optional[int]
+    last_passage: Optional[datetime] = None
+
+
+class HeadwayModel:
+    """
+    Learn the headways of every line at every stop from arrivals snapshots.
+
+    A bus is considered to have passed a stop when the first arrival of its
+    line grows between two close snapshots, at the time the previous snapshot
+    predicted. The time between two passages, and the gap between the two
+    next buses when a new one appears, are headway samples. Samples are kept
+    in decaying histograms per stop, line, day type and hour of the day, and
+    the least recently updated series are dropped beyond ``max_series``, so
+    memory stays bounded.
+
+    Args:
+        calendar: Optional service calendar providing the day types and the clock
+        max_series: Maximum number of histograms and tracked lines kept
+        decay: Weight kept by the previous samples when a new one is added
+        min_samples: Samples needed before a histogram is trusted
+        max_observation_gap: Longest time between two snapshots of a line for
+            a passage to be detected
+        now: Optional clock returning the naive local time
+
+    Methods:
+        observe: Learn from the live arrivals of a stop
+        headway: Get the mean observed headway of a line
+        quantile: Get a quantile of the observed headways of a line
+        expected_arrival: Get the expected time to the next bus of a line
+    """
+
+    def __init__(
+        self,
+        calendar: Optional[ServiceCalendar] = None,
+        max_series: int = 10000,
+        decay: float = 0.98,
+        min_samples: int = 3,
+        max_observation_gap: timedelta = timedelta(minutes=10),
+        now: Optional[Callable[[], datetime]] = None,
+    ) -> None:
+        """Initialize HeadwayModel object."""
+        self._calendar: ServiceCalendar = calendar or ServiceCalendar()
+        self._max_series: int = max_series
+        self._decay: float = decay
+        self._min_samples: int = min_samples
+        self._max_observation_gap: timedelta = max_observation_gap
+        self._now: Callable[[], datetime] = now or self._calendar.now
+        self._series: OrderedDict[SeriesKey, HeadwayHistogram] = OrderedDict()
+        self._lines: OrderedDict[tuple[int, str], _LineState] = OrderedDict()
+
+    def observe(self, stop: Stop, now: Optional[datetime] = None) -> None:
+        """
+        Learn from the live arrivals of a stop.
+
+        Args:
+            stop: The bus stop with its arrivals, in minutes
+            now: Optional naive local time of the arrivals, defaults to the current time
+        """
+        now = now or self._now()
+        seen: set[str] = set()
+        for line in stop.stop_lines:
+            if line.is_estimate or line.line_number in seen:
+                continue
+            seen.add(line.line_number)
+            key = (stop.stop_id, line.line_number)
+            state = self._lines.pop(key, None)
+            if state is None or now - state.observed_at > self._max_observation_gap:
+                state = _LineState(now, None, None)
+            elif state.arrival is not None and (
+                line.arrival is None or line.arrival > state.arrival + 1
+            ):
+                passage = state.observed_at + timedelta(minutes=state.arrival)
+                if state.last_passage is not None:
+                    self._add(
+                        stop.stop_id,
+                        line.line_number,
+                        passage,
+                        passage - state.last_passage,
+                    )
+                if line.arrival is not None and line.next_arrival is not None:
+                    self._add(
+                        stop.stop_id,
+                        line.line_number,
+                        passage,
+                        timedelta(minutes=line.next_arrival - line.arrival),
+                    )
+                state.last_passage = passage
+            state.observed_at = now
+            state.arrival = line.arrival
+            self._lines[key] = state
+            if len(self._lines) > self._max_series:
+                self._lines.popitem(last=False)
+
+    def headway(
+        self, stop_id: int, line_number: str, now: Optional[datetime] = None
+    ) -> Optional[float]:
+        """Get the mean observed headway of a line, in minutes, if known."""
+        histogram = self._histogram(stop_id, line_number, now or self._now())
+        return histogram.mean() if histogram is not None else None
+
+    def quantile(
+        self, stop_id: int, line_number: str, q: float, now: Optional[datetime] = None
+    ) -> Optional[float]:
+        """Get a quantile of the observed headways of a line, in minutes, if known."""
+        histogram = self._histogram(stop_id, line_number, now or self._now())
+        return histogram.quantile(q) if histogram is not None else None
+
+    def expected_arrival(
+        self, stop_id: int, line_number: str, now: Optional[datetime] = None
+    ) -> Optional[float]:
+        """
+        Get the expected time to the next bus of a line, in minutes.
+
+        When a recent passage is known the wait is conditioned on the time
+        elapsed since then, otherwise it is the wait of a random arrival.
+
+        Returns:
+            The expected wait, or None if the line has not been learned
+        """
+        now = now or self._now()
+        histogram = self._histogram(stop_id, line_number, now)
+        if histogram is None:
+            return None
+        state = self._lines.get((stop_id, line_number))
+        if state is not None and state.last_passage is not None:
+            elapsed = (now - state.last_passage).total_seconds() / 60
+            if 0 <= elapsed <= HEADWAY_BINS[-1]:
+                wait = histogram.expected_wait(elapsed)
+                if wait is not None:
+                    return wait
+        return histogram.expected_wait()
+
+    def _add(
+        self, stop_id: int, line_number: str, at: datetime, headway: timedelta
+    ) -> None:
+        """Add a headway sample to the histogram of its time of day."""
+        minutes = headway.total_seconds() / 60
+        if not 0 < minutes <= HEADWAY_BINS[-1]:
+            return
+        key = (stop_id, line_number, self._calendar.day_type(at.date()), at.hour)
+        histogram = self._series.pop(key, None) or HeadwayHistogram()
+        histogram.add(minutes, self._decay)
+        self._series[key] = histogram
+        if len(self._series) > self._max_series:
+            self._series.popitem(last=False)
+
+    def _histogram(
+        self, stop_id: int, line_number: str, now: datetime
+    ) -> Optional[HeadwayHistogram]:
+        """Get the trusted histogram of the hour of a line, or of a neighbour hour."""
+        day_type = self._calendar.day_type(now.date())
+        for hour in (now.hour, (now.hour - 1) % 24, (now.hour + 1) % 24):
+            histogram = self._series.get((stop_id, line_number, day_type, hour))
+            if histogram is not None and histogram.weight >= self._min_samples:
+                return histogram
+        return None
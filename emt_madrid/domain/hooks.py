@@ -0,0 +1,137 @@
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional, Union
+
+from emt_madrid.domain.stop import Stop
+
+HOOK_NAMES = (
+    "before_request",
+    "after_response",
+    "on_auth",
+    "on_retry",
+    "on_cache_hit",
+    "on_arrivals",
+    "on_arrival_estimates",
+)
+
+
+@dataclass
+class RequestInfo:
+    """
+    Request sent to the EMT API, shared by its before and after hooks.
+
+    Args:
+        method: HTTP method of the request
+        endpoint: Endpoint path of the request
+        params: Query parameters of the request
+        data: Body of the request
+        started_at: Performance counter value when the request started
+        context: Free storage for the hooks, e.g. to keep a tracing span
+            between before_request and after_response
+    """
+
+    method: str
+    endpoint: str
+    params: Optional[dict[str, Any]] = None
+    data: Optional[Union[dict[str, Any], str]] = None
+    started_at: float = field(default_factory=time.perf_counter)
+    context: dict[str, Any] = field(default_factory=dict)
+
+
+class ClientHooks:
+    """
+    Callbacks notified of the lifecycle of the client requests.
+
+    Hooks are synchronous callables registered by name. A ClientHooks object
+    with no hook registered is falsy, so instrumented code skips building
+    events entirely with an ``if hooks:`` check. Exceptions raised by a hook
+    propagate to the caller.
+
+    Hooks:
+        before_request(request): Before a request is sent
+        after_response(request, response, error, duration): After a request
+            completes, with the parsed response or the error it raised
+        on_auth(reason, success, duration): After a login, with the reason of
+            the token refresh, "missing" or "expired"
+        on_retry(endpoint, reason): When a request is replaced by another one,
+            e.g. the stop detail falling back to the around stop endpoint
+        on_cache_hit(kind, stop_id): When a result is served without a request,
+            e.g. from the cache, or estimated by the fallback after a failure.
+            Cached line stops are identified by their line and direction,
+            e.g. "27/1", instead of a stop ID
+        on_arrivals(stop): When live arrivals of a stop are retrieved, e.g. to
+            store or learn from them
+        on_arrival_estimates(stop_id, estimates): When the arrivals endpoint
+            answers, with the line number and seconds to arrival of every bus
+            approaching the stop, e.g. to store them at full resolution
+
+    Raises:
+        ValueError: When registering an unknown hook
+    """
+
+    def __init__(self) -> None:
+        """Initialize ClientHooks object."""
+        self._callbacks: dict[str, list[Callable[..., Any]]] = {
+            name: [] for name in HOOK_NAMES
+        }
+        self._registered: int = 0
+
+    def __bool__(self) -> bool:
+        return self._registered > 0
+
+    def register(self, name: str, callback: Callable[..., Any]) -> Callable[..., Any]:
+        """Register a callback for a hook and return it, to be used as a decorator."""
+        if name not in self._callbacks:
+            raise ValueError(f"Unknown hook {name}, expected one of {HOOK_NAMES}")
+        self._callbacks[name].append(callback)
+        self._registered += 1
+        return callback
+
+    def unregister(self, name: str, callback: Callable[..., Any]) -> None:
+        """Remove a registered callback."""
+        if callback in self._callbacks.get(name, []):
+            self._callbacks[name].remove(callback)
+            self._registered -= 1
+
+    def before_request(self, request: RequestInfo) -> None:
+        """Notify that a request is about to be sent."""
+        for callback in self._callbacks["before_request"]:
+            callback(request)
+
+    def after_response(
+        self,
+        request: RequestInfo,
+        response: Optional[dict[str, Any]],
+        error: Optional[BaseException],
+    ) -> None:
+        """Notify that a request completed, successfully or not."""
+        duration = time.perf_counter() - request.started_at
+        for callback in self._callbacks["after_response"]:
+            callback(request, response, error, duration)
+
+    def on_auth(self, reason: str, success: bool, duration: float) -> None:
+        """Notify that the client logged in to refresh its token."""
+        for callback in self._callbacks["on_auth"]:
+            callback(reason, success, duration)
+
+    def on_retry(self, endpoint: str, reason: str) -> None:
+        """Notify that a request is replaced by another one."""
+        for callback in self._callbacks["on_retry"]:
+            callback(endpoint, reason)
+
+    def on_cache_hit(self, kind: str, stop_id: Union[int, str]) -> None:
+        """Notify that a result is served without querying the API."""
+        for callback in self._callbacks["on_cache_hit"]:
+            callback(kind, stop_id)
+
+    def on_arrivals(self, stop: Stop) -> None:
+        """Notify that live arrivals of a stop have been retrieved."""
+        for callback in self._callbacks["on_arrivals"]:
+            callback(stop)
+
+    def on_arrival_estimates(
+        self, stop_id: int, estimates: list[tuple[str, int]]
+    ) -> None:
+        """Notify that the arrivals endpoint reported the buses approaching a stop."""
+        for callback in self._callbacks["on_arrival_estimates"]:
+            callback(stop_id, estimates)
@@ -6,7 +6,11 @@ from emt_madrid.domain.day_type import DayType
 
 @dataclass
 class Line:
-    """Bus line information."""
+    """Bus line information.
+
+    ``is_estimate`` flags arrivals estimated from the timetable instead of
+    retrieved from the live API.
+    """
 
     line_number: str
     origin: str
@@ -18,7 +22,9 @@ class Line:
     day_type: Optional[DayType] = None
     arrival: Optional[int] = None
     next_arrival: Optional[int] = None
+    is_estimate: bool = False
 
     def __str__(self) -> str:
         """Return a string representation of the line."""
-        return f"Line {self.line_number}: {self.origin} → {self.destination} - {self.arrival} min - {self.next_arrival} min"
+        estimated = " (estimated)" if self.is_estimate else ""
+        return f"Line {self.line_number}: {self.origin} → {self.destination} - {self.arrival} min - {self.next_arrival} min{estimated}"
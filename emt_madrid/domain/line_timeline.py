@@ -0,0 +1,65 @@
+from dataclasses import dataclass, field
+from operator import attrgetter
+from typing import Optional
+
+from emt_madrid.domain.stop import Stop
+
+
+@dataclass
+class TimelineEntry:
+    """
+    Arrivals of a line at one stop of its route.
+
+    Args:
+        stop: The bus stop
+        arrival: Minutes until the next bus of the line, if any
+        next_arrival: Minutes until the following bus of the line, if any
+        is_estimate: Whether the arrivals were estimated from the timetable
+        error: Why the arrivals could not be retrieved, if they could not
+    """
+
+    stop: Stop
+    arrival: Optional[int] = None
+    next_arrival: Optional[int] = None
+    is_estimate: bool = False
+    error: Optional[str] = None
+
+
+@dataclass
+class LineTimeline:
+    """
+    Arrivals of a bus line at every stop of its route, in route order.
+
+    Args:
+        line_number: Number of the bus line
+        direction: 1 for the trips to the destination, 2 for the trips back
+        origin: First stop header of the direction
+        destination: Last stop header of the direction
+        entries: Arrivals at every stop, in route order
+    """
+
+    line_number: str
+    direction: int
+    origin: str
+    destination: str
+    entries: list[TimelineEntry] = field(default_factory=list)
+
+    def upcoming(self, limit: Optional[int] = None) -> list[TimelineEntry]:
+        """Get the stops with an arrival, the soonest first."""
+        entries = sorted(
+            (entry for entry in self.entries if entry.arrival is not None),
+            key=attrgetter("arrival"),
+        )
+        return entries[:limit] if limit is not None else entries
+
+    @property
+    def failed_stop_ids(self) -> list[int]:
+        """IDs of the stops whose arrivals could not be retrieved."""
+        return [entry.stop.stop_id for entry in self.entries if entry.error]
+
+    def __str__(self) -> str:
+        """Return a string representation of the timeline."""
+        stops = ", ".join(
+            f"{entry.stop.stop_id}: {entry.arrival} min" for entry in self.entries
+        )
+        return f"Line {self.line_number}: {self.origin} → {self.destination} - {stops}"
@@ -0,0 +1,79 @@
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Optional
+
+from emt_madrid.domain.arrival_estimator import HeadwayProvider
+from emt_madrid.domain.service_calendar import ServiceCalendar
+from emt_madrid.domain.stop import Stop
+
+
+@dataclass
+class PollingPolicy:
+    """
+    Decide how long to wait before polling the arrivals of a stop again.
+
+    The next poll is scheduled at half the time to the nearest bus, so imminent
+    buses refresh often. Stops without live arrivals fall back to half the
+    shortest expected wait given by ``arrival_provider``, e.g. learned from
+    observed headways, then to half the shortest headway of their lines, and
+    stops whose lines are all out of service are polled at
+    ``out_of_service_interval``. Every interval is expressed in seconds.
+
+    Args:
+        min_interval: Shortest interval between two polls of the same stop
+        max_interval: Longest interval between two polls of an in-service stop
+        out_of_service_interval: Interval for stops with no line in service
+        error_interval: Interval after a failed poll
+        calendar: Service calendar used to find the lines in service
+        arrival_provider: Optional callable returning the expected time, in
+            minutes, to the next bus of a line at a stop and time, or None if
+            unknown
+    """
+
+    min_interval: float = 20
+    max_interval: float = 600
+    out_of_service_interval: float = 1800
+    error_interval: float = 60
+    calendar: ServiceCalendar = field(default_factory=ServiceCalendar)
+    arrival_provider: Optional[HeadwayProvider] = None
+
+    def next_interval(self, stop: Stop, now: datetime) -> float:
+        """
+        Get the number of seconds to wait before polling a stop again.
+
+        Args:
+            stop: The bus stop with its latest arrival information
+            now: The current local date and time
+
+        Returns:
+            The interval in seconds until the next poll
+        """
+        lines = self.calendar.active_lines(stop, now)
+        if not lines:
+            return self.out_of_service_interval
+
+        arrivals = [line.arrival for line in lines if line.arrival is not None]
+        if arrivals:
+            return self._clamp(min(arrivals) * 60 / 2)
+
+        if self.arrival_provider is not None:
+            waits = [
+                wait
+                for wait in (
+                    self.arrival_provider(stop.stop_id, line.line_number, now)
+                    for line in lines
+                )
+                if wait is not None
+            ]
+            if waits:
+                return self._clamp(min(waits) * 60 / 2)
+
+        headways = [line.min_frequency for line in lines if line.min_frequency]
+        if headways:
+            return self._clamp(min(headways) * 60 / 2)
+
+        return self.max_interval
+
+    def _clamp(self, interval: float) -> float:
+        """Bound an interval between the minimum and maximum intervals."""
+        return max(self.min_interval, min(self.max_interval, interval))
@@ -0,0 +1,111 @@
+from datetime import date, datetime, time, timedelta, tzinfo
+from typing import Iterable, Optional
+from zoneinfo import ZoneInfo
+
+from emt_madrid.domain.day_type import DayType
+from emt_madrid.domain.line import Line
+from emt_madrid.domain.stop import Stop
+
+MADRID_TIMEZONE = ZoneInfo("Europe/Madrid")
+
+
+class ServiceCalendar:
+    """
+    Evaluate whether bus lines and stops are in service at a given time.
+
+    Each line runs on its day type between ``start_time`` and ``end_time``,
+    which are the first and last departures from the header. Services ending
+    after midnight belong to the day they started on, and a grace period is
+    added after the last departure so buses still on their way to the stop
+    are not missed.
+
+    Args:
+        holidays: Dates served with the festive timetable
+        grace: Time after the last departure during which a line is still active
+        timezone: Time zone of the EMT timetables
+    """
+
+    def __init__(
+        self,
+        holidays: Iterable[date] = (),
+        grace: timedelta = timedelta(minutes=60),
+        timezone: tzinfo = MADRID_TIMEZONE,
+    ) -> None:
+        """Initialize ServiceCalendar object."""
+        self._holidays: frozenset[date] = frozenset(holidays)
+        self._grace: timedelta = grace
+        self._timezone: tzinfo = timezone
+
+    def now(self) -> datetime:
+        """Get the current naive local time in the timetables time zone."""
+        return datetime.now(self._timezone).replace(tzinfo=None)
+
+    def day_type(self, day: date) -> DayType:
+        """Get the timetable day type that applies to a date."""
+        if day in self._holidays or day.weekday() == 6:
+            return DayType.FESTIVE
+        if day.weekday() == 5:
+            return DayType.SATURDAY
+        return DayType.WORKING_DAY
+
+    def is_line_active(self, line: Line, now: Optional[datetime] = None) -> bool:
+        """
+        Check whether a line is in service.
+
+        Lines without service hours are considered active.
+
+        Args:
+            line: The bus line to check
+            now: Optional naive local time, defaults to the current time
+
+        Returns:
+            True if the line is running at the given time
+        """
+        if line.start_time is None or line.end_time is None:
+            return True
+        now = now or self.now()
+        today = now.date()
+        for service_day in (today, today - timedelta(days=1)):
+            if line.day_type is not None and line.day_type != self.day_type(
+                service_day
+            ):
+                continue
+            start, end = self._service_window(
+                service_day, line.start_time, line.end_time
+            )
+            if start <= now <= end:
+                return True
+        return False
+
+    def active_lines(self, stop: Stop, now: Optional[datetime] = None) -> list[Line]:
+        """Get the lines of a stop that are in service."""
+        now = now or self.now()
+        return [line for line in stop.stop_lines if self.is_line_active(line, now)]
+
+    def is_stop_active(self, stop: Stop, now: Optional[datetime] = None) -> bool:
+        """
+        Check whether any line of a stop is in service.
+
+        Stops without lines are considered active, as there is nothing to
+        evaluate.
+
+        Args:
+            stop: The bus stop to check
+            now: Optional naive local time, defaults to the current time
+
+        Returns:
+            True if at least one line of the stop is running at the given time
+        """
+        if not stop.stop_lines:
+            return True
+        return bool(self.active_lines(stop, now))
+
+    def _service_window(
+        self, service_day: date, start_time: time, end_time: time
+    ) -> tuple[datetime, datetime]:
+        """Get the service window of a day, including the grace period."""
+        start = datetime.combine(service_day, start_time)
+        end = datetime.combine(service_day, end_time)
+        if end_time < start_time:
+            end += timedelta(days=1)
+        return start, end + self._grace
@@ -0,0 +1,161 @@
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, Optional
+
+
+@dataclass(frozen=True)
+class BusArrival:
+    """
+    Bus approaching a stop, as reported by the arrivals endpoint.
+
+    Args:
+        bus_id: ID of the bus
+        line_number: Number of the bus line
+        stop_id: ID of the bus stop
+        eta: Estimated time to arrival, in seconds
+        distance: Distance to the stop, in meters, if known
+        coordinates: Longitude and latitude of the bus, if known
+    """
+
+    bus_id: int
+    line_number: str
+    stop_id: int
+    eta: int
+    distance: Optional[int] = None
+    coordinates: Optional[tuple[float, float]] = None
+
+
+@dataclass
+class Vehicle:
+    """
+    Latest known state of a bus.
+
+    Args:
+        bus_id: ID of the bus
+        line_number: Number of the line the bus is serving
+        coordinates: Longitude and latitude of the bus, if known
+        distance: Distance to the stop the position was reported for, in meters
+        updated_at: Unix timestamp, in seconds, of the latest report
+        etas: Estimated time to arrival, in seconds, at every stop reporting the bus
+    """
+
+    bus_id: int
+    line_number: str
+    coordinates: Optional[tuple[float, float]]
+    distance: Optional[int]
+    updated_at: float
+    etas: dict[int, int] = field(default_factory=dict)
+
+    @property
+    def next_stop_id(self) -> Optional[int]:
+        """ID of the stop the bus reaches first, if any."""
+        return min(self.etas, key=self.etas.__getitem__) if self.etas else None
+
+
+class VehicleIndex:
+    """
+    In-memory index of the buses reported by the arrivals of every stop.
+
+    Each arrivals response updates the buses it reports: a bus seen from
+    several stops is a single vehicle, with one ETA per stop and the position
+    of its latest report, the one closest to its stop breaking ties. Buses no
+    longer reported by a stop lose their ETA at that stop, and vehicles not
+    reported for ``ttl`` seconds are dropped, so the index only holds the live
+    fleet without any extra request.
+
+    Args:
+        ttl: Seconds a vehicle is kept without being reported
+        clock: Clock returning the current Unix timestamp, in seconds
+
+    Methods:
+        update: Replace the buses reported by a stop
+        get: Get a vehicle by bus ID
+        vehicles: Get the live vehicles, optionally of some lines
+    """
+
+    def __init__(
+        self, ttl: float = 300, clock: Callable[[], float] = time.time
+    ) -> None:
+        """Initialize VehicleIndex object."""
+        self._ttl: float = ttl
+        self._clock: Callable[[], float] = clock
+        self._vehicles: dict[int, Vehicle] = {}
+        self._stop_buses: dict[int, set[int]] = {}
+        self._expired_at: float = 0.0
+
+    def __len__(self) -> int:
+        return len(self._vehicles)
+
+    def update(self, stop_id: int, arrivals: Iterable[BusArrival]) -> None:
+        """
+        Replace the buses reported by a stop.
+
+        Args:
+            stop_id: ID of the bus stop
+            arrivals: Every bus reported by the latest arrivals of the stop
+        """
+        now = self._clock()
+        reported: set[int] = set()
+        for arrival in arrivals:
+            reported.add(arrival.bus_id)
+            vehicle = self._vehicles.get(arrival.bus_id)
+            if vehicle is None:
+                vehicle = Vehicle(
+                    arrival.bus_id,
+                    arrival.line_number,
+                    arrival.coordinates,
+                    arrival.distance,
+                    now,
+                )
+                self._vehicles[arrival.bus_id] = vehicle
+            elif now > vehicle.updated_at or _is_closer(arrival, vehicle):
+                vehicle.line_number = arrival.line_number
+                vehicle.coordinates = arrival.coordinates or vehicle.coordinates
+                vehicle.distance = arrival.distance
+                vehicle.updated_at = now
+            vehicle.etas[stop_id] = arrival.eta
+
+        for bus_id in self._stop_buses.get(stop_id, set()) - reported:
+            vehicle = self._vehicles.get(bus_id)
+            if vehicle is not None:
+                vehicle.etas.pop(stop_id, None)
+        self._stop_buses[stop_id] = reported
+        self._expire(now)
+
+    def get(self, bus_id: int) -> Optional[Vehicle]:
+        """Get a live vehicle by bus ID, if it is known."""
+        self._expire(self._clock())
+        return self._vehicles.get(bus_id)
+
+    def vehicles(self, lines: Optional[Iterable[str]] = None) -> list[Vehicle]:
+        """Get the live vehicles, optionally only those of some lines."""
+        self._expire(self._clock())
+        line_filter = set(lines) if lines is not None else None
+        return [
+            vehicle
+            for vehicle in self._vehicles.values()
+            if line_filter is None or vehicle.line_number in line_filter
+        ]
+
+    def _expire(self, now: float) -> None:
+        """Drop the vehicles not reported for longer than the TTL, at most once a second."""
+        if now - self._expired_at < 1:
+            return
+        self._expired_at = now
+        expired = [
+            bus_id
+            for bus_id, vehicle in self._vehicles.items()
+            if now - vehicle.updated_at > self._ttl
+        ]
+        for bus_id in expired:
+            del self._vehicles[bus_id]
+        if expired:
+            for buses in self._stop_buses.values():
+                buses.difference_update(expired)
+
+
+def _is_closer(arrival: BusArrival, vehicle: Vehicle) -> bool:
+    """Check whether a report from the same moment is closer to its stop."""
+    return arrival.distance is not None and (
+        vehicle.distance is None or arrival.distance < vehicle.distance
+    )
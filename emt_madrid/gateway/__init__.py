@@ -0,0 +1,9 @@
+"""HTTP gateway sharing one EMT API account, cache and quota among many consumers."""
+
+from .server import create_app, create_emt_app, serialize_stop
+
+__all__ = [
+    "create_app",
+    "create_emt_app",
+    "serialize_stop",
+]
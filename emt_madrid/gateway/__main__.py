@@ -0,0 +1,82 @@
+"""Run the gateway with ``python -m emt_madrid.gateway``."""
+
+import argparse
+import os
+
+from aiohttp import web
+
+from emt_madrid.domain.arrival_estimator import ArrivalEstimator
+from emt_madrid.domain.vehicle_index import VehicleIndex
+from emt_madrid.gateway.server import create_emt_app
+from emt_madrid.infrastructure.emt_api_config import EMTAPIConfig
+from emt_madrid.infrastructure.metrics import EMTMetrics
+from emt_madrid.infrastructure.quota_tracker import QuotaTracker
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m emt_madrid.gateway",
+        description="Serve EMT stop information and arrivals over HTTP/JSON. "
+        "Credentials are read from EMT_API_EMAIL and EMT_API_PASSWORD.",
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument(
+        "--stop-info-ttl",
+        type=float,
+        default=24 * 60 * 60,
+        help="seconds a stop information entry stays cached",
+    )
+    parser.add_argument(
+        "--arrivals-ttl",
+        type=float,
+        default=20,
+        help="seconds an arrivals entry stays cached",
+    )
+    parser.add_argument(
+        "--rate",
+        type=float,
+        default=None,
+        help="maximum number of upstream requests per second",
+    )
+    parser.add_argument(
+        "--base-url",
+        default=None,
+        help="EMT API base URL, e.g. a local simulator",
+    )
+    parser.add_argument(
+        "--quota-file",
+        default=None,
+        help="JSON file persisting the daily quota counters of the account",
+    )
+    parser.add_argument(
+        "--fallback-estimates",
+        action="store_true",
+        help="serve timetable estimates when the live arrivals are unavailable",
+    )
+    args = parser.parse_args()
+
+    email = os.getenv("EMT_API_EMAIL")
+    password = os.getenv("EMT_API_PASSWORD")
+    if not email or not password:
+        parser.error(
+            "EMT_API_EMAIL and EMT_API_PASSWORD environment variables must be set"
+        )
+
+    app = create_emt_app(
+        email=email,
+        password=password,
+        stop_info_ttl=args.stop_info_ttl,
+        arrivals_ttl=args.arrivals_ttl,
+        rate=args.rate,
+        config=EMTAPIConfig(base_url=args.base_url),
+        metrics=EMTMetrics(),
+        quota=QuotaTracker(path=args.quota_file) if args.quota_file else None,
+        fallback=ArrivalEstimator() if args.fallback_estimates else None,
+        vehicles=VehicleIndex(),
+    )
+    web.run_app(app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
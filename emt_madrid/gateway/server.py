@@ -0,0 +1,254 @@
+import copy
+import json
+from dataclasses import replace
+from typing import Any, Optional
+
+import aiohttp
+from aiohttp import web
+
+from emt_madrid.domain.arrival_estimator import ArrivalEstimator
+from emt_madrid.domain.emt_repository import EMTRepository
+from emt_madrid.domain.exceptions import (
+    APILimitExceededError,
+    ArrivalsNotFoundError,
+    AuthenticationError,
+    EMTError,
+    StopNotFoundError,
+)
+from emt_madrid.domain.stop import Stop
+from emt_madrid.domain.vehicle_index import Vehicle, VehicleIndex
+from emt_madrid.infrastructure.caching_repository import CachingEMTRepository
+from emt_madrid.infrastructure.emt_api_client import Credentials, EMTAuthenticatedClient
+from emt_madrid.infrastructure.emt_api_config import EMTAPIConfig
+from emt_madrid.infrastructure.emt_api_repository import EMTAPIRepository
+from emt_madrid.infrastructure.http_client import HTTPClient
+from emt_madrid.infrastructure.metrics import EMTMetrics
+from emt_madrid.infrastructure.quota_tracker import QuotaTracker
+from emt_madrid.infrastructure.rate_limiter import RateLimiter
+from emt_madrid.use_cases.get_arrivals import GetArrivals
+
+REPOSITORY_KEY = web.AppKey("repository", EMTRepository)
+METRICS_KEY = web.AppKey("metrics", EMTMetrics)
+FALLBACK_KEY = web.AppKey("fallback", ArrivalEstimator)
+VEHICLES_KEY = web.AppKey("vehicles", VehicleIndex)
+
+
+def create_app(
+    repository: EMTRepository,
+    metrics: Optional[EMTMetrics] = None,
+    fallback: Optional[ArrivalEstimator] = None,
+    vehicles: Optional[VehicleIndex] = None,
+) -> web.Application:
+    """
+    Create the gateway application serving stop information and arrivals.
+
+    Routes:
+        GET /stops/{stop_id}: Stop information
+        GET /stops/{stop_id}/arrivals?lines=27,150: Stop arrivals, optionally filtered
+        GET /health: Liveness check
+        GET /metrics: Metrics in the Prometheus text format, if metrics are given
+        GET /vehicles?lines=27,150: Buses reported by the served arrivals, if
+            a vehicle index is given
+
+    Args:
+        repository: EMT repository shared by every request
+        metrics: Optional metrics to expose
+        fallback: Optional estimator serving timetable estimates, flagged with
+            ``is_estimate``, when the live arrivals cannot be retrieved
+        vehicles: Optional index of the buses reported by the arrivals
+
+    Returns:
+        The aiohttp application
+    """
+    app = web.Application()
+    app[REPOSITORY_KEY] = repository
+    app.router.add_get("/health", _health)
+    app.router.add_get("/stops/{stop_id}", _get_stop_info)
+    app.router.add_get("/stops/{stop_id}/arrivals", _get_arrivals)
+    if fallback is not None:
+        app[FALLBACK_KEY] = fallback
+    if metrics is not None:
+        app[METRICS_KEY] = metrics
+        app.router.add_get("/metrics", _metrics)
+    if vehicles is not None:
+        app[VEHICLES_KEY] = vehicles
+        app.router.add_get("/vehicles", _vehicles)
+    return app
+
+
+def create_emt_app(
+    email: str,
+    password: str,
+    stop_info_ttl: float = 24 * 60 * 60,
+    arrivals_ttl: float = 20,
+    rate: Optional[float] = None,
+    config: Optional[EMTAPIConfig] = None,
+    metrics: Optional[EMTMetrics] = None,
+    quota: Optional[QuotaTracker] = None,
+    fallback: Optional[ArrivalEstimator] = None,
+    vehicles: Optional[VehicleIndex] = None,
+) -> web.Application:
+    """
+    Create the gateway application backed by the EMT API.
+
+    A single session, access token and cache are shared by every consumer, and
+    the upstream requests are optionally limited to ``rate`` per second.
+
+    Args:
+        email: EMT API account email
+        password: EMT API account password
+        stop_info_ttl: Seconds a stop information entry stays cached
+        arrivals_ttl: Seconds an arrivals entry stays cached
+        rate: Optional maximum number of upstream requests per second
+        config: Optional EMT API configuration
+        metrics: Optional metrics of the upstream requests and the cache
+        quota: Optional tracker of the daily quota of the account, saved when
+            the application stops
+        fallback: Optional estimator serving timetable estimates when the
+            live arrivals cannot be retrieved
+        vehicles: Optional index updated with the buses reported by every
+            upstream arrivals response
+
+    Returns:
+        The aiohttp application
+    """
+    credentials = Credentials(email=email, password=password)
+    http_client = HTTPClient(config=config or EMTAPIConfig(), metrics=metrics)
+    repository = CachingEMTRepository(
+        EMTAPIRepository(
+            EMTAuthenticatedClient(http_client, credentials, metrics, quota=quota),
+            vehicle_index=vehicles,
+        ),
+        stop_info_ttl=stop_info_ttl,
+        arrivals_ttl=arrivals_ttl,
+        rate_limiter=RateLimiter(rate, burst=max(1, int(rate))) if rate else None,
+        metrics=metrics,
+    )
+    app = create_app(repository, metrics, fallback, vehicles)
+
+    async def session_context(app: web.Application):
+        async with aiohttp.ClientSession() as session:
+            http_client.session = session
+            yield
+        if quota is not None:
+            quota.save()
+
+    app.cleanup_ctx.append(session_context)
+    return app
+
+
+async def _health(request: web.Request) -> web.Response:
+    return web.json_response({"status": "ok"})
+
+
+async def _metrics(request: web.Request) -> web.Response:
+    return web.Response(
+        text=request.app[METRICS_KEY].render(),
+        headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"},
+    )
+
+
+async def _vehicles(request: web.Request) -> web.Response:
+    lines = [line for line in request.query.get("lines", "").split(",") if line]
+    vehicles = request.app[VEHICLES_KEY].vehicles(lines or None)
+    return web.json_response([serialize_vehicle(vehicle) for vehicle in vehicles])
+
+
+async def _get_stop_info(request: web.Request) -> web.Response:
+    repository = request.app[REPOSITORY_KEY]
+    stop_id = _stop_id(request)
+    try:
+        stop = await repository.get_stop_info(stop_id)
+    except EMTError as e:
+        raise _http_error(e) from e
+    return web.json_response(serialize_stop(stop))
+
+
+async def _get_arrivals(request: web.Request) -> web.Response:
+    repository = request.app[REPOSITORY_KEY]
+    stop_id = _stop_id(request)
+    lines = [line for line in request.query.get("lines", "").split(",") if line]
+    try:
+        stop = await repository.get_stop_info(stop_id)
+        stop = await GetArrivals(
+            repository, copy.deepcopy(stop), fallback=request.app.get(FALLBACK_KEY)
+        ).execute()
+    except EMTError as e:
+        raise _http_error(e) from e
+    if lines:
+        stop = replace(
+            stop,
+            stop_lines=[line for line in stop.stop_lines if line.line_number in lines],
+        )
+    return web.json_response(serialize_stop(stop))
+
+
+def _stop_id(request: web.Request) -> int:
+    try:
+        return int(request.match_info["stop_id"])
+    except ValueError as e:
+        raise _error(web.HTTPBadRequest, "Stop ID must be an integer") from e
+
+
+def _http_error(error: EMTError) -> web.HTTPException:
+    """Map a domain error, and the errors it wraps, to an HTTP error."""
+    causes: list[BaseException] = []
+    cause: Optional[BaseException] = error
+    while cause is not None:
+        causes.append(cause)
+        cause = cause.__cause__
+
+    if any(isinstance(cause, APILimitExceededError) for cause in causes):
+        return _error(web.HTTPServiceUnavailable, "EMT API limit exceeded")
+    if any(isinstance(cause, AuthenticationError) for cause in causes):
+        return _error(web.HTTPBadGateway, "EMT API authentication failed")
+    if any(isinstance(cause, aiohttp.ClientError) for cause in causes):
+        return _error(web.HTTPBadGateway, "EMT API not available")
+    if isinstance(error, (StopNotFoundError, ArrivalsNotFoundError)):
+        return _error(web.HTTPNotFound, str(error))
+    return _error(web.HTTPBadGateway, str(error))
+
+
+def _error(error_class: type[web.HTTPException], message: str) -> web.HTTPException:
+    """Create an HTTP error with a JSON body."""
+    return error_class(
+        text=json.dumps({"error": message}), content_type="application/json"
+    )
+
+
+def serialize_stop(stop: Stop) -> dict[str, Any]:
+    """Convert a Stop object into a JSON serializable dictionary."""
+    return {
+        "stop_id": stop.stop_id,
+        "stop_name": stop.stop_name,
+        "stop_address": stop.stop_address,
+        "stop_coordinates": stop.stop_coordinates,
+        "stop_lines": [
+            {
+                "line_number": line.line_number,
+                "origin": line.origin,
+                "destination": line.destination,
+                "max_frequency": line.max_frequency,
+                "min_frequency": line.min_frequency,
+                "start_time": line.start_time.isoformat() if line.start_time else None,
+                "end_time": line.end_time.isoformat() if line.end_time else None,
+                "day_type": str(line.day_type) if line.day_type else None,
+                "arrival": line.arrival,
+                "next_arrival": line.next_arrival,
+                "is_estimate": line.is_estimate,
+            }
+            for line in stop.stop_lines
+        ],
+    }
+
+
+def serialize_vehicle(vehicle: Vehicle) -> dict[str, Any]:
+    """Convert a Vehicle object into a JSON serializable dictionary."""
+    return {
+        "bus_id": vehicle.bus_id,
+        "line_number": vehicle.line_number,
+        "coordinates": list(vehicle.coordinates) if vehicle.coordinates else None,
+        "updated_at": vehicle.updated_at,
+        "next_stop_id": vehicle.next_stop_id,
+        "etas": {str(stop_id): eta for stop_id, eta in vehicle.etas.items()},
+    }
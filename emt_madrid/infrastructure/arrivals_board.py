@@ -0,0 +1,329 @@
+import mmap
+import os
+import struct
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Optional, Union
+
+from emt_madrid.domain.arrivals_grouping import lines_by_number
+from emt_madrid.domain.stop import Stop
+
+MAGIC = b"EMTB"
+VERSION = 2
+HEADER = struct.Struct("<4sHxxIQ")
+SEQUENCE = struct.Struct("<I")
+PAYLOAD = struct.Struct("<i16siidB7x")
+SLOT_SIZE = SEQUENCE.size + PAYLOAD.size
+NO_ARRIVAL = -1
+MAX_LOAD = 0.75
+
+
+@dataclass(frozen=True)
+class BoardEntry:
+    """
+    Latest arrivals of a line at a stop, as published on an arrivals board.
+
+    Args:
+        stop_id: ID of the bus stop
+        line_number: Number of the bus line
+        arrival: Minutes to the next bus, if any
+        next_arrival: Minutes to the following bus, if any
+        is_estimate: Whether the arrivals were estimated from the timetable
+        updated_at: Unix timestamp, in seconds, of the publication
+    """
+
+    stop_id: int
+    line_number: str
+    arrival: Optional[int]
+    next_arrival: Optional[int]
+    is_estimate: bool
+    updated_at: float
+
+
+def _home(stop_id: int, capacity: int) -> int:
+    """Get the first slot probed for a stop, the same in every process."""
+    return (stop_id * 2654435761) % capacity
+
+
+class ArrivalsBoardPublisher:
+    """
+    Publish the latest arrivals of every line of every stop to a shared board.
+
+    The board is a memory-mapped file with a fixed layout: a header followed
+    by ``capacity`` slots of fixed size, one per stop and line. The slots of
+    a stop are found by linear probing from a position derived from its ID,
+    so readers locate them without any index. A slot stores the stop ID plus
+    one, so a zero marks a free slot even for stop 0. Every slot is guarded by a
+    sequence number, odd while the slot is being written, so readers detect
+    and retry torn reads without any lock (a seqlock). There must be a
+    single publisher per board.
+
+    A board file left by a previous publisher with the same capacity is
+    reused, so readers keep their mapping across publisher restarts.
+
+    Slots are never freed, since that would break the probing of the slots
+    after them. A line published for a stop and missing from a later
+    publication of that stop is published again with no arrivals.
+
+    The publisher can be fed from the ``on_arrivals`` client hook or the
+    ``on_update`` callback of ArrivalsScheduler with ``publish``.
+
+    Args:
+        path: Path of the board file, created if missing
+        capacity: Number of slots, i.e. of stop and line pairs, of the board
+        clock: Clock returning the current Unix timestamp, in seconds
+
+    Methods:
+        publish: Publish the arrivals of a stop
+        close: Unmap the board
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        capacity: int = 65536,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        """Initialize ArrivalsBoardPublisher object."""
+        self._path: Path = Path(path)
+        self._capacity: int = capacity
+        self._clock: Callable[[], float] = clock
+        self._slots: dict[tuple[int, str], int] = {}
+        self._lines: dict[int, set[str]] = {}
+        reused = self._reuse()
+        if not reused:
+            self._create()
+        with open(self._path, "r+b") as file:
+            self._map: mmap.mmap = mmap.mmap(file.fileno(), 0)
+        if reused:
+            self._index()
+
+    def publish(self, stop: Stop) -> None:
+        """
+        Publish the arrivals of every line of a stop.
+
+        The lines published before for the stop and missing from it are
+        published with no arrivals.
+
+        Raises:
+            ValueError: If the board is full or a line number is too long
+        """
+        updated_at = self._clock()
+        index = lines_by_number(stop)
+        for line_number, lines in index.items():
+            encoded = line_number.encode()
+            if len(encoded) > 16:
+                raise ValueError(f"Line numbers are limited to 16 bytes: {line_number}")
+            line = lines[0]
+            self._write(
+                self._slot(stop.stop_id, line_number),
+                stop.stop_id,
+                encoded,
+                NO_ARRIVAL if line.arrival is None else line.arrival,
+                NO_ARRIVAL if line.next_arrival is None else line.next_arrival,
+                updated_at,
+                line.is_estimate,
+            )
+        for line_number in self._lines.get(stop.stop_id, ()):
+            if line_number not in index:
+                self._write(
+                    self._slots[(stop.stop_id, line_number)],
+                    stop.stop_id,
+                    line_number.encode(),
+                    NO_ARRIVAL,
+                    NO_ARRIVAL,
+                    updated_at,
+                    False,
+                )
+        magic, version, capacity, updates = HEADER.unpack_from(self._map)
+        HEADER.pack_into(self._map, 0, magic, version, capacity, updates + 1)
+
+    def close(self) -> None:
+        """Unmap the board."""
+        self._map.close()
+
+    def _reuse(self) -> bool:
+        """Check whether an existing board file can be reused."""
+        try:
+            with open(self._path, "rb") as file:
+                header = file.read(HEADER.size)
+        except FileNotFoundError:
+            return False
+        if len(header) < HEADER.size:
+            return False
+        magic, version, capacity, _ = HEADER.unpack(header)
+        return (
+            magic == MAGIC
+            and version == VERSION
+            and capacity == self._capacity
+            and self._path.stat().st_size == HEADER.size + capacity * SLOT_SIZE
+        )
+
+    def _create(self) -> None:
+        """Create an empty board file, replacing any incompatible one atomically."""
+        temporary = self._path.with_suffix(".tmp")
+        with open(temporary, "wb") as file:
+            file.write(HEADER.pack(MAGIC, VERSION, self._capacity, 0))
+            file.truncate(HEADER.size + self._capacity * SLOT_SIZE)
+        os.replace(temporary, self._path)
+
+    def _index(self) -> None:
+        """
+        Index the slots already used in the board.
+
+        A slot left with an odd sequence by a publisher that died while
+        writing it is marked stable again, so readers stop retrying it.
+        """
+        for slot in range(self._capacity):
+            offset = HEADER.size + slot * SLOT_SIZE
+            (sequence,) = SEQUENCE.unpack_from(self._map, offset)
+            if sequence & 1:
+                SEQUENCE.pack_into(self._map, offset, (sequence + 1) & 0xFFFFFFFF)
+            stored_id, line_number = PAYLOAD.unpack_from(
+                self._map, offset + SEQUENCE.size
+            )[:2]
+            if stored_id:
+                self._claim(stored_id - 1, line_number.rstrip(b"\0").decode(), slot)
+
+    def _slot(self, stop_id: int, line_number: str) -> int:
+        """Get the slot of a line of a stop, claiming a free one if needed."""
+        slot = self._slots.get((stop_id, line_number))
+        if slot is not None:
+            return slot
+        if len(self._slots) >= self._capacity * MAX_LOAD:
+            raise ValueError("The arrivals board is full")
+        slot = _home(stop_id, self._capacity)
+        while PAYLOAD.unpack_from(
+            self._map, HEADER.size + slot * SLOT_SIZE + SEQUENCE.size
+        )[0]:
+            slot = (slot + 1) % self._capacity
+        self._claim(stop_id, line_number, slot)
+        return slot
+
+    def _claim(self, stop_id: int, line_number: str, slot: int) -> None:
+        """Record the slot of a line of a stop."""
+        self._slots[(stop_id, line_number)] = slot
+        self._lines.setdefault(stop_id, set()).add(line_number)
+
+    def _write(
+        self,
+        slot: int,
+        stop_id: int,
+        line_number: bytes,
+        arrival: int,
+        next_arrival: int,
+        updated_at: float,
+        is_estimate: bool,
+    ) -> None:
+        """Write a slot, keeping its sequence odd while it is inconsistent."""
+        offset = HEADER.size + slot * SLOT_SIZE
+        sequence = SEQUENCE.unpack_from(self._map, offset)[0] | 1
+        SEQUENCE.pack_into(self._map, offset, sequence)
+        PAYLOAD.pack_into(
+            self._map,
+            offset + SEQUENCE.size,
+            stop_id + 1,
+            line_number,
+            arrival,
+            next_arrival,
+            updated_at,
+            is_estimate,
+        )
+        SEQUENCE.pack_into(self._map, offset, (sequence + 1) & 0xFFFFFFFF)
+
+
+class ArrivalsBoardReader:
+    """
+    Read the arrivals published on a shared board, without any request.
+
+    Values are unpacked straight from the memory-mapped file, and a slot
+    being written, or rewritten while it was read, is read again.
+
+    Args:
+        path: Path of the board file
+        read_timeout: Seconds a slot can stay unstable before reading it fails
+
+    Methods:
+        get: Get the arrivals of a line at a stop
+        stop: Get the arrivals of every line of a stop
+        updates: Get the number of publications so far
+        close: Unmap the board
+
+    Raises:
+        ValueError: If the file is not an arrivals board of a supported version
+    """
+
+    def __init__(self, path: Union[str, Path], read_timeout: float = 1.0) -> None:
+        """Initialize ArrivalsBoardReader object."""
+        self._read_timeout: float = read_timeout
+        with open(path, "rb") as file:
+            self._map: mmap.mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self._capacity, _ = HEADER.unpack_from(self._map)
+        if magic != MAGIC or version != VERSION:
+            self._map.close()
+            raise ValueError("Not an arrivals board of a supported version")
+
+    @property
+    def updates(self) -> int:
+        """Get the number of publications so far, to detect changes cheaply."""
+        return HEADER.unpack_from(self._map)[3]
+
+    def get(self, stop_id: int, line_number: str) -> Optional[BoardEntry]:
+        """Get the latest arrivals of a line at a stop, if published."""
+        for entry in self.stop(stop_id):
+            if entry.line_number == line_number:
+                return entry
+        return None
+
+    def stop(self, stop_id: int) -> list[BoardEntry]:
+        """Get the latest arrivals of every published line of a stop."""
+        entries = []
+        stored_id = stop_id + 1
+        slot = _home(stop_id, self._capacity)
+        for _ in range(self._capacity):
+            payload = self._read(slot)
+            if not payload[0]:
+                break
+            if payload[0] == stored_id:
+                _, line_number, arrival, next_arrival, updated_at, is_estimate = payload
+                entries.append(
+                    BoardEntry(
+                        stop_id=stop_id,
+                        line_number=line_number.rstrip(b"\0").decode(),
+                        arrival=None if arrival == NO_ARRIVAL else arrival,
+                        next_arrival=None
+                        if next_arrival == NO_ARRIVAL
+                        else next_arrival,
+                        is_estimate=bool(is_estimate),
+                        updated_at=updated_at,
+                    )
+                )
+            slot = (slot + 1) % self._capacity
+        return entries
+
+    def close(self) -> None:
+        """Unmap the board."""
+        self._map.close()
+
+    def _read(self, slot: int) -> tuple:
+        """
+        Read a consistent copy of a slot, retrying while it is being written.
+
+        Raises:
+            TimeoutError: If the slot is not stable within the read timeout,
+                e.g. because its publisher died while writing it
+        """
+        offset = HEADER.size + slot * SLOT_SIZE
+        deadline = None
+        while True:
+            (sequence,) = SEQUENCE.unpack_from(self._map, offset)
+            if not sequence & 1:
+                payload = PAYLOAD.unpack_from(self._map, offset + SEQUENCE.size)
+                if SEQUENCE.unpack_from(self._map, offset)[0] == sequence:
+                    return payload
+            if deadline is None:
+                deadline = time.monotonic() + self._read_timeout
+            elif time.monotonic() > deadline:
+                raise TimeoutError(f"Slot {slot} of the arrivals board is not stable")
+            time.sleep(0)
@@ -0,0 +1,197 @@
+import asyncio
+from dataclasses import replace
+from typing import AsyncGenerator, Iterable, Optional
+
+from emt_madrid.domain.arrivals_diff import ArrivalChange, ArrivalsDiffer
+from emt_madrid.domain.emt_repository import EMTRepository
+from emt_madrid.domain.polling_policy import PollingPolicy
+from emt_madrid.domain.stop import Stop
+from emt_madrid.infrastructure.arrivals_scheduler import ArrivalsScheduler
+
+
+class Subscription:
+    """
+    Pending arrival updates of a single subscriber.
+
+    Updates are coalesced per stop: if the subscriber is slower than the
+    poller, a newer snapshot of a stop replaces the one still pending. The
+    queue is therefore bounded by the number of watched stops and a slow
+    subscriber never blocks the poller or the other subscribers.
+
+    Args:
+        stop_ids: IDs of the watched bus stops
+        lines: Optional list of bus lines to filter
+    """
+
+    def __init__(self, stop_ids: Iterable[int], lines: Optional[list[str]]) -> None:
+        """Initialize Subscription object."""
+        self.stop_ids: frozenset[int] = frozenset(stop_ids)
+        self._lines: Optional[frozenset[str]] = frozenset(lines) if lines else None
+        self._pending: dict[int, Stop] = {}
+        self._signatures: dict[int, tuple] = {}
+        self._ready = asyncio.Event()
+
+    def __len__(self) -> int:
+        """Return the number of pending updates."""
+        return len(self._pending)
+
+    def offer(self, stop: Stop) -> None:
+        """Queue a stop snapshot if its filtered arrivals have changed."""
+        lines = [
+            line
+            for line in stop.stop_lines
+            if self._lines is None or line.line_number in self._lines
+        ]
+        signature = tuple(
+            (line.line_number, line.arrival, line.next_arrival) for line in lines
+        )
+        if self._signatures.get(stop.stop_id) == signature:
+            return
+        self._signatures[stop.stop_id] = signature
+        self._pending.pop(stop.stop_id, None)
+        self._pending[stop.stop_id] = replace(
+            stop, stop_lines=[replace(line) for line in lines]
+        )
+        self._ready.set()
+
+    async def get(self) -> Stop:
+        """Wait for the oldest pending update and return it."""
+        while not self._pending:
+            self._ready.clear()
+            await self._ready.wait()
+        return self._pending.pop(next(iter(self._pending)))
+
+
+class ArrivalsMonitor:
+    """
+    Stream arrival updates to many subscribers from one shared poller.
+
+    Every watched stop is polled once by an ArrivalsScheduler regardless of
+    the number of subscribers, and each subscriber only receives the stops
+    whose arrivals have changed for the lines it is interested in.
+
+    Args:
+        repository: EMT repository to use for data access
+        policy: Optional policy deciding the interval between two polls of a stop
+
+    Methods:
+        watch: Iterate over the arrival updates of some stops
+        watch_changes: Iterate over the arrival changes of some stops
+    """
+
+    def __init__(
+        self, repository: EMTRepository, policy: Optional[PollingPolicy] = None
+    ) -> None:
+        """Initialize ArrivalsMonitor object."""
+        self._repository: EMTRepository = repository
+        self._scheduler = ArrivalsScheduler(
+            repository, policy=policy, on_update=self._publish
+        )
+        self._subscriptions: dict[int, set[Subscription]] = {}
+        self._stops: dict[int, asyncio.Task[Stop]] = {}
+        self._latest: dict[int, Stop] = {}
+        self._task: Optional[asyncio.Task[None]] = None
+
+    async def watch(
+        self, stop_ids: Iterable[int], lines: Optional[list[str]] = None
+    ) -> AsyncGenerator[Stop, None]:
+        """
+        Iterate over the arrival updates of some stops.
+
+        Args:
+            stop_ids: IDs of the bus stops to watch
+            lines: Optional list of bus lines to filter
+
+        Yields:
+            A snapshot of a stop each time its filtered arrivals change
+
+        Raises:
+            StopNotFoundError: If the information of a stop cannot be retrieved
+        """
+        subscription = Subscription(stop_ids, lines)
+        try:
+            await self._subscribe(subscription)
+            while True:
+                yield await subscription.get()
+        finally:
+            self._unsubscribe(subscription)
+
+    async def watch_changes(
+        self,
+        stop_ids: Iterable[int],
+        lines: Optional[list[str]] = None,
+        threshold: int = 0,
+    ) -> AsyncGenerator[list[ArrivalChange], None]:
+        """
+        Iterate over the arrival changes of some stops.
+
+        Args:
+            stop_ids: IDs of the bus stops to watch
+            lines: Optional list of bus lines to filter
+            threshold: Minimum arrival change, in minutes, to report
+
+        Yields:
+            The changes of a stop since its previous update, never empty
+
+        Raises:
+            StopNotFoundError: If the information of a stop cannot be retrieved
+        """
+        differ = ArrivalsDiffer(threshold)
+        updates = self.watch(stop_ids, lines)
+        try:
+            async for stop in updates:
+                changes = differ.diff(stop)
+                if changes:
+                    yield changes
+        finally:
+            await updates.aclose()
+
+    async def _subscribe(self, subscription: Subscription) -> None:
+        """Register a subscription and start polling its stops."""
+        for stop_id in subscription.stop_ids:
+            self._subscriptions.setdefault(stop_id, set()).add(subscription)
+        for stop_id in subscription.stop_ids:
+            if stop_id not in self._stops:
+                self._stops[stop_id] = asyncio.create_task(self._add_stop(stop_id))
+        await asyncio.gather(
+            *(self._stops[stop_id] for stop_id in subscription.stop_ids)
+        )
+
+        for stop_id in subscription.stop_ids:
+            if stop_id in self._latest:
+                subscription.offer(self._latest[stop_id])
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._scheduler.run())
+
+    async def _add_stop(self, stop_id: int) -> Stop:
+        """Retrieve the information of a stop and schedule it."""
+        try:
+            stop = await self._repository.get_stop_info(stop_id)
+        except Exception:
+            self._stops.pop(stop_id, None)
+            raise
+        if stop_id in self._subscriptions:
+            self._scheduler.add_stop(stop)
+        return stop
+
+    def _unsubscribe(self, subscription: Subscription) -> None:
+        """Remove a subscription and stop polling the stops nobody watches."""
+        for stop_id in subscription.stop_ids:
+            subscribers = self._subscriptions.get(stop_id, set())
+            subscribers.discard(subscription)
+            if subscribers:
+                continue
+            self._subscriptions.pop(stop_id, None)
+            self._stops.pop(stop_id, None)
+            self._latest.pop(stop_id, None)
+            self._scheduler.remove_stop(stop_id)
+
+        if not self._subscriptions and self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def _publish(self, stop: Stop) -> None:
+        """Offer a refreshed stop to every subscriber watching it."""
+        self._latest[stop.stop_id] = stop
+        for subscription in self._subscriptions.get(stop.stop_id, ()):
+            subscription.offer(stop)
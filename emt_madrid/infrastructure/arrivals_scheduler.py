@@ -0,0 +1,156 @@
+import asyncio
+import heapq
+import itertools
+import time
+from datetime import datetime
+from typing import Awaitable, Callable, Optional
+
+from emt_madrid.domain.emt_repository import EMTRepository
+from emt_madrid.domain.exceptions import EMTError
+from emt_madrid.domain.polling_policy import PollingPolicy
+from emt_madrid.domain.stop import Stop
+
+
+class ArrivalsScheduler:
+    """
+    Poll the arrivals of many stops, each one at its own pace.
+
+    Stops are kept in a heap ordered by their next poll time. After every poll
+    the stop is rescheduled using the polling policy, so stops with imminent
+    buses are refreshed often while quiet or out-of-service stops are barely
+    touched.
+
+    Args:
+        repository: EMT repository to use for data access
+        policy: Policy deciding the interval between two polls of a stop
+        on_update: Optional callback invoked with every refreshed stop
+        max_concurrency: Maximum number of arrivals requests in flight
+        clock: Monotonic clock returning seconds
+        now: Optional function returning the current local date and time,
+            defaults to the current time of the policy service calendar
+
+    Methods:
+        add_stop: Schedule a stop to be polled
+        remove_stop: Stop polling a stop
+        next_due: Get the time of the next scheduled poll
+        run_pending: Poll every stop that is due
+        run: Poll the scheduled stops forever
+    """
+
+    def __init__(
+        self,
+        repository: EMTRepository,
+        policy: Optional[PollingPolicy] = None,
+        on_update: Optional[Callable[[Stop], Optional[Awaitable[None]]]] = None,
+        max_concurrency: int = 10,
+        clock: Callable[[], float] = time.monotonic,
+        now: Optional[Callable[[], datetime]] = None,
+    ) -> None:
+        """Initialize ArrivalsScheduler object."""
+        self._repository: EMTRepository = repository
+        self._policy: PollingPolicy = policy or PollingPolicy()
+        self._on_update = on_update
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._clock: Callable[[], float] = clock
+        self._now: Callable[[], datetime] = now or self._policy.calendar.now
+        self._queue: list[tuple[float, int, int]] = []
+        self._stops: dict[int, Stop] = {}
+        self._entries: dict[int, int] = {}
+        self._counter = itertools.count()
+        self._wakeup = asyncio.Event()
+
+    def __len__(self) -> int:
+        """Return the number of scheduled stops."""
+        return len(self._stops)
+
+    def add_stop(self, stop: Stop, due_at: Optional[float] = None) -> None:
+        """
+        Schedule a stop to be polled.
+
+        Args:
+            stop: The bus stop to poll, as returned by get_stop_info
+            due_at: Optional clock time of the first poll, defaults to now
+        """
+        self._stops[stop.stop_id] = stop
+        self._push(stop.stop_id, self._clock() if due_at is None else due_at)
+        self._wakeup.set()
+
+    def remove_stop(self, stop_id: int) -> None:
+        """Stop polling a stop. Its pending heap entry is discarded lazily."""
+        self._stops.pop(stop_id, None)
+        self._entries.pop(stop_id, None)
+
+    def next_due(self) -> Optional[float]:
+        """Get the clock time of the next scheduled poll, if any."""
+        self._discard_removed()
+        return self._queue[0][0] if self._queue else None
+
+    async def run_pending(self) -> list[Stop]:
+        """
+        Poll every stop whose next poll time has been reached.
+
+        Returns:
+            The stops that were refreshed successfully
+        """
+        now = self._clock()
+        due: list[Stop] = []
+        self._discard_removed()
+        while self._queue and self._queue[0][0] <= now:
+            _, _, stop_id = heapq.heappop(self._queue)
+            del self._entries[stop_id]
+            due.append(self._stops[stop_id])
+            self._discard_removed()
+
+        results = await asyncio.gather(*(self._poll(stop) for stop in due))
+        return [stop for stop in results if stop is not None]
+
+    async def run(self) -> None:
+        """Poll the scheduled stops until the task is cancelled."""
+        while True:
+            self._wakeup.clear()
+            next_due = self.next_due()
+            timeout = (
+                self._policy.min_interval
+                if next_due is None
+                else max(0.0, next_due - self._clock())
+            )
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except TimeoutError:
+                pass
+            await self.run_pending()
+
+    async def _poll(self, stop: Stop) -> Optional[Stop]:
+        """Refresh the arrivals of a stop and schedule its next poll."""
+        try:
+            async with self._semaphore:
+                stop = await self._repository.get_arrivals(stop)
+        except EMTError:
+            self._reschedule(stop, self._policy.error_interval)
+            return None
+
+        self._reschedule(stop, self._policy.next_interval(stop, self._now()))
+        if self._on_update is not None:
+            result = self._on_update(stop)
+            if result is not None:
+                await result
+        return stop
+
+    def _reschedule(self, stop: Stop, interval: float) -> None:
+        """Schedule the next poll of a stop unless it has been removed."""
+        if stop.stop_id in self._stops:
+            self._push(stop.stop_id, self._clock() + interval)
+
+    def _push(self, stop_id: int, due_at: float) -> None:
+        """Push the heap entry of a stop, replacing any previous one."""
+        entry = next(self._counter)
+        self._entries[stop_id] = entry
+        heapq.heappush(self._queue, (due_at, entry, stop_id))
+
+    def _discard_removed(self) -> None:
+        """Drop heap entries that have been removed or replaced."""
+        while self._queue:
+            _, entry, stop_id = self._queue[0]
+            if self._entries.get(stop_id) == entry:
+                return
+            heapq.heappop(self._queue)
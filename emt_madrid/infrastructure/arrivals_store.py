@@ -0,0 +1,334 @@
+import asyncio
+import itertools
+import os
+import struct
+import threading
+import time
+import zlib
+from functools import partial
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, Optional, Union
+
+from emt_madrid.domain.arrival_observation import (
+    ArrivalObservation,
+    observations_from_estimates,
+)
+
+MAGIC = b"EMTA"
+VERSION = 1
+HEADER = struct.Struct("<4sBIqq")
+CHUNK_SUFFIX = ".chunk"
+
+
+def _encode_varints(values: Iterable[int], output: bytearray) -> None:
+    """Append zigzag encoded variable-length integers to a buffer."""
+    for value in values:
+        value = (value << 1) ^ (value >> 63)
+        while value >= 0x80:
+            output.append((value & 0x7F) | 0x80)
+            value >>= 7
+        output.append(value)
+
+
+def _decode_varints(data: bytes, offset: int, count: int) -> tuple[list[int], int]:
+    """Read zigzag encoded variable-length integers from a buffer."""
+    values = []
+    for _ in range(count):
+        value = shift = 0
+        while True:
+            byte = data[offset]
+            offset += 1
+            value |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                break
+            shift += 7
+        values.append((value >> 1) ^ -(value & 1))
+    return values, offset
+
+
+def _deltas(values: list[int]) -> list[int]:
+    return [value - previous for previous, value in zip([0] + values, values)]
+
+
+def _undeltas(deltas: list[int]) -> list[int]:
+    values, total = [], 0
+    for delta in deltas:
+        total += delta
+        values.append(total)
+    return values
+
+
+def encode_chunk(observations: list[ArrivalObservation]) -> bytes:
+    """
+    Encode observations into a compressed columnar chunk.
+
+    Observations are sorted by time and stored as columns: observation times in
+    milliseconds and stop IDs are delta encoded, line numbers are replaced by
+    their index in a dictionary, and every column is written as zigzag
+    variable-length integers before the chunk is compressed.
+
+    Args:
+        observations: Observations of the chunk
+
+    Returns:
+        The encoded chunk
+    """
+    rows = sorted(observations, key=lambda row: (row.observed_at, row.stop_id))
+    observed_at = [round(row.observed_at * 1000) for row in rows]
+    lines = sorted({row.line_number for row in rows})
+    line_index = {line: index for index, line in enumerate(lines)}
+
+    body = bytearray()
+    _encode_varints([len(lines)], body)
+    for line in lines:
+        encoded = line.encode()
+        _encode_varints([len(encoded)], body)
+        body += encoded
+    _encode_varints(_deltas(observed_at), body)
+    _encode_varints(_deltas([row.stop_id for row in rows]), body)
+    _encode_varints([line_index[row.line_number] for row in rows], body)
+    _encode_varints([row.eta for row in rows], body)
+
+    header = HEADER.pack(
+        MAGIC,
+        VERSION,
+        len(rows),
+        observed_at[0] if rows else 0,
+        observed_at[-1] if rows else 0,
+    )
+    return header + zlib.compress(bytes(body))
+
+
+def decode_chunk(data: bytes) -> list[ArrivalObservation]:
+    """
+    Decode the observations of a chunk.
+
+    Raises:
+        ValueError: If the data is not a chunk of a supported version
+    """
+    magic, version, count, _, _ = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("Not an arrivals chunk of a supported version")
+    body = zlib.decompress(data[HEADER.size :])
+
+    (line_count,), offset = _decode_varints(body, 0, 1)
+    lines = []
+    for _ in range(line_count):
+        (length,), offset = _decode_varints(body, offset, 1)
+        lines.append(body[offset : offset + length].decode())
+        offset += length
+    observed_at, offset = _decode_varints(body, offset, count)
+    stop_ids, offset = _decode_varints(body, offset, count)
+    line_indexes, offset = _decode_varints(body, offset, count)
+    etas, offset = _decode_varints(body, offset, count)
+
+    return [
+        ArrivalObservation(stop_id, lines[line], eta, timestamp / 1000)
+        for timestamp, stop_id, line, eta in zip(
+            _undeltas(observed_at), _undeltas(stop_ids), line_indexes, etas
+        )
+    ]
+
+
+class ArrivalsStore:
+    """
+    Append-only store of arrival observations in compact chunks on disk.
+
+    Observations are buffered in memory and written as immutable chunk files
+    once ``chunk_size`` of them are pending or on ``flush``. The time range of
+    each chunk is part of its file name, so time-range queries only read the
+    chunks overlapping the range. Chunks are written to a temporary file and
+    renamed, so readers never see a partial chunk.
+
+    Chunks filled while an event loop is running are compressed and written
+    in a worker thread, so recording never blocks the loop, and queries still
+    see their observations while they are being written. A chunk stops being
+    listed as being written when its file is renamed into place, under the
+    same lock, so queries see it exactly once.
+
+    The store can be fed from the ``on_arrival_estimates`` client hook with
+    ``record``, which keeps the estimates of every bus to the second.
+
+    Args:
+        path: Directory of the chunk files, created if missing
+        chunk_size: Number of observations per chunk
+        clock: Clock returning the current Unix timestamp, in seconds
+
+    Methods:
+        append: Add observations
+        record: Add the estimated arrivals of the buses approaching a stop
+        flush: Write the pending observations to a chunk
+        aflush: Write the pending observations to a chunk in a worker thread
+        wait_written: Wait for the chunks being written in the background
+        query: Iterate over the observations of a time range
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        chunk_size: int = 4096,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        """Initialize ArrivalsStore object."""
+        self._path: Path = Path(path)
+        self._path.mkdir(parents=True, exist_ok=True)
+        self._chunk_size: int = chunk_size
+        self._clock: Callable[[], float] = clock
+        self._pending: list[ArrivalObservation] = []
+        self._writing: dict[int, list[ArrivalObservation]] = {}
+        self._tasks: set[asyncio.Task] = set()
+        self._keys: Iterator[int] = itertools.count()
+        self._lock: threading.Lock = threading.Lock()
+
+    def append(self, observations: Iterable[ArrivalObservation]) -> None:
+        """Add observations, writing a chunk when enough are pending."""
+        self._pending.extend(observations)
+        while len(self._pending) >= self._chunk_size:
+            chunk = self._pending[: self._chunk_size]
+            del self._pending[: self._chunk_size]
+            self._write_later(chunk)
+
+    def record(self, stop_id: int, estimates: Iterable[tuple[str, int]]) -> None:
+        """
+        Add the estimated arrivals of the buses approaching a stop, observed now.
+
+        Args:
+            stop_id: ID of the bus stop
+            estimates: Line number and estimated time to arrival, in seconds,
+                of every bus approaching the stop
+        """
+        self.append(observations_from_estimates(stop_id, estimates, self._clock()))
+
+    def flush(self) -> None:
+        """Write the pending observations to a chunk, blocking until it is written."""
+        if self._pending:
+            self._write(self._pending)
+            self._pending = []
+
+    async def aflush(self) -> None:
+        """
+        Write the pending observations to a chunk in a worker thread.
+
+        Every chunk being written in the background is waited for.
+
+        Raises:
+            OSError: If a chunk could not be written, its observations are
+                pending again
+        """
+        if self._pending:
+            observations, self._pending = self._pending, []
+            self._write_later(observations)
+        await self.wait_written()
+
+    async def wait_written(self) -> None:
+        """
+        Wait for the chunks being written in the background.
+
+        Raises:
+            OSError: If a chunk could not be written, its observations are
+                pending again
+        """
+        if self._tasks:
+            await asyncio.gather(*self._tasks)
+
+    def query(
+        self,
+        start: float,
+        end: float,
+        stop_ids: Optional[Iterable[int]] = None,
+        lines: Optional[Iterable[str]] = None,
+    ) -> Iterator[ArrivalObservation]:
+        """
+        Iterate over the observations of a time range.
+
+        Observations are yielded chunk by chunk, sorted by time within each
+        chunk, followed by the pending ones.
+
+        Args:
+            start: Unix timestamp, in seconds, of the start of the range, included
+            end: Unix timestamp, in seconds, of the end of the range, excluded
+            stop_ids: Optional IDs of the bus stops to keep
+            lines: Optional line numbers to keep
+
+        Returns:
+            An iterator over the matching observations
+        """
+        stop_filter = set(stop_ids) if stop_ids is not None else None
+        line_filter = set(lines) if lines is not None else None
+        start_ms, end_ms = round(start * 1000), round(end * 1000)
+
+        def matches(observation: ArrivalObservation) -> bool:
+            return (
+                start <= observation.observed_at < end
+                and (stop_filter is None or observation.stop_id in stop_filter)
+                and (line_filter is None or observation.line_number in line_filter)
+            )
+
+        with self._lock:
+            chunks = self._chunks()
+            writing = list(self._writing.values())
+        pending = list(self._pending)
+        for chunk_path, first, last in chunks:
+            if last < start_ms or first >= end_ms:
+                continue
+            yield from filter(matches, decode_chunk(chunk_path.read_bytes()))
+        for chunk in writing:
+            yield from filter(matches, chunk)
+        yield from filter(matches, pending)
+
+    def _chunks(self) -> list[tuple[Path, int, int]]:
+        """List the chunk files with the time range in their names, by start time."""
+        chunks = []
+        for chunk_path in self._path.glob(f"*{CHUNK_SUFFIX}"):
+            first, last, _ = chunk_path.stem.split("-")
+            chunks.append((chunk_path, int(first), int(last)))
+        return sorted(chunks, key=lambda chunk: (chunk[1], chunk[0].name))
+
+    def _write_later(self, observations: list[ArrivalObservation]) -> None:
+        """Write a chunk in a worker thread, or right away with no running loop."""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._write(observations)
+            return
+        key = next(self._keys)
+        with self._lock:
+            self._writing[key] = observations
+        task = loop.create_task(asyncio.to_thread(self._write, observations, key))
+        self._tasks.add(task)
+        task.add_done_callback(partial(self._written, key))
+
+    def _written(self, key: int, task: asyncio.Task) -> None:
+        """Keep the observations of a chunk pending if it could not be written."""
+        self._tasks.discard(task)
+        if task.cancelled() or task.exception() is not None:
+            with self._lock:
+                observations = self._writing.pop(key, None)
+            if observations:
+                self._pending[:0] = observations
+
+    def _write(
+        self, observations: list[ArrivalObservation], key: Optional[int] = None
+    ) -> None:
+        """
+        Write observations to a new chunk file.
+
+        The chunk is written to a temporary file, then renamed and forgotten
+        as being written under the lock, so a query lists it only once.
+        """
+        data = encode_chunk(observations)
+        _, _, _, first, last = HEADER.unpack_from(data)
+        temporary = self._path / f"{first:013d}-{threading.get_ident()}.tmp"
+        temporary.write_bytes(data)
+        with self._lock:
+            sequence = 0
+            while True:
+                chunk_path = (
+                    self._path / f"{first:013d}-{last:013d}-{sequence}{CHUNK_SUFFIX}"
+                )
+                if not chunk_path.exists():
+                    break
+                sequence += 1
+            os.replace(temporary, chunk_path)
+            if key is not None:
+                del self._writing[key]
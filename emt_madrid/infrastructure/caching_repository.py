@@ -0,0 +1,236 @@
+import asyncio
+import time
+from collections import OrderedDict
+from copy import copy
+from dataclasses import replace
+from typing import Any, Awaitable, Callable, Collection, Hashable, Optional, Union
+
+from emt_madrid.domain.emt_repository import EMTRepository
+from emt_madrid.domain.hooks import ClientHooks
+from emt_madrid.domain.stop import Stop
+from emt_madrid.infrastructure.metrics import EMTMetrics
+from emt_madrid.infrastructure.rate_limiter import RateLimiter
+
+CacheKey = tuple[str, Union[int, str]]
+
+
+def _copy_stop(stop: Stop, lines: Optional[Collection[str]] = None) -> Stop:
+    """Copy a cached stop and its lines, keeping only the given line numbers."""
+    return replace(
+        stop,
+        stop_coordinates=list(stop.stop_coordinates),
+        stop_lines=[
+            copy(line)
+            for line in stop.stop_lines
+            if lines is None or line.line_number in lines
+        ],
+    )
+
+
+class CachingEMTRepository(EMTRepository):
+    """
+    EMT repository decorator sharing cached and in-flight upstream requests.
+
+    Stop information and arrivals are cached for a configurable time. Callers
+    asking for an entry that is already being retrieved wait for the same
+    upstream request instead of issuing a new one, and every upstream request
+    can be throttled by a shared rate limiter.
+
+    The cache holds at most ``max_entries`` entries: expired entries are
+    dropped when they are looked up, and the least recently used entry is
+    evicted when a new one does not fit. Cached stops are copied with their
+    lines before being returned, so callers updating their arrivals never
+    change the cached entries.
+
+    Args:
+        repository: EMT repository used to retrieve missing entries
+        stop_info_ttl: Seconds a stop information entry stays fresh
+        arrivals_ttl: Seconds an arrivals entry stays fresh
+        rate_limiter: Optional rate limiter for the upstream requests
+        clock: Monotonic clock returning seconds
+        metrics: Optional metrics counting the cache hits and misses
+        hooks: Optional hooks notified of the cache hits
+        max_entries: Maximum number of cached entries
+    """
+
+    def __init__(
+        self,
+        repository: EMTRepository,
+        stop_info_ttl: float = 24 * 60 * 60,
+        arrivals_ttl: float = 20,
+        rate_limiter: Optional[RateLimiter] = None,
+        clock: Callable[[], float] = time.monotonic,
+        metrics: Optional[EMTMetrics] = None,
+        hooks: Optional[ClientHooks] = None,
+        max_entries: int = 10000,
+    ) -> None:
+        """Initialize CachingEMTRepository object."""
+        self._repository: EMTRepository = repository
+        self._stop_info_ttl: float = stop_info_ttl
+        self._arrivals_ttl: float = arrivals_ttl
+        self._rate_limiter: Optional[RateLimiter] = rate_limiter
+        self._clock: Callable[[], float] = clock
+        self._max_entries: int = max_entries
+        self._cache: OrderedDict[CacheKey, tuple[float, Any]] = OrderedDict()
+        self._in_flight: dict[Hashable, asyncio.Task] = {}
+        self._metrics: Optional[EMTMetrics] = metrics
+        self._hooks: Optional[ClientHooks] = hooks
+        self.hits: int = 0
+        self.misses: int = 0
+
+    async def get_stop_info(
+        self, stop_id: int, lines: Optional[Collection[str]] = None
+    ) -> Stop:
+        """
+        Get information about a bus stop, from the cache if it is fresh.
+
+        Every line of the stop is cached, so callers filtering different lines
+        share the same entry, and a copy with only the given ``lines`` is
+        returned.
+        """
+        stop = await self._get(
+            ("stop_info", stop_id),
+            self._stop_info_ttl,
+            lambda: self._repository.get_stop_info(stop_id),
+        )
+        return _copy_stop(stop, lines)
+
+    async def get_nearby_stops(self, stop_id: int) -> Stop:
+        """Get information about nearby stops, from the cache if it is fresh."""
+        stop = await self._get(
+            ("nearby_stops", stop_id),
+            self._stop_info_ttl,
+            lambda: self._repository.get_nearby_stops(stop_id),
+        )
+        return _copy_stop(stop)
+
+    async def get_arrivals(self, stop: Stop) -> Stop:
+        """
+        Get information about arrivals at a specific stop.
+
+        The arrivals are cached per line number, so stops holding a different
+        subset of lines can share the same entry. Concurrent callers share an
+        upstream request only when they ask for the same lines.
+
+        Args:
+            stop: The bus stop to update with arrival information
+
+        Returns:
+            The same Stop object with updated arrival information for each line
+
+        Raises:
+            ArrivalsNotFoundError: If the arrival information cannot be retrieved
+        """
+
+        async def fetch() -> dict[str, tuple[Optional[int], Optional[int]]]:
+            fetched = await self._repository.get_arrivals(stop)
+            return {
+                line.line_number: (line.arrival, line.next_arrival)
+                for line in fetched.stop_lines
+            }
+
+        key = ("arrivals", stop.stop_id)
+        in_flight_key = (
+            stop.stop_id,
+            frozenset(line.line_number for line in stop.stop_lines),
+        )
+        arrivals = await self._get(key, self._arrivals_ttl, fetch, in_flight_key)
+        if any(line.line_number not in arrivals for line in stop.stop_lines):
+            self._cache.pop(key, None)
+            arrivals = await self._get(key, self._arrivals_ttl, fetch, in_flight_key)
+
+        for line in stop.stop_lines:
+            line.arrival, line.next_arrival = arrivals.get(
+                line.line_number, (None, None)
+            )
+        return stop
+
+    async def get_line_stops(self, line_id: str, direction: int) -> list[Stop]:
+        """Get the ordered stops of a bus line, from the cache if they are fresh."""
+        stops = await self._get(
+            ("line_stops", f"{line_id}/{direction}"),
+            self._stop_info_ttl,
+            lambda: self._repository.get_line_stops(line_id, direction),
+        )
+        return [_copy_stop(stop) for stop in stops]
+
+    async def get_all_stops(self) -> list[Stop]:
+        """Get information about every stop of the network, from the cache if it is fresh."""
+        stops = await self._get(
+            ("all_stops", 0),
+            self._stop_info_ttl,
+            self._repository.get_all_stops,
+        )
+        return [_copy_stop(stop) for stop in stops]
+
+    def invalidate(self, stop_id: int) -> None:
+        """Discard every cached entry of a stop, including the stop lists holding it."""
+        for kind in ("stop_info", "nearby_stops", "arrivals"):
+            self._cache.pop((kind, stop_id), None)
+        for key, (_, stops) in list(self._cache.items()):
+            if key[0] in ("line_stops", "all_stops") and any(
+                stop.stop_id == stop_id for stop in stops
+            ):
+                del self._cache[key]
+
+    async def _get(
+        self,
+        key: CacheKey,
+        ttl: float,
+        fetch: Callable[[], Awaitable[Any]],
+        in_flight_key: Optional[Hashable] = None,
+    ) -> Any:
+        """
+        Return a fresh cached entry or join the request retrieving it.
+
+        Requests are shared by ``in_flight_key``, which defaults to the cache key.
+        """
+        entry = self._cache.get(key)
+        if entry is not None:
+            if entry[0] > self._clock():
+                self._cache.move_to_end(key)
+                self._count(key, hit=True)
+                return entry[1]
+            del self._cache[key]
+
+        if in_flight_key is None:
+            in_flight_key = key
+        task = self._in_flight.get(in_flight_key)
+        if task is None:
+            self._count(key, hit=False)
+            task = asyncio.ensure_future(self._fetch(key, ttl, fetch, in_flight_key))
+            self._in_flight[in_flight_key] = task
+        else:
+            self._count(key, hit=True)
+        return await asyncio.shield(task)
+
+    def _count(self, key: CacheKey, hit: bool) -> None:
+        """Count a cache hit or miss."""
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+        if self._metrics is not None:
+            self._metrics.count_cache_lookup(key[0], hit)
+        if hit and self._hooks:
+            self._hooks.on_cache_hit(*key)
+
+    async def _fetch(
+        self,
+        key: CacheKey,
+        ttl: float,
+        fetch: Callable[[], Awaitable[Any]],
+        in_flight_key: Hashable,
+    ) -> Any:
+        """Retrieve an entry from the upstream repository and cache it."""
+        try:
+            if self._rate_limiter is not None:
+                await self._rate_limiter.acquire()
+            value = await fetch()
+            self._cache.pop(key, None)
+            self._cache[key] = (self._clock() + ttl, value)
+            if len(self._cache) > self._max_entries:
+                self._cache.popitem(last=False)
+            return value
+        finally:
+            self._in_flight.pop(in_flight_key, None)
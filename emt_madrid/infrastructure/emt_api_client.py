@@ -1,8 +1,13 @@
+import asyncio
+import time
 from datetime import datetime
 from typing import Any, Dict, Optional, Union
 
+from emt_madrid.domain.hooks import ClientHooks
 from emt_madrid.infrastructure.emt_api_endpoints import Auth
 from emt_madrid.infrastructure.http_client import HTTPClient
+from emt_madrid.infrastructure.metrics import EMTMetrics, endpoint_label
+from emt_madrid.infrastructure.quota_tracker import QuotaTracker
 from emt_madrid.domain.exceptions import (
     AuthenticationError,
     InvalidCredentialsError,
@@ -66,13 +71,28 @@ class EMTAuthenticatedClient:
     Args:
         http_client: An instance of HTTPClient for making HTTP requests
         credentials: User credentials for authentication
+        metrics: Optional metrics counting the token refreshes
+        hooks: Optional hooks notified of the token refreshes
+        quota: Optional tracker counting the requests against the daily quota
+            of the account, and holding back low-priority requests
     """
 
-    def __init__(self, http_client: HTTPClient, credentials: Credentials) -> None:
+    def __init__(
+        self,
+        http_client: HTTPClient,
+        credentials: Credentials,
+        metrics: Optional[EMTMetrics] = None,
+        hooks: Optional[ClientHooks] = None,
+        quota: Optional[QuotaTracker] = None,
+    ) -> None:
         """Initialize EMTAuthenticatedClient object."""
         self._http_client: HTTPClient = http_client
         self._credentials: Credentials = credentials
         self._token: Token = Token()
+        self._metrics: Optional[EMTMetrics] = metrics
+        self._hooks: Optional[ClientHooks] = hooks
+        self._quota: Optional[QuotaTracker] = quota
+        self._refreshing: Optional[asyncio.Future] = None
 
     async def _authenticate(self) -> None:
         """Authenticate with the EMT API using stored credentials.
@@ -81,14 +101,15 @@ class EMTAuthenticatedClient:
         to the EMT API using the provided credentials.
 
         Raises:
-            AuthenticationError: If authentication fails due to invalid credentials
-            Exception: For any other authentication failures
+            AuthenticationError: If authentication fails, e.g. due to invalid
+                credentials, or caused by an APILimitExceededError when the API
+                limit or the daily quota is exceeded
         """
         Auth.LOGIN["headers"]["email"] = self._credentials.email
         Auth.LOGIN["headers"]["password"] = self._credentials.password
 
         try:
-            response = await self._http_client.exchange(
+            response = await self._send(
                 method=Auth.LOGIN["method"],
                 endpoint=Auth.LOGIN["endpoint"],
                 headers=Auth.LOGIN["headers"],
@@ -116,6 +137,37 @@ class EMTAuthenticatedClient:
         except Exception as e:
             raise AuthenticationError(f"Authentication failed: {str(e)}") from e
 
+    async def _instrumented_authenticate(self) -> None:
+        """Authenticate and report the refresh, with its reason and outcome."""
+        reason = "missing" if self._token.token is None else "expired"
+        started_at = time.perf_counter()
+        success = False
+        try:
+            await self._authenticate()
+            success = True
+        finally:
+            if self._metrics is not None:
+                self._metrics.count_auth_refresh(reason, success=success)
+            if self._hooks:
+                self._hooks.on_auth(reason, success, time.perf_counter() - started_at)
+
+    async def _refresh_token(self) -> None:
+        """Log in, sharing a single login with the concurrent requests."""
+        if self._refreshing is None:
+            if self._metrics is None and not self._hooks:
+                self._refreshing = asyncio.ensure_future(self._authenticate())
+            else:
+                self._refreshing = asyncio.ensure_future(
+                    self._instrumented_authenticate()
+                )
+            self._refreshing.add_done_callback(self._refreshed)
+        await asyncio.shield(self._refreshing)
+
+    def _refreshed(self, refreshing: asyncio.Future) -> None:
+        """Forget a completed login, so the next expiration triggers a new one."""
+        if self._refreshing is refreshing:
+            self._refreshing = None
+
     async def exchange(
         self,
         method: str,
@@ -143,9 +195,30 @@ class EMTAuthenticatedClient:
         Raises:
             aiohttp.ClientResponseError: If the HTTP request fails
             ValueError: If authentication is required but not available
+            QuotaThrottledError: If a low-priority request is held back
             Exception: For other unexpected errors during the request
         """
         if self._token.is_expired or self._token.token is None:
-            await self._authenticate()
+            await self._refresh_token()
         headers = {"accessToken": self._token.token}
-        return await self._http_client.exchange(method, endpoint, params, data, headers)
+        return await self._send(method, endpoint, params, data, headers)
+
+    async def _send(
+        self,
+        method: str,
+        endpoint: str,
+        params: Optional[Dict[str, Any]] = None,
+        data: Optional[Union[Dict[str, Any], str]] = None,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> Dict[str, Any]:
+        """Send a request through the HTTP client, accounting it in the quota."""
+        if self._quota is None:
+            return await self._http_client.exchange(
+                method, endpoint, params, data, headers
+            )
+        self._quota.acquire(self._credentials.email, endpoint_label(endpoint))
+        response = await self._http_client.exchange(
+            method, endpoint, params, data, headers
+        )
+        self._quota.observe_response(self._credentials.email, response)
+        return response
@@ -1,5 +1,20 @@
 """Configuration for the EMT API."""
 
+from typing import Optional
+
 
 class EMTAPIConfig:
+    """
+    EMT API configuration.
+
+    Args:
+        base_url: Optional base URL overriding the public EMT API, e.g. to use a
+            local simulator
+    """
+
     BASE_URL = "https://openapi.emtmadrid.es/"
+
+    def __init__(self, base_url: Optional[str] = None) -> None:
+        """Initialize EMTAPIConfig object."""
+        if base_url is not None:
+            self.BASE_URL = base_url if base_url.endswith("/") else f"{base_url}/"
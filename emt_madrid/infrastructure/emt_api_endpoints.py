@@ -1,8 +1,21 @@
 """Endpoints for the EMT API."""
 
+from typing import Optional, TypedDict
+
+
+class Endpoint(TypedDict):
+    """Definition of an EMT API endpoint and its response codes."""
+
+    description: str
+    endpoint: str
+    method: str
+    headers: dict[str, str]
+    data: Optional[dict[str, str]]
+    responses: dict[str, str]
+
 
 class Auth:
-    LOGIN = {
+    LOGIN: Endpoint = {
         "description": "Endpoint to authenticate and get an access token.",
         "endpoint": "v1/mobilitylabs/user/login/",
         "method": "GET",
@@ -18,7 +31,20 @@ class Auth:
 
 
 class Stops:
-    DETAIL = {
+    LIST: Endpoint = {
+        "description": "Bulk list of every bus stop of the network with its lines.",
+        "endpoint": "v1/transport/busemtmad/stops/list/",
+        "method": "POST",
+        "headers": {"accessToken": ""},
+        "data": {},
+        "responses": {
+            "stops_retrieved": "00",
+            "invalid_token": "80",
+            "api_limit_exceeded": "98",
+        },
+    }
+
+    DETAIL: Endpoint = {
         "description": "Most complete endpoint to get information about a bus stop.",
         "endpoint": "v1/transport/busemtmad/stops/{stop_id}/detail/",
         "method": "GET",
@@ -33,7 +59,7 @@ class Stops:
         },
     }
 
-    ARROUNDSTOP = {
+    ARROUNDSTOP: Endpoint = {
         "description": "Get information about stops around a specific stop.",
         "endpoint": "v2/transport/busemtmad/stops/arroundstop/{stop_id}/0/",
         "method": "GET",
@@ -46,11 +72,44 @@ class Stops:
         },
     }
 
-    ARRIVAL = {
+    ARRIVAL: Endpoint = {
         "description": "Get information about arrivals at a specific stop.",
         "endpoint": "v2/transport/busemtmad/stops/{stop_id}/arrives/",
         "method": "POST",
         "headers": {"accessToken": ""},
         "data": {"stopId": "", "Text_EstimationsRequired_YN": "Y"},
-        "responses": {"arrivals_retrieved": "00", "stop_not_found": "80"},
+        "responses": {
+            "arrivals_retrieved": "00",
+            "stop_not_found": "80",
+            "api_limit_exceeded": "98",
+        },
+    }
+
+
+class Lines:
+    INFO: Endpoint = {
+        "description": "List of every bus line in service on a date (YYYYMMDD).",
+        "endpoint": "v1/transport/busemtmad/lines/info/{date}/",
+        "method": "GET",
+        "headers": {"accessToken": ""},
+        "data": None,
+        "responses": {
+            "lines_retrieved": "00",
+            "invalid_token": "80",
+            "api_limit_exceeded": "98",
+        },
+    }
+
+    STOPS: Endpoint = {
+        "description": "Ordered stops of a bus line in a direction (1 to B, 2 to A).",
+        "endpoint": "v1/transport/busemtmad/lines/{line_id}/stops/{direction}/",
+        "method": "GET",
+        "headers": {"accessToken": ""},
+        "data": None,
+        "responses": {
+            "stops_retrieved": "00",
+            "line_not_found": "90",
+            "invalid_token": "80",
+            "api_limit_exceeded": "98",
+        },
     }
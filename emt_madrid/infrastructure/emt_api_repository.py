@@ -1,24 +1,71 @@
-from datetime import time
+import asyncio
+from datetime import datetime
+from operator import attrgetter
+from typing import Any, Collection, Optional, Sequence
 
+import aiohttp
+
+from emt_madrid.domain.arrivals_grouping import group_arrivals
 from emt_madrid.domain.day_type import DayType
 from emt_madrid.domain.emt_repository import EMTRepository
+from emt_madrid.domain.hooks import ClientHooks
 from emt_madrid.domain.exceptions import (
+    APILimitExceededError,
     APIResponseError,
+    LineNotFoundError,
+    PayloadDecodeError,
     StopNotFoundError,
     ArrivalsNotFoundError,
 )
 from emt_madrid.domain.line import Line
+from emt_madrid.domain.service_calendar import MADRID_TIMEZONE
 from emt_madrid.domain.stop import Stop
+from emt_madrid.domain.vehicle_index import BusArrival, VehicleIndex
 from emt_madrid.infrastructure.emt_api_client import EMTAuthenticatedClient
-from emt_madrid.infrastructure.emt_api_endpoints import Stops
+from emt_madrid.infrastructure.emt_api_endpoints import Lines, Stops
+from emt_madrid.infrastructure.emt_api_schemas import (
+    AroundStop,
+    Arrival,
+    ArrivalEstimate,
+    DetailLine,
+    DetailStop,
+    LineInfo,
+    LineRoute,
+    ListStop,
+    decode,
+    decode_list_of,
+)
 
+DAY_TYPES = {"SA": DayType.SATURDAY, "FE": DayType.FESTIVE}
 
-class EMTAPIRepository(EMTRepository):
-    """EMT API repository to retrieve bus stop information and arrival times."""
+# Errors of a request mapped to the not found error of the repository method.
+# Invalid payloads and exhausted quotas are raised unchanged, since retrying
+# or falling back to another request would not help.
+UPSTREAM_ERRORS = (APIResponseError, aiohttp.ClientError, TimeoutError)
+PROPAGATED_ERRORS = (PayloadDecodeError, APILimitExceededError)
 
-    def __init__(self, emt_authenticated_client: EMTAuthenticatedClient) -> None:
+
+class EMTAPIRepository(EMTRepository):
+    """EMT API repository to retrieve bus stop information and arrival times.
+
+    Args:
+        emt_authenticated_client: Client making the authenticated requests
+        hooks: Optional hooks notified when a request falls back to another one
+            and of the raw estimates of every arrivals response
+        vehicle_index: Optional index updated with the buses reported by every
+            arrivals response
+    """
+
+    def __init__(
+        self,
+        emt_authenticated_client: EMTAuthenticatedClient,
+        hooks: Optional[ClientHooks] = None,
+        vehicle_index: Optional[VehicleIndex] = None,
+    ) -> None:
         """Initialize EMTAPIRepository object."""
         self.emt_authenticated_client = emt_authenticated_client
+        self._hooks: Optional[ClientHooks] = hooks
+        self._vehicle_index: Optional[VehicleIndex] = vehicle_index
 
     async def get_nearby_stops(self, stop_id: int) -> Stop:
         """Get information about nearby stops using the ARROUNDSTOP endpoint.
@@ -30,7 +77,9 @@ class EMTAPIRepository(EMTRepository):
             A Stop object containing the nearest stop information
 
         Raises:
-            ValueError: If no nearby stops are found
+            StopNotFoundError: If no nearby stops are found
+            PayloadDecodeError: If the response does not match its schema
+            APILimitExceededError: If the request exceeds the API quota
         """
         try:
             endpoint = Stops.ARROUNDSTOP["endpoint"].format(stop_id=stop_id)
@@ -57,54 +106,60 @@ class EMTAPIRepository(EMTRepository):
                     message=f"No nearby stops found for stop {stop_id}. Code: {response.get('code')}",
                 )
 
-            stop_data = stops_data[0]
-
-            coordinates = stop_data["geometry"]["coordinates"]
-            lines = []
-            if "lines" in stop_data:
-                lines = self._get_lines_from_around_stop(stop_data["lines"])
+            stop_data = decode(AroundStop, stops_data[0], "data[0]")
 
             return Stop(
-                stop_id=stop_data["stopId"],
-                stop_name=stop_data["stopName"],
-                stop_address=stop_data["address"].strip(),
-                stop_coordinates=coordinates,
-                stop_lines=lines,
+                stop_id=stop_data.stop_id,
+                stop_name=stop_data.name,
+                stop_address=stop_data.address.strip(),
+                stop_coordinates=list(stop_data.coordinates),
+                stop_lines=self._get_lines_from_around_stop(stop_data),
             )
 
-        except Exception as e:
+        except PROPAGATED_ERRORS:
+            raise
+        except UPSTREAM_ERRORS as e:
             raise StopNotFoundError(stop_id, str(e)) from e
 
-    def _get_lines_from_around_stop(self, lines: list[dict]) -> list[Line]:
+    def _get_lines_from_around_stop(self, stop_data: AroundStop) -> list[Line]:
         """Get a list of lines from the around stop endpoint response."""
         result = []
-        for line in lines:
-            if line["to"] == "B":
-                origin = line["nameA"]
-                destination = line["nameB"]
+        for line in stop_data.lines:
+            if line.to == "B":
+                origin = line.name_a
+                destination = line.name_b
             else:
-                origin = line["nameB"]
-                destination = line["nameA"]
+                origin = line.name_b
+                destination = line.name_a
             result.append(
                 Line(
-                    line_number=str(line["line"]),
+                    line_number=line.line,
                     origin=origin,
                     destination=destination,
                 )
             )
         return result
 
-    async def get_stop_info(self, stop_id: int) -> Stop:
+    async def get_stop_info(
+        self, stop_id: int, lines: Optional[Collection[str]] = None
+    ) -> Stop:
         """Get information about a bus stop.
 
+        When ``lines`` is given, the other entries of the ``dataLine`` array are
+        skipped before decoding, so no Line is built for lines the caller
+        discards. The around stop fallback still returns every line.
+
         Args:
             stop_id: The ID of the bus stop
+            lines: Optional line numbers to keep
 
         Returns:
             A Stop object containing the stop information
 
         Raises:
             StopNotFoundError: If the stop information cannot be retrieved
+            PayloadDecodeError: If the response does not match its schema
+            APILimitExceededError: If the request exceeds the API quota
         """
         try:
             endpoint = Stops.DETAIL["endpoint"].format(stop_id=stop_id)
@@ -124,6 +179,8 @@ class EMTAPIRepository(EMTRepository):
                 response.get("code", {})
                 == Stops.DETAIL["responses"]["detail_not_available"]
             ):
+                if self._hooks:
+                    self._hooks.on_retry(endpoint, "detail_not_available")
                 return await self.get_nearby_stops(stop_id)
 
             stops_data = response.get("data", [])
@@ -133,45 +190,233 @@ class EMTAPIRepository(EMTRepository):
                     f"No information found for stop {stop_id}. Code: {response.get('code')}"
                 )
 
-            stop_data = stops_data[0].get("stops", [{}])[0] if stops_data else {}
-            coordinates = []
-            if "geometry" in stop_data:
-                coordinates = stop_data["geometry"]["coordinates"]
-            lines = []
-            if "dataLine" in stop_data:
-                lines = self._get_lines_from_stop(stop_data["dataLine"])
+            raw_stop = (stops_data[0].get("stops") or [{}])[0]
+            if lines is not None and isinstance(raw_stop, dict):
+                raw_stop = self._filter_data_line(raw_stop, lines)
+            stop_data = decode(DetailStop, raw_stop, "data[0].stops[0]")
 
             return Stop(
                 stop_id=stop_id,
-                stop_name=stop_data.get("name", "Unknown"),
-                stop_address=stop_data.get("postalAddress", "Unknown"),
-                stop_coordinates=coordinates,
-                stop_lines=lines,
+                stop_name=stop_data.name,
+                stop_address=stop_data.postal_address,
+                stop_coordinates=list(stop_data.coordinates),
+                stop_lines=self._get_lines_from_detail(stop_data.lines),
             )
 
-        except Exception as e:
+        except PROPAGATED_ERRORS:
+            raise
+        except UPSTREAM_ERRORS as e:
             raise StopNotFoundError(stop_id, str(e)) from e
 
-    def _get_lines_from_stop(self, lines: list[dict]) -> list[Line]:
-        """Get a list of lines from the stop endpoint response."""
-        result = []
-        for line in lines:
-            day_type = DayType.WORKING_DAY
-            if line["dayType"] == "SA":
-                day_type = DayType.SATURDAY
-            elif line["dayType"] == "FE":
-                day_type = DayType.FESTIVE
+    def _filter_data_line(
+        self, stop_data: dict[str, Any], lines: Collection[str]
+    ) -> dict[str, Any]:
+        """Keep only the ``dataLine`` entries of some line numbers, undecoded."""
+        data_line = stop_data.get("dataLine")
+        if not isinstance(data_line, list):
+            return stop_data
+        wanted = {str(line) for line in lines}
+        return {
+            **stop_data,
+            "dataLine": [
+                line
+                for line in data_line
+                if not isinstance(line, dict) or str(line.get("label")) in wanted
+            ],
+        }
+
+    def _get_lines_from_detail(self, lines: Sequence[DetailLine]) -> list[Line]:
+        """Get a list of lines from the decoded lines of the stop endpoint."""
+        return [
+            Line(
+                line_number=line.label,
+                origin=line.header_a,
+                destination=line.header_b,
+                max_frequency=line.max_frequency,
+                min_frequency=line.min_frequency,
+                start_time=line.start_time,
+                end_time=line.stop_time,
+                day_type=self._get_day_type(line.day_type),
+            )
+            for line in lines
+        ]
+
+    def _get_day_type(self, code: str) -> DayType:
+        """Get the day type of an EMT day type code."""
+        return DAY_TYPES.get(code, DayType.WORKING_DAY)
+
+    async def get_line_stops(self, line_id: str, direction: int) -> list[Stop]:
+        """Get the ordered stops of a bus line in a direction.
+
+        Every stop holds the line once per day type of its timetable, like the
+        stop detail, so its arrivals can be retrieved with ``get_arrivals``.
+        This is the only per-line listing retrieved: the route endpoint adds
+        the itinerary geometry, which no caller needs, so it is not requested.
+
+        Args:
+            line_id: The ID or number of the bus line
+            direction: 1 for the trips to the destination (header B), 2 for the
+                trips back to the origin (header A)
+
+        Returns:
+            A Stop object for every stop of the route, in route order
+
+        Raises:
+            LineNotFoundError: If the stops of the line cannot be retrieved
+            PayloadDecodeError: If the response does not match its schema
+            APILimitExceededError: If the request exceeds the API quota
+        """
+        try:
+            endpoint = Lines.STOPS["endpoint"].format(
+                line_id=line_id, direction=direction
+            )
+            response = await self.emt_authenticated_client.exchange(
+                method=Lines.STOPS["method"], endpoint=endpoint
+            )
+
+            if not response:
+                raise APIResponseError(f"No response from line: {line_id}")
+
+            if response.get("code") != Lines.STOPS["responses"]["stops_retrieved"]:
+                raise APIResponseError(
+                    f"Failed to retrieve the stops of line {line_id}. Code: {response.get('code')}"
+                )
+
+            if not response.get("data"):
+                raise APIResponseError(f"No stops found for line {line_id}")
+            route = decode(LineRoute, response["data"][0], "data[0]")
+            if not route.stops:
+                raise APIResponseError(f"No stops found for line {line_id}")
+
+            origin, destination = route.name_a, route.name_b
+            if direction == 2:
+                origin, destination = destination, origin
+
+            return [
+                Stop(
+                    stop_id=stop_data.stop_id,
+                    stop_name=stop_data.name,
+                    stop_address=stop_data.postal_address,
+                    stop_coordinates=list(stop_data.coordinates),
+                    stop_lines=[
+                        Line(
+                            line_number=route.label,
+                            origin=origin,
+                            destination=destination,
+                            max_frequency=timetable.max_frequency,
+                            min_frequency=timetable.min_frequency,
+                            start_time=timetable.start_time,
+                            end_time=timetable.stop_time,
+                            day_type=self._get_day_type(timetable.day_type),
+                        )
+                        for timetable in route.timetables
+                    ]
+                    or [
+                        Line(
+                            line_number=route.label,
+                            origin=origin,
+                            destination=destination,
+                        )
+                    ],
+                )
+                for stop_data in route.stops
+            ]
+
+        except PROPAGATED_ERRORS:
+            raise
+        except UPSTREAM_ERRORS as e:
+            raise LineNotFoundError(line_id, str(e)) from e
+
+    async def get_all_stops(self) -> list[Stop]:
+        """Get information about every stop of the network.
+
+        The whole catalog is loaded with two requests, the bulk stops list and
+        the lines in service today, instead of one detail request per stop.
+        Lines only carry their number, origin and destination, since the bulk
+        endpoints have no timetables.
 
+        Returns:
+            A Stop object for every stop of the network
+
+        Raises:
+            StopNotFoundError: If the stops cannot be retrieved
+            PayloadDecodeError: If the response does not match its schema
+            APILimitExceededError: If the request exceeds the API quota
+        """
+        try:
+            lines_info, response = await asyncio.gather(
+                self._get_lines_info(),
+                self.emt_authenticated_client.exchange(
+                    method=Stops.LIST["method"],
+                    endpoint=Stops.LIST["endpoint"],
+                    data=dict(Stops.LIST["data"] or {}),
+                ),
+            )
+
+            if not response:
+                raise APIResponseError("No response from the stops list")
+
+            if response.get("code") != Stops.LIST["responses"]["stops_retrieved"]:
+                raise APIResponseError(
+                    f"Failed to retrieve the stops list. Code: {response.get('code')}"
+                )
+
+            return [
+                Stop(
+                    stop_id=stop_data.stop_id,
+                    stop_name=stop_data.name,
+                    stop_address=stop_data.postal_address,
+                    stop_coordinates=list(stop_data.coordinates),
+                    stop_lines=self._get_lines_from_list(stop_data.lines, lines_info),
+                )
+                for stop_data in decode_list_of(
+                    ListStop, response.get("data", []), "data"
+                )
+            ]
+
+        except PROPAGATED_ERRORS:
+            raise
+        except UPSTREAM_ERRORS as e:
+            raise StopNotFoundError(message=str(e)) from e
+
+    async def _get_lines_info(self) -> dict[str, LineInfo]:
+        """Get the lines in service today, by line ID."""
+        today = datetime.now(MADRID_TIMEZONE).strftime("%Y%m%d")
+        response = await self.emt_authenticated_client.exchange(
+            method=Lines.INFO["method"],
+            endpoint=Lines.INFO["endpoint"].format(date=today),
+        )
+
+        if not response:
+            raise APIResponseError("No response from the lines list")
+
+        if response.get("code") != Lines.INFO["responses"]["lines_retrieved"]:
+            raise APIResponseError(
+                f"Failed to retrieve the lines list. Code: {response.get('code')}"
+            )
+
+        return {
+            line.line: line
+            for line in decode_list_of(LineInfo, response.get("data", []), "data")
+        }
+
+    def _get_lines_from_list(
+        self, lines: Sequence[str], lines_info: dict[str, LineInfo]
+    ) -> list[Line]:
+        """Get a list of lines from the "line/direction" codes of the stops list."""
+        result = []
+        for code in lines:
+            line_id, _, direction = code.partition("/")
+            info = lines_info.get(line_id)
+            origin, destination = (info.name_a, info.name_b) if info else ("", "")
+            if direction == "2":
+                origin, destination = destination, origin
+            label = info.label if info else None
             result.append(
                 Line(
-                    line_number=line["label"],
-                    origin=line["headerA"],
-                    destination=line["headerB"],
-                    max_frequency=int(line["maxFreq"]),
-                    min_frequency=int(line["minFreq"]),
-                    start_time=time.fromisoformat(line["startTime"]),
-                    end_time=time.fromisoformat(line["stopTime"]),
-                    day_type=day_type,
+                    line_number=label or line_id.lstrip("0") or line_id,
+                    origin=origin,
+                    destination=destination,
                 )
             )
         return result
@@ -187,10 +432,12 @@ class EMTAPIRepository(EMTRepository):
 
         Raises:
             ArrivalsNotFoundError: If the arrival information cannot be retrieved
+            PayloadDecodeError: If the response does not match its schema
+            APILimitExceededError: If the request exceeds the API quota
         """
         try:
             endpoint = Stops.ARRIVAL["endpoint"].format(stop_id=stop.stop_id)
-            data = Stops.ARRIVAL["data"].copy()
+            data = dict(Stops.ARRIVAL["data"] or {})
             data["stopId"] = str(stop.stop_id)
             response = await self.emt_authenticated_client.exchange(
                 method=Stops.ARRIVAL["method"], endpoint=endpoint, data=data
@@ -205,7 +452,12 @@ class EMTAPIRepository(EMTRepository):
                     message=f"No nearby stops found for stop {stop.stop_id}. Code: {response.get('code')}",
                 )
 
-            arrivals_data = response.get("data", [{}])[0].get("Arrive", [])
+            if response.get("code") == Stops.ARRIVAL["responses"]["api_limit_exceeded"]:
+                raise APILimitExceededError(
+                    f"API limit exceeded getting the arrivals of stop {stop.stop_id}"
+                )
+
+            arrivals_data = (response.get("data") or [{}])[0].get("Arrive", [])
 
             if not arrivals_data:
                 raise ArrivalsNotFoundError(
@@ -213,33 +465,70 @@ class EMTAPIRepository(EMTRepository):
                     message=f"No arrival information found for stop {stop.stop_id}",
                 )
 
-            line_arrivals = {}
-            for arrival in arrivals_data:
-                try:
-                    line_number = str(arrival["line"])
-                    if line_number not in line_arrivals:
-                        line_arrivals[line_number] = []
-                    line_arrivals[line_number].append(
-                        int(arrival["estimateArrive"]) // 60
-                    )
-                except (KeyError, ValueError):
-                    continue
-
-            for line in stop.stop_lines:
-                arrivals = line_arrivals.get(line.line_number, [])
-
-                sorted_arrivals = sorted(set(arrivals))
-
-                if not sorted_arrivals:
-                    line.arrival = None
-                    line.next_arrival = None
-                else:
-                    line.arrival = sorted_arrivals[0]
-                    line.next_arrival = (
-                        sorted_arrivals[1] if len(sorted_arrivals) > 1 else None
-                    )
+            if self._vehicle_index is None:
+                estimates = self._get_estimates(arrivals_data)
+            else:
+                arrivals_list = decode_list_of(Arrival, arrivals_data, "data[0].Arrive")
+                estimates = list(
+                    map(attrgetter("line", "estimate_arrive"), arrivals_list)
+                )
+            group_arrivals(stop, estimates)
+            if self._hooks:
+                self._hooks.on_arrival_estimates(stop.stop_id, estimates)
+
+            if self._vehicle_index is not None:
+                self._vehicle_index.update(
+                    stop.stop_id,
+                    self._get_bus_arrivals(stop.stop_id, arrivals_list),
+                )
 
             return stop
 
-        except Exception as e:
+        except PROPAGATED_ERRORS:
+            raise
+        except UPSTREAM_ERRORS as e:
             raise ArrivalsNotFoundError(stop.stop_id, str(e)) from e
+
+    def _get_estimates(self, arrivals: Any) -> list[tuple[str, int]]:
+        """Get the line number and seconds to arrival of every reported bus.
+
+        Arrivals of the expected types, i.e. nearly all of them, are read
+        directly, since building an ArrivalEstimate for each would cost more
+        than grouping them. Otherwise they are decoded with the schema, which
+        converts numeric line numbers and times or raises a precise error.
+        """
+        try:
+            estimates = [
+                (arrival["line"], arrival["estimateArrive"]) for arrival in arrivals
+            ]
+        except (KeyError, TypeError):
+            pass
+        else:
+            for line_number, eta in estimates:
+                if line_number.__class__ is not str or eta.__class__ is not int:
+                    break
+            else:
+                return estimates
+        return [
+            (arrival.line, arrival.estimate_arrive)
+            for arrival in decode_list_of(ArrivalEstimate, arrivals, "data[0].Arrive")
+        ]
+
+    def _get_bus_arrivals(
+        self, stop_id: int, arrivals: list[Arrival]
+    ) -> list[BusArrival]:
+        """Get the buses reported by the arrivals endpoint response."""
+        return [
+            BusArrival(
+                bus_id=arrival.bus,
+                line_number=arrival.line,
+                stop_id=stop_id,
+                eta=arrival.estimate_arrive,
+                distance=arrival.distance,
+                coordinates=(arrival.coordinates[0], arrival.coordinates[1])
+                if arrival.coordinates
+                else None,
+            )
+            for arrival in arrivals
+            if arrival.bus is not None
+        ]
@@ -0,0 +1,418 @@
+"""Typed schemas of the EMT API payloads.
+
+Every schema is a slotted dataclass listing, in field order, the JSON key,
+decoder and default of each field in ``FIELDS``. ``decode`` validates a JSON
+object once against a schema: unknown keys are skipped, missing required keys
+and invalid values raise a PayloadDecodeError naming the exact path, e.g.
+``data[0].stops[0].dataLine[2].startTime``. Defaults are immutable, since
+they are shared by every decoded object.
+
+Decoding stays close to walking the dicts by hand: values already of the
+field type are kept without calling their decoder, and the objects of the
+flat schemas, like the lines of the stop detail, are decoded once and shared
+by the next responses repeating them.
+"""
+
+from dataclasses import dataclass
+from datetime import time
+from operator import itemgetter
+from typing import Any, Callable, ClassVar, Optional, Sequence, TypeVar
+
+from emt_madrid.domain.exceptions import PayloadDecodeError
+
+T = TypeVar("T")
+Decoder = Callable[[Any], Any]
+
+REQUIRED = object()
+
+
+class _Invalid(Exception):
+    """Raised by a decoder for a value of the wrong type or format."""
+
+
+def _str(value: Any) -> str:
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(value)
+    raise _Invalid(f"expected a string, got {type(value).__name__}")
+
+
+def _int(value: Any) -> int:
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    if isinstance(value, str):
+        try:
+            return int(value)
+        except ValueError:
+            pass
+    raise _Invalid(f"expected an integer, got {value!r}")
+
+
+_TIMES: dict[str, time] = {}
+
+
+def _time(value: Any) -> time:
+    """Decode an "HH:MM" time, memoized since timetables repeat a few values."""
+    parsed = _TIMES.get(value) if isinstance(value, str) else None
+    if parsed is None:
+        try:
+            parsed = time.fromisoformat(value)
+        except (TypeError, ValueError):
+            raise _Invalid(f"expected an HH:MM time, got {value!r}") from None
+        if len(_TIMES) < 4096:
+            _TIMES[value] = parsed
+    return parsed
+
+
+def _coordinates(value: Any) -> list[float]:
+    """Decode the longitude and latitude of a GeoJSON point."""
+    try:
+        longitude, latitude = value["coordinates"][:2]
+        return [float(longitude), float(latitude)]
+    except (KeyError, TypeError, ValueError):
+        raise _Invalid(f"expected a point geometry, got {value!r}") from None
+
+
+def _strings(value: Any) -> list[str]:
+    """Decode a JSON array of strings."""
+    if not isinstance(value, list):
+        raise _Invalid(f"expected an array, got {type(value).__name__}")
+    return [_str(item) for item in value]
+
+
+def _list_of(schema: type[T]) -> Decoder:
+    def decode_list(value: Any) -> list[T]:
+        return decode_list_of(schema, value, "")
+
+    return decode_list
+
+
+# Decoders returning the values of a JSON type unchanged, so ``decode`` keeps
+# those values without calling the decoder.
+_NATIVE_TYPES: dict[Decoder, type] = {_str: str, _int: int}
+_SCALAR_DECODERS = frozenset({_str, _int, _time})
+MEMO_SIZE = 4096
+
+
+@dataclass(slots=True)
+class _Plan:
+    """
+    Decoding plan of a schema, computed once per schema.
+
+    Objects of schemas with scalar fields only are memoized by their raw
+    values, when every value is a string, since the lines and timetables of
+    a response repeat at every stop they serve. Decoded objects are frozen,
+    so they can be shared.
+    """
+
+    fields: tuple
+    getter: Callable[[Any], tuple]
+    memo: Optional[dict[tuple, Any]]
+
+
+_PLANS: dict[type, _Plan] = {}
+
+
+def _plan(schema: type) -> _Plan:
+    """Get the decoding plan of a schema."""
+    plan = _PLANS.get(schema)
+    if plan is None:
+        fields: tuple = getattr(schema, "FIELDS")
+        plan = _PLANS[schema] = _Plan(
+            fields=tuple(
+                (key, _NATIVE_TYPES.get(decoder), decoder, default)
+                for key, decoder, default in fields
+            ),
+            getter=itemgetter(*(key for key, _, _ in fields)),
+            memo={}
+            if len(fields) > 1
+            and all(decoder in _SCALAR_DECODERS for _, decoder, _ in fields)
+            else None,
+        )
+    return plan
+
+
+def _decode(schema: type[T], plan: _Plan, value: Any) -> T:
+    """Decode a JSON object, raising errors with a path relative to it."""
+    memo = plan.memo
+    raw = None
+    if memo is not None:
+        try:
+            raw = plan.getter(value)
+            decoded = memo.get(raw)
+        except (KeyError, TypeError):
+            raw = decoded = None
+        if decoded is not None:
+            return decoded
+    if not isinstance(value, dict):
+        raise PayloadDecodeError("", f"expected an object, got {type(value).__name__}")
+    get = value.get
+    values = []
+    for key, native, decoder, default in plan.fields:
+        item = get(key)
+        if item.__class__ is native:
+            values.append(item)
+        elif item is None:
+            if default is REQUIRED:
+                raise PayloadDecodeError(f".{key}", "missing required field")
+            values.append(default)
+        else:
+            try:
+                values.append(decoder(item))
+            except _Invalid as e:
+                raise PayloadDecodeError(f".{key}", str(e)) from None
+            except PayloadDecodeError as e:
+                raise PayloadDecodeError(f".{key}{e.path}", e.reason) from None
+    decoded = schema(*values)
+    if (
+        memo is not None
+        and raw is not None
+        and len(memo) < MEMO_SIZE
+        and all(item.__class__ is str for item in raw)
+    ):
+        memo[raw] = decoded
+    return decoded
+
+
+def decode(schema: type[T], value: Any, path: str) -> T:
+    """
+    Decode a JSON object into a schema.
+
+    Args:
+        schema: Schema class with its ``FIELDS``
+        value: Parsed JSON value
+        path: Path of the value in the response, used in the errors
+
+    Returns:
+        The decoded schema object
+
+    Raises:
+        PayloadDecodeError: If the value does not match the schema
+    """
+    try:
+        return _decode(schema, _plan(schema), value)
+    except PayloadDecodeError as e:
+        raise PayloadDecodeError(f"{path}{e.path}", e.reason) from None
+
+
+def decode_list_of(schema: type[T], value: Any, path: str) -> list[T]:
+    """
+    Decode a JSON array of objects into a list of schema objects.
+
+    The path of an invalid item is only built once decoding fails, by
+    decoding the items again up to the first invalid one.
+    """
+    if not isinstance(value, list):
+        raise PayloadDecodeError(path, f"expected an array, got {type(value).__name__}")
+    plan = _plan(schema)
+    try:
+        return [_decode(schema, plan, item) for item in value]
+    except PayloadDecodeError:
+        for index, item in enumerate(value):
+            try:
+                _decode(schema, plan, item)
+            except PayloadDecodeError as e:
+                raise PayloadDecodeError(f"{path}[{index}]{e.path}", e.reason) from None
+        raise
+
+
+@dataclass(frozen=True, slots=True)
+class DetailLine:
+    """Line of the stop detail endpoint, once per day type."""
+
+    label: str
+    header_a: str
+    header_b: str
+    max_frequency: int
+    min_frequency: int
+    start_time: time
+    stop_time: time
+    day_type: str
+
+    FIELDS: ClassVar[tuple] = (
+        ("label", _str, REQUIRED),
+        ("headerA", _str, REQUIRED),
+        ("headerB", _str, REQUIRED),
+        ("maxFreq", _int, REQUIRED),
+        ("minFreq", _int, REQUIRED),
+        ("startTime", _time, REQUIRED),
+        ("stopTime", _time, REQUIRED),
+        ("dayType", _str, REQUIRED),
+    )
+
+
+@dataclass(frozen=True, slots=True)
+class DetailStop:
+    """Stop of the stop detail endpoint."""
+
+    name: str
+    postal_address: str
+    coordinates: Sequence[float]
+    lines: Sequence[DetailLine]
+
+    FIELDS: ClassVar[tuple] = (
+        ("name", _str, "Unknown"),
+        ("postalAddress", _str, "Unknown"),
+        ("geometry", _coordinates, ()),
+        ("dataLine", _list_of(DetailLine), ()),
+    )
+
+
+@dataclass(frozen=True, slots=True)
+class AroundLine:
+    """Line of the around stop endpoint."""
+
+    line: str
+    name_a: str
+    name_b: str
+    to: str
+
+    FIELDS: ClassVar[tuple] = (
+        ("line", _str, REQUIRED),
+        ("nameA", _str, REQUIRED),
+        ("nameB", _str, REQUIRED),
+        ("to", _str, REQUIRED),
+    )
+
+
+@dataclass(frozen=True, slots=True)
+class AroundStop:
+    """Stop of the around stop endpoint."""
+
+    stop_id: int
+    name: str
+    address: str
+    coordinates: Sequence[float]
+    lines: Sequence[AroundLine]
+
+    FIELDS: ClassVar[tuple] = (
+        ("stopId", _int, REQUIRED),
+        ("stopName", _str, REQUIRED),
+        ("address", _str, REQUIRED),
+        ("geometry", _coordinates, REQUIRED),
+        ("lines", _list_of(AroundLine), ()),
+    )
+
+
+@dataclass(frozen=True, slots=True)
+class ArrivalEstimate:
+    """Estimated arrival of a bus at a stop, from the arrivals endpoint."""
+
+    line: str
+    estimate_arrive: int
+
+    FIELDS: ClassVar[tuple] = (
+        ("line", _str, REQUIRED),
+        ("estimateArrive", _int, REQUIRED),
+    )
+
+
+@dataclass(frozen=True, slots=True)
+class Arrival:
+    """Bus approaching a stop with its position, from the arrivals endpoint."""
+
+    line: str
+    estimate_arrive: int
+    bus: Optional[int]
+    distance: Optional[int]
+    coordinates: Optional[list[float]]
+
+    FIELDS: ClassVar[tuple] = (
+        ("line", _str, REQUIRED),
+        ("estimateArrive", _int, REQUIRED),
+        ("bus", _int, None),
+        ("DistanceBus", _int, None),
+        ("geometry", _coordinates, None),
+    )
+
+
+@dataclass(frozen=True, slots=True)
+class ListStop:
+    """Stop of the bulk stops list, with its "line/direction" codes."""
+
+    stop_id: int
+    name: str
+    postal_address: str
+    coordinates: Sequence[float]
+    lines: Sequence[str]
+
+    FIELDS: ClassVar[tuple] = (
+        ("node", _int, REQUIRED),
+        ("name", _str, "Unknown"),
+        ("postalAddress", _str, "Unknown"),
+        ("geometry", _coordinates, ()),
+        ("lines", _strings, ()),
+    )
+
+
+@dataclass(frozen=True, slots=True)
+class LineInfo:
+    """Line in service of the lines list."""
+
+    line: str
+    label: Optional[str]
+    name_a: str
+    name_b: str
+
+    FIELDS: ClassVar[tuple] = (
+        ("line", _str, REQUIRED),
+        ("label", _str, None),
+        ("nameA", _str, ""),
+        ("nameB", _str, ""),
+    )
+
+
+@dataclass(frozen=True, slots=True)
+class RouteTimetable:
+    """Timetable of a line for a day type, from the line stops endpoint."""
+
+    day_type: str
+    start_time: time
+    stop_time: time
+    min_frequency: int
+    max_frequency: int
+
+    FIELDS: ClassVar[tuple] = (
+        ("idDayType", _str, REQUIRED),
+        ("startTime", _time, REQUIRED),
+        ("stopTime", _time, REQUIRED),
+        ("minimumFrequency", _int, REQUIRED),
+        ("maximumFrequency", _int, REQUIRED),
+    )
+
+
+@dataclass(frozen=True, slots=True)
+class RouteStop:
+    """Stop of the route of a line, from the line stops endpoint."""
+
+    stop_id: int
+    name: str
+    postal_address: str
+    coordinates: Sequence[float]
+
+    FIELDS: ClassVar[tuple] = (
+        ("stop", _int, REQUIRED),
+        ("name", _str, "Unknown"),
+        ("postalAddress", _str, "Unknown"),
+        ("geometry", _coordinates, ()),
+    )
+
+
+@dataclass(frozen=True, slots=True)
+class LineRoute:
+    """Route of a line in a direction, from the line stops endpoint."""
+
+    label: str
+    name_a: str
+    name_b: str
+    timetables: Sequence[RouteTimetable]
+    stops: Sequence[RouteStop]
+
+    FIELDS: ClassVar[tuple] = (
+        ("label", _str, REQUIRED),
+        ("nameA", _str, REQUIRED),
+        ("nameB", _str, REQUIRED),
+        ("timeTable", _list_of(RouteTimetable), ()),
+        ("stops", _list_of(RouteStop), ()),
+    )
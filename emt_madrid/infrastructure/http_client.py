@@ -1,9 +1,13 @@
+import time
 from typing import Any, Dict, Optional, Union
 from urllib.parse import urljoin
 
 import aiohttp
 
+from emt_madrid.domain.hooks import ClientHooks, RequestInfo
 from emt_madrid.infrastructure.emt_api_config import EMTAPIConfig
+from emt_madrid.infrastructure.metrics import EMTMetrics
+from emt_madrid.infrastructure.transport import AiohttpTransport, Transport
 
 
 class HTTPClient:
@@ -13,14 +17,27 @@ class HTTPClient:
     Args:
         config: EMTAPIConfig object containing API configuration
         session: Optional aiohttp.ClientSession to use for HTTP requests
+        transport: Optional transport to use instead of the session, e.g. to
+            record or replay the exchanges
+        metrics: Optional metrics recording the latency, size and response
+            code of every request
+        hooks: Optional hooks notified before and after every request
     """
 
     def __init__(
-        self, config: EMTAPIConfig, session: Optional[aiohttp.ClientSession] = None
+        self,
+        config: EMTAPIConfig,
+        session: Optional[aiohttp.ClientSession] = None,
+        transport: Optional[Transport] = None,
+        metrics: Optional[EMTMetrics] = None,
+        hooks: Optional[ClientHooks] = None,
     ) -> None:
         """Initialize HTTPClient with default base URL"""
         self.session: Optional[aiohttp.ClientSession] = session
         self.base_url: str = config.BASE_URL
+        self.transport: Optional[Transport] = transport
+        self.metrics: Optional[EMTMetrics] = metrics
+        self.hooks: Optional[ClientHooks] = hooks
 
     async def exchange(
         self,
@@ -47,14 +64,32 @@ class HTTPClient:
             aiohttp.ClientResponseError: If HTTP response status is not successful
         """
         url = urljoin(self.base_url, endpoint)
+        transport = self.transport or AiohttpTransport(self.session)
+        if self.metrics is None and not self.hooks:
+            return await transport.send(method, url, params, data, headers)
 
-        async with self.session.request(
-            method=method,
-            url=url,
-            params=params,
-            json=data if isinstance(data, dict) else None,
-            data=data if not isinstance(data, dict) else None,
-            headers=headers,
-        ) as response:
-            response.raise_for_status()
-            return await response.json()
+        request = RequestInfo(method, endpoint, params, data)
+        if self.hooks:
+            self.hooks.before_request(request)
+        response = None
+        size = None
+        error = None
+        try:
+            response, size = await transport.send_measured(
+                method, url, params, data, headers
+            )
+            return response
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            if self.metrics is not None:
+                self.metrics.observe_exchange(
+                    method,
+                    endpoint,
+                    time.perf_counter() - request.started_at,
+                    response,
+                    size,
+                )
+            if self.hooks:
+                self.hooks.after_response(request, response, error)
@@ -0,0 +1,355 @@
+"""Client metrics and their exposition in the Prometheus text format."""
+
+import math
+import re
+from dataclasses import dataclass
+from typing import Any, Iterable, Optional, TypeVar
+
+from emt_madrid.infrastructure.emt_api_endpoints import Auth, Stops
+
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+LabelValues = tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str]) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Metric:
+    """
+    Base class of the metrics, holding one value per combination of labels.
+
+    Args:
+        name: Metric name
+        documentation: Help text of the metric
+        labelnames: Names of the labels
+    """
+
+    kind = "untyped"
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: tuple[str, ...] = ()
+    ) -> None:
+        """Initialize Metric object."""
+        self.name: str = name
+        self.documentation: str = documentation
+        self.labelnames: tuple[str, ...] = labelnames
+        self._values: dict[LabelValues, Any] = {}
+
+    def _key(self, labels: dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(
+                f"Metric {self.name} expects labels {self.labelnames}, got {tuple(labels)}"
+            )
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> list[tuple[str, str, float]]:
+        """Return the samples of the metric as (name, labels, value) tuples."""
+        return [
+            (self.name, _format_labels(self.labelnames, key), value)
+            for key, value in sorted(self._values.items())
+        ]
+
+    def render(self) -> str:
+        """Render the metric in the Prometheus text format."""
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        lines += [
+            f"{name}{labels} {_format_value(value)}"
+            for name, labels, value in self.samples()
+        ]
+        return "\n".join(lines) + "\n"
+
+
+class Counter(Metric):
+    """Monotonically increasing count."""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        """Increase the count of the given labels."""
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels: str) -> float:
+        """Get the count of the given labels."""
+        return self._values.get(self._key(labels), 0)
+
+
+class Gauge(Metric):
+    """Value that can go up and down."""
+
+    kind = "gauge"
+
+    def set(self, value: float, **labels: str) -> None:
+        """Set the value of the given labels."""
+        self._values[self._key(labels)] = value
+
+    def get(self, **labels: str) -> float:
+        """Get the value of the given labels."""
+        return self._values.get(self._key(labels), 0)
+
+
+@dataclass(slots=True)
+class _HistogramState:
+    """Bucket counts, sum and count of the observations of a label set."""
+
+    counts: list[int]
+    total: float = 0.0
+    count: int = 0
+
+
+class Histogram(Metric):
+    """
+    Distribution of observed values in cumulative buckets.
+
+    Args:
+        name: Metric name
+        documentation: Help text of the metric
+        labelnames: Names of the labels
+        buckets: Upper bounds of the buckets, in increasing order
+    """
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ) -> None:
+        """Initialize Histogram object."""
+        super().__init__(name, documentation, labelnames)
+        self.buckets: tuple[float, ...] = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value: float, **labels: str) -> None:
+        """Record an observed value for the given labels."""
+        key = self._key(labels)
+        state: Optional[_HistogramState] = self._values.get(key)
+        if state is None:
+            state = self._values[key] = _HistogramState([0] * len(self.buckets))
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                state.counts[index] += 1
+                break
+        state.total += value
+        state.count += 1
+
+    def count(self, **labels: str) -> int:
+        """Get the number of observations of the given labels."""
+        state: Optional[_HistogramState] = self._values.get(self._key(labels))
+        return state.count if state is not None else 0
+
+    def sum(self, **labels: str) -> float:
+        """Get the sum of the observations of the given labels."""
+        state: Optional[_HistogramState] = self._values.get(self._key(labels))
+        return state.total if state is not None else 0.0
+
+    def samples(self) -> list[tuple[str, str, float]]:
+        """Return the cumulative bucket, sum and count samples."""
+        result = []
+        for key, state in sorted(self._values.items(), key=lambda item: item[0]):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, state.counts):
+                cumulative += bucket_count
+                labels = _format_labels(
+                    self.labelnames + ("le",), key + (_format_value(bound),)
+                )
+                result.append((f"{self.name}_bucket", labels, cumulative))
+            labels = _format_labels(self.labelnames, key)
+            result.append((f"{self.name}_sum", labels, state.total))
+            result.append((f"{self.name}_count", labels, state.count))
+        return result
+
+
+M = TypeVar("M", bound=Metric)
+
+
+class MetricsRegistry:
+    """Collection of metrics rendered together in the Prometheus text format."""
+
+    def __init__(self) -> None:
+        """Initialize MetricsRegistry object."""
+        self._metrics: dict[str, Metric] = {}
+
+    def register(self, metric: M) -> M:
+        """
+        Add a metric to the registry.
+
+        Raises:
+            ValueError: If a metric with the same name is already registered
+        """
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def get(self, name: str) -> Optional[Metric]:
+        """Get a registered metric by name."""
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        """Render every registered metric in the Prometheus text format."""
+        return "".join(metric.render() for metric in self._metrics.values())
+
+
+def _endpoint_patterns() -> list[tuple[re.Pattern, str]]:
+    endpoints = [Auth.LOGIN, Stops.DETAIL, Stops.ARROUNDSTOP, Stops.ARRIVAL]
+    return [
+        (
+            re.compile(
+                "^"
+                + re.escape(endpoint["endpoint"]).replace(r"\{stop_id\}", r"\d+")
+                + "$"
+            ),
+            endpoint["endpoint"],
+        )
+        for endpoint in endpoints
+    ]
+
+
+_ENDPOINT_PATTERNS = _endpoint_patterns()
+
+
+def endpoint_label(endpoint: str) -> str:
+    """
+    Get the template of an endpoint, so stop IDs do not multiply the label values.
+
+    Args:
+        endpoint: Endpoint path of a request, e.g. "v1/transport/busemtmad/stops/72/detail/"
+
+    Returns:
+        The endpoint template, e.g. "v1/transport/busemtmad/stops/{stop_id}/detail/"
+    """
+    for pattern, template in _ENDPOINT_PATTERNS:
+        if pattern.match(endpoint):
+            return template
+    return re.sub(r"(?<=/)\d+(?=/|$)", "{id}", endpoint)
+
+
+class EMTMetrics:
+    """
+    Metrics of the EMT client stack.
+
+    Metrics:
+        emt_request_duration_seconds: Latency of the requests per endpoint
+        emt_response_size_bytes: Size of the response bodies per endpoint
+        emt_responses_total: Responses per endpoint and EMT response code, with
+            "error" when the request raised
+        emt_auth_refreshes_total: Logins per reason and outcome
+        emt_cache_requests_total: Cache lookups per kind and result
+        emt_cache_hit_ratio: Ratio of cache lookups served from the cache per kind
+
+    Args:
+        registry: Optional registry to register the metrics in
+    """
+
+    def __init__(self, registry: Optional[MetricsRegistry] = None) -> None:
+        """Initialize EMTMetrics object."""
+        self.registry: MetricsRegistry = registry or MetricsRegistry()
+        self.request_duration = self.registry.register(
+            Histogram(
+                "emt_request_duration_seconds",
+                "Latency of the EMT API requests.",
+                ("endpoint", "method"),
+                LATENCY_BUCKETS,
+            )
+        )
+        self.response_size = self.registry.register(
+            Histogram(
+                "emt_response_size_bytes",
+                "Size of the EMT API JSON responses.",
+                ("endpoint",),
+                SIZE_BUCKETS,
+            )
+        )
+        self.responses = self.registry.register(
+            Counter(
+                "emt_responses_total",
+                "EMT API responses by response code.",
+                ("endpoint", "code"),
+            )
+        )
+        self.auth_refreshes = self.registry.register(
+            Counter(
+                "emt_auth_refreshes_total",
+                "EMT API logins to get a new access token.",
+                ("reason", "outcome"),
+            )
+        )
+        self.cache_requests = self.registry.register(
+            Counter(
+                "emt_cache_requests_total",
+                "Cache lookups by result.",
+                ("kind", "result"),
+            )
+        )
+        self.cache_hit_ratio = self.registry.register(
+            Gauge(
+                "emt_cache_hit_ratio",
+                "Ratio of the cache lookups served from the cache.",
+                ("kind",),
+            )
+        )
+
+    def observe_exchange(
+        self,
+        method: str,
+        endpoint: str,
+        seconds: float,
+        response: Optional[dict[str, Any]],
+        size: Optional[int] = None,
+    ) -> None:
+        """
+        Record a request to the EMT API.
+
+        Args:
+            method: HTTP method of the request
+            endpoint: Endpoint path of the request
+            seconds: Latency of the request
+            response: Parsed JSON response, or None if the request raised
+            size: Size in bytes of the response body, if the transport knows it
+        """
+        label = endpoint_label(endpoint)
+        self.request_duration.observe(seconds, endpoint=label, method=method.upper())
+        if response is None:
+            self.responses.inc(endpoint=label, code="error")
+            return
+        self.responses.inc(endpoint=label, code=str(response.get("code", "")))
+        if size is not None:
+            self.response_size.observe(size, endpoint=label)
+
+    def count_auth_refresh(self, reason: str, success: bool) -> None:
+        """Record a login, e.g. because the token was missing or expired."""
+        self.auth_refreshes.inc(
+            reason=reason, outcome="success" if success else "failure"
+        )
+
+    def count_cache_lookup(self, kind: str, hit: bool) -> None:
+        """Record a cache lookup and update the hit ratio of its kind."""
+        self.cache_requests.inc(kind=kind, result="hit" if hit else "miss")
+        hits = self.cache_requests.get(kind=kind, result="hit")
+        misses = self.cache_requests.get(kind=kind, result="miss")
+        self.cache_hit_ratio.set(hits / (hits + misses), kind=kind)
+
+    def render(self) -> str:
+        """Render the metrics in the Prometheus text format."""
+        return self.registry.render()
@@ -0,0 +1,291 @@
+import json
+import os
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import date, datetime, time, timedelta
+from enum import IntEnum
+from pathlib import Path
+from typing import Any, Callable, Generator, Optional, Union
+
+from emt_madrid.domain.exceptions import QuotaThrottledError
+from emt_madrid.domain.service_calendar import MADRID_TIMEZONE
+from emt_madrid.infrastructure.emt_api_endpoints import Auth
+
+DEFAULT_DAILY_LIMIT = 20000
+UNATTRIBUTED = "unattributed"
+
+
+class Priority(IntEnum):
+    """Priority of the requests when the daily quota runs low."""
+
+    LOW = 0
+    HIGH = 1
+
+
+_priority: ContextVar[Priority] = ContextVar(
+    "emt_quota_priority", default=Priority.HIGH
+)
+
+
+@contextmanager
+def request_priority(priority: Priority) -> Generator[None, None, None]:
+    """
+    Set the priority of the requests made within the context.
+
+    The priority is inherited by the tasks created within the context, so a
+    whole catalog refresh or crawl can be marked as low priority at once.
+
+    Args:
+        priority: Priority of the requests
+    """
+    reset_token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(reset_token)
+
+
+class QuotaTracker:
+    """
+    Daily API quota accounting per account and endpoint.
+
+    Every request is counted per account, endpoint and day, with days following
+    the Madrid time zone in which the EMT quota resets. The counters are
+    reconciled with the usage reported by the login response, persisted to a
+    JSON file and used to forecast when the quota runs out at the current rate.
+
+    High-priority requests, like arrivals, are never held back. Low-priority
+    requests are throttled once the remaining quota drops to the reserve or
+    the quota is forecast to run out before the end of the day, so they do
+    not starve the arrivals traffic.
+
+    The counters are not shared between processes using the same file.
+
+    Args:
+        daily_limit: Daily requests allowed per account until the login reports it
+        reserve: Ratio of the daily limit kept for high-priority requests
+        path: Optional JSON file persisting the counters
+        window: Seconds of recent requests used to estimate the request rate
+        autosave_every: Number of requests between two saves of the counters
+        retention_days: Days of counters kept in the file
+        now: Clock returning the current aware datetime
+
+    Raises:
+        QuotaThrottledError: From acquire, when a low-priority request is held back
+    """
+
+    def __init__(
+        self,
+        daily_limit: int = DEFAULT_DAILY_LIMIT,
+        reserve: float = 0.2,
+        path: Optional[Union[str, Path]] = None,
+        window: float = 60 * 60,
+        autosave_every: int = 50,
+        retention_days: int = 7,
+        now: Optional[Callable[[], datetime]] = None,
+    ) -> None:
+        """Initialize QuotaTracker object."""
+        self._daily_limit: int = daily_limit
+        self._reserve: float = reserve
+        self._path: Optional[Path] = Path(path) if path is not None else None
+        self._window: float = window
+        self._autosave_every: int = autosave_every
+        self._retention_days: int = retention_days
+        self._now: Callable[[], datetime] = now or (
+            lambda: datetime.now(MADRID_TIMEZONE)
+        )
+        self._limits: dict[str, int] = {}
+        self._usage: dict[str, dict[str, dict[str, int]]] = {}
+        self._recent: dict[str, deque[tuple[int, int]]] = {}
+        self._unsaved: int = 0
+        if self._path is not None and self._path.exists():
+            self._load(self._path)
+
+    def acquire(self, account: str, endpoint: str) -> None:
+        """
+        Count a request about to be sent, unless its priority holds it back.
+
+        Args:
+            account: Account sending the request
+            endpoint: Endpoint template of the request
+
+        Raises:
+            QuotaThrottledError: If the request is low priority and the
+                quota must be preserved
+        """
+        if _priority.get() < Priority.HIGH and not self.allows(
+            account, _priority.get()
+        ):
+            raise QuotaThrottledError(
+                f"Low-priority request to {endpoint} throttled, "
+                f"{self.remaining(account)} requests left today"
+            )
+        self.record(account, endpoint)
+
+    def record(self, account: str, endpoint: str, count: int = 1) -> None:
+        """Count requests of an account to an endpoint."""
+        now = self._now()
+        usage = self._today(account, now)
+        usage[endpoint] = usage.get(endpoint, 0) + count
+
+        minute = int(now.timestamp() // 60)
+        recent = self._recent.setdefault(account, deque())
+        if recent and recent[-1][0] == minute:
+            recent[-1] = (minute, recent[-1][1] + count)
+        else:
+            recent.append((minute, count))
+        while recent and recent[0][0] <= minute - self._window / 60:
+            recent.popleft()
+
+        self._unsaved += count
+        if self._path is not None and self._unsaved >= self._autosave_every:
+            self.save()
+
+    def observe_response(self, account: str, response: dict[str, Any]) -> None:
+        """
+        Reconcile the counters with an EMT API response.
+
+        The usage reported by a successful login replaces a lower local count
+        and updates the daily limit, and an "API limit exceeded" code marks the
+        quota as exhausted.
+
+        Args:
+            account: Account that sent the request
+            response: Parsed JSON response
+        """
+        code = response.get("code")
+        if code == Auth.LOGIN["responses"]["api_limit_exceeded"]:
+            self.mark_exhausted(account)
+            return
+        if code != Auth.LOGIN["responses"]["authentication_successful"]:
+            return
+        data = response.get("data") or [{}]
+        counter = data[0].get("apiCounter") if isinstance(data[0], dict) else None
+        if isinstance(counter, dict):
+            self.sync(account, counter.get("current"), counter.get("dailyUse"))
+
+    def sync(
+        self,
+        account: str,
+        current: Optional[int],
+        daily_limit: Optional[int] = None,
+    ) -> None:
+        """
+        Align the counters with the usage reported by the API.
+
+        Requests counted by the API but not by this tracker, e.g. sent by
+        another process, are attributed to an "unattributed" endpoint.
+
+        Args:
+            account: Account the usage belongs to
+            current: Requests counted by the API today
+            daily_limit: Daily limit reported by the API
+        """
+        if daily_limit:
+            self._limits[account] = int(daily_limit)
+        if current is None:
+            return
+        missing = int(current) - self.used(account)
+        if missing > 0:
+            usage = self._today(account, self._now())
+            usage[UNATTRIBUTED] = usage.get(UNATTRIBUTED, 0) + missing
+
+    def mark_exhausted(self, account: str) -> None:
+        """Count the rest of today's quota of an account as used."""
+        remaining = self.remaining(account)
+        if remaining > 0:
+            usage = self._today(account, self._now())
+            usage[UNATTRIBUTED] = usage.get(UNATTRIBUTED, 0) + remaining
+
+    def daily_limit(self, account: str) -> int:
+        """Get the daily limit of an account."""
+        return self._limits.get(account, self._daily_limit)
+
+    def usage(self, account: str, day: Optional[date] = None) -> dict[str, int]:
+        """Get the requests of an account per endpoint on a day, today by default."""
+        day = day or self._now().date()
+        return dict(self._usage.get(account, {}).get(day.isoformat(), {}))
+
+    def used(self, account: str, day: Optional[date] = None) -> int:
+        """Get the requests of an account on a day, today by default."""
+        return sum(self.usage(account, day).values())
+
+    def remaining(self, account: str) -> int:
+        """Get the requests an account has left today."""
+        return max(0, self.daily_limit(account) - self.used(account))
+
+    def rate(self, account: str) -> float:
+        """Get the recent request rate of an account, in requests per second."""
+        recent = self._recent.get(account)
+        if not recent:
+            return 0.0
+        now = self._now().timestamp()
+        in_window = [
+            (minute, count)
+            for minute, count in recent
+            if (minute + 1) * 60 > now - self._window
+        ]
+        if not in_window:
+            return 0.0
+        hits = sum(count for _, count in in_window)
+        elapsed = min(self._window, max(60.0, now - in_window[0][0] * 60))
+        return hits / elapsed
+
+    def forecast_exhaustion(self, account: str) -> Optional[datetime]:
+        """
+        Forecast when the quota of an account runs out at the current rate.
+
+        Returns:
+            The forecast time, or None if the quota lasts until it resets
+        """
+        now = self._now()
+        remaining = self.remaining(account)
+        if remaining <= 0:
+            return now
+        rate = self.rate(account)
+        if rate <= 0:
+            return None
+        exhaustion = now + timedelta(seconds=remaining / rate)
+        reset = datetime.combine(now.date() + timedelta(days=1), time(), now.tzinfo)
+        return exhaustion if exhaustion < reset else None
+
+    def allows(self, account: str, priority: Priority) -> bool:
+        """Check whether a request of the given priority may be sent now."""
+        if priority >= Priority.HIGH:
+            return True
+        reserved = self.daily_limit(account) * self._reserve
+        return (
+            self.remaining(account) > reserved
+            and self.forecast_exhaustion(account) is None
+        )
+
+    def save(self) -> None:
+        """Write the counters to the file, replacing it atomically."""
+        if self._path is None:
+            return
+        oldest = (self._now().date() - timedelta(days=self._retention_days)).isoformat()
+        usage = {
+            account: {day: counts for day, counts in days.items() if day > oldest}
+            for account, days in self._usage.items()
+        }
+        temporary = self._path.with_name(self._path.name + ".tmp")
+        temporary.write_text(
+            json.dumps({"limits": self._limits, "usage": usage}), encoding="utf-8"
+        )
+        os.replace(temporary, self._path)
+        self._unsaved = 0
+
+    def _load(self, path: Path) -> None:
+        """Read the counters from a file."""
+        stored = json.loads(path.read_text(encoding="utf-8"))
+        self._limits = {
+            account: int(limit) for account, limit in stored.get("limits", {}).items()
+        }
+        self._usage = stored.get("usage", {})
+
+    def _today(self, account: str, now: datetime) -> dict[str, int]:
+        """Get the mutable counters of an account for the current day."""
+        return self._usage.setdefault(account, {}).setdefault(
+            now.date().isoformat(), {}
+        )
@@ -0,0 +1,59 @@
+import asyncio
+import time
+from typing import Callable
+
+
+class RateLimiter:
+    """
+    Token bucket limiting the rate of upstream requests.
+
+    Tokens are refilled continuously at ``rate`` per second up to ``burst``.
+    Callers waiting for a token are served in order.
+
+    Args:
+        rate: Number of requests allowed per second
+        burst: Maximum number of requests allowed at once
+        clock: Monotonic clock returning seconds
+
+    Methods:
+        try_acquire: Take a token if one is available
+        acquire: Wait until a token is available and take it
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: int = 1,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Initialize RateLimiter object."""
+        if rate <= 0 or burst < 1:
+            raise ValueError("Rate must be positive and burst at least 1")
+        self._rate: float = rate
+        self._burst: int = burst
+        self._clock: Callable[[], float] = clock
+        self._tokens: float = burst
+        self._updated_at: float = clock()
+        self._lock = asyncio.Lock()
+
+    def try_acquire(self) -> bool:
+        """Take a token if one is available, without waiting."""
+        self._refill()
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return True
+        return False
+
+    async def acquire(self) -> None:
+        """Wait until a token is available and take it."""
+        async with self._lock:
+            while not self.try_acquire():
+                await asyncio.sleep((1 - self._tokens) / self._rate)
+
+    def _refill(self) -> None:
+        """Add the tokens earned since the last update."""
+        now = self._clock()
+        self._tokens = min(
+            self._burst, self._tokens + (now - self._updated_at) * self._rate
+        )
+        self._updated_at = now
@@ -0,0 +1,459 @@
+import asyncio
+import ctypes
+import multiprocessing
+import os
+import queue
+import time
+from datetime import datetime
+from multiprocessing.context import BaseContext
+from multiprocessing.process import BaseProcess
+from multiprocessing.queues import Queue
+from typing import Any, Callable, Optional, Self, Union
+
+import aiohttp
+
+from emt_madrid.domain.exceptions import EMTError
+from emt_madrid.domain.hash_ring import HashRing
+from emt_madrid.domain.polling_policy import PollingPolicy
+from emt_madrid.domain.stop import Stop
+from emt_madrid.infrastructure.arrivals_scheduler import ArrivalsScheduler
+from emt_madrid.infrastructure.caching_repository import CachingEMTRepository
+from emt_madrid.infrastructure.emt_api_client import Credentials, EMTAuthenticatedClient
+from emt_madrid.infrastructure.emt_api_config import EMTAPIConfig
+from emt_madrid.infrastructure.emt_api_repository import EMTAPIRepository
+from emt_madrid.infrastructure.http_client import HTTPClient
+from emt_madrid.infrastructure.rate_limiter import RateLimiter
+
+TOKEN_SIZE = 256
+
+Command = tuple[str, int]
+Result = tuple[int, Union[Stop, str]]
+
+
+class SharedRateLimiter(RateLimiter):
+    """
+    Token bucket shared by several processes.
+
+    The bucket lives in shared memory, so every process drawing from it
+    respects the same overall rate. It must be passed to the processes when
+    they are created.
+
+    Args:
+        rate: Number of requests allowed per second, across every process
+        burst: Maximum number of requests allowed at once
+        clock: Monotonic clock returning seconds, shared by the processes
+        context: Optional multiprocessing context creating the shared memory
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: int = 1,
+        clock: Callable[[], float] = time.monotonic,
+        context: Optional[BaseContext] = None,
+    ) -> None:
+        """Initialize SharedRateLimiter object."""
+        super().__init__(rate, burst, clock)
+        context = context or multiprocessing.get_context()
+        self._state = context.Array("d", [float(burst), clock()])
+
+    def __getstate__(self) -> dict[str, Any]:
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._lock = asyncio.Lock()
+
+    def try_acquire(self) -> bool:
+        """Take a token from the shared bucket if one is available, without waiting."""
+        with self._state.get_lock():
+            now = self._clock()
+            tokens, updated_at = self._state[0], self._state[1]
+            tokens = min(self._burst, tokens + (now - updated_at) * self._rate)
+            acquired = tokens >= 1
+            self._state[0] = tokens - 1 if acquired else tokens
+            self._state[1] = now
+        return acquired
+
+    async def acquire(self) -> None:
+        """Wait until a token of the shared bucket is available and take it."""
+        async with self._lock:
+            while not self.try_acquire():
+                await asyncio.sleep(1 / self._rate)
+
+
+class SharedToken:
+    """
+    Access token shared by several processes.
+
+    The processes read the token from shared memory, and a process finding
+    it missing or expired logs in while holding a shared lock, so a single
+    login serves every process.
+
+    Args:
+        context: Optional multiprocessing context creating the shared memory
+
+    Methods:
+        get: Get the token and its expiration
+        set: Store a new token
+    """
+
+    def __init__(self, context: Optional[BaseContext] = None) -> None:
+        """Initialize SharedToken object."""
+        context = context or multiprocessing.get_context()
+        self._token = context.Array(ctypes.c_char, TOKEN_SIZE)
+        self._expires_at = context.Value("d", 0.0, lock=False)
+        self.refresh_lock = context.Lock()
+
+    def get(self) -> tuple[Optional[str], Optional[datetime]]:
+        """Get the token and its expiration, if any process logged in."""
+        with self._token.get_lock():
+            token = self._token.value.decode()
+            expires_at = self._expires_at.value
+        if not token:
+            return None, None
+        return token, datetime.fromtimestamp(expires_at) if expires_at else None
+
+    def set(self, token: str, expires_at: Optional[datetime]) -> None:
+        """
+        Store a new token.
+
+        Raises:
+            ValueError: If the token does not fit in the shared memory
+        """
+        encoded = token.encode()
+        if len(encoded) >= TOKEN_SIZE:
+            raise ValueError(f"Tokens are limited to {TOKEN_SIZE - 1} bytes")
+        with self._token.get_lock():
+            self._token.value = encoded
+            self._expires_at.value = expires_at.timestamp() if expires_at else 0.0
+
+
+class SharedTokenAuthenticatedClient(EMTAuthenticatedClient):
+    """
+    Authenticated client adopting the token of the other processes.
+
+    Before logging in, the client takes the token stored by another process,
+    and only logs in if it is missing or expired too. The new token is then
+    stored for the others. If the login lock is not released in time, e.g.
+    because the worker holding it crashed, the client logs in on its own.
+
+    Args:
+        http_client: An instance of HTTPClient for making HTTP requests
+        credentials: User credentials for authentication
+        shared_token: Token shared with the other processes
+        lock_timeout: Seconds to wait for the login lock before logging in
+            without it
+    """
+
+    def __init__(
+        self,
+        http_client: HTTPClient,
+        credentials: Credentials,
+        shared_token: SharedToken,
+        lock_timeout: float = 10,
+        **kwargs: Any,
+    ) -> None:
+        """Initialize SharedTokenAuthenticatedClient object."""
+        super().__init__(http_client, credentials, **kwargs)
+        self._shared_token: SharedToken = shared_token
+        self._lock_timeout: float = lock_timeout
+
+    async def _authenticate(self) -> None:
+        """Adopt the shared token, or log in once for every process."""
+        if self._adopt_shared_token():
+            return
+        locked = await self._acquire_refresh_lock()
+        try:
+            if self._adopt_shared_token():
+                return
+            await super()._authenticate()
+            if self._token.token is not None:
+                self._shared_token.set(self._token.token, self._token.expires_at)
+        finally:
+            if locked:
+                self._shared_token.refresh_lock.release()
+
+    async def _acquire_refresh_lock(self) -> bool:
+        """Wait for the login lock off the loop, releasing it if the wait is cancelled."""
+        lock = self._shared_token.refresh_lock
+        waiting = asyncio.ensure_future(
+            asyncio.to_thread(lock.acquire, True, self._lock_timeout)
+        )
+        try:
+            return await asyncio.shield(waiting)
+        except asyncio.CancelledError:
+            waiting.add_done_callback(lambda task: task.result() and lock.release())
+            raise
+
+    def _adopt_shared_token(self) -> bool:
+        """Take the shared token if it is valid and newer than the local one."""
+        token, expires_at = self._shared_token.get()
+        if token is None or token == self._token.token:
+            return False
+        if expires_at is not None and expires_at < datetime.now():
+            return False
+        self._token.token = token
+        self._token.expires_at = expires_at
+        return True
+
+
+def _poll_shard(
+    stop_ids: list[int],
+    credentials: Credentials,
+    config: EMTAPIConfig,
+    policy: Optional[PollingPolicy],
+    max_concurrency: int,
+    shared_token: SharedToken,
+    rate_limiter: Optional[SharedRateLimiter],
+    commands: Queue[Command],
+    results: Queue[Result],
+) -> None:
+    """Poll the stops of a shard in a worker process until told to stop."""
+    asyncio.run(
+        _poll_shard_async(
+            stop_ids,
+            credentials,
+            config,
+            policy,
+            max_concurrency,
+            shared_token,
+            rate_limiter,
+            commands,
+            results,
+        )
+    )
+
+
+async def _poll_shard_async(
+    stop_ids: list[int],
+    credentials: Credentials,
+    config: EMTAPIConfig,
+    policy: Optional[PollingPolicy],
+    max_concurrency: int,
+    shared_token: SharedToken,
+    rate_limiter: Optional[SharedRateLimiter],
+    commands: Queue[Command],
+    results: Queue[Result],
+) -> None:
+    """Poll the stops of a shard, applying the commands of the parent process."""
+    async with aiohttp.ClientSession() as session:
+        repository = CachingEMTRepository(
+            EMTAPIRepository(
+                SharedTokenAuthenticatedClient(
+                    HTTPClient(config=config, session=session),
+                    credentials,
+                    shared_token,
+                )
+            ),
+            rate_limiter=rate_limiter,
+        )
+        scheduler = ArrivalsScheduler(
+            repository,
+            policy,
+            on_update=lambda stop: results.put((stop.stop_id, stop)),
+            max_concurrency=max_concurrency,
+        )
+        pending: set[asyncio.Task] = set()
+
+        async def add(stop_id: int) -> None:
+            try:
+                scheduler.add_stop(await repository.get_stop_info(stop_id))
+            except EMTError as e:
+                results.put((stop_id, str(e)))
+
+        def schedule(stop_id: int) -> None:
+            task = asyncio.create_task(add(stop_id))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+
+        for stop_id in stop_ids:
+            schedule(stop_id)
+        polling = asyncio.create_task(scheduler.run())
+        try:
+            while True:
+                command, stop_id = await asyncio.to_thread(commands.get)
+                if command == "add":
+                    schedule(stop_id)
+                elif command == "remove":
+                    scheduler.remove_stop(stop_id)
+                else:
+                    break
+        finally:
+            polling.cancel()
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(polling, *pending, return_exceptions=True)
+
+
+class ShardedPoller:
+    """
+    Poll the arrivals of many stops from a pool of worker processes.
+
+    Stops are sharded across the workers with a consistent hash ring, and
+    every worker polls its stops with its own event loop, HTTP session,
+    cache and ArrivalsScheduler, so JSON decoding scales with the cores.
+    The workers share a single access token, logged in once by the first
+    worker needing it, and an optional rate limiter drawing from a single
+    bucket, so adding workers multiplies neither the logins nor the request
+    rate. Refreshed stops are sent back to the parent process.
+
+    The poller is a context manager starting the workers on enter and
+    stopping them on exit.
+
+    Args:
+        email: EMT API account email
+        password: EMT API account password
+        stop_ids: IDs of the bus stops to poll
+        workers: Optional number of worker processes, defaults to the CPU count
+        policy: Optional policy deciding the interval between two polls of a stop
+        rate: Optional number of upstream requests per second, across every worker
+        burst: Maximum number of upstream requests allowed at once
+        max_concurrency: Maximum number of arrivals requests in flight per worker
+        config: Optional EMT API configuration, e.g. to use another base URL
+        start_method: Multiprocessing start method of the workers
+
+    Methods:
+        start: Start the worker processes
+        add_stop: Start polling a stop
+        remove_stop: Stop polling a stop
+        collect: Get the stops refreshed by the workers
+        close: Stop the worker processes
+    """
+
+    def __init__(
+        self,
+        email: str,
+        password: str,
+        stop_ids: list[int],
+        workers: Optional[int] = None,
+        policy: Optional[PollingPolicy] = None,
+        rate: Optional[float] = None,
+        burst: int = 1,
+        max_concurrency: int = 10,
+        config: Optional[EMTAPIConfig] = None,
+        start_method: str = "spawn",
+    ) -> None:
+        """Initialize ShardedPoller object."""
+        self._credentials: Credentials = Credentials(email=email, password=password)
+        self._stop_ids: list[int] = list(stop_ids)
+        self._workers: int = workers or os.cpu_count() or 1
+        self._policy: Optional[PollingPolicy] = policy
+        self._max_concurrency: int = max_concurrency
+        self._config: EMTAPIConfig = config or EMTAPIConfig()
+        self._context: BaseContext = multiprocessing.get_context(start_method)
+        self._rate_limiter: Optional[SharedRateLimiter] = (
+            SharedRateLimiter(rate, burst, context=self._context)
+            if rate is not None
+            else None
+        )
+        self._shared_token: SharedToken = SharedToken(self._context)
+        self._ring: HashRing = HashRing(range(self._workers))
+        self._results: Queue[Result] = self._context.Queue()
+        self._commands: list[Queue[Command]] = []
+        self._processes: list[BaseProcess] = []
+        self._removed: set[int] = set()
+        self.stops: dict[int, Stop] = {}
+        self.errors: dict[int, str] = {}
+
+    def __enter__(self) -> Self:
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def shard(self, stop_id: int) -> int:
+        """Get the worker polling a stop."""
+        return self._ring.shard(stop_id)
+
+    def start(self) -> None:
+        """Start the worker processes, each one with its shard of the stops."""
+        if self._processes:
+            return
+        shards: list[list[int]] = [[] for _ in range(self._workers)]
+        for stop_id in self._stop_ids:
+            shards[self.shard(stop_id)].append(stop_id)
+        for index, stop_ids in enumerate(shards):
+            commands = self._context.Queue()
+            process: BaseProcess = getattr(self._context, "Process")(
+                target=_poll_shard,
+                args=(
+                    stop_ids,
+                    self._credentials,
+                    self._config,
+                    self._policy,
+                    self._max_concurrency,
+                    self._shared_token,
+                    self._rate_limiter,
+                    commands,
+                    self._results,
+                ),
+                name=f"emt-madrid-shard-{index}",
+                daemon=True,
+            )
+            process.start()
+            self._commands.append(commands)
+            self._processes.append(process)
+
+    def add_stop(self, stop_id: int) -> None:
+        """Start polling a stop in the worker of its shard."""
+        self._removed.discard(stop_id)
+        self._commands[self.shard(stop_id)].put(("add", stop_id))
+
+    def remove_stop(self, stop_id: int) -> None:
+        """
+        Stop polling a stop.
+
+        Results of the stop already sent by its worker are ignored by
+        ``collect`` until the stop is added again.
+        """
+        self._removed.add(stop_id)
+        self._commands[self.shard(stop_id)].put(("remove", stop_id))
+        self.stops.pop(stop_id, None)
+        self.errors.pop(stop_id, None)
+
+    def collect(self, timeout: Optional[float] = None) -> list[Stop]:
+        """
+        Get the stops refreshed by the workers since the previous call.
+
+        Args:
+            timeout: Optional seconds to wait for the first result, waits
+                forever if None and returns at once if 0
+
+        Returns:
+            The refreshed stops, in the order they were received. The latest
+            arrivals of every stop are kept in ``stops``, and the stops that
+            could not be retrieved in ``errors``
+        """
+        updated = []
+        block = timeout != 0
+        while True:
+            try:
+                message = self._results.get(block=block, timeout=timeout or None)
+            except queue.Empty:
+                return updated
+            block = False
+            stop_id, result = message
+            if stop_id in self._removed:
+                continue
+            if isinstance(result, Stop):
+                self.stops[stop_id] = result
+                self.errors.pop(stop_id, None)
+                updated.append(result)
+            else:
+                self.errors[stop_id] = result
+
+    def close(self, timeout: Optional[float] = 5) -> None:
+        """Stop the worker processes, terminating those not stopped in time."""
+        for commands in self._commands:
+            commands.put(("stop", 0))
+        for process in self._processes:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+                process.join()
+        self._commands = []
+        self._processes = []
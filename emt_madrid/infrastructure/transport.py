@@ -0,0 +1,287 @@
+"""Pluggable transports used by HTTPClient to exchange requests."""
+
+import asyncio
+import json
+import time
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+import aiohttp
+
+REDACTED = "redacted"
+REDACTED_FIELDS = frozenset(
+    {"accessToken", "email", "idUser", "password", "userName", "username"}
+)
+
+
+class Transport(ABC):
+    """Transport interface sending a request and returning the JSON response."""
+
+    @abstractmethod
+    async def send(
+        self,
+        method: str,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        data: Optional[Union[Dict[str, Any], str]] = None,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> Dict[str, Any]:
+        """Send a request and return the parsed JSON response."""
+        raise NotImplementedError
+
+    async def send_measured(
+        self,
+        method: str,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        data: Optional[Union[Dict[str, Any], str]] = None,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> tuple[Dict[str, Any], Optional[int]]:
+        """Send a request and return the parsed JSON response and its size, if known."""
+        return await self.send(method, url, params, data, headers), None
+
+
+class AiohttpTransport(Transport):
+    """
+    Transport sending the requests over an aiohttp session.
+
+    Args:
+        session: aiohttp.ClientSession to use for HTTP requests
+    """
+
+    def __init__(self, session: Optional[aiohttp.ClientSession]) -> None:
+        """Initialize AiohttpTransport object."""
+        self.session: Optional[aiohttp.ClientSession] = session
+
+    async def send(
+        self,
+        method: str,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        data: Optional[Union[Dict[str, Any], str]] = None,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Send a request over the session.
+
+        Raises:
+            aiohttp.ClientResponseError: If HTTP response status is not successful
+        """
+        response, _ = await self.send_measured(method, url, params, data, headers)
+        return response
+
+    async def send_measured(
+        self,
+        method: str,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        data: Optional[Union[Dict[str, Any], str]] = None,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> tuple[Dict[str, Any], Optional[int]]:
+        """
+        Send a request over the session, measuring the size of the response body.
+
+        Raises:
+            aiohttp.ClientResponseError: If HTTP response status is not successful
+        """
+        async with self.session.request(
+            method=method,
+            url=url,
+            params=params,
+            json=data if isinstance(data, dict) else None,
+            data=data if not isinstance(data, dict) else None,
+            headers=headers,
+        ) as response:
+            response.raise_for_status()
+            parsed = await response.json()
+            return parsed, len(await response.read())
+
+
+class CassetteMissError(LookupError):
+    """Raised when a replayed request has no recorded response left."""
+
+
+def _request_key(
+    method: str,
+    url: str,
+    params: Optional[Dict[str, Any]],
+    data: Optional[Union[Dict[str, Any], str]],
+) -> str:
+    """Build the key identifying a request in a cassette, ignoring headers."""
+    return json.dumps([method.upper(), url, params, data], sort_keys=True)
+
+
+def _redact(value: Any) -> Any:
+    """Replace the values of credential and personal fields."""
+    if isinstance(value, dict):
+        return {
+            key: REDACTED if key in REDACTED_FIELDS else _redact(item)
+            for key, item in value.items()
+        }
+    if isinstance(value, list):
+        return [_redact(item) for item in value]
+    return value
+
+
+def _shift_dates(value: Any, offset_ms: int) -> Any:
+    """Shift every ``{"$date": ms}`` timestamp of a response by an offset."""
+    if isinstance(value, dict):
+        if set(value) == {"$date"} and isinstance(value["$date"], int):
+            return {"$date": value["$date"] + offset_ms}
+        return {key: _shift_dates(item, offset_ms) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_shift_dates(item, offset_ms) for item in value]
+    return value
+
+
+class RecordingTransport(Transport):
+    """
+    Transport recording every exchange of another transport to a cassette.
+
+    Each exchange is appended to the cassette as one compact JSON line with
+    the request, the response and its latency. Request headers are not
+    recorded and credentials or personal fields of the responses are redacted.
+
+    The lines are buffered and appended in batches from a worker thread, so
+    the event loop never waits for the file. The transport must be closed to
+    write the lines still buffered.
+
+    Args:
+        transport: Transport actually sending the requests
+        path: Path of the cassette file, created or appended to
+        buffer_size: Number of exchanges buffered before they are written
+
+    Methods:
+        flush: Write the buffered exchanges to the cassette
+        close: Write the buffered exchanges, once the recording is over
+    """
+
+    def __init__(
+        self, transport: Transport, path: Union[str, Path], buffer_size: int = 100
+    ) -> None:
+        """Initialize RecordingTransport object."""
+        self._transport: Transport = transport
+        self._path: Path = Path(path)
+        self._buffer_size: int = buffer_size
+        self._buffer: list[str] = []
+        self._write_lock: asyncio.Lock = asyncio.Lock()
+
+    async def send(
+        self,
+        method: str,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        data: Optional[Union[Dict[str, Any], str]] = None,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> Dict[str, Any]:
+        """Send a request through the wrapped transport and record it."""
+        response, _ = await self.send_measured(method, url, params, data, headers)
+        return response
+
+    async def send_measured(
+        self,
+        method: str,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        data: Optional[Union[Dict[str, Any], str]] = None,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> tuple[Dict[str, Any], Optional[int]]:
+        """Send a request through the wrapped transport and record it."""
+        started_at = time.perf_counter()
+        response, size = await self._transport.send_measured(
+            method, url, params, data, headers
+        )
+        latency = time.perf_counter() - started_at
+
+        interaction = {
+            "key": _request_key(method, url, params, data),
+            "response": _redact(response),
+            "latency": round(latency, 6),
+            "recorded_at": int(time.time() * 1000),
+        }
+        self._buffer.append(
+            json.dumps(interaction, ensure_ascii=False, separators=(",", ":")) + "\n"
+        )
+        if len(self._buffer) >= self._buffer_size:
+            await self.flush()
+        return response, size
+
+    async def flush(self) -> None:
+        """Write the buffered exchanges to the cassette, in the recorded order."""
+        async with self._write_lock:
+            lines, self._buffer = self._buffer, []
+            if lines:
+                await asyncio.to_thread(self._write, lines)
+
+    async def close(self) -> None:
+        """Write the exchanges still buffered."""
+        await self.flush()
+
+    def _write(self, lines: list[str]) -> None:
+        """Append lines to the cassette."""
+        with self._path.open("a", encoding="utf-8") as cassette:
+            cassette.writelines(lines)
+
+
+class ReplayTransport(Transport):
+    """
+    Transport answering requests from a recorded cassette, with no network.
+
+    Responses of the same request are returned in the order they were
+    recorded. Timestamps like token expiration dates are shifted by the time
+    elapsed since the recording, so replayed tokens are still valid.
+
+    Args:
+        path: Path of the cassette file
+        loop: Whether to start again from the first response of a request once
+            all of them have been replayed, to replay at larger volumes
+        replay_latency: Whether to wait for the recorded latency of each response
+        latency_scale: Factor applied to the recorded latencies
+
+    Raises:
+        CassetteMissError: When a request has no recorded response left
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        loop: bool = False,
+        replay_latency: bool = False,
+        latency_scale: float = 1.0,
+    ) -> None:
+        """Initialize ReplayTransport object."""
+        self._loop: bool = loop
+        self._replay_latency: bool = replay_latency
+        self._latency_scale: float = latency_scale
+        self._interactions: dict[str, list[dict[str, Any]]] = defaultdict(list)
+        self._positions: dict[str, int] = defaultdict(int)
+        with Path(path).open(encoding="utf-8") as cassette:
+            for line in cassette:
+                if line.strip():
+                    interaction = json.loads(line)
+                    self._interactions[interaction["key"]].append(interaction)
+
+    async def send(
+        self,
+        method: str,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        data: Optional[Union[Dict[str, Any], str]] = None,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> Dict[str, Any]:
+        """Return the next recorded response of a request."""
+        key = _request_key(method, url, params, data)
+        interactions = self._interactions.get(key)
+        position = self._positions[key]
+        if not interactions or (position >= len(interactions) and not self._loop):
+            raise CassetteMissError(f"No recorded response for {method} {url}")
+
+        interaction = interactions[position % len(interactions)]
+        self._positions[key] = position + 1
+        if self._replay_latency:
+            await asyncio.sleep(interaction["latency"] * self._latency_scale)
+
+        offset_ms = int(time.time() * 1000) - interaction["recorded_at"]
+        return _shift_dates(interaction["response"], offset_ms)
@@ -1,15 +1,27 @@
-from typing import Optional
+from typing import AsyncIterator, Optional
 
 import aiohttp
 
+from emt_madrid.domain.arrival_estimator import ArrivalEstimator
+from emt_madrid.domain.arrival_extrapolator import ArrivalExtrapolator
+from emt_madrid.domain.arrivals_diff import ArrivalChange
 from emt_madrid.domain.emt_repository import EMTRepository
+from emt_madrid.domain.hooks import ClientHooks
+from emt_madrid.domain.line_timeline import LineTimeline
+from emt_madrid.domain.service_calendar import ServiceCalendar
 from emt_madrid.domain.stop import Stop
+from emt_madrid.domain.vehicle_index import VehicleIndex
+from emt_madrid.infrastructure.arrivals_monitor import ArrivalsMonitor
 from emt_madrid.infrastructure.emt_api_client import Credentials, EMTAuthenticatedClient
 from emt_madrid.infrastructure.emt_api_config import EMTAPIConfig
 from emt_madrid.infrastructure.http_client import HTTPClient
+from emt_madrid.infrastructure.metrics import EMTMetrics
+from emt_madrid.infrastructure.quota_tracker import QuotaTracker
+from emt_madrid.infrastructure.transport import Transport
 from emt_madrid.infrastructure.emt_api_repository import EMTAPIRepository
 from emt_madrid.use_cases.get_stop_info import GetStopInfo
 from emt_madrid.use_cases.get_arrivals import GetArrivals
+from emt_madrid.use_cases.get_line_arrivals import GetLineArrivals
 
 
 class EMTClient:
@@ -22,10 +34,33 @@ class EMTClient:
         stop_id: ID of the bus stop to monitor
         session: aiohttp.ClientSession to use for HTTP requests
         lines: Optional list of bus lines to filter
+        max_staleness: Optional maximum age, in seconds, of the fetched arrivals.
+            When set, arrivals are extrapolated locally from the last fetch
+            until they are older than this bound
+        refresh_threshold: Arrival time, in minutes, that forces a refresh when
+            reached by an extrapolated arrival or next arrival
+        service_calendar: Optional calendar used to skip arrivals requests
+            while no line of the stop is in service
+        transport: Optional transport to use instead of the session, e.g. to
+            record or replay the exchanges
+        config: Optional EMT API configuration, e.g. to use another base URL
+        metrics: Optional metrics of the requests and token refreshes, which
+            can be rendered in the Prometheus text format
+        hooks: Optional hooks notified of the requests, token refreshes,
+            results served without a request and arrivals estimated by the
+            fallback, e.g. for tracing
+        quota: Optional tracker counting the requests against the daily quota
+            of the account and holding back low-priority requests
+        fallback: Optional estimator returning arrivals estimated from the
+            timetable, flagged with ``is_estimate``, when the API fails
+        vehicle_index: Optional index of the buses reported by every arrivals
+            response, e.g. to draw the live fleet without extra requests
 
     Methods:
         initialize: Initialize the client
         get_arrivals: Get information about arrivals at a specific stop
+        watch: Iterate over the arrival updates of one or more stops
+        watch_changes: Iterate over the arrival changes of one or more stops
     """
 
     def __init__(
@@ -35,22 +70,52 @@ class EMTClient:
         stop_id: int,
         session: aiohttp.ClientSession,
         lines: Optional[list[str]] = None,
+        max_staleness: Optional[float] = None,
+        refresh_threshold: int = 1,
+        service_calendar: Optional[ServiceCalendar] = None,
+        transport: Optional[Transport] = None,
+        config: Optional[EMTAPIConfig] = None,
+        metrics: Optional[EMTMetrics] = None,
+        hooks: Optional[ClientHooks] = None,
+        quota: Optional[QuotaTracker] = None,
+        fallback: Optional[ArrivalEstimator] = None,
+        vehicle_index: Optional[VehicleIndex] = None,
     ) -> None:
         """Initialize EMT client."""
-        self._repository: EMTRepository | None = None
         self._stop_id: int = stop_id
         self._lines: Optional[list[str]] = lines
         self._email: str = email
         self._password: str = password
         self._session: aiohttp.ClientSession = session
         self._stop: Stop | None = None
-        http_client = HTTPClient(config=EMTAPIConfig(), session=self._session)
+        self._service_calendar: Optional[ServiceCalendar] = service_calendar
+        self._extrapolator: ArrivalExtrapolator | None = None
+        self._monitor: ArrivalsMonitor | None = None
+        self._hooks: Optional[ClientHooks] = hooks
+        self._fallback: Optional[ArrivalEstimator] = fallback
+        if max_staleness is not None:
+            self._extrapolator = ArrivalExtrapolator(
+                max_staleness=max_staleness, refresh_threshold=refresh_threshold
+            )
+        http_client = HTTPClient(
+            config=config or EMTAPIConfig(),
+            session=self._session,
+            transport=transport,
+            metrics=metrics,
+            hooks=hooks,
+        )
         credentials = Credentials(email=self._email, password=self._password)
         emt_authenticated_client = EMTAuthenticatedClient(
-            http_client=http_client, credentials=credentials
+            http_client=http_client,
+            credentials=credentials,
+            metrics=metrics,
+            hooks=hooks,
+            quota=quota,
         )
-        self._repository = EMTAPIRepository(
-            emt_authenticated_client=emt_authenticated_client
+        self._repository: EMTRepository = EMTAPIRepository(
+            emt_authenticated_client=emt_authenticated_client,
+            hooks=hooks,
+            vehicle_index=vehicle_index,
         )
 
     async def get_stop_info(self) -> Stop:
@@ -71,14 +136,126 @@ class EMTClient:
         """
         Get information about arrivals at a specific stop.
 
+        When ``max_staleness`` is set, the arrivals are extrapolated from the
+        last fetch and the API is only queried again once they become stale.
+
         Returns:
             The same Stop object with updated arrival information for each line
 
         Raises:
             ValueError: If the arrival information cannot be retrieved
         """
-        if self._stop is None:
-            await self.get_stop_info()
-        get_arrivals = GetArrivals(self._repository, self._stop)
+        stop = self._stop
+        if stop is None:
+            stop = await self.get_stop_info()
+        if self._extrapolator is not None and not self._extrapolator.needs_refresh(
+            stop
+        ):
+            if self._hooks:
+                self._hooks.on_cache_hit("extrapolated_arrivals", self._stop_id)
+            return self._extrapolator.extrapolate(stop)
+        get_arrivals = GetArrivals(
+            self._repository,
+            stop,
+            self._service_calendar,
+            self._hooks,
+            self._fallback,
+        )
         self._stop = await get_arrivals.execute()
+        if self._extrapolator is not None and not any(
+            line.is_estimate for line in self._stop.stop_lines
+        ):
+            self._extrapolator.record(self._stop)
         return self._stop
+
+    async def get_all_stops(self) -> list[Stop]:
+        """
+        Get information about every stop of the network.
+
+        Returns:
+            A Stop object for every stop, with the number, origin and
+            destination of its lines
+
+        Raises:
+            StopNotFoundError: If the stops cannot be retrieved
+        """
+        return await self._repository.get_all_stops()
+
+    async def get_line_arrivals(
+        self, line_id: str, direction: int = 1, max_concurrency: int = 8
+    ) -> LineTimeline:
+        """
+        Get the arrivals of a bus line at every stop of its route.
+
+        Args:
+            line_id: ID or number of the bus line
+            direction: 1 for the trips to the destination, 2 for the trips back
+            max_concurrency: Maximum number of arrivals requests in flight
+
+        Returns:
+            The timeline of the line, with one entry per stop in route order
+
+        Raises:
+            LineNotFoundError: If the stops of the line cannot be retrieved
+        """
+        get_line_arrivals = GetLineArrivals(
+            self._repository,
+            line_id,
+            direction,
+            max_concurrency,
+            self._service_calendar,
+            self._hooks,
+            self._fallback,
+        )
+        return await get_line_arrivals.execute()
+
+    def watch(
+        self,
+        stop_ids: Optional[list[int]] = None,
+        lines: Optional[list[str]] = None,
+    ) -> AsyncIterator[Stop]:
+        """
+        Iterate over the arrival updates of one or more stops.
+
+        All the iterators created by the same client share a single poller, so
+        several consumers watching the same stop cost one upstream request.
+
+        Args:
+            stop_ids: Optional IDs of the bus stops to watch, defaults to the client stop
+            lines: Optional list of bus lines to filter, defaults to the client lines
+
+        Returns:
+            An async iterator yielding a stop each time its arrivals change
+        """
+        return self._get_monitor().watch(
+            stop_ids or [self._stop_id], lines if lines is not None else self._lines
+        )
+
+    def watch_changes(
+        self,
+        stop_ids: Optional[list[int]] = None,
+        lines: Optional[list[str]] = None,
+        threshold: int = 0,
+    ) -> AsyncIterator[list[ArrivalChange]]:
+        """
+        Iterate over the arrival changes of one or more stops.
+
+        Args:
+            stop_ids: Optional IDs of the bus stops to watch, defaults to the client stop
+            lines: Optional list of bus lines to filter, defaults to the client lines
+            threshold: Minimum arrival change, in minutes, to report
+
+        Returns:
+            An async iterator yielding the changes of a stop since its previous update
+        """
+        return self._get_monitor().watch_changes(
+            stop_ids or [self._stop_id],
+            lines if lines is not None else self._lines,
+            threshold,
+        )
+
+    def _get_monitor(self) -> ArrivalsMonitor:
+        """Get the arrivals monitor shared by every watch iterator."""
+        if self._monitor is None:
+            self._monitor = ArrivalsMonitor(self._repository)
+        return self._monitor
@@ -0,0 +1,11 @@
+"""Local simulator of the EMT API for load and resilience testing."""
+
+from .network import SimulatedNetwork
+from .server import LatencyModel, SimulatorConfig, create_simulator_app
+
+__all__ = [
+    "LatencyModel",
+    "SimulatedNetwork",
+    "SimulatorConfig",
+    "create_simulator_app",
+]
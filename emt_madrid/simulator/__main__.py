@@ -0,0 +1,75 @@
+"""Run the simulator with ``python -m emt_madrid.simulator``."""
+
+import argparse
+
+from aiohttp import web
+
+from emt_madrid.simulator.network import SimulatedNetwork
+from emt_madrid.simulator.server import (
+    LatencyModel,
+    SimulatorConfig,
+    create_simulator_app,
+)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m emt_madrid.simulator",
+        description="Serve a simulated EMT API. Point the client to it with "
+        "EMTAPIConfig(base_url='http://HOST:PORT/').",
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--stops", type=int, default=1000, help="number of stops")
+    parser.add_argument("--lines", type=int, default=200, help="number of lines")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--detail-not-available-ratio",
+        type=float,
+        default=0.0,
+        help='ratio of stops answering the detail endpoint with code "81"',
+    )
+    parser.add_argument(
+        "--latency",
+        type=LatencyModel.parse,
+        default=LatencyModel(),
+        help='e.g. "constant:0.05", "uniform:0.02:0.2" or "lognormal:0.08:0.5"',
+    )
+    parser.add_argument(
+        "--rate",
+        type=float,
+        default=None,
+        help="requests per second before answering HTTP 429",
+    )
+    parser.add_argument(
+        "--daily-limit",
+        type=int,
+        default=None,
+        help='hits per day before answering code "98"',
+    )
+    parser.add_argument(
+        "--token-ttl",
+        type=float,
+        default=24 * 60 * 60,
+        help="seconds an access token stays valid",
+    )
+    args = parser.parse_args()
+
+    config = SimulatorConfig(
+        network=SimulatedNetwork(
+            stops=args.stops,
+            lines=args.lines,
+            detail_not_available_ratio=args.detail_not_available_ratio,
+            seed=args.seed,
+        ),
+        token_ttl=args.token_ttl,
+        daily_limit=args.daily_limit,
+        rate=args.rate,
+        latency=args.latency,
+        seed=args.seed,
+    )
+    web.run_app(create_simulator_app(config), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
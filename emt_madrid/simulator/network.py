@@ -0,0 +1,253 @@
+import math
+import random
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+MADRID_CENTER = (-3.7038, 40.4168)
+BUS_SPEED = 5.0  # meters per second
+FLEET_SIZE = 40  # buses per line
+
+
+@dataclass
+class SimulatedLine:
+    """Bus line of the simulated network."""
+
+    line_id: str
+    label: str
+    header_a: str
+    header_b: str
+    min_frequency: int
+    max_frequency: int
+    start_time: str
+    stop_time: str
+
+    @property
+    def headway(self) -> float:
+        """Seconds between two consecutive buses."""
+        return 60 * (self.min_frequency + self.max_frequency) / 2
+
+
+@dataclass
+class SimulatedStop:
+    """Bus stop of the simulated network."""
+
+    stop_id: int
+    name: str
+    address: str
+    coordinates: list[float]
+    lines: list[tuple[SimulatedLine, str]] = field(default_factory=list)
+    detail_available: bool = True
+
+
+class SimulatedNetwork:
+    """
+    Deterministic synthetic bus network producing EMT API payloads.
+
+    Buses of each line pass by each stop at a fixed headway with a phase
+    derived from the seed, so arrival times count down consistently between
+    requests and the same bus keeps its ID while approaching a stop.
+
+    Args:
+        stops: Number of stops, with IDs from 1 to ``stops``
+        lines: Number of lines
+        lines_per_stop: Minimum and maximum number of lines serving a stop
+        detail_not_available_ratio: Ratio of stops answering the detail
+            endpoint with the "detail not available" code
+        seed: Seed of the random generator
+    """
+
+    def __init__(
+        self,
+        stops: int = 1000,
+        lines: int = 200,
+        lines_per_stop: tuple[int, int] = (1, 6),
+        detail_not_available_ratio: float = 0.0,
+        seed: int = 0,
+    ) -> None:
+        """Initialize SimulatedNetwork object."""
+        rng = random.Random(seed)
+        self.lines: list[SimulatedLine] = []
+        for number in range(1, lines + 1):
+            min_frequency = rng.randint(4, 15)
+            self.lines.append(
+                SimulatedLine(
+                    line_id=f"{number:03d}",
+                    label=str(number),
+                    header_a=f"ORIGIN {number}",
+                    header_b=f"DESTINATION {number}",
+                    min_frequency=min_frequency,
+                    max_frequency=min_frequency + rng.randint(2, 10),
+                    start_time=f"{rng.randint(5, 7):02d}:{rng.choice((0, 15, 30)):02d}",
+                    stop_time=f"{rng.choice((23, 0)):02d}:{rng.randint(0, 59):02d}",
+                )
+            )
+
+        self.stops: dict[int, SimulatedStop] = {}
+        for stop_id in range(1, stops + 1):
+            longitude = MADRID_CENTER[0] + rng.uniform(-0.08, 0.08)
+            latitude = MADRID_CENTER[1] + rng.uniform(-0.06, 0.06)
+            stop_lines = rng.sample(
+                self.lines, k=min(len(self.lines), rng.randint(*lines_per_stop))
+            )
+            self.stops[stop_id] = SimulatedStop(
+                stop_id=stop_id,
+                name=f"Stop {stop_id}",
+                address=f"Calle Simulada, {stop_id}",
+                coordinates=[longitude, latitude],
+                lines=[(line, rng.choice("AB")) for line in stop_lines],
+                detail_available=rng.random() >= detail_not_available_ratio,
+            )
+        self._phases: dict[tuple[int, str], float] = {
+            (stop.stop_id, line.line_id): rng.uniform(0, line.headway)
+            for stop in self.stops.values()
+            for line, _ in stop.lines
+        }
+
+    def get(self, stop_id: int) -> Optional[SimulatedStop]:
+        """Get a stop by ID, if it exists."""
+        return self.stops.get(stop_id)
+
+    def detail(self, stop: SimulatedStop) -> dict[str, Any]:
+        """Build the data of the stop detail endpoint."""
+        return {
+            "stops": [
+                {
+                    "stop": str(stop.stop_id),
+                    "name": stop.name,
+                    "postalAddress": stop.address,
+                    "geometry": {"type": "Point", "coordinates": stop.coordinates},
+                    "pmv": str(60000 + stop.stop_id),
+                    "dataLine": [
+                        {
+                            "line": line.line_id,
+                            "label": line.label,
+                            "direction": direction,
+                            "maxFreq": str(line.max_frequency),
+                            "minFreq": str(line.min_frequency),
+                            "headerA": line.header_a,
+                            "headerB": line.header_b,
+                            "startTime": line.start_time,
+                            "stopTime": line.stop_time,
+                            "dayType": day_type,
+                        }
+                        for line, direction in stop.lines
+                        for day_type in ("LA", "SA", "FE")
+                    ],
+                }
+            ]
+        }
+
+    def list_entry(self, stop: SimulatedStop) -> dict[str, Any]:
+        """Build the entry of a stop in the bulk stops list."""
+        return {
+            "node": str(stop.stop_id),
+            "name": stop.name,
+            "postalAddress": stop.address,
+            "geometry": {"type": "Point", "coordinates": stop.coordinates},
+            "wifi": "0",
+            "lines": [
+                f"{line.line_id}/{'1' if direction == 'B' else '2'}"
+                for line, direction in stop.lines
+            ],
+        }
+
+    def line_info(self, line: SimulatedLine) -> dict[str, Any]:
+        """Build the entry of a line in the lines list."""
+        return {
+            "line": line.line_id,
+            "label": line.label,
+            "nameA": line.header_a,
+            "nameB": line.header_b,
+            "group": "110",
+        }
+
+    def line(self, line_id: str) -> Optional[SimulatedLine]:
+        """Get a line by ID or number, if it exists."""
+        return next(
+            (line for line in self.lines if line_id in (line.line_id, line.label)),
+            None,
+        )
+
+    def line_stops(self, line: SimulatedLine, direction: int) -> dict[str, Any]:
+        """Build the data of the line stops endpoint, stops ordered by ID."""
+        to = "B" if direction == 1 else "A"
+        return {
+            "line": line.line_id,
+            "label": line.label,
+            "nameA": line.header_a,
+            "nameB": line.header_b,
+            "timeTable": [
+                {
+                    "idDayType": day_type,
+                    "startTime": line.start_time,
+                    "stopTime": line.stop_time,
+                    "minimumFrequency": str(line.min_frequency),
+                    "maximumFrequency": str(line.max_frequency),
+                }
+                for day_type in ("LA", "SA", "FE")
+            ],
+            "stops": [
+                {
+                    "stop": str(stop.stop_id),
+                    "name": stop.name,
+                    "postalAddress": stop.address,
+                    "geometry": {"type": "Point", "coordinates": stop.coordinates},
+                }
+                for stop in self.stops.values()
+                if (line, to) in stop.lines
+            ],
+        }
+
+    def around(self, stop: SimulatedStop) -> dict[str, Any]:
+        """Build the data of the around stop endpoint."""
+        return {
+            "stopId": stop.stop_id,
+            "geometry": {"type": "Point", "coordinates": stop.coordinates},
+            "stopName": stop.name,
+            "address": stop.address,
+            "metersToPoint": 0,
+            "lines": [
+                {
+                    "line": line.line_id,
+                    "label": line.label,
+                    "nameA": line.header_a,
+                    "nameB": line.header_b,
+                    "metersFromHeader": 0,
+                    "to": direction,
+                }
+                for line, direction in stop.lines
+            ],
+        }
+
+    def arrivals(self, stop: SimulatedStop, now: float) -> list[dict[str, Any]]:
+        """Build the arrivals of the two next buses of every line of a stop."""
+        result = []
+        for line, direction in stop.lines:
+            phase = self._phases[(stop.stop_id, line.line_id)]
+            turn = math.ceil((now - phase) / line.headway)
+            for bus_turn in (turn, turn + 1):
+                estimate = int(phase + bus_turn * line.headway - now)
+                distance = int(estimate * BUS_SPEED)
+                result.append(
+                    {
+                        "line": line.label,
+                        "stop": stop.stop_id,
+                        "isHead": "False",
+                        "destination": line.header_b
+                        if direction == "B"
+                        else line.header_a,
+                        "deviation": 0,
+                        "bus": 100 * int(line.line_id) + bus_turn % FLEET_SIZE,
+                        "geometry": {
+                            "type": "Point",
+                            "coordinates": [
+                                stop.coordinates[0] + distance / 85000,
+                                stop.coordinates[1],
+                            ],
+                        },
+                        "estimateArrive": estimate,
+                        "DistanceBus": distance,
+                        "positionTypeBus": "0",
+                    }
+                )
+        return result
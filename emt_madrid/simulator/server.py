@@ -0,0 +1,312 @@
+import asyncio
+import random
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import Any, Optional, Union
+
+from aiohttp import web
+
+from emt_madrid.infrastructure.emt_api_endpoints import Auth, Endpoint, Lines, Stops
+from emt_madrid.infrastructure.rate_limiter import RateLimiter
+from emt_madrid.simulator.network import SimulatedNetwork
+
+
+@dataclass
+class LatencyModel:
+    """
+    Distribution of the simulated response latencies, in seconds.
+
+    Args:
+        distribution: One of "constant", "uniform" or "lognormal"
+        first: Constant latency, uniform minimum or lognormal median
+        second: Uniform maximum or lognormal sigma
+    """
+
+    distribution: str = "constant"
+    first: float = 0.0
+    second: float = 0.0
+
+    @classmethod
+    def parse(cls, value: str) -> "LatencyModel":
+        """Parse a latency model like "constant:0.05", "uniform:0.02:0.2" or "lognormal:0.08:0.5"."""
+        distribution, *parameters = value.split(":")
+        if distribution not in ("constant", "uniform", "lognormal"):
+            raise ValueError(f"Unknown latency distribution: {distribution}")
+        numbers = [float(parameter) for parameter in parameters] + [0.0, 0.0]
+        return cls(distribution, numbers[0], numbers[1])
+
+    def sample(self, rng: random.Random) -> float:
+        """Draw a latency from the distribution."""
+        if self.distribution == "uniform":
+            return rng.uniform(self.first, self.second)
+        if self.distribution == "lognormal" and self.first > 0:
+            return rng.lognormvariate(0, self.second) * self.first
+        return self.first
+
+
+@dataclass
+class SimulatorConfig:
+    """
+    Behaviour of the simulated EMT API.
+
+    Args:
+        network: Simulated bus network
+        accounts: Optional email to password mapping, any account is accepted if empty
+        token_ttl: Seconds an access token stays valid
+        daily_limit: Optional number of hits per day before answering "98"
+        rate: Optional number of requests per second before answering HTTP 429
+        latency: Distribution of the response latencies
+        seed: Seed of the latency random generator
+    """
+
+    network: SimulatedNetwork = field(default_factory=SimulatedNetwork)
+    accounts: dict[str, str] = field(default_factory=dict)
+    token_ttl: float = 24 * 60 * 60
+    daily_limit: Optional[int] = None
+    rate: Optional[float] = None
+    latency: LatencyModel = field(default_factory=LatencyModel)
+    seed: int = 0
+
+
+class SimulatorState:
+    """Mutable state of a running simulator: tokens and usage counters."""
+
+    def __init__(self, config: SimulatorConfig) -> None:
+        """Initialize SimulatorState object."""
+        self.config: SimulatorConfig = config
+        self.tokens: dict[str, float] = {}
+        self.hits: int = 0
+        self.day: date = date.today()
+        self.rng = random.Random(config.seed)
+        self.rate_limiter: Optional[RateLimiter] = (
+            RateLimiter(config.rate, burst=max(1, int(config.rate)))
+            if config.rate
+            else None
+        )
+
+    def count_hit(self) -> bool:
+        """Count a hit and check whether the daily limit allows it."""
+        if date.today() != self.day:
+            self.day = date.today()
+            self.hits = 0
+        self.hits += 1
+        limit = self.config.daily_limit
+        return limit is None or self.hits <= limit
+
+
+STATE_KEY = web.AppKey("state", SimulatorState)
+
+
+def create_simulator_app(config: Optional[SimulatorConfig] = None) -> web.Application:
+    """
+    Create an application behaving like the EMT API endpoints used by the client.
+
+    Args:
+        config: Optional simulator configuration
+
+    Returns:
+        The aiohttp application
+    """
+    state = SimulatorState(config or SimulatorConfig())
+    app = web.Application(middlewares=[_latency_and_rate_limit])
+    app[STATE_KEY] = state
+    app.router.add_get(f"/{Auth.LOGIN['endpoint']}", _login)
+    app.router.add_post(f"/{Stops.LIST['endpoint']}", _stops_list)
+    app.router.add_get(
+        "/" + Lines.INFO["endpoint"].replace("{date}", "{date:\\d{8}}"),
+        _lines_info,
+    )
+    app.router.add_get(
+        "/" + Lines.STOPS["endpoint"].replace("{direction}", "{direction:[12]}"),
+        _line_stops,
+    )
+    app.router.add_get(
+        "/" + Stops.DETAIL["endpoint"].replace("{stop_id}", "{stop_id:\\d+}"),
+        _stop_detail,
+    )
+    app.router.add_get(
+        "/" + Stops.ARROUNDSTOP["endpoint"].replace("{stop_id}", "{stop_id:\\d+}"),
+        _around_stop,
+    )
+    app.router.add_post(
+        "/" + Stops.ARRIVAL["endpoint"].replace("{stop_id}", "{stop_id:\\d+}"),
+        _arrivals,
+    )
+    return app
+
+
+def _response(
+    code: str, description: Union[str, list[dict[str, str]]], data: Any
+) -> web.Response:
+    return web.json_response(
+        {
+            "code": code,
+            "description": description,
+            "datetime": datetime.now().isoformat(),
+            "data": data,
+        }
+    )
+
+
+@web.middleware
+async def _latency_and_rate_limit(request: web.Request, handler) -> web.StreamResponse:
+    state = request.app[STATE_KEY]
+    if state.rate_limiter is not None and not state.rate_limiter.try_acquire():
+        raise web.HTTPTooManyRequests()
+    latency = state.config.latency.sample(state.rng)
+    if latency > 0:
+        await asyncio.sleep(latency)
+    return await handler(request)
+
+
+async def _login(request: web.Request) -> web.Response:
+    state = request.app[STATE_KEY]
+    email = request.headers.get("email", "")
+    password = request.headers.get("password", "")
+    responses = Auth.LOGIN["responses"]
+
+    if not state.count_hit():
+        return _response(responses["api_limit_exceeded"], "Limit use API reached", [])
+    accounts = state.config.accounts
+    if not email or (accounts and email not in accounts):
+        return _response(responses["user_does_not_exist"], "Error: User not found", [])
+    if not password or (accounts and accounts[email] != password):
+        return _response(
+            responses["invalid_password"], "Error: Invalid user or Password", []
+        )
+
+    token = str(uuid.uuid4())
+    expires_at = time.time() + state.config.token_ttl
+    state.tokens[token] = expires_at
+    return _response(
+        responses["authentication_successful"],
+        "Token extend into control-cache Data recovered OK",
+        [
+            {
+                "accessToken": token,
+                "tokenSecExpiration": int(state.config.token_ttl),
+                "tokenDteExpiration": {"$date": int(expires_at * 1000)},
+                "email": email,
+                "apiCounter": {
+                    "current": state.hits,
+                    "dailyUse": state.config.daily_limit or 0,
+                },
+            }
+        ],
+    )
+
+
+def _check_access(request: web.Request, endpoint: Endpoint) -> Optional[web.Response]:
+    """Validate the access token and the daily limit of a data request."""
+    state = request.app[STATE_KEY]
+    expires_at = state.tokens.get(request.headers.get("accessToken", ""))
+    if expires_at is None or expires_at < time.time():
+        return _response(
+            endpoint["responses"].get("invalid_token", "80"), "Invalid token", []
+        )
+    if not state.count_hit():
+        return _response("98", "Limit use API reached", [])
+    return None
+
+
+async def _stops_list(request: web.Request) -> web.Response:
+    error = _check_access(request, Stops.LIST)
+    if error is not None:
+        return error
+    network = request.app[STATE_KEY].config.network
+    return _response(
+        Stops.LIST["responses"]["stops_retrieved"],
+        "Data recovered OK",
+        [network.list_entry(stop) for stop in network.stops.values()],
+    )
+
+
+async def _lines_info(request: web.Request) -> web.Response:
+    error = _check_access(request, Lines.INFO)
+    if error is not None:
+        return error
+    network = request.app[STATE_KEY].config.network
+    return _response(
+        Lines.INFO["responses"]["lines_retrieved"],
+        "Data recovered OK",
+        [network.line_info(line) for line in network.lines],
+    )
+
+
+async def _line_stops(request: web.Request) -> web.Response:
+    error = _check_access(request, Lines.STOPS)
+    if error is not None:
+        return error
+    network = request.app[STATE_KEY].config.network
+    responses = Lines.STOPS["responses"]
+    line = network.line(request.match_info["line_id"])
+    if line is None:
+        return _response(responses["line_not_found"], "Line not found", [])
+    return _response(
+        responses["stops_retrieved"],
+        "Data recovered OK",
+        [network.line_stops(line, int(request.match_info["direction"]))],
+    )
+
+
+async def _stop_detail(request: web.Request) -> web.Response:
+    error = _check_access(request, Stops.DETAIL)
+    if error is not None:
+        return error
+    network = request.app[STATE_KEY].config.network
+    responses = Stops.DETAIL["responses"]
+    stop = network.get(int(request.match_info["stop_id"]))
+    if stop is None:
+        return _response(
+            responses["stop_not_found"], "Error managing internal services", []
+        )
+    if not stop.detail_available:
+        return _response(responses["detail_not_available"], "No records found", [{}])
+    return _response(
+        responses["stop_data_retrieved"], "Data recovered OK", [network.detail(stop)]
+    )
+
+
+async def _around_stop(request: web.Request) -> web.Response:
+    error = _check_access(request, Stops.ARROUNDSTOP)
+    if error is not None:
+        return error
+    network = request.app[STATE_KEY].config.network
+    responses = Stops.ARROUNDSTOP["responses"]
+    stop = network.get(int(request.match_info["stop_id"]))
+    if stop is None:
+        return _response(
+            responses["stop_not_found"], "Error managing internal services", []
+        )
+    return _response(
+        responses["stop_data_retrieved"], "Data recovered OK", [network.around(stop)]
+    )
+
+
+async def _arrivals(request: web.Request) -> web.Response:
+    error = _check_access(request, Stops.ARRIVAL)
+    if error is not None:
+        return error
+    network = request.app[STATE_KEY].config.network
+    responses = Stops.ARRIVAL["responses"]
+    stop = network.get(int(request.match_info["stop_id"]))
+    if stop is None:
+        return _response(
+            responses["stop_not_found"],
+            [{"EN": "Bus Stop disabled or not exists"}],
+            [{"Arrive": [], "StopInfo": [], "ExtraInfo": [], "Incident": {}}],
+        )
+    return _response(
+        responses["arrivals_retrieved"],
+        "Data recovered OK",
+        [
+            {
+                "Arrive": network.arrivals(stop, time.time()),
+                "StopInfo": [],
+                "ExtraInfo": [],
+                "Incident": {},
+            }
+        ],
+    )
@@ -0,0 +1,359 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+from dataclasses import replace
+from typing import Awaitable, Callable, Optional, Self, TypeVar
+
+import aiohttp
+
+from emt_madrid.domain.arrival_estimator import ArrivalEstimator
+from emt_madrid.domain.emt_repository import EMTRepository
+from emt_madrid.domain.hooks import ClientHooks
+from emt_madrid.domain.line_timeline import LineTimeline
+from emt_madrid.domain.service_calendar import ServiceCalendar
+from emt_madrid.domain.stop import Stop
+from emt_madrid.infrastructure.caching_repository import CachingEMTRepository
+from emt_madrid.infrastructure.emt_api_client import Credentials, EMTAuthenticatedClient
+from emt_madrid.infrastructure.emt_api_config import EMTAPIConfig
+from emt_madrid.infrastructure.emt_api_repository import EMTAPIRepository
+from emt_madrid.infrastructure.http_client import HTTPClient
+from emt_madrid.infrastructure.metrics import EMTMetrics
+from emt_madrid.infrastructure.quota_tracker import QuotaTracker
+from emt_madrid.infrastructure.rate_limiter import RateLimiter
+from emt_madrid.infrastructure.transport import Transport
+from emt_madrid.use_cases.get_arrivals import GetArrivals
+from emt_madrid.use_cases.get_line_arrivals import GetLineArrivals
+from emt_madrid.use_cases.get_stop_info import GetStopInfo
+
+T = TypeVar("T")
+
+
+class SyncEMTClient:
+    """
+    Thread-safe synchronous EMT client backed by a background event loop.
+
+    A single event loop runs in a daemon thread for the lifetime of the
+    client, and holds the HTTP session, the access token and the cache shared
+    by every call. Calls can be made from any thread: the ``submit_*`` methods
+    schedule the request on the loop and return a ``concurrent.futures.Future``
+    right away, so several requests run concurrently, and the other methods
+    block until the result is available. Every returned Stop is a private
+    copy, so callers never see it change from another thread.
+
+    The client is a context manager, and must be closed to release the
+    session and stop the thread.
+
+    Args:
+        email: EMT API account email
+        password: EMT API account password
+        config: Optional EMT API configuration, e.g. to use another base URL
+        transport: Optional transport to use instead of the session
+        stop_info_ttl: Seconds a stop information entry stays cached
+        arrivals_ttl: Seconds an arrivals entry stays cached
+        rate_limiter: Optional rate limiter for the upstream requests
+        service_calendar: Optional calendar used to skip arrivals requests
+            while no line of the stop is in service
+        metrics: Optional metrics of the requests, token refreshes and cache
+        hooks: Optional hooks notified of the requests and token refreshes
+        quota: Optional tracker counting the requests against the daily quota
+        fallback: Optional estimator returning arrivals estimated from the
+            timetable when the API fails
+
+    Methods:
+        get_stop_info: Get information about a bus stop
+        get_arrivals: Get the arrivals at a bus stop
+        get_line_arrivals: Get the arrivals of a bus line at every stop of its route
+        get_all_stops: Get information about every stop of the network
+        submit: Run a coroutine function on the loop with the shared repository
+        close: Close the session and stop the background loop
+    """
+
+    def __init__(
+        self,
+        email: str,
+        password: str,
+        config: Optional[EMTAPIConfig] = None,
+        transport: Optional[Transport] = None,
+        stop_info_ttl: float = 24 * 60 * 60,
+        arrivals_ttl: float = 20,
+        rate_limiter: Optional[RateLimiter] = None,
+        service_calendar: Optional[ServiceCalendar] = None,
+        metrics: Optional[EMTMetrics] = None,
+        hooks: Optional[ClientHooks] = None,
+        quota: Optional[QuotaTracker] = None,
+        fallback: Optional[ArrivalEstimator] = None,
+    ) -> None:
+        """Initialize SyncEMTClient object."""
+        self._credentials: Credentials = Credentials(email=email, password=password)
+        self._config: EMTAPIConfig = config or EMTAPIConfig()
+        self._transport: Optional[Transport] = transport
+        self._stop_info_ttl: float = stop_info_ttl
+        self._arrivals_ttl: float = arrivals_ttl
+        self._rate_limiter: Optional[RateLimiter] = rate_limiter
+        self._service_calendar: Optional[ServiceCalendar] = service_calendar
+        self._metrics: Optional[EMTMetrics] = metrics
+        self._hooks: Optional[ClientHooks] = hooks
+        self._quota: Optional[QuotaTracker] = quota
+        self._fallback: Optional[ArrivalEstimator] = fallback
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._repository: Optional[EMTRepository] = None
+        self._lock: threading.Lock = threading.Lock()
+        self._closed: bool = False
+        self._loop: asyncio.AbstractEventLoop = asyncio.new_event_loop()
+        self._thread: threading.Thread = threading.Thread(
+            target=self._loop.run_forever, name="emt-madrid-sync-client", daemon=True
+        )
+        self._thread.start()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def submit(self, function: Callable[[EMTRepository], Awaitable[T]]) -> "Future[T]":
+        """
+        Run a coroutine function on the background loop.
+
+        Args:
+            function: Coroutine function called with the shared repository
+
+        Returns:
+            A future resolved with the result of the coroutine
+
+        Raises:
+            RuntimeError: If the client is closed
+        """
+
+        async def run() -> T:
+            return await function(self._get_repository())
+
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("The client is closed")
+            return asyncio.run_coroutine_threadsafe(run(), self._loop)
+
+    def submit_stop_info(
+        self, stop_id: int, lines: Optional[list[str]] = None
+    ) -> "Future[Stop]":
+        """Schedule the retrieval of the information of a bus stop."""
+        return self.submit(
+            lambda repository: self._stop_info(repository, stop_id, lines)
+        )
+
+    def submit_arrivals(
+        self, stop_id: int, lines: Optional[list[str]] = None
+    ) -> "Future[Stop]":
+        """Schedule the retrieval of the arrivals at a bus stop."""
+        return self.submit(
+            lambda repository: self._arrivals(repository, stop_id, lines)
+        )
+
+    def submit_line_arrivals(
+        self, line_id: str, direction: int = 1, max_concurrency: int = 8
+    ) -> "Future[LineTimeline]":
+        """Schedule the retrieval of the arrivals of a bus line."""
+        return self.submit(
+            lambda repository: GetLineArrivals(
+                repository,
+                line_id,
+                direction,
+                max_concurrency,
+                self._service_calendar,
+                self._hooks,
+                self._fallback,
+            ).execute()
+        )
+
+    def submit_all_stops(self) -> "Future[list[Stop]]":
+        """Schedule the retrieval of every stop of the network."""
+        return self.submit(
+            lambda repository: self._copy_stops(repository.get_all_stops())
+        )
+
+    def get_stop_info(
+        self,
+        stop_id: int,
+        lines: Optional[list[str]] = None,
+        timeout: Optional[float] = None,
+    ) -> Stop:
+        """
+        Get information about a bus stop.
+
+        Args:
+            stop_id: ID of the bus stop
+            lines: Optional list of bus lines to filter
+            timeout: Optional seconds to wait for the result
+
+        Returns:
+            A Stop object containing the stop information
+
+        Raises:
+            StopNotFoundError: If the stop information cannot be retrieved
+            TimeoutError: If the result is not available in time
+        """
+        return self._result(self.submit_stop_info(stop_id, lines), timeout)
+
+    def get_arrivals(
+        self,
+        stop_id: int,
+        lines: Optional[list[str]] = None,
+        timeout: Optional[float] = None,
+    ) -> Stop:
+        """
+        Get the arrivals at a bus stop.
+
+        Args:
+            stop_id: ID of the bus stop
+            lines: Optional list of bus lines to filter
+            timeout: Optional seconds to wait for the result
+
+        Returns:
+            A Stop object with the arrival information of each line
+
+        Raises:
+            StopNotFoundError: If the stop information cannot be retrieved
+            ArrivalsNotFoundError: If the arrival information cannot be retrieved
+            TimeoutError: If the result is not available in time
+        """
+        return self._result(self.submit_arrivals(stop_id, lines), timeout)
+
+    def get_line_arrivals(
+        self,
+        line_id: str,
+        direction: int = 1,
+        max_concurrency: int = 8,
+        timeout: Optional[float] = None,
+    ) -> LineTimeline:
+        """
+        Get the arrivals of a bus line at every stop of its route.
+
+        Args:
+            line_id: ID or number of the bus line
+            direction: 1 for the trips to the destination, 2 for the trips back
+            max_concurrency: Maximum number of arrivals requests at once
+            timeout: Optional seconds to wait for the result
+
+        Returns:
+            The timeline of the line with the arrivals at every stop
+
+        Raises:
+            LineNotFoundError: If the stops of the line cannot be retrieved
+            TimeoutError: If the result is not available in time
+        """
+        return self._result(
+            self.submit_line_arrivals(line_id, direction, max_concurrency), timeout
+        )
+
+    def get_all_stops(self, timeout: Optional[float] = None) -> list[Stop]:
+        """
+        Get information about every stop of the network.
+
+        Args:
+            timeout: Optional seconds to wait for the result
+
+        Returns:
+            A Stop object for every stop of the network
+
+        Raises:
+            StopNotFoundError: If the stops cannot be retrieved
+            TimeoutError: If the result is not available in time
+        """
+        return self._result(self.submit_all_stops(), timeout)
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """
+        Close the session and stop the background loop, once pending calls end.
+
+        Args:
+            timeout: Optional seconds to wait for the pending calls, which are
+                cancelled afterwards
+
+        Raises:
+            RuntimeError: If called from the client loop
+        """
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("The client cannot be closed from its own loop")
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        try:
+            asyncio.run_coroutine_threadsafe(self._close(timeout), self._loop).result()
+        finally:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._loop.close()
+
+    async def _close(self, timeout: Optional[float]) -> None:
+        """Wait for the pending calls, cancel the late ones and close the session."""
+        current = asyncio.current_task()
+        pending = {task for task in asyncio.all_tasks() if task is not current}
+        if pending:
+            _, pending = await asyncio.wait(pending, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        if self._session is not None:
+            await self._session.close()
+
+    def _result(self, future: "Future[T]", timeout: Optional[float]) -> T:
+        """Wait for a future, refusing to block the background loop."""
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("Blocking calls cannot be made from the client loop")
+        return future.result(timeout)
+
+    def _get_repository(self) -> EMTRepository:
+        """Get the repository shared by every call, created on the loop."""
+        if self._repository is None:
+            if self._transport is None:
+                self._session = aiohttp.ClientSession()
+            http_client = HTTPClient(
+                config=self._config,
+                session=self._session,
+                transport=self._transport,
+                metrics=self._metrics,
+                hooks=self._hooks,
+            )
+            emt_authenticated_client = EMTAuthenticatedClient(
+                http_client=http_client,
+                credentials=self._credentials,
+                metrics=self._metrics,
+                hooks=self._hooks,
+                quota=self._quota,
+            )
+            self._repository = CachingEMTRepository(
+                EMTAPIRepository(
+                    emt_authenticated_client=emt_authenticated_client,
+                    hooks=self._hooks,
+                ),
+                stop_info_ttl=self._stop_info_ttl,
+                arrivals_ttl=self._arrivals_ttl,
+                rate_limiter=self._rate_limiter,
+                metrics=self._metrics,
+                hooks=self._hooks,
+            )
+        return self._repository
+
+    async def _stop_info(
+        self, repository: EMTRepository, stop_id: int, lines: Optional[list[str]]
+    ) -> Stop:
+        """Get a private copy of the information of a bus stop."""
+        return self._copy(await GetStopInfo(repository, stop_id, lines).execute())
+
+    async def _arrivals(
+        self, repository: EMTRepository, stop_id: int, lines: Optional[list[str]]
+    ) -> Stop:
+        """Get the arrivals of a bus stop into a private copy of its information."""
+        stop = await self._stop_info(repository, stop_id, lines)
+        return await GetArrivals(
+            repository, stop, self._service_calendar, self._hooks, self._fallback
+        ).execute()
+
+    async def _copy_stops(self, stops: Awaitable[list[Stop]]) -> list[Stop]:
+        """Get private copies of cached stops."""
+        return [self._copy(stop) for stop in await stops]
+
+    def _copy(self, stop: Stop) -> Stop:
+        """Copy a stop and its lines, which are shared by the cache."""
+        return replace(stop, stop_lines=[replace(line) for line in stop.stop_lines])
@@ -1,4 +1,14 @@
+from typing import Optional
+
+from emt_madrid.domain.arrival_estimator import ArrivalEstimator
 from emt_madrid.domain.emt_repository import EMTRepository
+from emt_madrid.domain.exceptions import (
+    ArrivalsNotFoundError,
+    EMTError,
+    StopNotFoundError,
+)
+from emt_madrid.domain.hooks import ClientHooks
+from emt_madrid.domain.service_calendar import ServiceCalendar
 from emt_madrid.domain.stop import Stop
 
 
@@ -9,24 +19,76 @@ class GetArrivals:
     Args:
         repository: EMT repository to use for data access
         stop: The bus stop to update with arrival information
+        service_calendar: Optional calendar used to skip the request when no
+            line of the stop is in service
+        hooks: Optional hooks notified of the retrieved arrivals and when the
+            request is skipped
+        fallback: Optional estimator used when the live arrivals cannot be
+            retrieved because of an upstream failure, notified to the hooks as
+            a "fallback" cache hit
 
     Methods:
         execute: Get information about arrivals at a specific stop
     """
 
-    def __init__(self, repository: EMTRepository, stop: Stop) -> None:
+    def __init__(
+        self,
+        repository: EMTRepository,
+        stop: Stop,
+        service_calendar: Optional[ServiceCalendar] = None,
+        hooks: Optional[ClientHooks] = None,
+        fallback: Optional[ArrivalEstimator] = None,
+    ) -> None:
         """Initialize GetArrivals object."""
         self._repository: EMTRepository = repository
         self._stop: Stop = stop
+        self._service_calendar: Optional[ServiceCalendar] = service_calendar
+        self._hooks: Optional[ClientHooks] = hooks
+        self._fallback: Optional[ArrivalEstimator] = fallback
 
     async def execute(self) -> Stop:
         """
         Get information about arrivals at a specific stop.
 
+        If no line of the stop is in service, the arrivals are cleared without
+        querying the API. If the API fails, e.g. because the quota is exhausted
+        or it is not reachable, and a fallback is set, the arrivals are
+        estimated from the timetable and flagged as estimates.
+
         Returns:
             The same Stop object with updated arrival information for each line
 
         Raises:
             ValueError: If the arrival information cannot be retrieved
         """
-        return await self._repository.get_arrivals(self._stop)
+        if self._service_calendar is not None and not (
+            self._service_calendar.is_stop_active(self._stop)
+        ):
+            for line in self._stop.stop_lines:
+                line.arrival = None
+                line.next_arrival = None
+                line.is_estimate = False
+            if self._hooks:
+                self._hooks.on_cache_hit("out_of_service", self._stop.stop_id)
+            return self._stop
+        try:
+            stop = await self._repository.get_arrivals(self._stop)
+        except EMTError as e:
+            if self._fallback is None or not _is_upstream_failure(e):
+                raise
+            if self._hooks:
+                self._hooks.on_cache_hit("fallback", self._stop.stop_id)
+            return self._fallback.estimate(self._stop)
+        for line in stop.stop_lines:
+            line.is_estimate = False
+        if self._hooks:
+            self._hooks.on_arrivals(stop)
+        return stop
+
+
+def _is_upstream_failure(error: EMTError) -> bool:
+    """Check whether an error comes from a failure rather than a missing stop or bus."""
+    root: BaseException = error
+    while root.__cause__ is not None:
+        root = root.__cause__
+    return not isinstance(root, (ArrivalsNotFoundError, StopNotFoundError))
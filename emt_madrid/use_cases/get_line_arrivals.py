@@ -0,0 +1,102 @@
+import asyncio
+from typing import Optional
+
+from emt_madrid.domain.arrival_estimator import ArrivalEstimator
+from emt_madrid.domain.emt_repository import EMTRepository
+from emt_madrid.domain.exceptions import EMTError
+from emt_madrid.domain.hooks import ClientHooks
+from emt_madrid.domain.line_timeline import LineTimeline, TimelineEntry
+from emt_madrid.domain.service_calendar import ServiceCalendar
+from emt_madrid.domain.stop import Stop
+from emt_madrid.use_cases.get_arrivals import GetArrivals
+
+
+class GetLineArrivals:
+    """
+    Get the arrivals of a bus line at every stop of its route.
+
+    The stops of the line are retrieved once, then the arrivals of every stop
+    are retrieved concurrently, at most ``max_concurrency`` at a time, and
+    merged into a timeline in route order. A stop whose arrivals cannot be
+    retrieved keeps its error in the timeline instead of failing the others.
+
+    Args:
+        repository: EMT repository to use for data access
+        line_id: ID or number of the bus line
+        direction: 1 for the trips to the destination, 2 for the trips back
+        max_concurrency: Maximum number of arrivals requests in flight
+        service_calendar: Optional calendar used to skip the stops out of service
+        hooks: Optional hooks notified of the retrieved arrivals
+        fallback: Optional estimator used when the live arrivals of a stop
+            cannot be retrieved because of an upstream failure
+
+    Methods:
+        execute: Get the arrivals of the line along its route
+    """
+
+    def __init__(
+        self,
+        repository: EMTRepository,
+        line_id: str,
+        direction: int = 1,
+        max_concurrency: int = 8,
+        service_calendar: Optional[ServiceCalendar] = None,
+        hooks: Optional[ClientHooks] = None,
+        fallback: Optional[ArrivalEstimator] = None,
+    ) -> None:
+        """Initialize GetLineArrivals object."""
+        self._repository: EMTRepository = repository
+        self._line_id: str = line_id
+        self._direction: int = direction
+        self._max_concurrency: int = max_concurrency
+        self._service_calendar: Optional[ServiceCalendar] = service_calendar
+        self._hooks: Optional[ClientHooks] = hooks
+        self._fallback: Optional[ArrivalEstimator] = fallback
+
+    async def execute(self) -> LineTimeline:
+        """
+        Get the arrivals of the line along its route.
+
+        Returns:
+            The timeline of the line, with one entry per stop in route order
+
+        Raises:
+            LineNotFoundError: If the stops of the line cannot be retrieved
+        """
+        stops = await self._repository.get_line_stops(self._line_id, self._direction)
+        semaphore = asyncio.Semaphore(self._max_concurrency)
+
+        async def get_entry(stop: Stop) -> TimelineEntry:
+            async with semaphore:
+                try:
+                    stop = await GetArrivals(
+                        self._repository,
+                        stop,
+                        self._service_calendar,
+                        self._hooks,
+                        self._fallback,
+                    ).execute()
+                except EMTError as e:
+                    return TimelineEntry(stop=stop, error=str(e))
+            line = next(
+                (line for line in stop.stop_lines if line.arrival is not None),
+                None,
+            )
+            if line is None:
+                return TimelineEntry(stop=stop)
+            return TimelineEntry(
+                stop=stop,
+                arrival=line.arrival,
+                next_arrival=line.next_arrival,
+                is_estimate=line.is_estimate,
+            )
+
+        entries = await asyncio.gather(*(get_entry(stop) for stop in stops))
+        first_line = stops[0].stop_lines[0] if stops and stops[0].stop_lines else None
+        return LineTimeline(
+            line_number=first_line.line_number if first_line else self._line_id,
+            direction=self._direction,
+            origin=first_line.origin if first_line else "",
+            destination=first_line.destination if first_line else "",
+            entries=list(entries),
+        )
@@ -36,10 +36,10 @@ class GetStopInfo:
         Raises:
             ValueError: If the stop information cannot be retrieved
         """
-        stop = await self._repository.get_stop_info(self._stop_id)
-
         if not self._lines:
-            return stop
+            return await self._repository.get_stop_info(self._stop_id)
+
+        stop = await self._repository.get_stop_info(self._stop_id, lines=self._lines)
 
         stop_line_numbers = {str(line.line_number) for line in stop.stop_lines}
         missing_lines = set(self._lines) - stop_line_numbers
@@ -0,0 +1,551 @@
+"""
+End-to-end benchmarks of the client stack against the local EMT API simulator.
+
+Run with ``make benchmark`` or::
+
+    python -m tests.benchmarks.bench_client --output benchmark-results.json
+    python -m tests.benchmarks.bench_client --compare benchmark-results.json
+
+Every benchmark reports a ``score`` and whether a higher score is better, so
+two result files can be compared to catch performance regressions.
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from datetime import time as datetime_time
+from functools import partial
+from importlib import metadata
+from typing import Any, Awaitable, Callable, Optional
+
+import aiohttp
+from aiohttp.test_utils import TestServer
+
+from emt_madrid.domain.arrivals_grouping import group_arrivals
+from emt_madrid.domain.day_type import DayType
+from emt_madrid.domain.exceptions import ArrivalsNotFoundError, StopNotFoundError
+from emt_madrid.domain.line import Line
+from emt_madrid.domain.stop import Stop
+from emt_madrid.infrastructure.caching_repository import CachingEMTRepository
+from emt_madrid.infrastructure.emt_api_client import Credentials, EMTAuthenticatedClient
+from emt_madrid.infrastructure.emt_api_config import EMTAPIConfig
+from emt_madrid.infrastructure.emt_api_endpoints import Stops
+from emt_madrid.infrastructure.emt_api_repository import EMTAPIRepository
+from emt_madrid.infrastructure.http_client import HTTPClient
+from emt_madrid.simulator.network import SimulatedNetwork
+from emt_madrid.simulator.server import SimulatorConfig, create_simulator_app
+
+CREDENTIALS = Credentials(email="benchmark@example.com", password="benchmark")
+
+
+@dataclass
+class BenchmarkSizes:
+    """Sizes of the benchmark workloads."""
+
+    iterations: int = 2000
+    auth_rounds: int = 50
+    stops: int = 500
+    concurrency: tuple[int, ...] = (1, 10, 50)
+    cached_stops: int = 500
+    interchange_lines: int = 40
+    import_rounds: int = 10
+
+
+QUICK_SIZES = BenchmarkSizes(
+    iterations=20,
+    auth_rounds=3,
+    stops=10,
+    concurrency=(1, 5),
+    cached_stops=10,
+    import_rounds=3,
+)
+
+
+class _StaticResponseClient:
+    """Authenticated client answering every exchange with the same response."""
+
+    def __init__(self, response: dict[str, Any]) -> None:
+        self.response = response
+
+    async def exchange(self, *args: Any, **kwargs: Any) -> dict[str, Any]:
+        return self.response
+
+
+def _timings(samples: list[float]) -> dict[str, Any]:
+    """Summarize per operation timings, in microseconds."""
+    samples = sorted(samples)
+    mean = statistics.fmean(samples)
+    return {
+        "iterations": len(samples),
+        "mean_us": round(mean * 1e6, 3),
+        "median_us": round(statistics.median(samples) * 1e6, 3),
+        "p95_us": round(samples[int(0.95 * (len(samples) - 1))] * 1e6, 3),
+        "min_us": round(samples[0] * 1e6, 3),
+        "ops_per_second": round(1 / mean, 1) if mean else None,
+        "score": round(statistics.median(samples) * 1e6, 3),
+        "higher_is_better": False,
+    }
+
+
+def _time_sync(function: Callable[[], Any], iterations: int) -> list[float]:
+    samples = []
+    for _ in range(iterations):
+        started_at = time.perf_counter()
+        function()
+        samples.append(time.perf_counter() - started_at)
+    return samples
+
+
+async def _time_async(
+    function: Callable[[], Awaitable[Any]], iterations: int
+) -> list[float]:
+    samples = []
+    for _ in range(iterations):
+        started_at = time.perf_counter()
+        await function()
+        samples.append(time.perf_counter() - started_at)
+    return samples
+
+
+def _repository(server: TestServer, session: aiohttp.ClientSession) -> EMTAPIRepository:
+    http_client = HTTPClient(
+        config=EMTAPIConfig(base_url=str(server.make_url("/"))), session=session
+    )
+    return EMTAPIRepository(EMTAuthenticatedClient(http_client, CREDENTIALS))
+
+
+def _detail_response(network: SimulatedNetwork, stop_id: int) -> dict[str, Any]:
+    """Build the stop detail response of a simulated stop."""
+    return {"code": "00", "data": [network.detail(network.stops[stop_id])]}
+
+
+async def _stop_info_by_hand(client: _StaticResponseClient, stop_id: int) -> Stop:
+    """Parse a stop detail response by walking its dicts, as a reference."""
+    endpoint = Stops.DETAIL["endpoint"].format(stop_id=stop_id)
+    response = await client.exchange(method=Stops.DETAIL["method"], endpoint=endpoint)
+    if response.get("code") != Stops.DETAIL["responses"]["stop_data_retrieved"]:
+        raise StopNotFoundError(stop_id)
+    stop_data = response["data"][0]["stops"][0]
+    lines = []
+    for line in stop_data["dataLine"]:
+        day_type = DayType.WORKING_DAY
+        if line["dayType"] == "SA":
+            day_type = DayType.SATURDAY
+        elif line["dayType"] == "FE":
+            day_type = DayType.FESTIVE
+        lines.append(
+            Line(
+                line_number=line["label"],
+                origin=line["headerA"],
+                destination=line["headerB"],
+                max_frequency=int(line["maxFreq"]),
+                min_frequency=int(line["minFreq"]),
+                start_time=datetime_time.fromisoformat(line["startTime"]),
+                end_time=datetime_time.fromisoformat(line["stopTime"]),
+                day_type=day_type,
+            )
+        )
+    return Stop(
+        stop_id=stop_id,
+        stop_name=stop_data.get("name", "Unknown"),
+        stop_address=stop_data.get("postalAddress", "Unknown"),
+        stop_coordinates=stop_data["geometry"]["coordinates"],
+        stop_lines=lines,
+    )
+
+
+async def bench_parse_stop_lines(
+    network: SimulatedNetwork, sizes: BenchmarkSizes
+) -> dict[str, Any]:
+    """Decode the busiest stop detail response, against walking its dicts."""
+    stop = max(network.stops.values(), key=lambda stop: len(stop.lines))
+    client = _StaticResponseClient(_detail_response(network, stop.stop_id))
+    repository = EMTAPIRepository(client)  # type: ignore
+
+    decoding = await _time_async(
+        lambda: repository.get_stop_info(stop.stop_id), sizes.iterations
+    )
+    walking = await _time_async(
+        lambda: _stop_info_by_hand(client, stop.stop_id), sizes.iterations
+    )
+
+    result = _timings(decoding)
+    result["lines"] = len(client.response["data"][0]["stops"][0]["dataLine"])
+    result["reference_median_us"] = _timings(walking)["median_us"]
+    result["speedup"] = round(
+        statistics.median(walking) / statistics.median(decoding), 2
+    )
+    return result
+
+
+async def _arrivals_by_hand(client: _StaticResponseClient, stop: Stop) -> Stop:
+    """Parse and group an arrivals response by walking its dicts, as a reference."""
+    endpoint = Stops.ARRIVAL["endpoint"].format(stop_id=stop.stop_id)
+    data = dict(Stops.ARRIVAL["data"] or {})
+    data["stopId"] = str(stop.stop_id)
+    response = await client.exchange(
+        method=Stops.ARRIVAL["method"], endpoint=endpoint, data=data
+    )
+    if response.get("code") != Stops.ARRIVAL["responses"]["arrivals_retrieved"]:
+        raise ArrivalsNotFoundError(stop.stop_id)
+    line_arrivals: dict[str, list[int]] = {}
+    for arrival in response["data"][0]["Arrive"]:
+        line_arrivals.setdefault(str(arrival["line"]), []).append(
+            int(arrival["estimateArrive"]) // 60
+        )
+    for line in stop.stop_lines:
+        sorted_arrivals = sorted(set(line_arrivals.get(line.line_number, [])))
+        line.arrival = sorted_arrivals[0] if sorted_arrivals else None
+        line.next_arrival = sorted_arrivals[1] if len(sorted_arrivals) > 1 else None
+    return stop
+
+
+async def bench_group_arrivals(
+    network: SimulatedNetwork, sizes: BenchmarkSizes
+) -> dict[str, Any]:
+    """Decode and group the arrivals of the busiest stop, against walking dicts."""
+    stop = max(network.stops.values(), key=lambda stop: len(stop.lines))
+    response = {
+        "code": "00",
+        "data": [{"Arrive": network.arrivals(stop, time.time())}],
+    }
+    client = _StaticResponseClient(response)
+    repository = EMTAPIRepository(client)  # type: ignore
+    target = Stop(
+        stop_id=stop.stop_id,
+        stop_name=stop.name,
+        stop_address=stop.address,
+        stop_coordinates=stop.coordinates,
+        stop_lines=[
+            Line(
+                line_number=line.label, origin=line.header_a, destination=line.header_b
+            )
+            for line, _ in stop.lines
+        ],
+    )
+
+    decoding = await _time_async(
+        lambda: repository.get_arrivals(target), sizes.iterations
+    )
+    walking = await _time_async(
+        lambda: _arrivals_by_hand(client, target), sizes.iterations
+    )
+
+    result = _timings(decoding)
+    result["arrivals"] = len(response["data"][0]["Arrive"])
+    result["reference_median_us"] = _timings(walking)["median_us"]
+    result["speedup"] = round(
+        statistics.median(walking) / statistics.median(decoding), 2
+    )
+    return result
+
+
+def _group_arrivals_by_sorting(stop: Stop, arrivals: list[tuple[str, int]]) -> None:
+    """Group arrivals into lists and sort each of them, as a reference."""
+    line_arrivals: dict[str, list[int]] = {}
+    for line_number, eta in arrivals:
+        line_arrivals.setdefault(line_number, []).append(eta // 60)
+    for line in stop.stop_lines:
+        sorted_arrivals = sorted(set(line_arrivals.get(line.line_number, [])))
+        line.arrival = sorted_arrivals[0] if sorted_arrivals else None
+        line.next_arrival = sorted_arrivals[1] if len(sorted_arrivals) > 1 else None
+
+
+async def bench_group_arrivals_single_pass(sizes: BenchmarkSizes) -> dict[str, Any]:
+    """Compare the single pass grouping with grouping by sorting per line."""
+    interchange_network = SimulatedNetwork(
+        stops=1,
+        lines=sizes.interchange_lines,
+        lines_per_stop=(sizes.interchange_lines,) * 2,
+    )
+    interchange = interchange_network.stops[1]
+    arrivals = [
+        (arrival["line"], arrival["estimateArrive"])
+        for arrival in interchange_network.arrivals(interchange, time.time())
+    ]
+    repository = EMTAPIRepository(
+        _StaticResponseClient(
+            _detail_response(interchange_network, interchange.stop_id)
+        )  # type: ignore
+    )
+    target = await repository.get_stop_info(interchange.stop_id)
+
+    sorting = _time_sync(
+        lambda: _group_arrivals_by_sorting(target, arrivals), sizes.iterations
+    )
+    single_pass = _time_sync(lambda: group_arrivals(target, arrivals), sizes.iterations)
+
+    result = _timings(single_pass)
+    result["lines"] = len(target.stop_lines)
+    result["arrivals"] = len(arrivals)
+    result["sorting_median_us"] = _timings(sorting)["median_us"]
+    result["speedup"] = round(
+        statistics.median(sorting) / statistics.median(single_pass), 2
+    )
+    return result
+
+
+def _import_time(statement: str) -> float:
+    """
+    Measure the wall time, in seconds, of an import statement in a new interpreter.
+
+    The time covers everything the statement imports, including third-party
+    dependencies, but not the startup of the interpreter.
+    """
+    output = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import time\n"
+            "started_at = time.perf_counter()\n"
+            f"{statement}\n"
+            "print(time.perf_counter() - started_at)",
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return float(output)
+
+
+async def bench_import_time(sizes: BenchmarkSizes) -> dict[str, Any]:
+    """Measure the import time of the package alone and with the client."""
+    package = [_import_time("import emt_madrid") for _ in range(sizes.import_rounds)]
+    client = [
+        _import_time("from emt_madrid import EMTClient")
+        for _ in range(sizes.import_rounds)
+    ]
+
+    result = _timings(package)
+    result["client_median_us"] = _timings(client)["median_us"]
+    return result
+
+
+async def bench_auth_overhead(
+    server: TestServer, session: aiohttp.ClientSession, sizes: BenchmarkSizes
+) -> dict[str, Any]:
+    """Compare the first request of a client, which logs in, with the next ones."""
+    first, next_ = [], []
+    for stop_id in range(1, sizes.auth_rounds + 1):
+        repository = _repository(server, session)
+        fetch = partial(repository.get_stop_info, stop_id)
+        first += await _time_async(fetch, 1)
+        next_ += await _time_async(fetch, 1)
+
+    overhead = statistics.median(first) - statistics.median(next_)
+    return {
+        "rounds": sizes.auth_rounds,
+        "first_request_median_us": round(statistics.median(first) * 1e6, 3),
+        "next_request_median_us": round(statistics.median(next_) * 1e6, 3),
+        "overhead_us": round(overhead * 1e6, 3),
+        "score": round(statistics.median(first) * 1e6, 3),
+        "higher_is_better": False,
+    }
+
+
+async def bench_fan_out(
+    server: TestServer,
+    session: aiohttp.ClientSession,
+    sizes: BenchmarkSizes,
+    concurrency: int,
+) -> dict[str, Any]:
+    """Retrieve the information and arrivals of many stops concurrently."""
+    repository = _repository(server, session)
+    await repository.get_stop_info(1)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def fetch(stop_id: int) -> None:
+        async with semaphore:
+            stop = await repository.get_stop_info(stop_id)
+            await repository.get_arrivals(stop)
+
+    started_at = time.perf_counter()
+    await asyncio.gather(*(fetch(stop_id) for stop_id in range(1, sizes.stops + 1)))
+    elapsed = time.perf_counter() - started_at
+
+    return {
+        "stops": sizes.stops,
+        "concurrency": concurrency,
+        "seconds": round(elapsed, 6),
+        "stops_per_second": round(sizes.stops / elapsed, 1),
+        "score": round(sizes.stops / elapsed, 1),
+        "higher_is_better": True,
+    }
+
+
+async def bench_cache_memory(
+    server: TestServer, session: aiohttp.ClientSession, sizes: BenchmarkSizes
+) -> dict[str, Any]:
+    """Measure the memory held by the cache per stop with info and arrivals."""
+    repository = CachingEMTRepository(_repository(server, session))
+    await repository.get_stop_info(1)
+
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    for stop_id in range(1, sizes.cached_stops + 1):
+        stop = await repository.get_stop_info(stop_id)
+        await repository.get_arrivals(stop)
+    gc.collect()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    allocated = sum(
+        stat.size_diff
+        for stat in after.compare_to(before, "filename")
+        if stat.traceback[0].filename.startswith(_package_path())
+    )
+    return {
+        "stops": sizes.cached_stops,
+        "bytes_per_stop": round(allocated / sizes.cached_stops, 1),
+        "score": round(allocated / sizes.cached_stops, 1),
+        "higher_is_better": False,
+    }
+
+
+def _package_path() -> str:
+    import emt_madrid
+
+    return emt_madrid.__path__[0]
+
+
+async def run_benchmarks(
+    sizes: Optional[BenchmarkSizes] = None, latency: float = 0.0
+) -> dict[str, Any]:
+    """
+    Run every benchmark against an in-process simulator.
+
+    Args:
+        sizes: Optional sizes of the workloads
+        latency: Constant latency, in seconds, added to every simulated response
+
+    Returns:
+        The results, with the environment they were measured in
+    """
+    sizes = sizes or BenchmarkSizes()
+    network = SimulatedNetwork(stops=max(sizes.stops, sizes.cached_stops))
+    config = SimulatorConfig(network=network)
+    config.latency.first = latency
+
+    benchmarks: dict[str, Any] = {
+        "parse_stop_lines": await bench_parse_stop_lines(network, sizes),
+        "group_arrivals": await bench_group_arrivals(network, sizes),
+        "group_arrivals_single_pass": await bench_group_arrivals_single_pass(sizes),
+        "import_time": await bench_import_time(sizes),
+    }
+    async with (
+        TestServer(create_simulator_app(config)) as server,
+        aiohttp.ClientSession() as session,
+    ):
+        benchmarks["auth_overhead"] = await bench_auth_overhead(server, session, sizes)
+        for concurrency in sizes.concurrency:
+            benchmarks[f"fan_out_c{concurrency}"] = await bench_fan_out(
+                server, session, sizes, concurrency
+            )
+        benchmarks["cache_memory"] = await bench_cache_memory(server, session, sizes)
+
+    return {
+        "environment": {
+            "python": sys.version.split()[0],
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "aiohttp": aiohttp.__version__,
+            "emt_madrid": _version(),
+            "latency": latency,
+            "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        },
+        "benchmarks": benchmarks,
+    }
+
+
+def _version() -> Optional[str]:
+    try:
+        return metadata.version("emt_madrid")
+    except metadata.PackageNotFoundError:
+        return None
+
+
+def compare(
+    baseline: dict[str, Any], current: dict[str, Any], tolerance: float
+) -> list[str]:
+    """
+    Compare the scores of two result sets.
+
+    Args:
+        baseline: Results of the reference run
+        current: Results of the new run
+        tolerance: Relative score degradation still accepted, e.g. 0.2 for 20%
+
+    Returns:
+        A description of every benchmark whose score degraded beyond the tolerance
+    """
+    regressions = []
+    for name, result in current["benchmarks"].items():
+        reference = baseline["benchmarks"].get(name)
+        if not reference or not reference["score"]:
+            continue
+        change = (result["score"] - reference["score"]) / reference["score"]
+        if result["higher_is_better"]:
+            change = -change
+        if change > tolerance:
+            regressions.append(
+                f"{name}: {reference['score']} -> {result['score']} "
+                f"({change:+.0%} worse)"
+            )
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m tests.benchmarks.bench_client",
+        description="Benchmark the client stack against the local EMT API simulator.",
+    )
+    parser.add_argument("--output", help="file to write the JSON results to")
+    parser.add_argument("--compare", help="results file to compare against")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="relative degradation accepted when comparing (default: 0.2)",
+    )
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.0,
+        help="constant latency, in seconds, of the simulated responses",
+    )
+    parser.add_argument(
+        "--quick", action="store_true", help="run small workloads, e.g. in CI"
+    )
+    args = parser.parse_args()
+
+    results = asyncio.run(
+        run_benchmarks(QUICK_SIZES if args.quick else None, args.latency)
+    )
+    report = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output:
+            output.write(report + "\n")
+    else:
+        print(report)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as baseline:
+            regressions = compare(json.load(baseline), results, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,52 @@
+import pytest
+
+from tests.benchmarks.bench_client import BenchmarkSizes, compare, run_benchmarks
+
+
+class TestBenchmarks:
+    """Smoke tests keeping the benchmark suite runnable."""
+
+    @pytest.mark.asyncio
+    async def test_run_benchmarks(self) -> None:
+        """Test that every benchmark runs and reports a score."""
+        sizes = BenchmarkSizes(
+            iterations=2,
+            auth_rounds=1,
+            stops=3,
+            concurrency=(2,),
+            cached_stops=3,
+            import_rounds=1,
+        )
+
+        results = await run_benchmarks(sizes)
+
+        assert set(results["benchmarks"]) == {
+            "parse_stop_lines",
+            "group_arrivals",
+            "group_arrivals_single_pass",
+            "import_time",
+            "auth_overhead",
+            "fan_out_c2",
+            "cache_memory",
+        }
+        assert all("score" in result for result in results["benchmarks"].values())
+
+    def test_compare(self) -> None:
+        """Test that only degradations beyond the tolerance are reported."""
+        baseline = {
+            "benchmarks": {
+                "parsing": {"score": 100, "higher_is_better": False},
+                "throughput": {"score": 100, "higher_is_better": True},
+            }
+        }
+        current = {
+            "benchmarks": {
+                "parsing": {"score": 110, "higher_is_better": False},
+                "throughput": {"score": 50, "higher_is_better": True},
+            }
+        }
+
+        regressions = compare(baseline, current, tolerance=0.2)
+
+        assert len(regressions) == 1
+        assert regressions[0].startswith("throughput")
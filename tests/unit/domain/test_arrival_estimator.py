@@ -0,0 +1,70 @@
+from datetime import datetime, time
+
+from emt_madrid.domain.arrival_estimator import ArrivalEstimator
+from emt_madrid.domain.day_type import DayType
+from emt_madrid.domain.service_calendar import ServiceCalendar
+from tests.unit.test_data import TestData
+
+WEDNESDAY_NOON = datetime(2025, 7, 16, 12, 0)
+
+
+def a_stop():
+    stop = TestData().a_stop(stop_id=72, line_numbers=["27", "27", "150"])
+    for line, day_type in zip(
+        stop.stop_lines, (DayType.WORKING_DAY, DayType.FESTIVE, DayType.WORKING_DAY)
+    ):
+        line.day_type = day_type
+        line.start_time = time(6, 0)
+        line.end_time = time(23, 30)
+        line.min_frequency = 6
+        line.max_frequency = 14
+        line.arrival = 99
+    return stop
+
+
+class TestArrivalEstimator:
+    """Test cases for ArrivalEstimator class."""
+
+    def test_estimate_from_timetable(self) -> None:
+        """Test that active lines wait half of the timetable headway."""
+        stop = ArrivalEstimator(ServiceCalendar()).estimate(a_stop(), WEDNESDAY_NOON)
+
+        working_day, festive, other = stop.stop_lines
+        assert (working_day.arrival, working_day.next_arrival) == (5, 15)
+        assert (festive.arrival, festive.next_arrival) == (None, None)
+        assert (other.arrival, other.next_arrival) == (5, 15)
+        assert all(line.is_estimate for line in stop.stop_lines)
+
+    def test_estimate_from_observed_headways(self) -> None:
+        """Test that observed headways take precedence over the timetable."""
+        observed = {"150": 4.0}
+        estimator = ArrivalEstimator(
+            headway_provider=lambda stop_id, line_number, now: observed.get(line_number)
+        )
+
+        stop = estimator.estimate(a_stop(), WEDNESDAY_NOON)
+
+        assert (stop.stop_lines[0].arrival, stop.stop_lines[0].next_arrival) == (5, 15)
+        assert (stop.stop_lines[2].arrival, stop.stop_lines[2].next_arrival) == (2, 6)
+
+    def test_estimate_from_expected_arrivals(self) -> None:
+        """Test that expected arrivals replace the half headway wait."""
+        estimator = ArrivalEstimator(
+            arrival_provider=lambda stop_id, line_number, now: {"150": 1.0}.get(
+                line_number
+            )
+        )
+
+        stop = estimator.estimate(a_stop(), WEDNESDAY_NOON)
+
+        assert (stop.stop_lines[0].arrival, stop.stop_lines[0].next_arrival) == (5, 15)
+        assert (stop.stop_lines[2].arrival, stop.stop_lines[2].next_arrival) == (1, 11)
+
+    def test_lines_without_frequencies(self) -> None:
+        """Test that lines without frequencies get no estimate."""
+        stop = TestData().a_stop(line_numbers=["1"])
+
+        ArrivalEstimator().estimate(stop, WEDNESDAY_NOON)
+
+        assert stop.stop_lines[0].arrival is None
+        assert stop.stop_lines[0].is_estimate
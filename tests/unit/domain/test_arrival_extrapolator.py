@@ -0,0 +1,111 @@
+from emt_madrid.domain.arrival_extrapolator import ArrivalExtrapolator
+from tests.unit.test_data import FakeClock, TestData
+
+
+def a_stop_with_arrivals(arrival: int | None, next_arrival: int | None):
+    stop = TestData().a_stop(line_numbers=["1"])
+    stop.stop_lines[0].arrival = arrival
+    stop.stop_lines[0].next_arrival = next_arrival
+    return stop
+
+
+class TestArrivalExtrapolator:
+    """Test cases for ArrivalExtrapolator class."""
+
+    def test_needs_refresh_without_snapshot(self) -> None:
+        """Test that a stop that has never been recorded needs a refresh."""
+        extrapolator = ArrivalExtrapolator(max_staleness=120)
+
+        assert extrapolator.needs_refresh(TestData().a_stop(line_numbers=["1"]))
+
+    def test_extrapolate_subtracts_elapsed_minutes(self) -> None:
+        """Test that arrivals are decreased by the elapsed time."""
+        clock = FakeClock(0.0)
+        extrapolator = ArrivalExtrapolator(max_staleness=300, clock=clock)
+        stop = a_stop_with_arrivals(10, 15)
+        extrapolator.record(stop)
+
+        clock.now = 130
+        assert not extrapolator.needs_refresh(stop)
+        extrapolator.extrapolate(stop)
+
+        assert stop.stop_lines[0].arrival == 8
+        assert stop.stop_lines[0].next_arrival == 13
+
+    def test_needs_refresh_when_stale(self) -> None:
+        """Test that a snapshot older than the staleness bound needs a refresh."""
+        clock = FakeClock(0.0)
+        extrapolator = ArrivalExtrapolator(max_staleness=60, clock=clock)
+        stop = a_stop_with_arrivals(10, None)
+        extrapolator.record(stop)
+
+        clock.now = 61
+
+        assert extrapolator.needs_refresh(stop)
+
+    def test_needs_refresh_when_arrival_crosses_threshold(self) -> None:
+        """Test that an arrival crossing the threshold needs a refresh."""
+        clock = FakeClock(0.0)
+        extrapolator = ArrivalExtrapolator(
+            max_staleness=600, refresh_threshold=2, clock=clock
+        )
+        stop = a_stop_with_arrivals(4, None)
+        extrapolator.record(stop)
+
+        clock.now = 60
+        assert not extrapolator.needs_refresh(stop)
+        clock.now = 120
+        assert extrapolator.needs_refresh(stop)
+
+    def test_arrival_below_threshold_only_refreshes_when_stale(self) -> None:
+        """Test that an imminent arrival does not force a refresh on every call."""
+        clock = FakeClock(0.0)
+        extrapolator = ArrivalExtrapolator(
+            max_staleness=60, refresh_threshold=2, clock=clock
+        )
+        stop = a_stop_with_arrivals(1, None)
+        extrapolator.record(stop)
+
+        clock.now = 30
+
+        assert not extrapolator.needs_refresh(stop)
+
+    def test_arrival_below_threshold_refreshes_once_a_minute_elapsed(self) -> None:
+        """Test that an imminent arrival is refreshed once it has moved."""
+        clock = FakeClock(0.0)
+        extrapolator = ArrivalExtrapolator(
+            max_staleness=600, refresh_threshold=2, clock=clock
+        )
+        stop = a_stop_with_arrivals(1, 20)
+        extrapolator.record(stop)
+
+        clock.now = 60
+
+        assert extrapolator.needs_refresh(stop)
+
+    def test_needs_refresh_when_next_arrival_crosses_threshold(self) -> None:
+        """Test that the next arrival is checked when there is no first arrival."""
+        clock = FakeClock(0.0)
+        extrapolator = ArrivalExtrapolator(
+            max_staleness=600, refresh_threshold=2, clock=clock
+        )
+        stop = a_stop_with_arrivals(None, 4)
+        extrapolator.record(stop)
+
+        clock.now = 60
+        assert not extrapolator.needs_refresh(stop)
+        clock.now = 120
+        assert extrapolator.needs_refresh(stop)
+
+    def test_extrapolate_drops_passed_buses(self) -> None:
+        """Test that a bus that should have passed is replaced by the next one."""
+        clock = FakeClock(0.0)
+        extrapolator = ArrivalExtrapolator(max_staleness=600, clock=clock)
+        stop = a_stop_with_arrivals(1, 6)
+        extrapolator.record(stop)
+
+        clock.now = 120
+        extrapolator.extrapolate(stop)
+
+        assert stop.stop_lines[0].arrival == 4
+        assert stop.stop_lines[0].next_arrival is None
@@ -0,0 +1,66 @@
+from emt_madrid.domain.arrivals_diff import ArrivalsDiffer, ChangeType
+from tests.unit.test_data import TestData
+
+
+def a_stop_with_arrivals(**arrivals: int | None):
+    """Create a stop whose lines are named after the keyword arguments."""
+    stop = TestData().a_stop(line_numbers=[name.strip("_") for name in arrivals])
+    for line, arrival in zip(stop.stop_lines, arrivals.values()):
+        line.arrival = arrival
+    return stop
+
+
+class TestArrivalsDiffer:
+    """Test cases for ArrivalsDiffer class."""
+
+    def test_first_snapshot_reports_appeared_lines(self) -> None:
+        """Test that every line with arrivals appears in the first snapshot."""
+        differ = ArrivalsDiffer()
+
+        changes = differ.diff(a_stop_with_arrivals(_1=5, _2=None))
+
+        assert [(c.line_number, c.change_type) for c in changes] == [
+            ("1", ChangeType.LINE_APPEARED)
+        ]
+
+    def test_unchanged_snapshot_has_no_changes(self) -> None:
+        """Test that an identical snapshot produces no changes."""
+        differ = ArrivalsDiffer()
+        differ.diff(a_stop_with_arrivals(_1=5))
+
+        assert differ.diff(a_stop_with_arrivals(_1=5)) == []
+
+    def test_disappeared_line(self) -> None:
+        """Test that a line losing its arrival is reported as disappeared."""
+        differ = ArrivalsDiffer()
+        differ.diff(a_stop_with_arrivals(_1=5, _2=7))
+
+        changes = differ.diff(a_stop_with_arrivals(_1=5, _2=None))
+
+        assert len(changes) == 1
+        assert changes[0].line_number == "2"
+        assert changes[0].change_type == ChangeType.LINE_DISAPPEARED
+        assert changes[0].previous_arrival == 7
+
+    def test_arrival_changes_below_threshold_accumulate(self) -> None:
+        """Test that small moves are ignored until they exceed the threshold."""
+        differ = ArrivalsDiffer(threshold=1)
+        differ.diff(a_stop_with_arrivals(_1=10))
+
+        assert differ.diff(a_stop_with_arrivals(_1=9)) == []
+        changes = differ.diff(a_stop_with_arrivals(_1=8))
+
+        assert len(changes) == 1
+        assert changes[0].change_type == ChangeType.ARRIVAL_CHANGED
+        assert changes[0].previous_arrival == 10
+        assert changes[0].arrival == 8
+
+    def test_forget_stop(self) -> None:
+        """Test that a forgotten stop reports its lines as appeared again."""
+        differ = ArrivalsDiffer()
+        stop = a_stop_with_arrivals(_1=5)
+        differ.diff(stop)
+
+        differ.forget(stop.stop_id)
+
+        assert differ.diff(stop)[0].change_type == ChangeType.LINE_APPEARED
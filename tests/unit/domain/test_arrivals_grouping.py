@@ -0,0 +1,121 @@
+import gc
+from dataclasses import asdict
+
+from emt_madrid.domain import arrivals_grouping
+from emt_madrid.domain.arrivals_grouping import group_arrivals, lines_by_number
+from emt_madrid.domain.day_type import DayType
+from emt_madrid.domain.line import Line
+from emt_madrid.domain.stop import Stop
+
+
+def a_stop(*line_numbers):
+    return Stop(
+        stop_id=72,
+        stop_name="Test Stop",
+        stop_address="Test Address",
+        stop_coordinates=[0, 0],
+        stop_lines=[
+            Line(line_number=line_number, origin="A", destination="B")
+            for line_number in line_numbers
+        ],
+    )
+
+
+class TestGroupArrivals:
+    """Test cases for group_arrivals function."""
+
+    def test_keeps_the_smallest_distinct_arrivals_of_each_line(self) -> None:
+        """Test that every line gets its two first distinct arrivals."""
+        stop = a_stop("27", "150")
+
+        slots = group_arrivals(
+            stop,
+            [("27", 600), ("150", 90), ("27", 120), ("27", 130), ("27", 60)],
+        )
+
+        assert slots == {"27": [1, 2], "150": [1]}
+        assert (stop.stop_lines[0].arrival, stop.stop_lines[0].next_arrival) == (1, 2)
+        assert (stop.stop_lines[1].arrival, stop.stop_lines[1].next_arrival) == (
+            1,
+            None,
+        )
+
+    def test_keeps_k_arrivals(self) -> None:
+        """Test that more arrivals can be kept per line."""
+        slots = group_arrivals(
+            a_stop("27"), [("27", 600), ("27", 300), ("27", 60), ("27", 420)], k=3
+        )
+
+        assert slots == {"27": [1, 5, 7]}
+
+    def test_lines_without_arrivals_are_cleared(self) -> None:
+        """Test that lines not reported lose their previous arrivals."""
+        stop = a_stop("27")
+        stop.stop_lines[0].arrival = 3
+        stop.stop_lines[0].next_arrival = 9
+
+        group_arrivals(stop, [("5", 60)])
+
+        assert stop.stop_lines[0].arrival is None
+        assert stop.stop_lines[0].next_arrival is None
+
+    def test_every_day_type_of_a_line_is_updated(self) -> None:
+        """Test that a line listed once per day type gets the same arrivals."""
+        stop = a_stop("27", "27")
+        stop.stop_lines[1].day_type = DayType.SATURDAY
+
+        group_arrivals(stop, [("27", 120)])
+
+        assert [line.arrival for line in stop.stop_lines] == [2, 2]
+
+
+class TestLinesByNumber:
+    """Test cases for the line index of a stop."""
+
+    def test_index_follows_the_lines(self) -> None:
+        """Test that the index reflects the current lines of the stop."""
+        stop = a_stop("27", "150", "27")
+
+        assert {
+            number: len(lines) for number, lines in lines_by_number(stop).items()
+        } == {"27": 2, "150": 1}
+        stop.stop_lines[1].line_number = "5"
+        stop.stop_lines.append(Line(line_number="N1", origin="A", destination="B"))
+        assert list(lines_by_number(stop)) == ["27", "5", "N1"]
+
+    def test_index_is_built_once_per_stop(self) -> None:
+        """Test that the index is reused until a line is replaced."""
+        stop = a_stop("27", "150")
+        index = lines_by_number(stop)
+
+        group_arrivals(stop, [("27", 120)])
+        assert lines_by_number(stop) is index
+
+        stop.stop_lines[0] = Line(line_number="27", origin="A", destination="B")
+        assert lines_by_number(stop) is not index
+        assert lines_by_number(stop)["27"] == [stop.stop_lines[0]]
+
+    def test_index_is_dropped_with_the_stop(self) -> None:
+        """Test that the index of a stop does not outlive it."""
+        stop = a_stop("27")
+        lines_by_number(stop)
+        key = id(stop)
+
+        del stop
+        gc.collect()
+
+        assert key not in arrivals_grouping._INDEXES
+
+    def test_stop_is_a_plain_dataclass(self) -> None:
+        """Test that stops hold no cached state besides their fields."""
+        stop = a_stop("27")
+        group_arrivals(stop, [("27", 120)])
+
+        assert asdict(stop)["stop_lines"][0]["arrival"] == 2
+        assert set(asdict(stop)) == {
+            "stop_id",
+            "stop_name",
+            "stop_address",
+            "stop_coordinates",
+            "stop_lines",
+        }
@@ -0,0 +1,37 @@
+import pytest
+
+from emt_madrid.domain.hash_ring import HashRing
+
+
+class TestHashRing:
+    """Test cases for HashRing class."""
+
+    def test_adding_a_shard_only_moves_stops_to_it(self) -> None:
+        """Test that a new shard takes stops without reshuffling the others."""
+        ring = HashRing(range(4))
+        before = {stop_id: ring.shard(stop_id) for stop_id in range(1000)}
+
+        ring.add(4)
+        after = {stop_id: ring.shard(stop_id) for stop_id in range(1000)}
+
+        moved = [stop_id for stop_id in before if before[stop_id] != after[stop_id]]
+        assert all(after[stop_id] == 4 for stop_id in moved)
+        assert 100 < len(moved) < 350
+
+    def test_removing_a_shard_hands_over_its_stops(self) -> None:
+        """Test that only the stops of a removed shard move."""
+        ring = HashRing(range(4))
+        before = {stop_id: ring.shard(stop_id) for stop_id in range(1000)}
+
+        ring.remove(2)
+
+        for stop_id, shard in before.items():
+            if shard != 2:
+                assert ring.shard(stop_id) == shard
+            else:
+                assert ring.shard(stop_id) != 2
+
+    def test_empty_ring(self) -> None:
+        """Test that an empty ring cannot assign stops."""
+        with pytest.raises(LookupError):
+            HashRing().shard(1)
@@ -0,0 +1,130 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from emt_madrid.domain.headway_model import HeadwayHistogram, HeadwayModel
+from tests.unit.test_data import TestData
+
+START = datetime(2025, 7, 16, 12, 0)
+
+
+def a_snapshot(arrival, next_arrival=None, stop_id=72, line_number="27"):
+    stop = TestData().a_stop(stop_id=stop_id, line_numbers=[line_number, line_number])
+    for line in stop.stop_lines:
+        line.arrival = arrival
+        line.next_arrival = next_arrival
+    return stop
+
+
+def feed_buses(model, headway=8, buses=5, poll=1, stop_id=72):
+    """Observe buses passing every ``headway`` minutes, polled every ``poll``."""
+    elapsed = 0
+    while elapsed < headway * buses:
+        arrival = headway - elapsed % headway
+        model.observe(
+            a_snapshot(arrival, arrival + headway, stop_id=stop_id),
+            START + timedelta(minutes=elapsed),
+        )
+        elapsed += poll
+    return START + timedelta(minutes=elapsed)
+
+
+class TestHeadwayHistogram:
+    """Test cases for HeadwayHistogram class."""
+
+    def test_statistics(self) -> None:
+        """Test the mean, quantiles and expected waits of the samples."""
+        histogram = HeadwayHistogram()
+        for headway in (7.5, 7.5, 9.5, 9.5):
+            histogram.add(headway)
+
+        assert histogram.mean() == pytest.approx(8.5)
+        assert histogram.quantile(0.5) == pytest.approx(8)
+        assert histogram.quantile(1) == pytest.approx(10)
+        assert histogram.expected_wait() == pytest.approx((7.5**2 + 9.5**2) / 34)
+        assert histogram.expected_wait(8) == pytest.approx(1.5)
+        assert histogram.expected_wait(20) is None
+
+    def test_decay(self) -> None:
+        """Test that older samples fade away."""
+        histogram = HeadwayHistogram()
+        for _ in range(50):
+            histogram.add(4.5, decay=0.9)
+        for _ in range(50):
+            histogram.add(9.5, decay=0.9)
+
+        assert histogram.mean() == pytest.approx(9.5, abs=0.1)
+        assert histogram.weight < 10
+
+    def test_empty(self) -> None:
+        """Test that an empty histogram has no statistics."""
+        histogram = HeadwayHistogram()
+
+        assert histogram.mean() is None
+        assert histogram.quantile(0.5) is None
+        assert histogram.expected_wait() is None
+
+
+class TestHeadwayModel:
+    """Test cases for HeadwayModel class."""
+
+    def test_learns_headways_from_passages(self) -> None:
+        """Test that regular passages are learned as the headway of the line."""
+        model = HeadwayModel(decay=1.0)
+        now = feed_buses(model, headway=8)
+
+        assert model.headway(72, "27", now) == pytest.approx(7.5)
+        assert model.quantile(72, "27", 0.5, now) == pytest.approx(7.5)
+        assert model.headway(72, "150", now) is None
+        assert model.headway(5, "27", now) is None
+
+    def test_expected_arrival_uses_last_passage(self) -> None:
+        """Test that the expected wait shrinks as time passes since the last bus."""
+        model = HeadwayModel(decay=1.0)
+        now = feed_buses(model, headway=8)
+        last_passage = START + timedelta(minutes=32)
+
+        assert model.expected_arrival(
+            72, "27", last_passage + timedelta(minutes=2)
+        ) == (pytest.approx(5.5))
+        assert model.expected_arrival(
+            72, "27", last_passage + timedelta(minutes=6)
+        ) == (pytest.approx(1.5))
+        assert model.expected_arrival(72, "27", now + timedelta(hours=3)) is None
+
+    def test_needs_enough_samples(self) -> None:
+        """Test that lines with few samples are not trusted."""
+        model = HeadwayModel(min_samples=50)
+        now = feed_buses(model)
+
+        assert model.headway(72, "27", now) is None
+        assert model.expected_arrival(72, "27", now) is None
+
+    def test_ignores_distant_snapshots(self) -> None:
+        """Test that passages are not inferred across long observation gaps."""
+        model = HeadwayModel(min_samples=1)
+        now = feed_buses(model, poll=15)
+
+        assert model.headway(72, "27", now) is None
+
+    def test_ignores_estimates(self) -> None:
+        """Test that estimated arrivals are not learned."""
+        model = HeadwayModel(min_samples=1)
+        for minute in range(40):
+            stop = a_snapshot(8 - minute % 8, 16 - minute % 8)
+            for line in stop.stop_lines:
+                line.is_estimate = True
+            model.observe(stop, START + timedelta(minutes=minute))
+
+        assert model.headway(72, "27", START) is None
+
+    def test_memory_is_bounded(self) -> None:
+        """Test that the least recently updated series are dropped."""
+        model = HeadwayModel(max_series=2, decay=1.0)
+        for stop_id in (1, 2, 3):
+            now = feed_buses(model, stop_id=stop_id)
+
+        assert model.headway(1, "27", now) is None
+        assert model.headway(3, "27", now) is not None
+        assert len(model._series) <= 2
+        assert len(model._lines) <= 2
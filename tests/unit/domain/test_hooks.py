@@ -0,0 +1,47 @@
+import pytest
+
+from emt_madrid.domain.hooks import ClientHooks, RequestInfo
+
+
+class TestClientHooks:
+    """Test cases for ClientHooks class."""
+
+    def test_empty_hooks_are_falsy(self) -> None:
+        """Test that hooks with no callback can be skipped with a truth check."""
+        hooks = ClientHooks()
+        callback = hooks.register("on_cache_hit", lambda kind, stop_id: None)
+        assert hooks
+
+        hooks.unregister("on_cache_hit", callback)
+
+        assert not hooks
+
+    def test_unknown_hook(self) -> None:
+        """Test that only the supported hooks can be registered."""
+        with pytest.raises(ValueError):
+            ClientHooks().register("on_everything", print)
+
+    def test_callbacks_are_notified(self) -> None:
+        """Test that every callback of a hook is notified in order."""
+        hooks = ClientHooks()
+        events: list[tuple] = []
+        hooks.register("before_request", lambda request: events.append(("first",)))
+        hooks.register(
+            "before_request", lambda request: events.append(("second", request))
+        )
+        hooks.register(
+            "after_response",
+            lambda request, response, error, duration: events.append(
+                ("after", response, error, duration >= 0)
+            ),
+        )
+        request = RequestInfo("GET", "v1/test/endpoint")
+
+        hooks.before_request(request)
+        hooks.after_response(request, {"code": "00"}, None)
+
+        assert events == [
+            ("first",),
+            ("second", request),
+            ("after", {"code": "00"}, None, True),
+        ]
@@ -0,0 +1,59 @@
+from datetime import datetime, time
+
+from emt_madrid.domain.polling_policy import PollingPolicy
+from tests.unit.test_data import TestData
+
+NOW = datetime(2025, 7, 16, 12, 0)
+
+
+class TestPollingPolicy:
+    """Test cases for PollingPolicy class."""
+
+    def test_interval_follows_nearest_arrival(self) -> None:
+        """Test that the interval is half the time to the nearest bus."""
+        stop = TestData().a_stop(line_numbers=["1", "2"])
+        stop.stop_lines[0].arrival = 10
+        stop.stop_lines[1].arrival = 6
+
+        assert PollingPolicy().next_interval(stop, NOW) == 180
+
+    def test_interval_is_bounded(self) -> None:
+        """Test that imminent and distant buses are bounded by the limits."""
+        policy = PollingPolicy(min_interval=20, max_interval=300)
+        stop = TestData().a_stop(line_numbers=["1"])
+
+        stop.stop_lines[0].arrival = 0
+        assert policy.next_interval(stop, NOW) == 20
+
+        stop.stop_lines[0].arrival = 45
+        assert policy.next_interval(stop, NOW) == 300
+
+    def test_interval_without_arrivals_uses_headway(self) -> None:
+        """Test that stops without live arrivals use the shortest headway."""
+        stop = TestData().a_stop(line_numbers=["1", "2"])
+        stop.stop_lines[0].min_frequency = 12
+        stop.stop_lines[1].min_frequency = 8
+
+        assert PollingPolicy().next_interval(stop, NOW) == 240
+
+    def test_interval_out_of_service(self) -> None:
+        """Test that stops whose lines are not running are barely polled."""
+        policy = PollingPolicy(out_of_service_interval=3600)
+        stop = TestData().a_stop(line_numbers=["1"])
+        stop.stop_lines[0].start_time = time(6, 30)
+        stop.stop_lines[0].end_time = time(0, 4)
+
+        assert policy.next_interval(stop, datetime(2025, 7, 16, 3, 0)) == 3600
+        assert policy.next_interval(stop, datetime(2025, 7, 16, 0, 2)) != 3600
+
+    def test_interval_without_arrivals_uses_expected_arrival(self) -> None:
+        """Test that learned expected arrivals take precedence over the timetable."""
+        policy = PollingPolicy(
+            arrival_provider=lambda stop_id, line_number, now: {"2": 4.0}.get(
+                line_number
+            )
+        )
+        stop = TestData().a_stop(line_numbers=["1", "2"])
+        stop.stop_lines[0].min_frequency = 12
+
+        assert policy.next_interval(stop, NOW) == 120
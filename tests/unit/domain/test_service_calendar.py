@@ -0,0 +1,69 @@
+from datetime import date, datetime, time, timedelta
+
+from emt_madrid.domain.day_type import DayType
+from emt_madrid.domain.service_calendar import ServiceCalendar
+from tests.unit.test_data import TestData
+
+WEDNESDAY = date(2025, 7, 16)
+SATURDAY = date(2025, 7, 19)
+SUNDAY = date(2025, 7, 20)
+
+
+def a_stop_with_service(start: str, end: str, day_type: DayType | None):
+    stop = TestData().a_stop(line_numbers=["1"])
+    stop.stop_lines[0].start_time = time.fromisoformat(start)
+    stop.stop_lines[0].end_time = time.fromisoformat(end)
+    stop.stop_lines[0].day_type = day_type
+    return stop
+
+
+class TestServiceCalendar:
+    """Test cases for ServiceCalendar class."""
+
+    def test_day_type(self) -> None:
+        """Test the day type of working days, weekends and holidays."""
+        holiday = date(2025, 8, 15)
+        calendar = ServiceCalendar(holidays=[holiday])
+
+        assert calendar.day_type(WEDNESDAY) == DayType.WORKING_DAY
+        assert calendar.day_type(SATURDAY) == DayType.SATURDAY
+        assert calendar.day_type(SUNDAY) == DayType.FESTIVE
+        assert calendar.day_type(holiday) == DayType.FESTIVE
+
+    def test_line_active_within_service_hours(self) -> None:
+        """Test that a line is only active during its service hours."""
+        calendar = ServiceCalendar(grace=timedelta(0))
+        stop = a_stop_with_service("06:30", "23:30", DayType.WORKING_DAY)
+        line = stop.stop_lines[0]
+
+        assert calendar.is_line_active(line, datetime.combine(WEDNESDAY, time(12)))
+        assert not calendar.is_line_active(line, datetime.combine(WEDNESDAY, time(3)))
+
+    def test_line_inactive_on_other_day_types(self) -> None:
+        """Test that a line is not active on days of another day type."""
+        calendar = ServiceCalendar()
+        stop = a_stop_with_service("06:30", "23:30", DayType.SATURDAY)
+
+        assert not calendar.is_stop_active(stop, datetime.combine(WEDNESDAY, time(12)))
+        assert calendar.is_stop_active(stop, datetime.combine(SATURDAY, time(12)))
+
+    def test_service_after_midnight_uses_previous_day_type(self) -> None:
+        """Test that a service ending after midnight belongs to its start day."""
+        calendar = ServiceCalendar(grace=timedelta(0))
+        stop = a_stop_with_service("06:30", "00:30", DayType.SATURDAY)
+        sunday_night = datetime.combine(SUNDAY, time(0, 15))
+
+        assert calendar.is_stop_active(stop, sunday_night)
+        assert not calendar.is_stop_active(stop, sunday_night + timedelta(days=1))
+
+    def test_grace_period_after_last_departure(self) -> None:
+        """Test that a line stays active for the grace period."""
+        calendar = ServiceCalendar(grace=timedelta(minutes=30))
+        stop = a_stop_with_service("06:30", "23:30", None)
+
+        assert calendar.is_stop_active(stop, datetime.combine(SUNDAY, time(23, 50)))
+        assert not calendar.is_stop_active(stop, datetime.combine(SUNDAY, time(0, 5)))
+
+    def test_stop_without_lines_is_active(self) -> None:
+        """Test that a stop without lines is never skipped."""
+        assert ServiceCalendar().is_stop_active(TestData().a_stop())
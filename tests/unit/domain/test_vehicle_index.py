@@ -0,0 +1,79 @@
+from emt_madrid.domain.vehicle_index import BusArrival, VehicleIndex
+from tests.unit.test_data import FakeClock
+
+
+START = 1_750_000_000.0
+
+
+def a_bus(bus_id, stop_id, eta, distance=None, line_number="27", x=-3.69):
+    return BusArrival(
+        bus_id=bus_id,
+        line_number=line_number,
+        stop_id=stop_id,
+        eta=eta,
+        distance=distance,
+        coordinates=(x, 40.42),
+    )
+
+
+class TestVehicleIndex:
+    """Test cases for VehicleIndex class."""
+
+    def test_buses_are_deduplicated_across_stops(self) -> None:
+        """Test that a bus reported by several stops is a single vehicle."""
+        index = VehicleIndex(clock=FakeClock(START))
+
+        index.update(72, [a_bus(532, 72, 60, distance=300, x=-3.60)])
+        index.update(73, [a_bus(532, 73, 180, distance=900, x=-3.70)])
+
+        assert len(index) == 1
+        vehicle = index.get(532)
+        assert vehicle.etas == {72: 60, 73: 180}
+        assert vehicle.next_stop_id == 72
+        assert vehicle.coordinates == (-3.60, 40.42)
+
+    def test_latest_report_wins(self) -> None:
+        """Test that a newer report updates the position of the bus."""
+        clock = FakeClock(START)
+        index = VehicleIndex(clock=clock)
+
+        index.update(72, [a_bus(532, 72, 60, distance=300, x=-3.60)])
+        clock.now += 10
+        index.update(73, [a_bus(532, 73, 170, distance=850, x=-3.65)])
+
+        assert index.get(532).coordinates == (-3.65, 40.42)
+        assert index.get(532).updated_at == clock.now
+
+    def test_passed_buses_leave_the_stop(self) -> None:
+        """Test that buses no longer reported by a stop lose their ETA there."""
+        clock = FakeClock(START)
+        index = VehicleIndex(clock=clock)
+        index.update(72, [a_bus(532, 72, 30), a_bus(531, 72, 400)])
+
+        clock.now += 30
+        index.update(72, [a_bus(531, 72, 370)])
+
+        assert index.get(532).etas == {}
+        assert index.get(532).next_stop_id is None
+        assert index.get(531).etas == {72: 370}
+
+    def test_vehicles_expire(self) -> None:
+        """Test that vehicles not reported for the TTL are dropped."""
+        clock = FakeClock(START)
+        index = VehicleIndex(ttl=60, clock=clock)
+        index.update(72, [a_bus(532, 72, 30)])
+        clock.now += 30
+        index.update(73, [a_bus(601, 73, 30, line_number="150")])
+
+        clock.now += 45
+
+        assert [vehicle.bus_id for vehicle in index.vehicles()] == [601]
+        assert index.get(532) is None
+
+    def test_vehicles_filtered_by_line(self) -> None:
+        """Test that vehicles can be filtered by line numbers."""
+        index = VehicleIndex(clock=FakeClock(START))
+        index.update(72, [a_bus(532, 72, 30), a_bus(601, 72, 90, line_number="150")])
+
+        assert [vehicle.bus_id for vehicle in index.vehicles(["150"])] == [601]
+        assert len(index.vehicles()) == 2
@@ -0,0 +1,145 @@
+from unittest.mock import AsyncMock
+
+import pytest
+from aiohttp.test_utils import TestClient, TestServer
+
+from emt_madrid.domain.arrival_estimator import ArrivalEstimator
+from emt_madrid.domain.exceptions import APILimitExceededError, StopNotFoundError
+from emt_madrid.domain.vehicle_index import BusArrival, VehicleIndex
+from emt_madrid.gateway.server import create_app
+from emt_madrid.infrastructure.metrics import EMTMetrics
+from tests.unit.infrastructure.fixtures.test_get_arrivals_fixture import (
+    STOP_GET_ARRIVALS_OK,
+)
+from tests.unit.test_data import TestData
+from tests.unit.use_cases.test_fixtures import FakeEMTRepository
+
+
+def a_repository() -> FakeEMTRepository:
+    repository = FakeEMTRepository()
+    repository.get_stop_info = AsyncMock(return_value=TestData().a_stop(stop_id=72))  # type: ignore[method-assign]
+    repository.get_arrivals = AsyncMock(return_value=STOP_GET_ARRIVALS_OK)  # type: ignore[method-assign]
+    return repository
+
+
+class TestGatewayServer:
+    """Test cases for the gateway application."""
+
+    @pytest.mark.asyncio
+    async def test_get_stop_info(self) -> None:
+        """Test that stop information is served as JSON."""
+        async with TestClient(TestServer(create_app(a_repository()))) as client:  # type: ignore
+            response = await client.get("/stops/72")
+            body = await response.json()
+
+        assert response.status == 200
+        assert body["stop_id"] == 72
+        assert body["stop_name"] == "Test Stop"
+
+    @pytest.mark.asyncio
+    async def test_get_arrivals_filtered_by_lines(self) -> None:
+        """Test that arrivals can be filtered by line numbers."""
+        async with TestClient(TestServer(create_app(a_repository()))) as client:  # type: ignore
+            response = await client.get("/stops/72/arrivals", params={"lines": "5"})
+            body = await response.json()
+
+        assert response.status == 200
+        assert [line["line_number"] for line in body["stop_lines"]] == ["5"]
+        assert body["stop_lines"][0]["arrival"] == 1
+        assert body["stop_lines"][0]["start_time"] == "06:30:00"
+
+    @pytest.mark.asyncio
+    async def test_stop_not_found(self) -> None:
+        """Test that unknown stops are reported as 404."""
+        repository = a_repository()
+        repository.get_stop_info = AsyncMock(side_effect=StopNotFoundError(72))  # type: ignore[method-assign]
+
+        async with TestClient(TestServer(create_app(repository))) as client:  # type: ignore
+            response = await client.get("/stops/72")
+            body = await response.json()
+
+        assert response.status == 404
+        assert body["error"] == "Stop 72 not found"
+
+    @pytest.mark.asyncio
+    async def test_api_limit_exceeded(self) -> None:
+        """Test that an exhausted upstream quota is reported as 503."""
+        repository = a_repository()
+        error = StopNotFoundError(72)
+        error.__cause__ = APILimitExceededError()
+        repository.get_stop_info = AsyncMock(side_effect=error)  # type: ignore[method-assign]
+
+        async with TestClient(TestServer(create_app(repository))) as client:  # type: ignore
+            response = await client.get("/stops/72")
+
+        assert response.status == 503
+
+    @pytest.mark.asyncio
+    async def test_invalid_stop_id(self) -> None:
+        """Test that a non numeric stop ID is rejected."""
+        async with TestClient(TestServer(create_app(a_repository()))) as client:  # type: ignore
+            response = await client.get("/stops/abc")
+
+        assert response.status == 400
+
+    @pytest.mark.asyncio
+    async def test_metrics(self) -> None:
+        """Test that metrics are exposed in the Prometheus text format."""
+        metrics = EMTMetrics()
+        metrics.count_auth_refresh("missing", success=True)
+        app = create_app(a_repository(), metrics)  # type: ignore
+        async with TestClient(TestServer(app)) as client:
+            response = await client.get("/metrics")
+            body = await response.text()
+
+        assert response.status == 200
+        assert response.content_type == "text/plain"
+        assert 'emt_auth_refreshes_total{reason="missing",outcome="success"} 1' in body
+
+    @pytest.mark.asyncio
+    async def test_get_arrivals_fallback(self) -> None:
+        """Test that estimates are served when the EMT API fails."""
+        repository = a_repository()
+        stop = TestData().a_stop(stop_id=72, line_numbers=["5"])
+        stop.stop_lines[0].min_frequency = 8
+        repository.get_stop_info = AsyncMock(return_value=stop)  # type: ignore[method-assign]
+        error = StopNotFoundError(72, "API limit exceeded")
+        error.__cause__ = APILimitExceededError()
+        repository.get_arrivals = AsyncMock(side_effect=error)  # type: ignore[method-assign]
+        app = create_app(repository, fallback=ArrivalEstimator())  # type: ignore
+        async with TestClient(TestServer(app)) as client:
+            response = await client.get("/stops/72/arrivals")
+            body = await response.json()
+
+        assert response.status == 200
+        assert body["stop_lines"][0]["arrival"] == 4
+        assert body["stop_lines"][0]["is_estimate"] is True
+        assert stop.stop_lines[0].arrival is None
+
+    @pytest.mark.asyncio
+    async def test_vehicles(self) -> None:
+        """Test that the indexed buses are served, optionally filtered by line."""
+        vehicles = VehicleIndex()
+        vehicles.update(
+            72,
+            [
+                BusArrival(532, "27", 72, 60, 300, (-3.69, 40.42)),
+                BusArrival(601, "150", 72, 120, 700, (-3.7, 40.41)),
+            ],
+        )
+        app = create_app(a_repository(), vehicles=vehicles)  # type: ignore
+        async with TestClient(TestServer(app)) as client:
+            response = await client.get("/vehicles?lines=27")
+            body = await response.json()
+
+        assert response.status == 200
+        assert body == [
+            {
+                "bus_id": 532,
+                "line_number": "27",
+                "coordinates": [-3.69, 40.42],
+                "updated_at": vehicles.get(532).updated_at,
+                "next_stop_id": 72,
+                "etas": {"72": 60},
+            }
+        ]
@@ -0,0 +1,61 @@
+from emt_madrid.domain.line import Line
+from emt_madrid.domain.stop import Stop
+
+GET_ALL_STOPS_LINES_RESPONSE = {
+    "code": "00",
+    "description": "Data recovered OK",
+    "data": [
+        {"line": "005", "label": "5", "nameA": "SOL/SEVILLA", "nameB": "CHAMARTIN"},
+        {"line": "014", "label": "14", "nameA": "CONDE DE CASAL", "nameB": "PIO XII"},
+    ],
+}
+
+GET_ALL_STOPS_OK_RESPONSE = {
+    "code": "00",
+    "description": "Data recovered OK",
+    "data": [
+        {
+            "node": "72",
+            "name": "Cibeles-Casa de América",
+            "geometry": {
+                "type": "Point",
+                "coordinates": [-3.69214452424823, 40.4203613685499],
+            },
+            "wifi": "0",
+            "lines": ["005/1", "014/2"],
+        },
+        {
+            "node": "73",
+            "name": "Paseo de Recoletos",
+            "geometry": {"type": "Point", "coordinates": [-3.6925, 40.4225]},
+            "wifi": "0",
+            "lines": ["099/1"],
+        },
+    ],
+}
+
+GET_ALL_STOPS_OK = [
+    Stop(
+        stop_id=72,
+        stop_name="Cibeles-Casa de América",
+        stop_address="Unknown",
+        stop_coordinates=[-3.69214452424823, 40.4203613685499],
+        stop_lines=[
+            Line(line_number="5", origin="SOL/SEVILLA", destination="CHAMARTIN"),
+            Line(line_number="14", origin="PIO XII", destination="CONDE DE CASAL"),
+        ],
+    ),
+    Stop(
+        stop_id=73,
+        stop_name="Paseo de Recoletos",
+        stop_address="Unknown",
+        stop_coordinates=[-3.6925, 40.4225],
+        stop_lines=[Line(line_number="99", origin="", destination="")],
+    ),
+]
+
+GET_ALL_STOPS_INVALID_TOKEN_RESPONSE = {
+    "code": "80",
+    "description": "Invalid token",
+    "data": [],
+}
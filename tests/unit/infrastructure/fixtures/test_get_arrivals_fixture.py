@@ -168,6 +168,13 @@ STOP_GET_ARRIVALS_NOT_FOUND_RESPONSE = {
     "data": [{"Arrive": [], "StopInfo": [], "ExtraInfo": [], "Incident": {}}],
 }
 
+STOP_GET_ARRIVALS_API_LIMIT_EXCEEDED_RESPONSE = {
+    "code": "98",
+    "description": "API limit exceeded",
+    "datetime": "2023-07-10T19:33:32.596198",
+    "data": [],
+}
+
 STOP_GET_ARRIVALS_NO_DATA_RESPONSE = {
     "code": "00",
     "description": " Data recovered  OK  (lapsed: 1065 millsecs)",
@@ -0,0 +1,81 @@
+from datetime import time
+
+from emt_madrid.domain.day_type import DayType
+from emt_madrid.domain.line import Line
+from emt_madrid.domain.stop import Stop
+
+GET_LINE_STOPS_OK_RESPONSE = {
+    "code": "00",
+    "description": "Data recovered OK",
+    "data": [
+        {
+            "line": "027",
+            "label": "27",
+            "nameA": "EMBAJADORES",
+            "nameB": "PLAZA CASTILLA",
+            "timeTable": [
+                {
+                    "idDayType": "LA",
+                    "startTime": "06:00",
+                    "stopTime": "23:30",
+                    "minimumFrequency": "4",
+                    "maximumFrequency": "9",
+                },
+            ],
+            "stops": [
+                {
+                    "stop": "72",
+                    "name": "Cibeles-Casa de América",
+                    "postalAddress": "Pº de Recoletos, 2 (Pza. de Cibeles)",
+                    "geometry": {
+                        "type": "Point",
+                        "coordinates": [-3.69214452424823, 40.4203613685499],
+                    },
+                },
+                {
+                    "stop": "73",
+                    "name": "Paseo de Recoletos",
+                    "postalAddress": "Pº de Recoletos, 13",
+                    "geometry": {"type": "Point", "coordinates": [-3.6925, 40.4225]},
+                },
+            ],
+        }
+    ],
+}
+
+
+def a_line_27() -> Line:
+    return Line(
+        line_number="27",
+        origin="PLAZA CASTILLA",
+        destination="EMBAJADORES",
+        max_frequency=9,
+        min_frequency=4,
+        start_time=time(6, 0),
+        end_time=time(23, 30),
+        day_type=DayType.WORKING_DAY,
+    )
+
+
+GET_LINE_STOPS_OK = [
+    Stop(
+        stop_id=72,
+        stop_name="Cibeles-Casa de América",
+        stop_address="Pº de Recoletos, 2 (Pza. de Cibeles)",
+        stop_coordinates=[-3.69214452424823, 40.4203613685499],
+        stop_lines=[a_line_27()],
+    ),
+    Stop(
+        stop_id=73,
+        stop_name="Paseo de Recoletos",
+        stop_address="Pº de Recoletos, 13",
+        stop_coordinates=[-3.6925, 40.4225],
+        stop_lines=[a_line_27()],
+    ),
+]
+
+GET_LINE_STOPS_NOT_FOUND_RESPONSE = {
+    "code": "90",
+    "description": "Line not found",
+    "data": [],
+}
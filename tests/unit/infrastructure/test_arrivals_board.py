@@ -0,0 +1,173 @@
+import multiprocessing
+import threading
+
+import pytest
+
+from emt_madrid.domain.line import Line
+from emt_madrid.domain.stop import Stop
+from emt_madrid.infrastructure.arrivals_board import (
+    ArrivalsBoardPublisher,
+    HEADER,
+    SEQUENCE,
+    SLOT_SIZE,
+    ArrivalsBoardReader,
+    BoardEntry,
+)
+
+
+def a_stop(stop_id=72, arrivals=None):
+    arrivals = arrivals or {"27": (3, 12), "150": (None, None)}
+    return Stop(
+        stop_id=stop_id,
+        stop_name="Test Stop",
+        stop_address="Test Address",
+        stop_coordinates=[0, 0],
+        stop_lines=[
+            Line(
+                line_number=line_number,
+                origin="A",
+                destination="B",
+                arrival=arrival,
+                next_arrival=next_arrival,
+            )
+            for line_number, (arrival, next_arrival) in arrivals.items()
+        ],
+    )
+
+
+def read_stop(path, results) -> None:
+    reader = ArrivalsBoardReader(path)
+    results.put(reader.stop(72))
+    reader.close()
+
+
+class TestArrivalsBoard:
+    """Test cases for ArrivalsBoardPublisher and ArrivalsBoardReader classes."""
+
+    def test_published_arrivals_are_read(self, tmp_path) -> None:
+        """Test that readers get the latest arrivals of every line of a stop."""
+        publisher = ArrivalsBoardPublisher(
+            tmp_path / "board", capacity=64, clock=lambda: 100.0
+        )
+        reader = ArrivalsBoardReader(tmp_path / "board")
+
+        publisher.publish(a_stop())
+        publisher.publish(a_stop(73, {"27": (8, None)}))
+        publisher.publish(a_stop(arrivals={"27": (2, 11)}))
+
+        assert reader.get(72, "27") == BoardEntry(72, "27", 2, 11, False, 100.0)
+        assert reader.get(72, "150") == BoardEntry(72, "150", None, None, False, 100.0)
+        assert reader.get(73, "27").arrival == 8
+        assert reader.get(74, "27") is None
+        assert reader.updates == 3
+
+    def test_board_is_read_by_other_processes(self, tmp_path) -> None:
+        """Test that a process mapping the board reads the published arrivals."""
+        publisher = ArrivalsBoardPublisher(tmp_path / "board", capacity=64)
+        publisher.publish(a_stop())
+        context = multiprocessing.get_context("spawn")
+        results = context.Queue()
+
+        process = context.Process(target=read_stop, args=(tmp_path / "board", results))
+        process.start()
+        entries = results.get(timeout=30)
+        process.join()
+
+        assert {(entry.line_number, entry.arrival) for entry in entries} == {
+            ("27", 3),
+            ("150", None),
+        }
+
+    def test_restarted_publisher_reuses_the_board(self, tmp_path) -> None:
+        """Test that a new publisher keeps the slots of the previous one."""
+        ArrivalsBoardPublisher(tmp_path / "board", capacity=64).publish(a_stop())
+        reader = ArrivalsBoardReader(tmp_path / "board")
+
+        ArrivalsBoardPublisher(tmp_path / "board", capacity=64).publish(
+            a_stop(arrivals={"27": (1, 5)})
+        )
+
+        assert [entry.line_number for entry in reader.stop(72)].count("27") == 1
+        assert reader.get(72, "27").arrival == 1
+
+    def test_board_left_mid_write_is_repaired(self, tmp_path) -> None:
+        """Test that a slot left unstable by a dead publisher is usable again."""
+        publisher = ArrivalsBoardPublisher(tmp_path / "board", capacity=64)
+        publisher.publish(a_stop(arrivals={"27": (3, 12)}))
+        offset = HEADER.size + publisher._slots[(72, "27")] * SLOT_SIZE
+        (sequence,) = SEQUENCE.unpack_from(publisher._map, offset)
+        SEQUENCE.pack_into(publisher._map, offset, sequence + 1)
+        publisher.close()
+        reader = ArrivalsBoardReader(tmp_path / "board", read_timeout=0.05)
+
+        with pytest.raises(TimeoutError):
+            reader.stop(72)
+
+        publisher = ArrivalsBoardPublisher(tmp_path / "board", capacity=64)
+        assert reader.get(72, "27").arrival == 3
+        publisher.publish(a_stop(arrivals={"27": (1, 5)}))
+        publisher.publish(a_stop(arrivals={"27": (0, 4)}))
+
+        assert reader.get(72, "27").arrival == 0
+        assert not SEQUENCE.unpack_from(publisher._map, offset)[0] & 1
+
+    def test_reads_are_never_torn(self, tmp_path) -> None:
+        """Test that a reader never sees a half-written slot."""
+        publisher = ArrivalsBoardPublisher(tmp_path / "board", capacity=64)
+        reader = ArrivalsBoardReader(tmp_path / "board")
+        publisher.publish(a_stop(arrivals={"27": (0, 1)}))
+        done = threading.Event()
+
+        def write() -> None:
+            for minute in range(20000):
+                publisher.publish(a_stop(arrivals={"27": (minute, minute + 1)}))
+            done.set()
+
+        writer = threading.Thread(target=write)
+        writer.start()
+        while not done.is_set():
+            entry = reader.get(72, "27")
+            assert entry.next_arrival == entry.arrival + 1
+        writer.join()
+
+    def test_lines_missing_from_a_publication_are_cleared(self, tmp_path) -> None:
+        """Test that a line no longer reported at a stop has no arrivals left."""
+        publisher = ArrivalsBoardPublisher(tmp_path / "board", capacity=64)
+        reader = ArrivalsBoardReader(tmp_path / "board")
+        publisher.publish(a_stop(arrivals={"27": (3, 12), "150": (4, 9)}))
+
+        publisher.publish(a_stop(arrivals={"27": (2, 11)}))
+
+        assert reader.get(72, "27").arrival == 2
+        assert reader.get(72, "150").arrival is None
+        assert reader.get(72, "150").next_arrival is None
+
+        ArrivalsBoardPublisher(tmp_path / "board", capacity=64).publish(
+            a_stop(arrivals={"150": (5, 7)})
+        )
+
+        assert reader.get(72, "27").arrival is None
+        assert reader.get(72, "150").arrival == 5
+
+    def test_stop_zero_is_published(self, tmp_path) -> None:
+        """Test that stop 0 is not mistaken for a free slot."""
+        publisher = ArrivalsBoardPublisher(
+            tmp_path / "board", capacity=64, clock=lambda: 100.0
+        )
+        reader = ArrivalsBoardReader(tmp_path / "board")
+
+        publisher.publish(a_stop(0, {"27": (3, 12)}))
+        publisher.publish(a_stop(0, {"27": (2, 11)}))
+
+        assert reader.stop(0) == [BoardEntry(0, "27", 2, 11, False, 100.0)]
+        assert ArrivalsBoardPublisher(tmp_path / "board", capacity=64)._slots == (
+            publisher._slots
+        )
+
+    def test_full_board(self, tmp_path) -> None:
+        """Test that publishing beyond the capacity of the board fails."""
+        publisher = ArrivalsBoardPublisher(tmp_path / "board", capacity=4)
+        publisher.publish(a_stop(1, {"1": (1, 2), "2": (1, 2), "3": (1, 2)}))
+
+        with pytest.raises(ValueError):
+            publisher.publish(a_stop(2, {"1": (1, 2)}))
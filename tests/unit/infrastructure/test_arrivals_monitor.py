@@ -0,0 +1,122 @@
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+
+from emt_madrid.domain.arrivals_diff import ChangeType
+from emt_madrid.domain.polling_policy import PollingPolicy
+from emt_madrid.infrastructure.arrivals_monitor import ArrivalsMonitor, Subscription
+from tests.unit.test_data import TestData
+from tests.unit.use_cases.test_fixtures import FakeEMTRepository
+
+FAST_POLICY = PollingPolicy(min_interval=0, max_interval=0.01)
+
+
+def a_repository(arrivals: list[tuple[int, int]]) -> FakeEMTRepository:
+    """Create a repository returning the given (line 1, line 2) arrivals."""
+    pending = iter(arrivals)
+    last = arrivals[-1]
+
+    def get_arrivals(stop):
+        current = next(pending, last)
+        for line, arrival in zip(stop.stop_lines, current):
+            line.arrival = arrival
+        return stop
+
+    repository = FakeEMTRepository()
+    repository.get_stop_info = AsyncMock(  # type: ignore[method-assign]
+        side_effect=lambda stop_id: TestData().a_stop(
+            stop_id=stop_id, line_numbers=["1", "2"]
+        )
+    )
+    repository.get_arrivals = AsyncMock(side_effect=get_arrivals)  # type: ignore[method-assign]
+    return repository
+
+
+async def take(iterator, count: int) -> list:
+    return [await asyncio.wait_for(anext(iterator), 1) for _ in range(count)]
+
+
+class TestArrivalsMonitor:
+    """Test cases for ArrivalsMonitor class."""
+
+    @pytest.mark.asyncio
+    async def test_watch_yields_only_changes(self) -> None:
+        """Test that unchanged arrivals are not yielded again."""
+        repository = a_repository([(5, 9), (5, 9), (4, 9)])
+        monitor = ArrivalsMonitor(repository, FAST_POLICY)  # type: ignore
+        updates = monitor.watch([123])
+
+        first, second = await take(updates, 2)
+        await updates.aclose()
+
+        assert [line.arrival for line in first.stop_lines] == [5, 9]
+        assert [line.arrival for line in second.stop_lines] == [4, 9]
+        assert repository.get_arrivals.await_count >= 3
+
+    @pytest.mark.asyncio
+    async def test_watch_filters_lines(self) -> None:
+        """Test that changes to lines outside the filter are not yielded."""
+        repository = a_repository([(5, 9), (5, 8), (4, 8)])
+        monitor = ArrivalsMonitor(repository, FAST_POLICY)  # type: ignore
+        updates = monitor.watch([123], lines=["1"])
+
+        first, second = await take(updates, 2)
+        await updates.aclose()
+
+        assert [line.line_number for line in first.stop_lines] == ["1"]
+        assert first.stop_lines[0].arrival == 5
+        assert second.stop_lines[0].arrival == 4
+
+    @pytest.mark.asyncio
+    async def test_subscribers_share_one_poller(self) -> None:
+        """Test that subscribers to the same stop share the upstream polls."""
+        repository = a_repository([(5, 9)])
+        monitor = ArrivalsMonitor(repository, PollingPolicy(min_interval=60))  # type: ignore
+        first_subscriber = monitor.watch([123])
+        second_subscriber = monitor.watch([123])
+
+        [first] = await take(first_subscriber, 1)
+        [second] = await take(second_subscriber, 1)
+        await first_subscriber.aclose()
+        await second_subscriber.aclose()
+
+        assert first == second
+        repository.get_stop_info.assert_awaited_once_with(123)
+        repository.get_arrivals.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_watch_changes_yields_change_events(self) -> None:
+        """Test that arrival updates are turned into change events."""
+        repository = a_repository([(5, None), (5, 9)])
+        monitor = ArrivalsMonitor(repository, FAST_POLICY)  # type: ignore
+        changes = monitor.watch_changes([123])
+
+        first, second = await take(changes, 2)
+        await changes.aclose()
+
+        assert [(c.line_number, c.change_type) for c in first] == [
+            ("1", ChangeType.LINE_APPEARED)
+        ]
+        assert [(c.line_number, c.change_type) for c in second] == [
+            ("2", ChangeType.LINE_APPEARED)
+        ]
+
+
+class TestSubscription:
+    """Test cases for Subscription class."""
+
+    @pytest.mark.asyncio
+    async def test_pending_updates_are_coalesced_per_stop(self) -> None:
+        """Test that a slow subscriber only keeps the latest snapshot of a stop."""
+        subscription = Subscription([1, 2], lines=None)
+        for arrival in (5, 4, 3):
+            stop = TestData().a_stop(stop_id=1, line_numbers=["1"])
+            stop.stop_lines[0].arrival = arrival
+            subscription.offer(stop)
+        subscription.offer(TestData().a_stop(stop_id=2, line_numbers=["1"]))
+
+        assert len(subscription) == 2
+        latest = await subscription.get()
+        assert latest.stop_id == 1
+        assert latest.stop_lines[0].arrival == 3
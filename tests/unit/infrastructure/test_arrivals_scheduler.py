@@ -0,0 +1,92 @@
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from emt_madrid.domain.exceptions import ArrivalsNotFoundError
+from emt_madrid.domain.polling_policy import PollingPolicy
+from emt_madrid.infrastructure.arrivals_scheduler import ArrivalsScheduler
+from tests.unit.test_data import FakeClock, TestData
+from tests.unit.use_cases.test_fixtures import FakeEMTRepository
+
+
+def a_scheduler(repository, clock, **kwargs) -> ArrivalsScheduler:
+    return ArrivalsScheduler(
+        repository,  # type: ignore
+        policy=PollingPolicy(min_interval=10, max_interval=600, error_interval=60),
+        clock=clock,
+        now=lambda: datetime(2025, 7, 16, 12, 0),
+        **kwargs,
+    )
+
+
+def a_stop_with_arrival(stop_id: int, arrival: int):
+    stop = TestData().a_stop(stop_id=stop_id, line_numbers=["1"])
+    stop.stop_lines[0].arrival = arrival
+    return stop
+
+
+class TestArrivalsScheduler:
+    """Test cases for ArrivalsScheduler class."""
+
+    @pytest.mark.asyncio
+    async def test_run_pending_polls_only_due_stops(self) -> None:
+        """Test that only stops whose poll time has been reached are polled."""
+        repository = FakeEMTRepository()
+        repository.get_arrivals = AsyncMock(side_effect=lambda stop: stop)  # type: ignore[method-assign]
+        clock = FakeClock(0.0)
+        scheduler = a_scheduler(repository, clock)
+        scheduler.add_stop(a_stop_with_arrival(1, 2))
+        scheduler.add_stop(a_stop_with_arrival(2, 2), due_at=100)
+
+        updated = await scheduler.run_pending()
+
+        assert [stop.stop_id for stop in updated] == [1]
+        repository.get_arrivals.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_stops_are_rescheduled_by_nearest_arrival(self) -> None:
+        """Test that a stop with an imminent bus is polled before a quiet one."""
+        repository = FakeEMTRepository()
+        repository.get_arrivals = AsyncMock(side_effect=lambda stop: stop)  # type: ignore[method-assign]
+        clock = FakeClock(0.0)
+        scheduler = a_scheduler(repository, clock)
+        scheduler.add_stop(a_stop_with_arrival(1, 2))
+        scheduler.add_stop(a_stop_with_arrival(2, 20))
+
+        await scheduler.run_pending()
+
+        assert scheduler.next_due() == 60
+        clock.now = 60
+        updated = await scheduler.run_pending()
+        assert [stop.stop_id for stop in updated] == [1]
+
+    @pytest.mark.asyncio
+    async def test_failed_poll_is_retried_after_error_interval(self) -> None:
+        """Test that a failed poll is rescheduled using the error interval."""
+        repository = FakeEMTRepository()
+        repository.get_arrivals = AsyncMock(side_effect=ArrivalsNotFoundError(1))  # type: ignore[method-assign]
+        on_update = MagicMock()
+        clock = FakeClock(0.0)
+        scheduler = a_scheduler(repository, clock, on_update=on_update)
+        scheduler.add_stop(a_stop_with_arrival(1, 2))
+
+        updated = await scheduler.run_pending()
+
+        assert updated == []
+        assert scheduler.next_due() == 60
+        on_update.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_removed_stop_is_not_polled(self) -> None:
+        """Test that removing a stop discards its scheduled poll."""
+        repository = FakeEMTRepository()
+        repository.get_arrivals = AsyncMock(side_effect=lambda stop: stop)  # type: ignore[method-assign]
+        scheduler = a_scheduler(repository, FakeClock(0.0))
+        scheduler.add_stop(a_stop_with_arrival(1, 2))
+
+        scheduler.remove_stop(1)
+
+        assert await scheduler.run_pending() == []
+        assert scheduler.next_due() is None
+        assert len(scheduler) == 0
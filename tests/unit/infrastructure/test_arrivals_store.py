@@ -0,0 +1,126 @@
+import asyncio
+import time
+
+import pytest
+
+from emt_madrid.domain.arrival_observation import ArrivalObservation
+from emt_madrid.infrastructure.arrivals_store import (
+    ArrivalsStore,
+    decode_chunk,
+    encode_chunk,
+)
+
+START = 1752660000.0
+
+
+def observations(count: int, start: float = START) -> list[ArrivalObservation]:
+    return [
+        ArrivalObservation(
+            stop_id=72 + index % 3,
+            line_number=("27", "150", "N1")[index % 3],
+            eta=600 - index * 20,
+            observed_at=start + index * 20.5,
+        )
+        for index in range(count)
+    ]
+
+
+class TestChunkEncoding:
+    """Test cases for the chunk encoding."""
+
+    def test_round_trip(self) -> None:
+        """Test that chunks decode to the same observations, sorted by time."""
+        rows = observations(100)
+
+        assert decode_chunk(encode_chunk(list(reversed(rows)))) == rows
+
+    def test_compact(self) -> None:
+        """Test that regular observations take a few bytes each."""
+        assert len(encode_chunk(observations(4096))) < 4096 * 4
+
+
+class TestArrivalsStore:
+    """Test cases for ArrivalsStore class."""
+
+    def test_query_time_range(self, tmp_path) -> None:
+        """Test that queries return the observations of the range only."""
+        store = ArrivalsStore(tmp_path, chunk_size=10)
+        rows = observations(25)
+        store.append(rows)
+
+        result = list(store.query(rows[5].observed_at, rows[15].observed_at))
+
+        assert result == rows[5:15]
+        assert len(list(tmp_path.glob("*.chunk"))) == 2
+
+    def test_query_filters(self, tmp_path) -> None:
+        """Test that queries can be filtered by stop and line."""
+        store = ArrivalsStore(tmp_path, chunk_size=10)
+        store.append(observations(30))
+        store.flush()
+
+        result = list(store.query(0, START + 3600, stop_ids=[73], lines=["150"]))
+
+        assert len(result) == 10
+        assert {(row.stop_id, row.line_number) for row in result} == {(73, "150")}
+
+    def test_persistence(self, tmp_path) -> None:
+        """Test that flushed observations are read by another store."""
+        store = ArrivalsStore(tmp_path)
+        store.append(observations(5))
+        store.flush()
+
+        assert list(ArrivalsStore(tmp_path).query(0, START + 3600)) == observations(5)
+
+    def test_record_estimates(self, tmp_path) -> None:
+        """Test that every bus is recorded with its estimate to the second."""
+        store = ArrivalsStore(tmp_path, clock=lambda: START)
+
+        store.record(72, [("27", 185), ("27", 731), ("27", 1400), ("150", 59)])
+
+        assert list(store.query(START, START + 1)) == [
+            ArrivalObservation(72, "27", 185, START),
+            ArrivalObservation(72, "27", 731, START),
+            ArrivalObservation(72, "27", 1400, START),
+            ArrivalObservation(72, "150", 59, START),
+        ]
+
+    @pytest.mark.asyncio
+    async def test_chunks_are_written_in_the_background(self, tmp_path) -> None:
+        """Test that a running loop is not blocked by writing a chunk."""
+        store = ArrivalsStore(tmp_path, chunk_size=10)
+        rows = observations(15)
+
+        store.append(rows)
+
+        assert list(store.query(0, START + 3600)) == rows
+        await store.wait_written()
+        assert len(list(tmp_path.glob("*.chunk"))) == 1
+        assert list(store.query(0, START + 3600)) == rows
+
+    @pytest.mark.asyncio
+    async def test_written_chunk_is_queried_once(self, tmp_path) -> None:
+        """Test that a chunk renamed into place is not also listed as being written."""
+        store = ArrivalsStore(tmp_path, chunk_size=10)
+        rows = observations(10)
+
+        store.append(rows)
+        await asyncio.sleep(0)
+        deadline = time.monotonic() + 5
+        while not list(tmp_path.glob("*.chunk")) and time.monotonic() < deadline:
+            time.sleep(0.001)
+
+        assert list(tmp_path.glob("*.chunk"))
+        assert list(store.query(0, START + 3600)) == rows
+        await store.wait_written()
+
+    @pytest.mark.asyncio
+    async def test_aflush(self, tmp_path) -> None:
+        """Test that pending observations are written without blocking the loop."""
+        store = ArrivalsStore(tmp_path)
+        store.append(observations(5))
+
+        await store.aflush()
+
+        assert len(list(tmp_path.glob("*.chunk"))) == 1
+        assert list(ArrivalsStore(tmp_path).query(0, START + 3600)) == observations(5)
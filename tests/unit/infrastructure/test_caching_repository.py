@@ -0,0 +1,206 @@
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+
+from emt_madrid.domain.exceptions import ArrivalsNotFoundError
+from emt_madrid.infrastructure.caching_repository import CachingEMTRepository
+from tests.unit.test_data import FakeClock, TestData
+from tests.unit.use_cases.test_fixtures import FakeEMTRepository
+
+
+def set_arrivals(stop):
+    for index, line in enumerate(stop.stop_lines):
+        line.arrival = index + 1
+    return stop
+
+
+class TestCachingEMTRepository:
+    """Test cases for CachingEMTRepository class."""
+
+    @pytest.mark.asyncio
+    async def test_stop_info_is_cached_until_expired(self) -> None:
+        """Test that stop information is only requested again once expired."""
+        repository = FakeEMTRepository()
+        repository.get_stop_info = AsyncMock(return_value=TestData().a_stop())  # type: ignore[method-assign]
+        clock = FakeClock(0.0)
+        caching_repository = CachingEMTRepository(
+            repository,  # type: ignore
+            stop_info_ttl=60,
+            clock=clock,
+        )
+
+        await caching_repository.get_stop_info(123)
+        await caching_repository.get_stop_info(123)
+        clock.now = 61
+        await caching_repository.get_stop_info(123)
+
+        assert repository.get_stop_info.await_count == 2
+        assert caching_repository.hits == 1
+        assert caching_repository.misses == 2
+
+    @pytest.mark.asyncio
+    async def test_cache_is_bounded(self) -> None:
+        """Test that expired and least recently used entries are evicted."""
+        repository = FakeEMTRepository()
+        repository.get_stop_info = AsyncMock(return_value=TestData().a_stop())  # type: ignore[method-assign]
+        clock = FakeClock(0.0)
+        caching_repository = CachingEMTRepository(
+            repository,  # type: ignore
+            stop_info_ttl=60,
+            clock=clock,
+            max_entries=2,
+        )
+
+        await caching_repository.get_stop_info(1)
+        await caching_repository.get_stop_info(2)
+        await caching_repository.get_stop_info(1)
+        await caching_repository.get_stop_info(3)
+        await caching_repository.get_stop_info(1)
+        await caching_repository.get_stop_info(2)
+
+        assert repository.get_stop_info.await_count == 4
+        assert len(caching_repository._cache) == 2
+
+        clock.now = 61
+        await caching_repository.get_stop_info(2)
+
+        assert repository.get_stop_info.await_count == 5
+        assert len(caching_repository._cache) == 2
+
+    @pytest.mark.asyncio
+    async def test_filtered_stop_info_shares_the_cached_stop(self) -> None:
+        """Test that filtering lines returns a copy and keeps the cached stop whole."""
+        repository = FakeEMTRepository()
+        repository.get_stop_info = AsyncMock(  # type: ignore[method-assign]
+            return_value=TestData().a_stop(line_numbers=["1", "2"])
+        )
+        caching_repository = CachingEMTRepository(repository)  # type: ignore
+
+        filtered = await caching_repository.get_stop_info(123, lines=["2"])
+        stop = await caching_repository.get_stop_info(123)
+
+        assert [line.line_number for line in filtered.stop_lines] == ["2"]
+        assert [line.line_number for line in stop.stop_lines] == ["1", "2"]
+        repository.get_stop_info.assert_awaited_once_with(123)
+
+    @pytest.mark.asyncio
+    async def test_all_stops_are_cached(self) -> None:
+        """Test that the network catalog is cached like stop information."""
+        repository = FakeEMTRepository()
+        repository.get_all_stops = AsyncMock(return_value=[TestData().a_stop()])  # type: ignore[method-assign]
+        caching_repository = CachingEMTRepository(repository)  # type: ignore
+
+        first = await caching_repository.get_all_stops()
+        second = await caching_repository.get_all_stops()
+
+        assert first == second
+        assert first is not second
+        assert repository.get_all_stops.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_returned_stops_do_not_share_the_cached_lines(self) -> None:
+        """Test that updating the arrivals of a returned stop keeps the cache intact."""
+        repository = FakeEMTRepository()
+        repository.get_stop_info = AsyncMock(  # type: ignore[method-assign]
+            return_value=TestData().a_stop(line_numbers=["1", "2"])
+        )
+        caching_repository = CachingEMTRepository(repository)  # type: ignore
+
+        stop = await caching_repository.get_stop_info(123)
+        filtered = await caching_repository.get_stop_info(123, lines=["2"])
+        set_arrivals(stop)
+        filtered.stop_lines[0].arrival = 9
+
+        cached = await caching_repository.get_stop_info(123)
+        assert [line.arrival for line in cached.stop_lines] == [None, None]
+
+    @pytest.mark.asyncio
+    async def test_invalidate_drops_the_stop_lists_holding_the_stop(self) -> None:
+        """Test that invalidating a stop also drops the cached lists it is in."""
+        repository = FakeEMTRepository()
+        repository.get_line_stops = AsyncMock(return_value=[TestData().a_stop()])  # type: ignore[method-assign]
+        caching_repository = CachingEMTRepository(repository)  # type: ignore
+        stop_id = TestData().a_stop().stop_id
+
+        await caching_repository.get_line_stops("27", 1)
+        caching_repository.invalidate(stop_id + 1)
+        await caching_repository.get_line_stops("27", 1)
+        caching_repository.invalidate(stop_id)
+        await caching_repository.get_line_stops("27", 1)
+
+        assert repository.get_line_stops.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_concurrent_requests_are_coalesced(self) -> None:
+        """Test that concurrent callers share the same upstream request."""
+
+        async def slow_get_arrivals(stop):
+            await asyncio.sleep(0.01)
+            return set_arrivals(stop)
+
+        repository = FakeEMTRepository()
+        repository.get_arrivals = AsyncMock(side_effect=slow_get_arrivals)  # type: ignore[method-assign]
+        caching_repository = CachingEMTRepository(repository)  # type: ignore
+        stops = [TestData().a_stop(line_numbers=["1", "2"]) for _ in range(5)]
+
+        results = await asyncio.gather(
+            *(caching_repository.get_arrivals(stop) for stop in stops)
+        )
+
+        repository.get_arrivals.assert_awaited_once()
+        for stop in results:
+            assert [line.arrival for line in stop.stop_lines] == [1, 2]
+
+    @pytest.mark.asyncio
+    async def test_concurrent_requests_for_other_lines_are_not_shared(self) -> None:
+        """Test that a caller never joins a request missing some of its lines."""
+
+        async def slow_get_arrivals(stop):
+            await asyncio.sleep(0.01)
+            return set_arrivals(stop)
+
+        repository = FakeEMTRepository()
+        repository.get_arrivals = AsyncMock(side_effect=slow_get_arrivals)  # type: ignore[method-assign]
+        caching_repository = CachingEMTRepository(repository)  # type: ignore
+
+        first, second = await asyncio.gather(
+            caching_repository.get_arrivals(TestData().a_stop(line_numbers=["1"])),
+            caching_repository.get_arrivals(TestData().a_stop(line_numbers=["1", "2"])),
+        )
+
+        assert repository.get_arrivals.await_count == 2
+        assert [line.arrival for line in first.stop_lines] == [1]
+        assert [line.arrival for line in second.stop_lines] == [1, 2]
+
+    @pytest.mark.asyncio
+    async def test_arrivals_are_applied_per_line(self) -> None:
+        """Test that a stop with a subset of lines reuses the cached arrivals."""
+        repository = FakeEMTRepository()
+        repository.get_arrivals = AsyncMock(side_effect=set_arrivals)  # type: ignore[method-assign]
+        caching_repository = CachingEMTRepository(repository)  # type: ignore
+
+        await caching_repository.get_arrivals(
+            TestData().a_stop(line_numbers=["1", "2"])
+        )
+        stop = await caching_repository.get_arrivals(
+            TestData().a_stop(line_numbers=["2"])
+        )
+
+        repository.get_arrivals.assert_awaited_once()
+        assert stop.stop_lines[0].arrival == 2
+
+    @pytest.mark.asyncio
+    async def test_errors_are_not_cached(self) -> None:
+        """Test that a failed request is retried by the next caller."""
+        repository = FakeEMTRepository()
+        repository.get_arrivals = AsyncMock(  # type: ignore[method-assign]
+            side_effect=[ArrivalsNotFoundError(123), TestData().a_stop()]
+        )
+        caching_repository = CachingEMTRepository(repository)  # type: ignore
+
+        with pytest.raises(ArrivalsNotFoundError):
+            await caching_repository.get_arrivals(TestData().a_stop())
+        await caching_repository.get_arrivals(TestData().a_stop())
+
+        assert repository.get_arrivals.await_count == 2
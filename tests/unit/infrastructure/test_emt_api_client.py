@@ -1,13 +1,15 @@
 from __future__ import annotations
 
+import asyncio
 from typing import Any, Optional
 from unittest.mock import AsyncMock, MagicMock
 from datetime import datetime
 
 import pytest
 
-from emt_madrid.domain.exceptions import AuthenticationError
+from emt_madrid.domain.exceptions import APILimitExceededError, AuthenticationError
 from emt_madrid.infrastructure.emt_api_client import EMTAuthenticatedClient, HTTPClient
+from emt_madrid.infrastructure.emt_api_endpoints import Auth
 from tests.unit.infrastructure.fixtures.test_autenticate_fixture import (
     CREDENTIALS,
     LOGIN_OK_RESPONSE,
@@ -77,6 +79,17 @@ class TestEMTAuthenticatedClient:
         with pytest.raises(AuthenticationError):
             await emt_authenticated_client._authenticate()
 
+    @pytest.mark.asyncio
+    async def test_authenticate_api_limit_exceeded_cause(self):
+        """Test that a login over the API limit is caused by APILimitExceededError."""
+        http_client = FakeHTTPClient(API_LIMIT_EXCEEDED_RESPONSE)
+        emt_authenticated_client = EMTAuthenticatedClient(http_client, CREDENTIALS)
+
+        with pytest.raises(AuthenticationError) as error:
+            await emt_authenticated_client._authenticate()
+
+        assert isinstance(error.value.__cause__, APILimitExceededError)
+
     @pytest.mark.asyncio
     async def test_exchange_success(self) -> None:
         """Test successful exchange with valid token."""
@@ -137,3 +150,21 @@ class TestEMTAuthenticatedClient:
         )
 
         mock_authenticate.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_concurrent_exchanges_share_one_login(self) -> None:
+        """Test that requests waiting for a token share a single login."""
+        http_client = FakeHTTPClient(LOGIN_OK_RESPONSE)
+        emt_authenticated_client = EMTAuthenticatedClient(http_client, CREDENTIALS)
+
+        await asyncio.gather(
+            *(emt_authenticated_client.exchange("GET", "v1/test") for _ in range(5))
+        )
+
+        logins = [
+            call
+            for call in http_client.exchange.call_args_list
+            if call.args[1] == Auth.LOGIN["endpoint"]
+        ]
+        assert len(logins) == 1
+        assert http_client.exchange.await_count == 6
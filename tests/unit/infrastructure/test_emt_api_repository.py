@@ -1,6 +1,10 @@
 import pytest
 import unittest.mock
 
+import copy
+
+from emt_madrid.domain.hooks import ClientHooks
+from emt_madrid.domain.vehicle_index import VehicleIndex
 from emt_madrid.infrastructure.emt_api_repository import EMTAPIRepository
 from tests.unit.infrastructure.fixtures.test_stop_get_info_fixture import (
     STOP_GET_INFO_OK_RESPONSE,
@@ -16,12 +20,29 @@ from tests.unit.infrastructure.fixtures.test_get_nearby_stops_fixture import (
     GET_NEARBY_STOPS_NO_DATA_RESPONSE,
 )
 from tests.unit.infrastructure.fixtures.test_get_arrivals_fixture import (
+    STOP_GET_ARRIVALS_API_LIMIT_EXCEEDED_RESPONSE,
     STOP_GET_ARRIVALS_OK,
     STOP_GET_ARRIVALS_OK_RESPONSE,
     STOP_GET_ARRIVALS_NOT_FOUND_RESPONSE,
     STOP_GET_ARRIVALS_NO_DATA_RESPONSE,
 )
-from emt_madrid.domain.exceptions import ArrivalsNotFoundError, StopNotFoundError
+from tests.unit.infrastructure.fixtures.test_get_all_stops_fixture import (
+    GET_ALL_STOPS_LINES_RESPONSE,
+    GET_ALL_STOPS_OK,
+    GET_ALL_STOPS_OK_RESPONSE,
+    GET_ALL_STOPS_INVALID_TOKEN_RESPONSE,
+)
+from tests.unit.infrastructure.fixtures.test_get_line_stops_fixture import (
+    GET_LINE_STOPS_OK_RESPONSE,
+    GET_LINE_STOPS_OK,
+    GET_LINE_STOPS_NOT_FOUND_RESPONSE,
+)
+from emt_madrid.domain.exceptions import (
+    APILimitExceededError,
+    ArrivalsNotFoundError,
+    LineNotFoundError,
+    StopNotFoundError,
+)
 
 
 class FakeEMTAuthenticatedClient:
@@ -36,6 +57,21 @@ class FakeEMTAuthenticatedClient:
         return self._response
 
 
+class FakeRoutingEMTAuthenticatedClient:
+    def __init__(self, responses: dict[str, dict]) -> None:
+        self._responses: dict[str, dict] = responses
+        self.endpoints: list[str] = []
+
+    async def exchange(
+        self, method: str, endpoint: str, data: dict | None = None
+    ) -> dict:
+        self.endpoints.append(endpoint)
+        for prefix, response in self._responses.items():
+            if endpoint.startswith(prefix):
+                return response
+        return {}
+
+
 class TestStopGetInfo:
     @pytest.mark.asyncio
     async def test_get_stop_info(self) -> None:
@@ -46,6 +82,24 @@ class TestStopGetInfo:
 
         assert stop == STOP_GET_INFO_OK
 
+    @pytest.mark.asyncio
+    async def test_get_stop_info_only_decodes_requested_lines(self) -> None:
+        response = copy.deepcopy(STOP_GET_INFO_OK_RESPONSE)
+        data_line = response["data"][0]["stops"][0]["dataLine"]
+        data_line[1]["startTime"] = "not a time"
+        emt_authenticated_client = FakeEMTAuthenticatedClient(response)
+        emt_api_repository = EMTAPIRepository(emt_authenticated_client)  # type: ignore
+
+        stop = await emt_api_repository.get_stop_info(
+            STOP_GET_INFO_OK.stop_id, lines=[data_line[0]["label"]]
+        )
+
+        assert stop.stop_lines == [
+            line
+            for line in STOP_GET_INFO_OK.stop_lines
+            if line.line_number == data_line[0]["label"]
+        ]
+
     @pytest.mark.asyncio
     async def test_get_stop_info_not_found(self) -> None:
         emt_authenticated_client = FakeEMTAuthenticatedClient(
@@ -130,6 +184,30 @@ class TestGetNearbyStops:
 
 
 class TestGetArrivals:
+    @pytest.mark.asyncio
+    async def test_get_arrivals_updates_vehicle_index(self) -> None:
+        emt_authenticated_client = FakeEMTAuthenticatedClient(
+            STOP_GET_ARRIVALS_OK_RESPONSE
+        )
+        vehicle_index = VehicleIndex()
+        emt_api_repository = EMTAPIRepository(
+            emt_authenticated_client,  # type: ignore
+            vehicle_index=vehicle_index,
+        )
+
+        await emt_api_repository.get_arrivals(copy.deepcopy(STOP_GET_ARRIVALS_OK))
+
+        assert sorted(vehicle.bus_id for vehicle in vehicle_index.vehicles()) == [
+            531,
+            532,
+            2060,
+        ]
+        vehicle = vehicle_index.get(532)
+        assert vehicle.line_number == "5"
+        assert vehicle.distance == 25
+        assert vehicle.coordinates == (-3.692979009005247, 40.41863125675024)
+        assert vehicle.etas == {STOP_GET_ARRIVALS_OK.stop_id: 62}
+
     @pytest.mark.asyncio
     async def test_get_arrivals(self) -> None:
         emt_authenticated_client = FakeEMTAuthenticatedClient(
@@ -141,6 +219,31 @@ class TestGetArrivals:
 
         assert stop == STOP_GET_ARRIVALS_OK
 
+    @pytest.mark.asyncio
+    async def test_get_arrivals_notifies_the_estimates(self) -> None:
+        hooks = ClientHooks()
+        estimates = []
+        hooks.register(
+            "on_arrival_estimates",
+            lambda stop_id, arrivals: estimates.append((stop_id, arrivals)),
+        )
+        emt_authenticated_client = FakeEMTAuthenticatedClient(
+            STOP_GET_ARRIVALS_OK_RESPONSE
+        )
+        emt_api_repository = EMTAPIRepository(emt_authenticated_client, hooks)  # type: ignore
+
+        await emt_api_repository.get_arrivals(copy.deepcopy(STOP_GET_INFO_OK))
+
+        assert estimates == [
+            (
+                STOP_GET_INFO_OK.stop_id,
+                [
+                    (arrival["line"], arrival["estimateArrive"])
+                    for arrival in STOP_GET_ARRIVALS_OK_RESPONSE["data"][0]["Arrive"]
+                ],
+            )
+        ]
+
     @pytest.mark.asyncio
     async def test_get_arrivals_not_found(self) -> None:
         emt_authenticated_client = FakeEMTAuthenticatedClient(
@@ -151,6 +254,16 @@ class TestGetArrivals:
         with pytest.raises(ArrivalsNotFoundError):
             await emt_api_repository.get_arrivals(STOP_GET_INFO_OK)
 
+    @pytest.mark.asyncio
+    async def test_get_arrivals_api_limit_exceeded(self) -> None:
+        emt_authenticated_client = FakeEMTAuthenticatedClient(
+            STOP_GET_ARRIVALS_API_LIMIT_EXCEEDED_RESPONSE
+        )
+        emt_api_repository = EMTAPIRepository(emt_authenticated_client)  # type: ignore
+
+        with pytest.raises(APILimitExceededError):
+            await emt_api_repository.get_arrivals(STOP_GET_INFO_OK)
+
     @pytest.mark.asyncio
     async def test_get_arrivals_no_response(self) -> None:
         emt_authenticated_client = FakeEMTAuthenticatedClient()
@@ -168,3 +281,72 @@ class TestGetArrivals:
 
         with pytest.raises(ArrivalsNotFoundError):
             await emt_api_repository.get_arrivals(STOP_GET_INFO_OK)
+
+
+class TestGetAllStops:
+    @pytest.mark.asyncio
+    async def test_get_all_stops(self) -> None:
+        emt_authenticated_client = FakeRoutingEMTAuthenticatedClient(
+            {
+                "v1/transport/busemtmad/lines/info/": GET_ALL_STOPS_LINES_RESPONSE,
+                "v1/transport/busemtmad/stops/list/": GET_ALL_STOPS_OK_RESPONSE,
+            }
+        )
+        emt_api_repository = EMTAPIRepository(emt_authenticated_client)  # type: ignore
+
+        stops = await emt_api_repository.get_all_stops()
+
+        assert stops == GET_ALL_STOPS_OK
+        assert len(emt_authenticated_client.endpoints) == 2
+
+    @pytest.mark.asyncio
+    async def test_get_all_stops_error(self) -> None:
+        emt_authenticated_client = FakeRoutingEMTAuthenticatedClient(
+            {
+                "v1/transport/busemtmad/lines/info/": GET_ALL_STOPS_LINES_RESPONSE,
+                "v1/transport/busemtmad/stops/list/": GET_ALL_STOPS_INVALID_TOKEN_RESPONSE,
+            }
+        )
+        emt_api_repository = EMTAPIRepository(emt_authenticated_client)  # type: ignore
+
+        with pytest.raises(StopNotFoundError):
+            await emt_api_repository.get_all_stops()
+
+    @pytest.mark.asyncio
+    async def test_get_all_stops_no_response(self) -> None:
+        emt_authenticated_client = FakeRoutingEMTAuthenticatedClient({})
+        emt_api_repository = EMTAPIRepository(emt_authenticated_client)  # type: ignore
+
+        with pytest.raises(StopNotFoundError):
+            await emt_api_repository.get_all_stops()
+
+
+class TestGetLineStops:
+    @pytest.mark.asyncio
+    async def test_get_line_stops(self) -> None:
+        emt_authenticated_client = FakeRoutingEMTAuthenticatedClient(
+            {"v1/transport/busemtmad/lines/27/stops/2/": GET_LINE_STOPS_OK_RESPONSE}
+        )
+        emt_api_repository = EMTAPIRepository(emt_authenticated_client)  # type: ignore
+
+        stops = await emt_api_repository.get_line_stops("27", 2)
+
+        assert stops == GET_LINE_STOPS_OK
+
+    @pytest.mark.asyncio
+    async def test_get_line_stops_not_found(self) -> None:
+        emt_authenticated_client = FakeEMTAuthenticatedClient(
+            GET_LINE_STOPS_NOT_FOUND_RESPONSE
+        )
+        emt_api_repository = EMTAPIRepository(emt_authenticated_client)  # type: ignore
+
+        with pytest.raises(LineNotFoundError):
+            await emt_api_repository.get_line_stops("999", 1)
+
+    @pytest.mark.asyncio
+    async def test_get_line_stops_no_response(self) -> None:
+        emt_authenticated_client = FakeEMTAuthenticatedClient()
+        emt_api_repository = EMTAPIRepository(emt_authenticated_client)  # type: ignore
+
+        with pytest.raises(LineNotFoundError):
+            await emt_api_repository.get_line_stops("27", 1)
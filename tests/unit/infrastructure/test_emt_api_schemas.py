@@ -0,0 +1,147 @@
+import copy
+import dataclasses
+from datetime import time
+
+import pytest
+
+from emt_madrid.domain.exceptions import PayloadDecodeError
+from emt_madrid.infrastructure.emt_api_repository import EMTAPIRepository
+from emt_madrid.infrastructure.emt_api_schemas import (
+    Arrival,
+    ArrivalEstimate,
+    DetailLine,
+    DetailStop,
+    decode,
+    decode_list_of,
+)
+from tests.unit.infrastructure.fixtures.test_get_arrivals_fixture import (
+    STOP_GET_ARRIVALS_OK_RESPONSE,
+)
+from tests.unit.infrastructure.fixtures.test_get_line_stops_fixture import (
+    GET_LINE_STOPS_OK_RESPONSE,
+)
+from tests.unit.infrastructure.fixtures.test_stop_get_info_fixture import (
+    STOP_GET_INFO_OK,
+    STOP_GET_INFO_OK_RESPONSE,
+)
+
+DATA_LINE = STOP_GET_INFO_OK_RESPONSE["data"][0]["stops"][0]["dataLine"]
+
+
+class FakeEMTAuthenticatedClient:
+    def __init__(self, response: dict) -> None:
+        self._response = response
+
+    async def exchange(self, method: str, endpoint: str, data=None) -> dict:
+        return self._response
+
+
+class TestEMTAPISchemas:
+    """Test cases for the EMT API payload schemas."""
+
+    def test_decode(self) -> None:
+        """Test that values are converted and unknown keys skipped."""
+        line = decode(DetailLine, DATA_LINE[0], "dataLine[0]")
+
+        assert line == DetailLine(
+            label="5",
+            header_a="SOL/SEVILLA",
+            header_b="CHAMARTIN",
+            max_frequency=19,
+            min_frequency=12,
+            start_time=time(6, 30),
+            stop_time=time(0, 4),
+            day_type="LA",
+        )
+
+    def test_decode_memoizes_repeated_objects(self) -> None:
+        """Test that objects repeated across responses are decoded once."""
+        first = decode(DetailLine, dict(DATA_LINE[0]), "dataLine[0]")
+        second = decode(DetailLine, dict(DATA_LINE[0]), "dataLine[0]")
+
+        assert second is first
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            first.label = "27"  # type: ignore[misc]
+
+    def test_decode_memoizes_strings_only(self) -> None:
+        """Test that values equal to a memoized string are still validated."""
+        assert decode(ArrivalEstimate, {"line": "27", "estimateArrive": 1}, "a")
+
+        with pytest.raises(PayloadDecodeError, match="expected an integer"):
+            decode(ArrivalEstimate, {"line": "27", "estimateArrive": True}, "a")
+
+    def test_defaults(self) -> None:
+        """Test that optional fields get their default."""
+        stop = decode(DetailStop, {}, "stop")
+        arrival = decode(Arrival, {"line": 27, "estimateArrive": "60"}, "arrival")
+
+        assert stop == DetailStop("Unknown", "Unknown", (), ())
+        assert arrival == Arrival("27", 60, None, None, None)
+
+    @pytest.mark.parametrize(
+        "change, path, reason",
+        [
+            ({"startTime": "25:99"}, "stop.dataLine[1].startTime", "HH:MM time"),
+            ({"maxFreq": "often"}, "stop.dataLine[1].maxFreq", "integer"),
+            ({"label": None}, "stop.dataLine[1].label", "missing required field"),
+        ],
+    )
+    def test_errors_name_the_path(self, change, path, reason) -> None:
+        """Test that invalid payloads report the exact path of the error."""
+        data_line = copy.deepcopy(DATA_LINE)
+        data_line[1].update(change)
+
+        with pytest.raises(PayloadDecodeError) as error:
+            decode(DetailStop, {"dataLine": data_line}, "stop")
+
+        assert error.value.path == path
+        assert reason in error.value.reason
+
+    def test_list_errors(self) -> None:
+        """Test that non array and non object values are reported."""
+        with pytest.raises(PayloadDecodeError, match="expected an array"):
+            decode_list_of(Arrival, {"line": "27"}, "data[0].Arrive")
+        with pytest.raises(PayloadDecodeError) as error:
+            decode_list_of(Arrival, [{"line": "27", "estimateArrive": 1}, "bus"], "a")
+        assert error.value.path == "a[1]"
+
+    @pytest.mark.asyncio
+    async def test_repository_errors_keep_the_decode_error(self) -> None:
+        """Test that repository errors say where the payload is invalid."""
+        response = copy.deepcopy(STOP_GET_INFO_OK_RESPONSE)
+        response["data"][0]["stops"][0]["dataLine"][2]["stopTime"] = "late"
+        repository = EMTAPIRepository(FakeEMTAuthenticatedClient(response))  # type: ignore
+
+        with pytest.raises(PayloadDecodeError) as error:
+            await repository.get_stop_info(72)
+
+        assert error.value.path == "data[0].stops[0].dataLine[2].stopTime"
+
+    @pytest.mark.asyncio
+    async def test_arrivals_of_other_types_are_decoded(self) -> None:
+        """Test that arrivals not read directly are converted or rejected."""
+        response = copy.deepcopy(STOP_GET_ARRIVALS_OK_RESPONSE)
+        arrivals = response["data"][0]["Arrive"]
+        arrivals[0]["line"] = int(arrivals[0]["line"])
+        repository = EMTAPIRepository(FakeEMTAuthenticatedClient(response))  # type: ignore
+        stop = copy.deepcopy(STOP_GET_INFO_OK)
+
+        await repository.get_arrivals(stop)
+        arrivals[1]["estimateArrive"] = "soon"
+
+        assert any(line.arrival is not None for line in stop.stop_lines)
+        with pytest.raises(PayloadDecodeError) as error:
+            await repository.get_arrivals(stop)
+        assert error.value.path == "data[0].Arrive[1].estimateArrive"
+
+    @pytest.mark.asyncio
+    async def test_line_stops_errors_name_the_path(self) -> None:
+        """Test that the line stops payload is validated like the stop detail."""
+        response = copy.deepcopy(GET_LINE_STOPS_OK_RESPONSE)
+        response["data"][0]["stops"][1]["stop"] = "P-73"
+        repository = EMTAPIRepository(FakeEMTAuthenticatedClient(response))  # type: ignore
+
+        with pytest.raises(PayloadDecodeError) as error:
+            await repository.get_line_stops("27", 1)
+
+        assert error.value.path == "data[0].stops[1].stop"
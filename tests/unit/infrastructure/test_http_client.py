@@ -1,5 +1,9 @@
+from unittest.mock import AsyncMock, MagicMock
+
 import pytest
 
+from emt_madrid.domain.hooks import ClientHooks
+from emt_madrid.infrastructure.emt_api_config import EMTAPIConfig
 from emt_madrid.infrastructure.http_client import HTTPClient
 
 
@@ -17,3 +21,53 @@ class TestHTTPClient:
         """Test HTTP client initialization with config."""
         http_client = HTTPClient(config=FakeConfig())  # type: ignore
         assert http_client.base_url == FakeConfig.BASE_URL
+
+    @pytest.mark.asyncio
+    async def test_config_base_url_override(self) -> None:
+        """Test that the base URL can point to another server."""
+        http_client = HTTPClient(config=EMTAPIConfig(base_url="http://127.0.0.1:8081"))
+        assert http_client.base_url == "http://127.0.0.1:8081/"
+        assert EMTAPIConfig().BASE_URL == EMTAPIConfig.BASE_URL
+
+    @pytest.mark.asyncio
+    async def test_exchange_uses_transport(self) -> None:
+        """Test that requests are sent through the configured transport."""
+        transport = MagicMock()
+        transport.send = AsyncMock(return_value={"code": "00"})
+        http_client = HTTPClient(config=FakeConfig(), transport=transport)  # type: ignore
+
+        response = await http_client.exchange("GET", "v1/test/endpoint")
+
+        assert response == {"code": "00"}
+        transport.send.assert_awaited_once_with(
+            "GET", "https://http.codes/v1/test/endpoint", None, None, None
+        )
+
+    @pytest.mark.asyncio
+    async def test_exchange_notifies_hooks(self) -> None:
+        """Test that hooks share the request context and receive the errors."""
+        transport = MagicMock()
+        transport.send_measured = AsyncMock(
+            side_effect=[({"code": "00"}, 13), ConnectionError()]
+        )
+        hooks = ClientHooks()
+        events = []
+        hooks.register(
+            "before_request", lambda request: request.context.update(span="span")
+        )
+        hooks.register(
+            "after_response",
+            lambda request, response, error, duration: events.append(
+                (request.context["span"], request.endpoint, response, type(error))
+            ),
+        )
+        http_client = HTTPClient(config=FakeConfig(), transport=transport, hooks=hooks)  # type: ignore
+
+        await http_client.exchange("GET", "v1/test/endpoint")
+        with pytest.raises(ConnectionError):
+            await http_client.exchange("GET", "v1/test/endpoint")
+
+        assert events == [
+            ("span", "v1/test/endpoint", {"code": "00"}, type(None)),
+            ("span", "v1/test/endpoint", None, ConnectionError),
+        ]
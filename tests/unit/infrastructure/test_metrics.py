@@ -0,0 +1,142 @@
+from unittest.mock import AsyncMock
+
+import pytest
+from aiohttp import ClientSession, web
+from aiohttp.test_utils import TestServer
+
+from emt_madrid.infrastructure.caching_repository import CachingEMTRepository
+from emt_madrid.infrastructure.emt_api_config import EMTAPIConfig
+from emt_madrid.infrastructure.http_client import HTTPClient
+from emt_madrid.infrastructure.metrics import (
+    Counter,
+    EMTMetrics,
+    Histogram,
+    MetricsRegistry,
+    endpoint_label,
+)
+from emt_madrid.main import EMTClient
+from emt_madrid.simulator.network import SimulatedNetwork
+from emt_madrid.simulator.server import SimulatorConfig, create_simulator_app
+from tests.unit.test_data import TestData
+from tests.unit.use_cases.test_fixtures import FakeEMTRepository
+
+DETAIL = "v1/transport/busemtmad/stops/{stop_id}/detail/"
+LOGIN = "v1/mobilitylabs/user/login/"
+
+
+class TestMetricsRegistry:
+    """Test cases for the metrics and their Prometheus exposition."""
+
+    def test_render_counter(self) -> None:
+        """Test that counters are rendered with escaped labels."""
+        registry = MetricsRegistry()
+        counter = registry.register(Counter("requests_total", "Requests.", ("path",)))
+        counter.inc(path='a"b')
+        counter.inc(2, path='a"b')
+
+        assert registry.render() == (
+            "# HELP requests_total Requests.\n"
+            "# TYPE requests_total counter\n"
+            'requests_total{path="a\\"b"} 3\n'
+        )
+
+    def test_render_histogram(self) -> None:
+        """Test that histogram buckets are cumulative and end with +Inf."""
+        registry = MetricsRegistry()
+        histogram = registry.register(Histogram("latency", "Latency.", (), (0.1, 1)))
+        for value in (0.05, 0.5, 0.7, 3):
+            histogram.observe(value)
+
+        assert registry.render().splitlines()[2:] == [
+            'latency_bucket{le="0.1"} 1',
+            'latency_bucket{le="1"} 3',
+            'latency_bucket{le="+Inf"} 4',
+            "latency_sum 4.25",
+            "latency_count 4",
+        ]
+
+    def test_duplicated_metric(self) -> None:
+        """Test that metric names are unique in a registry."""
+        registry = MetricsRegistry()
+        registry.register(Counter("requests_total", "Requests."))
+
+        with pytest.raises(ValueError):
+            registry.register(Counter("requests_total", "Requests."))
+
+    def test_wrong_labels(self) -> None:
+        """Test that every label of a metric must be given."""
+        counter = Counter("requests_total", "Requests.", ("path",))
+
+        with pytest.raises(ValueError):
+            counter.inc(code="00")
+
+    def test_endpoint_label(self) -> None:
+        """Test that stop IDs are removed from the endpoint labels."""
+        assert endpoint_label("v1/transport/busemtmad/stops/72/detail/") == DETAIL
+        assert endpoint_label(LOGIN) == LOGIN
+        assert endpoint_label("v1/other/123/") == "v1/other/{id}/"
+
+
+class TestEMTMetrics:
+    """Test cases for the instrumentation of the client stack."""
+
+    @pytest.mark.asyncio
+    async def test_client_requests(self) -> None:
+        """Test that requests, response codes and logins are recorded."""
+        metrics = EMTMetrics()
+        app = create_simulator_app(
+            SimulatorConfig(network=SimulatedNetwork(stops=5, lines=3))
+        )
+        async with TestServer(app) as server, ClientSession() as session:
+            emt_client = EMTClient(
+                email="test@example.com",
+                password="testpass",
+                stop_id=1,
+                session=session,
+                config=EMTAPIConfig(base_url=str(server.make_url("/"))),
+                metrics=metrics,
+            )
+            await emt_client.get_stop_info()
+            await emt_client.get_arrivals()
+
+        assert metrics.responses.get(endpoint=LOGIN, code="01") == 1
+        assert metrics.responses.get(endpoint=DETAIL, code="00") == 1
+        assert metrics.request_duration.count(endpoint=DETAIL, method="GET") == 1
+        assert metrics.response_size.sum(endpoint=DETAIL) > 0
+        assert metrics.auth_refreshes.get(reason="missing", outcome="success") == 1
+        assert "emt_request_duration_seconds_bucket" in metrics.render()
+
+    @pytest.mark.asyncio
+    async def test_response_size_is_the_body_size(self) -> None:
+        """Test that the size of the body is recorded, not of the parsed JSON."""
+        body = '{"code": "00", "data": [{"stopId": 72}]}'
+
+        async def handler(request: web.Request) -> web.Response:
+            return web.Response(text=body, content_type="application/json")
+
+        app = web.Application()
+        app.router.add_get("/v1/test/", handler)
+        metrics = EMTMetrics()
+        async with TestServer(app) as server, ClientSession() as session:
+            http_client = HTTPClient(
+                config=EMTAPIConfig(base_url=str(server.make_url("/"))),
+                session=session,
+                metrics=metrics,
+            )
+            await http_client.exchange("GET", "v1/test/")
+
+        assert metrics.response_size.sum(endpoint="v1/test/") == len(body)
+
+    @pytest.mark.asyncio
+    async def test_cache_hit_ratio(self) -> None:
+        """Test that cache lookups update the hit ratio."""
+        metrics = EMTMetrics()
+        upstream = FakeEMTRepository()
+        upstream.get_stop_info = AsyncMock(return_value=TestData().a_stop(stop_id=1))  # type: ignore[method-assign]
+        repository = CachingEMTRepository(upstream, metrics=metrics)  # type: ignore[arg-type]
+
+        for _ in range(4):
+            await repository.get_stop_info(1)
+
+        assert metrics.cache_requests.get(kind="stop_info", result="miss") == 1
+        assert metrics.cache_hit_ratio.get(kind="stop_info") == 0.75
@@ -0,0 +1,158 @@
+import asyncio
+from datetime import date, datetime, timedelta
+
+import pytest
+from aiohttp import ClientSession
+from aiohttp.test_utils import TestServer
+
+from emt_madrid.domain.exceptions import QuotaThrottledError
+from emt_madrid.domain.service_calendar import MADRID_TIMEZONE
+from emt_madrid.infrastructure.emt_api_client import Credentials, EMTAuthenticatedClient
+from emt_madrid.infrastructure.emt_api_config import EMTAPIConfig
+from emt_madrid.infrastructure.emt_api_repository import EMTAPIRepository
+from emt_madrid.infrastructure.http_client import HTTPClient
+from emt_madrid.infrastructure.quota_tracker import (
+    UNATTRIBUTED,
+    Priority,
+    QuotaTracker,
+    request_priority,
+)
+from emt_madrid.main import EMTClient
+from emt_madrid.simulator.network import SimulatedNetwork
+from emt_madrid.simulator.server import SimulatorConfig, create_simulator_app
+from tests.unit.test_data import FakeClock
+
+ACCOUNT = "test@example.com"
+DETAIL = "v1/transport/busemtmad/stops/{stop_id}/detail/"
+NOON = datetime(2025, 7, 16, 12, 0, tzinfo=MADRID_TIMEZONE)
+
+
+class TestQuotaTracker:
+    """Test cases for QuotaTracker class."""
+
+    def test_counts_per_endpoint_and_day(self) -> None:
+        """Test that requests are counted per endpoint and reset every day."""
+        clock = FakeClock(NOON)
+        tracker = QuotaTracker(daily_limit=100, now=clock)
+        tracker.record(ACCOUNT, DETAIL)
+        tracker.record(ACCOUNT, DETAIL)
+        tracker.record(ACCOUNT, "login")
+
+        clock.now += timedelta(days=1)
+        tracker.record(ACCOUNT, DETAIL)
+
+        assert tracker.usage(ACCOUNT, date(2025, 7, 16)) == {DETAIL: 2, "login": 1}
+        assert tracker.used(ACCOUNT) == 1
+        assert tracker.remaining(ACCOUNT) == 99
+
+    def test_sync_with_reported_usage(self) -> None:
+        """Test that the usage reported at login fills the unseen requests."""
+        tracker = QuotaTracker(now=FakeClock(NOON))
+        tracker.record(ACCOUNT, DETAIL)
+
+        tracker.observe_response(
+            ACCOUNT,
+            {"code": "01", "data": [{"apiCounter": {"current": 10, "dailyUse": 50}}]},
+        )
+
+        assert tracker.usage(ACCOUNT) == {DETAIL: 1, UNATTRIBUTED: 9}
+        assert tracker.remaining(ACCOUNT) == 40
+
+    def test_limit_exceeded_response(self) -> None:
+        """Test that an API limit exceeded code exhausts today's quota."""
+        tracker = QuotaTracker(daily_limit=100, now=FakeClock(NOON))
+
+        tracker.observe_response(ACCOUNT, {"code": "98", "data": []})
+
+        assert tracker.remaining(ACCOUNT) == 0
+
+    def test_forecast_exhaustion(self) -> None:
+        """Test that the exhaustion time is forecast from the recent rate."""
+        clock = FakeClock(NOON)
+        tracker = QuotaTracker(daily_limit=1000, now=clock)
+        for _ in range(10):
+            tracker.record(ACCOUNT, DETAIL, count=10)
+            clock.now += timedelta(minutes=1)
+
+        assert tracker.rate(ACCOUNT) == pytest.approx(100 / 600)
+        assert tracker.forecast_exhaustion(ACCOUNT) == clock.now + timedelta(
+            seconds=900 / (100 / 600)
+        )
+
+        clock.now += timedelta(hours=2)
+        assert tracker.forecast_exhaustion(ACCOUNT) is None
+
+    def test_throttles_low_priority_requests(self) -> None:
+        """Test that low-priority requests are held back to keep the reserve."""
+        tracker = QuotaTracker(daily_limit=100, reserve=0.2, now=FakeClock(NOON))
+        tracker.record(ACCOUNT, DETAIL, count=80)
+
+        tracker.acquire(ACCOUNT, DETAIL)
+        with request_priority(Priority.LOW), pytest.raises(QuotaThrottledError):
+            tracker.acquire(ACCOUNT, DETAIL)
+
+        assert tracker.used(ACCOUNT) == 81
+
+    def test_persistence(self, tmp_path) -> None:
+        """Test that the counters are saved and loaded again."""
+        path = tmp_path / "quota.json"
+        tracker = QuotaTracker(path=path, autosave_every=2, now=FakeClock(NOON))
+        tracker.record(ACCOUNT, DETAIL)
+        tracker.record(ACCOUNT, DETAIL)
+
+        reloaded = QuotaTracker(path=path, now=FakeClock(NOON))
+
+        assert reloaded.usage(ACCOUNT) == {DETAIL: 2}
+
+    @pytest.mark.asyncio
+    async def test_client_requests(self) -> None:
+        """Test that the client accounts its requests and honours the priority."""
+        tracker = QuotaTracker(daily_limit=3, reserve=0.5)
+        app = create_simulator_app(
+            SimulatorConfig(network=SimulatedNetwork(stops=3, lines=3))
+        )
+        async with TestServer(app) as server, ClientSession() as session:
+            emt_client = EMTClient(
+                email=ACCOUNT,
+                password="testpass",
+                stop_id=1,
+                session=session,
+                config=EMTAPIConfig(base_url=str(server.make_url("/"))),
+                quota=tracker,
+            )
+            await emt_client.get_stop_info()
+
+            async def crawl() -> None:
+                with request_priority(Priority.LOW):
+                    await asyncio.create_task(emt_client.get_arrivals())
+
+            with pytest.raises(QuotaThrottledError):
+                await crawl()
+            await emt_client.get_arrivals()
+
+        assert sum(tracker.usage(ACCOUNT).values()) == 3
+
+    @pytest.mark.asyncio
+    async def test_throttled_stop_info(self) -> None:
+        """Test that a throttled request is not reported as a missing stop."""
+        tracker = QuotaTracker(daily_limit=4, reserve=0.5)
+        app = create_simulator_app(
+            SimulatorConfig(network=SimulatedNetwork(stops=3, lines=3))
+        )
+        async with TestServer(app) as server, ClientSession() as session:
+            repository = EMTAPIRepository(
+                EMTAuthenticatedClient(
+                    HTTPClient(
+                        config=EMTAPIConfig(base_url=str(server.make_url("/"))),
+                        session=session,
+                    ),
+                    Credentials(ACCOUNT, "testpass"),
+                    quota=tracker,
+                )
+            )
+
+            await repository.get_stop_info(1)
+            with request_priority(Priority.LOW), pytest.raises(QuotaThrottledError):
+                await repository.get_stop_info(1)
+
+        assert sum(tracker.usage(ACCOUNT).values()) == 2
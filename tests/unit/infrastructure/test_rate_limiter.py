@@ -0,0 +1,36 @@
+import pytest
+
+from emt_madrid.infrastructure.rate_limiter import RateLimiter
+from tests.unit.test_data import FakeClock
+
+
+class TestRateLimiter:
+    """Test cases for RateLimiter class."""
+
+    def test_burst_then_refill(self) -> None:
+        """Test that tokens are consumed up to the burst and refilled over time."""
+        clock = FakeClock(0.0)
+        rate_limiter = RateLimiter(rate=2, burst=2, clock=clock)
+
+        assert rate_limiter.try_acquire()
+        assert rate_limiter.try_acquire()
+        assert not rate_limiter.try_acquire()
+
+        clock.now = 0.5
+        assert rate_limiter.try_acquire()
+        assert not rate_limiter.try_acquire()
+
+    def test_invalid_configuration(self) -> None:
+        """Test that a non-positive rate is rejected."""
+        with pytest.raises(ValueError):
+            RateLimiter(rate=0)
+
+    @pytest.mark.asyncio
+    async def test_acquire_waits_for_a_token(self) -> None:
+        """Test that acquire returns once a token has been refilled."""
+        rate_limiter = RateLimiter(rate=100)
+
+        await rate_limiter.acquire()
+        await rate_limiter.acquire()
+
+        assert not rate_limiter.try_acquire()
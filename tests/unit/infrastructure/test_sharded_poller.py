@@ -0,0 +1,163 @@
+import asyncio
+import multiprocessing
+import queue
+import time
+
+import pytest
+from aiohttp import ClientSession
+from aiohttp.test_utils import TestServer
+
+from emt_madrid.infrastructure.emt_api_client import Credentials
+from emt_madrid.infrastructure.emt_api_config import EMTAPIConfig
+from emt_madrid.infrastructure.http_client import HTTPClient
+from emt_madrid.infrastructure.sharded_poller import (
+    SharedRateLimiter,
+    SharedToken,
+    SharedTokenAuthenticatedClient,
+    ShardedPoller,
+)
+from emt_madrid.simulator.network import SimulatedNetwork
+from emt_madrid.simulator.server import STATE_KEY, SimulatorConfig, create_simulator_app
+from tests.unit.test_data import FakeClock, TestData
+
+NETWORK = SimulatedNetwork(stops=20, lines=10, seed=1)
+
+
+def take(limiter: SharedRateLimiter, results) -> None:
+    results.put(sum(limiter.try_acquire() for _ in range(10)))
+
+
+class TestSharedRateLimiter:
+    """Test cases for SharedRateLimiter class."""
+
+    def test_bucket_is_shared_by_processes(self) -> None:
+        """Test that the processes draw from a single bucket."""
+        context = multiprocessing.get_context("fork")
+        limiter = SharedRateLimiter(rate=0.001, burst=5, context=context)
+        results = context.Queue()
+
+        processes = [
+            context.Process(target=take, args=(limiter, results)) for _ in range(3)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+
+        assert sum(results.get() for _ in processes) == 5
+
+    def test_tokens_are_refilled(self) -> None:
+        """Test that the shared bucket refills at the configured rate."""
+        clock = FakeClock(0.0)
+        limiter = SharedRateLimiter(rate=2, burst=1, clock=clock)
+
+        assert limiter.try_acquire()
+        assert not limiter.try_acquire()
+        clock.now = 0.5
+        assert limiter.try_acquire()
+
+
+class TestSharedToken:
+    """Test cases for SharedToken class."""
+
+    def test_token_round_trip(self) -> None:
+        """Test that a stored token is read back with its expiration."""
+        shared_token = SharedToken()
+        assert shared_token.get() == (None, None)
+
+        shared_token.set("abc", None)
+
+        assert shared_token.get() == ("abc", None)
+
+    @pytest.mark.asyncio
+    async def test_login_lock_held_by_a_crashed_worker(self) -> None:
+        """Test that a worker logs in alone if the login lock is never released."""
+        shared_token = SharedToken()
+        shared_token.refresh_lock.acquire()
+        app = create_simulator_app(SimulatorConfig(network=NETWORK))
+        async with TestServer(app) as server, ClientSession() as session:
+            client = SharedTokenAuthenticatedClient(
+                HTTPClient(
+                    config=EMTAPIConfig(base_url=str(server.make_url("/"))),
+                    session=session,
+                ),
+                Credentials("test@example.com", "testpass"),
+                shared_token,
+                lock_timeout=0.1,
+            )
+
+            await client._authenticate()
+
+        assert client._token.token is not None
+        assert shared_token.get()[0] == client._token.token
+        assert len(app[STATE_KEY].tokens) == 1
+
+
+class TestShardedPoller:
+    """Test cases for ShardedPoller class, against the simulated EMT API."""
+
+    def test_stops_are_sharded_consistently(self) -> None:
+        """Test that every stop has a single worker, spread over all of them."""
+        poller = ShardedPoller("test@example.com", "testpass", [], workers=4)
+
+        shards = [poller.shard(stop_id) for stop_id in range(1, 1001)]
+
+        assert shards == [poller.shard(stop_id) for stop_id in range(1, 1001)]
+        assert all(shards.count(shard) > 150 for shard in range(4))
+
+    def test_late_results_of_removed_stops_are_ignored(self) -> None:
+        """Test that a removed stop is not put back by a result already sent."""
+        poller = ShardedPoller("test@example.com", "testpass", [], workers=2)
+        poller._results = queue.Queue()  # type: ignore
+        poller._commands = [queue.Queue(), queue.Queue()]  # type: ignore
+        stop = TestData().a_stop(stop_id=1)
+        poller._results.put((1, stop))
+        poller.collect(timeout=0)
+
+        poller.remove_stop(1)
+        poller._results.put((1, stop))
+        poller._results.put((1, "Stop not found"))
+
+        assert poller.collect(timeout=0) == []
+        assert poller.stops == {}
+        assert poller.errors == {}
+
+        poller.add_stop(1)
+        poller._results.put((1, stop))
+
+        assert poller.collect(timeout=0) == [stop]
+        assert poller.stops == {1: stop}
+
+    @pytest.mark.asyncio
+    async def test_workers_poll_their_shards_with_one_login(self) -> None:
+        """Test that the workers poll every stop and log in only once."""
+        app = create_simulator_app(SimulatorConfig(network=NETWORK))
+        async with TestServer(app) as server:
+
+            def run() -> ShardedPoller:
+                with ShardedPoller(
+                    "test@example.com",
+                    "testpass",
+                    [1, 2, 3, 4, 5, 6, 999],
+                    workers=2,
+                    rate=100,
+                    burst=10,
+                    config=EMTAPIConfig(base_url=str(server.make_url("/"))),
+                ) as poller:
+                    deadline = time.monotonic() + 30
+                    while (
+                        len(poller.stops) < 6 or not poller.errors
+                    ) and time.monotonic() < deadline:
+                        poller.collect(timeout=1)
+                return poller
+
+            poller = await asyncio.to_thread(run)
+
+        assert set(poller.stops) == {1, 2, 3, 4, 5, 6}
+        assert set(poller.errors) == {999}
+        assert all(
+            line.arrival is not None
+            for stop in poller.stops.values()
+            for line in stop.stop_lines
+        )
+        assert len(app[STATE_KEY].tokens) == 1
@@ -0,0 +1,166 @@
+import json
+from datetime import datetime
+
+import pytest
+
+from emt_madrid.infrastructure.http_client import HTTPClient
+from emt_madrid.infrastructure.transport import (
+    CassetteMissError,
+    RecordingTransport,
+    ReplayTransport,
+    Transport,
+)
+from tests.unit.infrastructure.fixtures.test_autenticate_fixture import (
+    LOGIN_EXPIRED_TOKEN_RESPONSE,
+    TOKEN,
+)
+from tests.unit.infrastructure.fixtures.test_get_arrivals_fixture import (
+    STOP_GET_ARRIVALS_OK_RESPONSE,
+)
+
+
+class FakeConfig:
+    """Fake configuration for testing HTTP client."""
+
+    BASE_URL = "https://http.codes/"
+
+
+class FakeTransport(Transport):
+    """Fake transport returning a fixed sequence of responses."""
+
+    def __init__(self, *responses: dict) -> None:
+        self._responses = list(responses)
+        self.requests: list[tuple] = []
+
+    async def send(self, method, url, params=None, data=None, headers=None) -> dict:
+        self.requests.append((method, url, params, data, headers))
+        return self._responses.pop(0)
+
+
+async def record(path, *responses: dict) -> HTTPClient:
+    transport = RecordingTransport(FakeTransport(*responses), path)
+    http_client = HTTPClient(
+        config=FakeConfig(),  # type: ignore
+        transport=transport,
+    )
+    for _ in responses:
+        await http_client.exchange("POST", "v2/arrives/", data={"stopId": "72"})
+    await transport.close()
+    return http_client
+
+
+class TestRecordingTransport:
+    """Test cases for RecordingTransport class."""
+
+    @pytest.mark.asyncio
+    async def test_record_appends_one_line_per_exchange(self, tmp_path) -> None:
+        """Test that each exchange is written as a compact JSON line."""
+        cassette = tmp_path / "cassette.jsonl"
+
+        await record(cassette, {"code": "00"}, {"code": "80"})
+
+        lines = cassette.read_text().splitlines()
+        assert len(lines) == 2
+        assert json.loads(lines[1])["response"] == {"code": "80"}
+
+    @pytest.mark.asyncio
+    async def test_record_buffers_exchanges(self, tmp_path) -> None:
+        """Test that exchanges are written once the buffer is full or on close."""
+        cassette = tmp_path / "cassette.jsonl"
+        transport = RecordingTransport(
+            FakeTransport({"code": "00"}, {"code": "01"}, {"code": "02"}),
+            cassette,
+            buffer_size=2,
+        )
+
+        await transport.send("POST", "https://http.codes/v2/arrives/", data={})
+        assert not cassette.exists()
+        await transport.send("POST", "https://http.codes/v2/arrives/", data={})
+        assert len(cassette.read_text().splitlines()) == 2
+        await transport.send("POST", "https://http.codes/v2/arrives/", data={})
+        await transport.close()
+
+        lines = cassette.read_text().splitlines()
+        assert [json.loads(line)["response"]["code"] for line in lines] == [
+            "00",
+            "01",
+            "02",
+        ]
+
+    @pytest.mark.asyncio
+    async def test_record_redacts_credentials(self, tmp_path) -> None:
+        """Test that tokens and personal fields are not written to the cassette."""
+        cassette = tmp_path / "cassette.jsonl"
+
+        await record(cassette, LOGIN_EXPIRED_TOKEN_RESPONSE)
+
+        content = cassette.read_text()
+        assert TOKEN not in content
+        assert "username@mail.com" not in content
+
+
+class TestReplayTransport:
+    """Test cases for ReplayTransport class."""
+
+    @pytest.mark.asyncio
+    async def test_replay_returns_recorded_responses_in_order(self, tmp_path) -> None:
+        """Test that the responses of a request are replayed in order."""
+        cassette = tmp_path / "cassette.jsonl"
+        await record(cassette, STOP_GET_ARRIVALS_OK_RESPONSE, {"code": "80"})
+        http_client = HTTPClient(
+            config=FakeConfig(),  # type: ignore
+            transport=ReplayTransport(cassette),
+        )
+
+        first = await http_client.exchange("POST", "v2/arrives/", data={"stopId": "72"})
+        second = await http_client.exchange(
+            "POST", "v2/arrives/", data={"stopId": "72"}
+        )
+
+        assert first == STOP_GET_ARRIVALS_OK_RESPONSE
+        assert second == {"code": "80"}
+        with pytest.raises(CassetteMissError):
+            await http_client.exchange("POST", "v2/arrives/", data={"stopId": "72"})
+
+    @pytest.mark.asyncio
+    async def test_replay_unknown_request(self, tmp_path) -> None:
+        """Test that a request that was never recorded is rejected."""
+        cassette = tmp_path / "cassette.jsonl"
+        await record(cassette, {"code": "00"})
+        transport = ReplayTransport(cassette)
+
+        with pytest.raises(CassetteMissError):
+            await transport.send("POST", "https://http.codes/v2/arrives/", data={})
+
+    @pytest.mark.asyncio
+    async def test_replay_loop(self, tmp_path) -> None:
+        """Test that looping replays the recorded responses again."""
+        cassette = tmp_path / "cassette.jsonl"
+        await record(cassette, {"code": "00"})
+        transport = ReplayTransport(cassette, loop=True)
+
+        for _ in range(3):
+            response = await transport.send(
+                "POST", "https://http.codes/v2/arrives/", data={"stopId": "72"}
+            )
+            assert response == {"code": "00"}
+
+    @pytest.mark.asyncio
+    async def test_replay_shifts_dates(self, tmp_path) -> None:
+        """Test that recorded expiration dates are moved to the replay time."""
+        cassette = tmp_path / "cassette.jsonl"
+        await record(cassette, LOGIN_EXPIRED_TOKEN_RESPONSE)
+        interaction = json.loads(cassette.read_text())
+        interaction["recorded_at"] -= 60 * 60 * 1000
+        cassette.write_text(json.dumps(interaction))
+
+        response = await ReplayTransport(cassette).send(
+            "POST", "https://http.codes/v2/arrives/", data={"stopId": "72"}
+        )
+
+        expiration = response["data"][0]["tokenDteExpiration"]["$date"]
+        recorded = LOGIN_EXPIRED_TOKEN_RESPONSE["data"][0]["tokenDteExpiration"][
+            "$date"
+        ]
+        assert expiration - recorded >= 60 * 60 * 1000
+        assert datetime.fromtimestamp(expiration / 1000).year >= 2025
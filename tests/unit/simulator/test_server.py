@@ -0,0 +1,177 @@
+import pytest
+from aiohttp import ClientSession
+from aiohttp.test_utils import TestServer
+
+from emt_madrid.domain.hooks import ClientHooks
+from emt_madrid.domain.exceptions import AuthenticationError, StopNotFoundError
+from emt_madrid.infrastructure.emt_api_config import EMTAPIConfig
+from emt_madrid.main import EMTClient
+from emt_madrid.simulator.network import SimulatedNetwork
+from emt_madrid.simulator.server import (
+    LatencyModel,
+    SimulatorConfig,
+    create_simulator_app,
+)
+
+NETWORK = SimulatedNetwork(stops=20, lines=10, seed=1)
+
+
+async def a_client(server: TestServer, session: ClientSession, **kwargs) -> EMTClient:
+    return EMTClient(
+        email=kwargs.pop("email", "test@example.com"),
+        password=kwargs.pop("password", "testpass"),
+        stop_id=kwargs.pop("stop_id", 1),
+        session=session,
+        config=EMTAPIConfig(base_url=str(server.make_url("/"))),
+        **kwargs,
+    )
+
+
+class TestSimulator:
+    """Test cases for the simulated EMT API, exercised through EMTClient."""
+
+    @pytest.mark.asyncio
+    async def test_get_arrivals(self) -> None:
+        """Test that the client reads stops and arrivals from the simulator."""
+        app = create_simulator_app(SimulatorConfig(network=NETWORK))
+        async with TestServer(app) as server, ClientSession() as session:
+            emt_client = await a_client(server, session)
+            stop = await emt_client.get_arrivals()
+
+        expected_lines = {line.label for line, _ in NETWORK.stops[1].lines}
+        assert stop.stop_name == "Stop 1"
+        assert {line.line_number for line in stop.stop_lines} == expected_lines
+        assert all(line.arrival is not None for line in stop.stop_lines)
+
+    @pytest.mark.asyncio
+    async def test_unknown_stop(self) -> None:
+        """Test that an unknown stop is reported as not found."""
+        app = create_simulator_app(SimulatorConfig(network=NETWORK))
+        async with TestServer(app) as server, ClientSession() as session:
+            emt_client = await a_client(server, session, stop_id=999)
+            with pytest.raises(StopNotFoundError):
+                await emt_client.get_stop_info()
+
+    @pytest.mark.asyncio
+    async def test_invalid_password(self) -> None:
+        """Test that configured accounts are validated."""
+        config = SimulatorConfig(network=NETWORK, accounts={"test@example.com": "ok"})
+        async with (
+            TestServer(create_simulator_app(config)) as server,
+            ClientSession() as session,
+        ):
+            emt_client = await a_client(server, session, password="wrong")
+            with pytest.raises(AuthenticationError):
+                await emt_client.get_stop_info()
+
+    @pytest.mark.asyncio
+    async def test_daily_limit(self) -> None:
+        """Test that hits beyond the daily limit are rejected with code 98."""
+        config = SimulatorConfig(network=NETWORK, daily_limit=2)
+        async with (
+            TestServer(create_simulator_app(config)) as server,
+            ClientSession() as session,
+        ):
+            emt_client = await a_client(server, session)
+            await emt_client.get_stop_info()
+            with pytest.raises(StopNotFoundError, match="98"):
+                await emt_client.get_stop_info()
+
+    @pytest.mark.asyncio
+    async def test_hooks(self) -> None:
+        """Test that the client lifecycle is reported to the hooks."""
+        network = SimulatedNetwork(stops=3, lines=3, detail_not_available_ratio=1.0)
+        hooks = ClientHooks()
+        events: list[tuple] = []
+        hooks.register(
+            "before_request", lambda request: events.append(("request", request.method))
+        )
+        hooks.register(
+            "on_auth",
+            lambda reason, success, duration: events.append(("auth", reason, success)),
+        )
+        hooks.register(
+            "on_retry", lambda endpoint, reason: events.append(("retry", reason))
+        )
+        hooks.register(
+            "on_cache_hit", lambda kind, stop_id: events.append(("cache", kind))
+        )
+        app = create_simulator_app(SimulatorConfig(network=network))
+        async with TestServer(app) as server, ClientSession() as session:
+            emt_client = await a_client(server, session, hooks=hooks, max_staleness=60)
+            await emt_client.get_arrivals()
+            await emt_client.get_arrivals()
+
+        assert events == [
+            ("request", "GET"),
+            ("auth", "missing", True),
+            ("request", "GET"),
+            ("retry", "detail_not_available"),
+            ("request", "GET"),
+            ("request", "POST"),
+            ("cache", "extrapolated_arrivals"),
+        ]
+
+
+class TestSimulatedNetwork:
+    """Test cases for SimulatedNetwork class."""
+
+    def test_arrivals_count_down(self) -> None:
+        """Test that arrival estimates decrease as time goes by."""
+        stop = NETWORK.stops[1]
+
+        before = NETWORK.arrivals(stop, now=1000.0)
+        after = NETWORK.arrivals(stop, now=1030.0)
+
+        assert [a["bus"] for a in before] == [a["bus"] for a in after]
+        for first, second in zip(before, after):
+            assert first["estimateArrive"] - second["estimateArrive"] in (29, 30, 31)
+
+
+class TestLatencyModel:
+    """Test cases for LatencyModel class."""
+
+    def test_parse(self) -> None:
+        """Test parsing latency models from the command line."""
+        assert LatencyModel.parse("uniform:0.1:0.2") == LatencyModel(
+            "uniform", 0.1, 0.2
+        )
+        with pytest.raises(ValueError):
+            LatencyModel.parse("gaussian:1")
+
+    @pytest.mark.asyncio
+    async def test_get_all_stops(self) -> None:
+        """Test that the whole network is loaded from the bulk endpoints."""
+        app = create_simulator_app(SimulatorConfig(network=NETWORK))
+        async with TestServer(app) as server, ClientSession() as session:
+            emt_client = await a_client(server, session)
+            stops = await emt_client.get_all_stops()
+
+        assert [stop.stop_id for stop in stops] == list(NETWORK.stops)
+        detail = {
+            (line.label, line.header_a if direction == "B" else line.header_b)
+            for line, direction in NETWORK.stops[1].lines
+        }
+        assert {(line.line_number, line.origin) for line in stops[0].stop_lines} == (
+            detail
+        )
+
+    @pytest.mark.asyncio
+    async def test_get_line_arrivals(self) -> None:
+        """Test that the arrivals of a line are retrieved along its route."""
+        line, direction = NETWORK.stops[1].lines[0]
+        app = create_simulator_app(SimulatorConfig(network=NETWORK))
+        async with TestServer(app) as server, ClientSession() as session:
+            emt_client = await a_client(server, session)
+            timeline = await emt_client.get_line_arrivals(
+                line.label, 1 if direction == "B" else 2, max_concurrency=2
+            )
+
+        route = [
+            stop.stop_id
+            for stop in NETWORK.stops.values()
+            if (line, direction) in stop.lines
+        ]
+        assert timeline.line_number == line.label
+        assert [entry.stop.stop_id for entry in timeline.entries] == route
+        assert all(entry.arrival is not None for entry in timeline.entries)
@@ -1,6 +1,20 @@
+from typing import Generic, TypeVar
+
 from emt_madrid.domain.line import Line
 from emt_madrid.domain.stop import Stop
 
+T = TypeVar("T")
+
+
+class FakeClock(Generic[T]):
+    """Fake clock returning a settable time, e.g. monotonic seconds or a datetime."""
+
+    def __init__(self, now: T) -> None:
+        self.now: T = now
+
+    def __call__(self) -> T:
+        return self.now
+
 
 class TestData:
     @staticmethod
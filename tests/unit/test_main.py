@@ -75,3 +75,37 @@ class TestEMTClient:
 
             assert not hasattr(emt_client.get_stop_info, "assert_awaited")
             assert result == TestData().a_stop()
+
+    @pytest.mark.asyncio
+    async def test_get_arrivals_extrapolates_until_stale(self, mock_session):
+        """Test that arrivals are extrapolated locally while they are fresh."""
+        emt_client = EMTClient(
+            email="test@example.com",
+            password="testpass",
+            stop_id=123,
+            session=mock_session,
+            max_staleness=60,
+        )
+        stop = TestData().a_stop(line_numbers=["1"])
+        stop.stop_lines[0].arrival = 5
+        emt_client._stop = stop
+
+        mock_use_case = AsyncMock(spec=GetArrivals)
+        mock_use_case.execute.return_value = stop
+
+        with patch("emt_madrid.main.GetArrivals", return_value=mock_use_case):
+            await emt_client.get_arrivals()
+            result = await emt_client.get_arrivals()
+
+            mock_use_case.execute.assert_awaited_once()
+            assert result.stop_lines[0].arrival == 5
+
+    def test_watch_shares_one_monitor(self, emt_client):
+        """Test that every watch call reuses the same arrivals monitor."""
+        with patch("emt_madrid.main.ArrivalsMonitor") as mock_monitor:
+            emt_client.watch()
+            emt_client.watch(stop_ids=[456], lines=["3"])
+
+            mock_monitor.assert_called_once_with(emt_client._repository)
+            mock_monitor.return_value.watch.assert_any_call([123], ["1", "2"])
+            mock_monitor.return_value.watch.assert_any_call([456], ["3"])
@@ -0,0 +1,89 @@
+"""Unit tests for the sync_client module."""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from aiohttp.test_utils import TestServer
+
+from emt_madrid.domain.exceptions import StopNotFoundError
+from emt_madrid.infrastructure.emt_api_config import EMTAPIConfig
+from emt_madrid.simulator.network import SimulatedNetwork
+from emt_madrid.simulator.server import STATE_KEY, SimulatorConfig, create_simulator_app
+from emt_madrid.sync_client import SyncEMTClient
+
+NETWORK = SimulatedNetwork(stops=20, lines=10, seed=1)
+
+
+def a_client(server: TestServer) -> SyncEMTClient:
+    return SyncEMTClient(
+        email="test@example.com",
+        password="testpass",
+        config=EMTAPIConfig(base_url=str(server.make_url("/"))),
+    )
+
+
+class TestSyncEMTClient:
+    """Test cases for the SyncEMTClient class, against the simulated EMT API."""
+
+    @pytest.mark.asyncio
+    async def test_calls_from_many_threads_share_one_login(self) -> None:
+        """Test that concurrent calls from several threads reuse the token and cache."""
+        app = create_simulator_app(SimulatorConfig(network=NETWORK))
+        async with TestServer(app) as server:
+
+            def run() -> list:
+                with (
+                    a_client(server) as client,
+                    ThreadPoolExecutor(max_workers=8) as executor,
+                ):
+                    return list(
+                        executor.map(client.get_arrivals, [1, 2, 3, 1, 2, 3] * 4)
+                    )
+
+            stops = await asyncio.to_thread(run)
+
+        assert [stop.stop_id for stop in stops] == [1, 2, 3, 1, 2, 3] * 4
+        assert all(line.arrival is not None for line in stops[0].stop_lines)
+        assert stops[0] is not stops[3]
+        assert stops[0].stop_lines[0] is not stops[3].stop_lines[0]
+        assert len(app[STATE_KEY].tokens) == 1
+
+    @pytest.mark.asyncio
+    async def test_submit_returns_futures(self) -> None:
+        """Test that submitted calls resolve futures and propagate errors."""
+        line_number = NETWORK.stops[1].lines[0][0].label
+        app = create_simulator_app(SimulatorConfig(network=NETWORK))
+        async with TestServer(app) as server:
+
+            def run() -> tuple:
+                with a_client(server) as client:
+                    stop = client.submit_stop_info(1, lines=[line_number])
+                    missing = client.submit_stop_info(999)
+                    return stop.result(), missing.exception()
+
+            stop, error = await asyncio.to_thread(run)
+
+        assert {line.line_number for line in stop.stop_lines} == {line_number}
+        assert isinstance(error, StopNotFoundError)
+
+    def test_closed_client_refuses_calls(self) -> None:
+        """Test that a closed client stops its thread and refuses new calls."""
+        client = SyncEMTClient(email="test@example.com", password="testpass")
+
+        client.close()
+
+        assert not client._thread.is_alive()
+        with pytest.raises(RuntimeError):
+            client.submit_arrivals(1)
+
+    def test_close_cancels_calls_after_the_timeout(self) -> None:
+        """Test that calls still running after the close timeout are cancelled."""
+        client = SyncEMTClient(email="test@example.com", password="testpass")
+        future = client.submit(lambda repository: asyncio.sleep(60))
+
+        client.close(timeout=0.1)
+
+        assert future.cancelled()
+        assert not client._thread.is_alive()
+        assert client._loop.is_closed()
@@ -1,6 +1,8 @@
 class FakeEMTRepository:
     """Fake repository for testing purposes."""
 
-    async def get_stop_info(self, stop_id): ...
+    async def get_stop_info(self, stop_id, lines=None): ...
     async def get_arrivals(self, stop_id): ...
     async def get_nearby_stops(self, lat, lon, radius): ...
+    async def get_line_stops(self, line_id, direction): ...
+    async def get_all_stops(self): ...
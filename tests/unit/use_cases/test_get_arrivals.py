@@ -1,8 +1,17 @@
+from datetime import datetime, time, timedelta
 from unittest.mock import AsyncMock
 
 import pytest
 
+from emt_madrid.domain.arrival_estimator import ArrivalEstimator
+from emt_madrid.domain.exceptions import APILimitExceededError, ArrivalsNotFoundError
+from emt_madrid.domain.hooks import ClientHooks
+from emt_madrid.domain.service_calendar import ServiceCalendar
+from emt_madrid.infrastructure.emt_api_repository import EMTAPIRepository
 from emt_madrid.use_cases.get_arrivals import GetArrivals
+from tests.unit.infrastructure.fixtures.test_get_arrivals_fixture import (
+    STOP_GET_ARRIVALS_API_LIMIT_EXCEEDED_RESPONSE,
+)
 from tests.unit.test_data import TestData
 from tests.unit.use_cases.test_fixtures import FakeEMTRepository
 
@@ -39,3 +48,87 @@ class TestGetArrivals:
 
         with pytest.raises(ValueError, match=error_message):
             await get_arrivals.execute()
+
+    @pytest.mark.asyncio
+    async def test_get_arrivals_skips_stops_out_of_service(self) -> None:
+        """Test that no request is made when no line of the stop is running."""
+        stop = TestData().a_stop(stop_id=123, line_numbers=["1"])
+        stop.stop_lines[0].start_time = time(0, 0)
+        stop.stop_lines[0].end_time = time(0, 0)
+        stop.stop_lines[0].arrival = 5
+
+        emt_repository = FakeEMTRepository()
+        mock_get_arrivals = AsyncMock(return_value=stop)
+        emt_repository.get_arrivals = mock_get_arrivals  # type: ignore[method-assign]
+        service_calendar = ServiceCalendar(grace=timedelta(0))
+        service_calendar.now = lambda: datetime(2025, 7, 16, 3, 0)  # type: ignore[method-assign]
+
+        hooks = ClientHooks()
+        skipped = []
+        hooks.register("on_cache_hit", lambda kind, stop_id: skipped.append(kind))
+
+        get_arrivals = GetArrivals(emt_repository, stop, service_calendar, hooks)  # type: ignore
+        result = await get_arrivals.execute()
+
+        mock_get_arrivals.assert_not_called()
+        assert result.stop_lines[0].arrival is None
+        assert skipped == ["out_of_service"]
+
+    @pytest.mark.asyncio
+    async def test_get_arrivals_falls_back_to_estimates(self) -> None:
+        """Test that upstream failures are answered with flagged estimates."""
+        stop = TestData().a_stop(stop_id=123, line_numbers=["1"])
+        stop.stop_lines[0].min_frequency = 10
+        stop.stop_lines[0].max_frequency = 10
+        emt_repository = FakeEMTRepository()
+        error = ArrivalsNotFoundError(123, "API limit exceeded")
+        error.__cause__ = APILimitExceededError()
+        emt_repository.get_arrivals = AsyncMock(side_effect=error)  # type: ignore[method-assign]
+
+        get_arrivals = GetArrivals(emt_repository, stop, fallback=ArrivalEstimator())  # type: ignore
+        result = await get_arrivals.execute()
+
+        assert result.stop_lines[0].arrival == 5
+        assert result.stop_lines[0].is_estimate
+
+    @pytest.mark.asyncio
+    async def test_get_arrivals_exhausted_quota_falls_back_to_estimates(
+        self,
+    ) -> None:
+        """Test that an exhausted arrivals quota is answered with estimates."""
+        stop = TestData().a_stop(stop_id=123, line_numbers=["1"])
+        stop.stop_lines[0].min_frequency = 10
+        stop.stop_lines[0].max_frequency = 10
+        emt_authenticated_client = AsyncMock()
+        emt_authenticated_client.exchange.return_value = (
+            STOP_GET_ARRIVALS_API_LIMIT_EXCEEDED_RESPONSE
+        )
+        hooks = ClientHooks()
+        served = []
+        hooks.register("on_cache_hit", lambda kind, stop_id: served.append(kind))
+
+        get_arrivals = GetArrivals(
+            EMTAPIRepository(emt_authenticated_client),
+            stop,
+            hooks=hooks,
+            fallback=ArrivalEstimator(),
+        )
+        result = await get_arrivals.execute()
+
+        assert result.stop_lines[0].arrival == 5
+        assert result.stop_lines[0].is_estimate
+        assert served == ["fallback"]
+
+    @pytest.mark.asyncio
+    async def test_get_arrivals_no_buses_is_not_estimated(self) -> None:
+        """Test that a stop with no bus coming is not answered with estimates."""
+        stop = TestData().a_stop(stop_id=123, line_numbers=["1"])
+        emt_repository = FakeEMTRepository()
+        error = ArrivalsNotFoundError(123)
+        error.__cause__ = ArrivalsNotFoundError(123)
+        emt_repository.get_arrivals = AsyncMock(side_effect=error)  # type: ignore[method-assign]
+
+        get_arrivals = GetArrivals(emt_repository, stop, fallback=ArrivalEstimator())  # type: ignore
+
+        with pytest.raises(ArrivalsNotFoundError):
+            await get_arrivals.execute()
@@ -0,0 +1,96 @@
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+
+from emt_madrid.domain.exceptions import APIResponseError, LineNotFoundError
+from emt_madrid.use_cases.get_line_arrivals import GetLineArrivals
+from tests.unit.test_data import TestData
+from tests.unit.use_cases.test_fixtures import FakeEMTRepository
+
+
+def a_route(stop_ids):
+    return [
+        TestData().a_stop(stop_id=stop_id, line_numbers=["27"]) for stop_id in stop_ids
+    ]
+
+
+class TestGetLineArrivals:
+    """Test cases for GetLineArrivals use case."""
+
+    @pytest.mark.asyncio
+    async def test_timeline_in_route_order(self) -> None:
+        """Test that the arrivals of every stop are merged in route order."""
+        emt_repository = FakeEMTRepository()
+        emt_repository.get_line_stops = AsyncMock(return_value=a_route([3, 1, 2]))  # type: ignore[method-assign]
+
+        async def get_arrivals(stop):
+            stop.stop_lines[0].arrival = stop.stop_id * 2
+            stop.stop_lines[0].next_arrival = stop.stop_id * 2 + 10
+            return stop
+
+        emt_repository.get_arrivals = get_arrivals  # type: ignore[method-assign]
+
+        timeline = await GetLineArrivals(emt_repository, "27", 2).execute()  # type: ignore
+
+        emt_repository.get_line_stops.assert_awaited_once_with("27", 2)
+        assert timeline.line_number == "27"
+        assert timeline.direction == 2
+        assert [entry.stop.stop_id for entry in timeline.entries] == [3, 1, 2]
+        assert [entry.arrival for entry in timeline.entries] == [6, 2, 4]
+        assert [entry.stop.stop_id for entry in timeline.upcoming(2)] == [1, 2]
+
+    @pytest.mark.asyncio
+    async def test_fan_out_is_bounded(self) -> None:
+        """Test that at most max_concurrency arrivals requests are in flight."""
+        emt_repository = FakeEMTRepository()
+        emt_repository.get_line_stops = AsyncMock(return_value=a_route(range(1, 11)))  # type: ignore[method-assign]
+        in_flight = peak = 0
+
+        async def get_arrivals(stop):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return stop
+
+        emt_repository.get_arrivals = get_arrivals  # type: ignore[method-assign]
+
+        timeline = await GetLineArrivals(
+            emt_repository,  # type: ignore
+            "27",
+            max_concurrency=3,
+        ).execute()
+
+        assert len(timeline.entries) == 10
+        assert peak == 3
+
+    @pytest.mark.asyncio
+    async def test_failed_stops_are_kept(self) -> None:
+        """Test that a failing stop does not fail the whole timeline."""
+        emt_repository = FakeEMTRepository()
+        emt_repository.get_line_stops = AsyncMock(return_value=a_route([1, 2]))  # type: ignore[method-assign]
+
+        async def get_arrivals(stop):
+            if stop.stop_id == 2:
+                raise APIResponseError("Upstream failure")
+            stop.stop_lines[0].arrival = 3
+            return stop
+
+        emt_repository.get_arrivals = get_arrivals  # type: ignore[method-assign]
+
+        timeline = await GetLineArrivals(emt_repository, "27").execute()  # type: ignore
+
+        assert timeline.entries[0].arrival == 3
+        assert timeline.entries[1].error == "Upstream failure"
+        assert timeline.failed_stop_ids == [2]
+
+    @pytest.mark.asyncio
+    async def test_line_not_found(self) -> None:
+        """Test that an unknown line is reported."""
+        emt_repository = FakeEMTRepository()
+        emt_repository.get_line_stops = AsyncMock(side_effect=LineNotFoundError("999"))  # type: ignore[method-assign]
+
+        with pytest.raises(LineNotFoundError):
+            await GetLineArrivals(emt_repository, "999").execute()  # type: ignore
@@ -46,6 +46,7 @@ class TestGetStopInfo:
         assert stop.stop_address == "Test Address"
         assert stop.stop_coordinates == [0, 0]
         assert stop.stop_lines == expected_stop.stop_lines
+        emt_repository.get_stop_info.assert_called_once_with(stop_id, lines=lines)
 
     @pytest.mark.asyncio
     async def test_raise_error_when_lines_not_available_at_stop(self) -> None: